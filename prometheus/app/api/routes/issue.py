@@ -1,13 +1,14 @@
 import asyncio
+from typing import AsyncIterator, Sequence
 
 from fastapi import APIRouter, Request
+from fastapi.responses import StreamingResponse
 
 from prometheus.app.decorators.require_login import requireLogin
 from prometheus.app.models.requests.issue import IssueRequest
-from prometheus.app.models.response.issue import IssueResponse
+from prometheus.app.models.response.issue import IssueJobResponse
 from prometheus.app.models.response.response import Response
-from prometheus.app.services.issue_service import IssueService
-from prometheus.app.services.knowledge_graph_service import KnowledgeGraphService
+from prometheus.app.services.issue_job_service import RESUMABLE_JOB_STATUSES, IssueJobService
 from prometheus.app.services.repository_service import RepositoryService
 from prometheus.app.services.user_service import UserService
 from prometheus.configuration.config import settings
@@ -15,24 +16,36 @@ from prometheus.exceptions.server_exception import ServerException
 
 router = APIRouter()
 
+# Seconds to wait for new events before sending a keep-alive comment to the client
+STREAM_KEEP_ALIVE_INTERVAL = 15
+
+
+def get_accessible_job(issue_job_service: IssueJobService, job_id: int, request: Request):
+    """Retrieve a job, ensuring that it exists and that the user has access to it."""
+    job = issue_job_service.get_job_by_id(job_id)
+    # Check if the job exists
+    if not job:
+        raise ServerException(code=404, message="Job not found")
+    # Check if the user has access to the job
+    if settings.ENABLE_AUTHENTICATION and job.user_id != request.state.user_id:
+        raise ServerException(code=403, message="You do not have access to this job")
+    return job
+
 
 @router.post(
     "/answer/",
-    summary="Process and generate a response for an issue",
-    description="Analyzes an issue, generates patches if needed, runs optional builds and tests, and can push changes "
-    "to a remote branch.",
-    response_description="Returns the patch, test results, and issue response",
-    response_model=Response[IssueResponse],
+    summary="Submit an issue to be processed and answered",
+    description="Queues a job that analyzes an issue, generates patches if needed, runs optional builds and "
+    "tests. Poll the job with /issue/job/ to get its progress and results.",
+    response_description="Returns the submitted job",
+    response_model=Response[IssueJobResponse],
 )
 @requireLogin
-async def answer_issue(issue: IssueRequest, request: Request) -> Response[IssueResponse]:
+async def answer_issue(issue: IssueRequest, request: Request) -> Response[IssueJobResponse]:
     # Retrieve necessary services from the application state
     repository_service: RepositoryService = request.app.state.service["repository_service"]
     user_service: UserService = request.app.state.service["user_service"]
-    issue_service: IssueService = request.app.state.service["issue_service"]
-    knowledge_graph_service: KnowledgeGraphService = request.app.state.service[
-        "knowledge_graph_service"
-    ]
+    issue_job_service: IssueJobService = request.app.state.service["issue_job_service"]
 
     # Fetch the repository by ID
     repository = repository_service.get_repository_by_id(issue.repository_id)
@@ -44,7 +57,6 @@ async def answer_issue(issue: IssueRequest, request: Request) -> Response[IssueR
         raise ServerException(code=403, message="You do not have access to this repository")
 
     # Check issue credit
-    user_issue_credit = None
     if settings.ENABLE_AUTHENTICATION:
         user_issue_credit = user_service.get_issue_credit(request.state.user_id)
         if user_issue_credit <= 0:
@@ -60,80 +72,122 @@ async def answer_issue(issue: IssueRequest, request: Request) -> Response[IssueR
                 code=400,
                 message="workdir must be provided for user defined environment",
             )
-    # Ensure the repository is not currently being used
-    if repository.is_working:
-        raise ServerException(
-            code=400,
-            message="The repository is currently being used. Please try again later.",
-        )
-
-    # Load the git repository and knowledge graph
-    git_repository = repository_service.get_repository(repository.playground_path)
-    knowledge_graph = knowledge_graph_service.get_knowledge_graph(
-        repository.kg_root_node_id,
-        repository.kg_max_ast_depth,
-        repository.kg_chunk_size,
-        repository.kg_chunk_overlap,
+
+    # Queue the issue, it is processed by the workers of the job service. Every job works in a
+    # worktree of its own, so several issues of the same repository can run at the same time.
+    job = issue_job_service.submit_job(
+        issue, request.state.user_id if settings.ENABLE_AUTHENTICATION else None
     )
+    return Response(data=IssueJobResponse.from_job(job))
+
+
+@router.get(
+    "/job/",
+    summary="Get the status and results of an issue job",
+    description="Returns the status and progress of a job submitted with /issue/answer/, and the patch, "
+    "test results, and issue response once it succeeded.",
+    response_description="Returns the job",
+    response_model=Response[IssueJobResponse],
+)
+@requireLogin
+def get_job(job_id: int, request: Request) -> Response[IssueJobResponse]:
+    issue_job_service: IssueJobService = request.app.state.service["issue_job_service"]
+    job = get_accessible_job(issue_job_service, job_id, request)
+    return Response(data=IssueJobResponse.from_job(job))
+
+
+@router.get(
+    "/job/stream/",
+    summary="Stream the progress and partial results of an issue job",
+    description="Streams the events of a job as server-sent events: node transitions, retrieved context, "
+    "candidate patches and test results, as they happen. The stream ends with a 'job' event that holds the "
+    "final state of the job, as returned by /issue/job/.",
+    response_description="Returns a text/event-stream of the job events",
+)
+@requireLogin
+async def stream_job(job_id: int, request: Request) -> StreamingResponse:
+    issue_job_service: IssueJobService = request.app.state.service["issue_job_service"]
+    get_accessible_job(issue_job_service, job_id, request)
 
-    # Process the issue in a separate thread to avoid blocking the event loop
-    (
-        patch,
-        passed_reproducing_test,
-        passed_build,
-        passed_regression_test,
-        passed_existing_test,
-        issue_response,
-        issue_type,
-    ) = await asyncio.to_thread(
-        issue_service.answer_issue,
-        repository_id=repository.id,
-        repository=git_repository,
-        knowledge_graph=knowledge_graph,
-        issue_title=issue.issue_title,
-        issue_body=issue.issue_body,
-        issue_comments=issue.issue_comments if issue.issue_comments else [],
-        issue_type=issue.issue_type,
-        run_build=issue.run_build,
-        run_existing_test=issue.run_existing_test,
-        run_regression_test=issue.run_regression_test,
-        run_reproduce_test=issue.run_reproduce_test,
-        number_of_candidate_patch=issue.number_of_candidate_patch,
-        dockerfile_content=issue.dockerfile_content,
-        image_name=issue.image_name,
-        workdir=issue.workdir,
-        build_commands=issue.build_commands,
-        test_commands=issue.test_commands,
+    async def event_stream() -> AsyncIterator[str]:
+        position = 0
+        finished = False
+        while not finished:
+            events, finished = await asyncio.to_thread(
+                issue_job_service.wait_for_events, job_id, position, STREAM_KEEP_ALIVE_INTERVAL
+            )
+            position += len(events)
+            for event in events:
+                yield f"event: {event.type}\ndata: {event.model_dump_json()}\n\n"
+            if not events and not finished:
+                yield ": keep-alive\n\n"
+        job = IssueJobResponse.from_job(issue_job_service.get_job_by_id(job_id))
+        yield f"event: job\ndata: {job.model_dump_json()}\n\n"
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
     )
 
-    # Check if all outputs are in their initial state, indicating a failure
-    if (
-        patch,
-        passed_reproducing_test,
-        passed_build,
-        passed_regression_test,
-        passed_existing_test,
-        issue_response,
-        issue_type,
-    ) == (None, False, False, False, False, None, None):
-        raise ServerException(
-            code=500,
-            message="Failed to process the issue. Please try again later.",
-        )
-
-    # Deduct issue credit after successful processing
+
+@router.post(
+    "/job/cancel/",
+    summary="Cancel an issue job",
+    description="Cancels a job that is waiting or running. A running job stops at the next step of the pipeline, "
+    "frees its container and keeps the last candidate patch it generated. It can be resumed with /issue/job/resume/.",
+    response_description="Returns the job",
+    response_model=Response[IssueJobResponse],
+)
+@requireLogin
+def cancel_job(job_id: int, request: Request) -> Response[IssueJobResponse]:
+    issue_job_service: IssueJobService = request.app.state.service["issue_job_service"]
+    get_accessible_job(issue_job_service, job_id, request)
+    job = issue_job_service.cancel_job(job_id)
+    return Response(data=IssueJobResponse.from_job(job))
+
+
+@router.post(
+    "/job/resume/",
+    summary="Resume a failed or cancelled issue job",
+    description="Queues a job that failed or was cancelled again. It resumes from the last step it completed "
+    "instead of starting over, keeping the context, reproduction and candidate patches found so far.",
+    response_description="Returns the job",
+    response_model=Response[IssueJobResponse],
+)
+@requireLogin
+def resume_job(job_id: int, request: Request) -> Response[IssueJobResponse]:
+    issue_job_service: IssueJobService = request.app.state.service["issue_job_service"]
+    user_service: UserService = request.app.state.service["user_service"]
+    job = get_accessible_job(issue_job_service, job_id, request)
+    if job.status not in RESUMABLE_JOB_STATUSES:
+        raise ServerException(code=400, message="Only failed or cancelled jobs can be resumed")
+
+    # Check issue credit
     if settings.ENABLE_AUTHENTICATION:
-        user_service.update_issue_credit(request.state.user_id, user_issue_credit - 1)
-
-    # Return the response
-    return Response(
-        data=IssueResponse(
-            patch=patch,
-            passed_reproducing_test=passed_reproducing_test,
-            passed_build=passed_build,
-            passed_regression_test=passed_regression_test,
-            passed_existing_test=passed_existing_test,
-            issue_response=issue_response,
-            issue_type=issue_type,
-        )
-    )
+        user_issue_credit = user_service.get_issue_credit(request.state.user_id)
+        if user_issue_credit <= 0:
+            raise ServerException(
+                code=403,
+                message="Insufficient issue credits. Please purchase more to continue.",
+            )
+
+    job = issue_job_service.resume_job(job_id)
+    return Response(data=IssueJobResponse.from_job(job))
+
+
+@router.get(
+    "/job/list/",
+    summary="List issue jobs",
+    description="List all jobs submitted by the authenticated user, newest first.",
+    response_description="Returns a list of jobs",
+    response_model=Response[Sequence[IssueJobResponse]],
+)
+@requireLogin
+def list_jobs(request: Request) -> Response[Sequence[IssueJobResponse]]:
+    issue_job_service: IssueJobService = request.app.state.service["issue_job_service"]
+    if settings.ENABLE_AUTHENTICATION:
+        jobs = issue_job_service.get_jobs_by_user_id(request.state.user_id)
+    else:
+        jobs = issue_job_service.get_all_jobs()
+    return Response(data=[IssueJobResponse.from_job(job) for job in jobs])
@@ -1,15 +1,20 @@
 from typing import Sequence
 
 import git
-from fastapi import APIRouter, Request
+from fastapi import APIRouter, BackgroundTasks, Request
 
 from prometheus.app.decorators.require_login import requireLogin
 from prometheus.app.models.requests.repository import (
     CreateBranchAndPushRequest,
     UploadRepositoryRequest,
 )
-from prometheus.app.models.response.repository import RepositoryResponse
+from prometheus.app.models.response.repository import (
+    KnowledgeGraphDeletionResponse,
+    RepositoryResponse,
+)
 from prometheus.app.models.response.response import Response
+from prometheus.app.services.context_cache_service import ContextCacheService
+from prometheus.app.services.issue_job_service import IssueJobService
 from prometheus.app.services.knowledge_graph_service import KnowledgeGraphService
 from prometheus.app.services.repository_service import RepositoryService
 from prometheus.app.services.user_service import UserService
@@ -134,14 +139,20 @@ async def create_branch_and_push(
             code=403, message="You do not have permission to modify this repository"
         )
     git_repo = repository_service.get_repository(repository.playground_path)
-    try:
-        await git_repo.create_and_push_branch(
-            branch_name=create_branch_and_push_request.branch_name,
-            commit_message=create_branch_and_push_request.commit_message,
-            patch=create_branch_and_push_request.patch,
-        )
-    except git.exc.GitCommandError as e:
-        raise e
+    # Push from a worktree, so the checkout shared by the running issues is left untouched
+    with repository_service.checkout_worktree(
+        repository.id,
+        git_repo,
+        f"create_branch_and_push {create_branch_and_push_request.branch_name}",
+    ) as worktree:
+        try:
+            await worktree.create_and_push_branch(
+                branch_name=create_branch_and_push_request.branch_name,
+                commit_message=create_branch_and_push_request.commit_message,
+                patch=create_branch_and_push_request.patch,
+            )
+        except git.exc.GitCommandError as e:
+            raise e
     return Response()
 
 
@@ -159,7 +170,14 @@ def list_repositories(request: Request):
         repositories = repository_service.get_repositories_by_user_id(request.state.user_id)
     else:
         repositories = repository_service.get_all_repositories()
-    return Response(data=[RepositoryResponse.model_validate(repo) for repo in repositories])
+    return Response(
+        data=[
+            RepositoryResponse.model_validate(repo).model_copy(
+                update={"is_working": repository_service.has_active_lease(repo.id)}
+            )
+            for repo in repositories
+        ]
+    )
 
 
 @router.delete(
@@ -170,17 +188,18 @@ def list_repositories(request: Request):
     response_model=Response,
 )
 @requireLogin
-def delete(repository_id: int, request: Request):
-    knowledge_graph_service: KnowledgeGraphService = request.app.state.service[
-        "knowledge_graph_service"
-    ]
+def delete(repository_id: int, request: Request, background_tasks: BackgroundTasks):
     repository_service: RepositoryService = request.app.state.service["repository_service"]
+    issue_job_service: IssueJobService = request.app.state.service["issue_job_service"]
+    context_cache_service: ContextCacheService = request.app.state.service["context_cache_service"]
     repository = repository_service.get_repository_by_id(repository_id)
     # Check if the repository exists
     if not repository:
         raise ServerException(code=404, message="Repository not found")
     # Check if the repository is being processed
-    if repository.is_working:
+    if repository_service.has_active_lease(repository.id) or issue_job_service.has_active_job(
+        repository.id
+    ):
         raise ServerException(
             code=400, message="Repository is currently being processed, please try again later"
         )
@@ -189,9 +208,32 @@ def delete(repository_id: int, request: Request):
         raise ServerException(
             code=403, message="You do not have permission to delete this repository"
         )
-    # Clear the knowledge graph and repository data
-    knowledge_graph_service.clear_kg(repository.kg_root_node_id)
+    # The cached contexts refer to the nodes of the deleted knowledge graph
+    context_cache_service.clear(repository.kg_root_node_id)
     repository_service.clean_repository(repository)
-    # Delete the repository from the database
-    repository_service.delete_repository(repository)
+    # Delete the repository from the database, with a record of the deletion of its knowledge
+    # graph, which is run again on startup if the server stops before it is done
+    deletion = repository_service.delete_repository(repository)
+    # Clear the knowledge graph once the response is sent, it takes a while for large ones
+    if deletion is not None:
+        background_tasks.add_task(repository_service.delete_knowledge_graph, deletion.id)
     return Response()
+
+
+@router.get(
+    "/delete/list/",
+    description="""
+    List the deleted repositories whose knowledge graph is still being deleted, with the progress
+    of the deletion.
+    """,
+    response_model=Response[Sequence[KnowledgeGraphDeletionResponse]],
+)
+@requireLogin
+def list_deletions(request: Request):
+    repository_service: RepositoryService = request.app.state.service["repository_service"]
+    deletions = repository_service.get_knowledge_graph_deletions(
+        request.state.user_id if settings.ENABLE_AUTHENTICATION else None
+    )
+    return Response(
+        data=[KnowledgeGraphDeletionResponse.model_validate(deletion) for deletion in deletions]
+    )
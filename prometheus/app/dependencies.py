@@ -1,11 +1,16 @@
 """Initializes and configures all prometheus services."""
 
+from pathlib import Path
+
 from prometheus.app.services.base_service import BaseService
+from prometheus.app.services.checkpoint_service import CheckpointService
+from prometheus.app.services.context_cache_service import ContextCacheService
 from prometheus.app.services.database_service import DatabaseService
 from prometheus.app.services.invitation_code_service import InvitationCodeService
+from prometheus.app.services.issue_job_service import IssueJobService
 from prometheus.app.services.issue_service import IssueService
 from prometheus.app.services.knowledge_graph_service import KnowledgeGraphService
-from prometheus.app.services.llm_service import LLMService
+from prometheus.app.services.llm_service import LLMService, get_embeddings
 from prometheus.app.services.neo4j_service import Neo4jService
 from prometheus.app.services.repository_service import RepositoryService
 from prometheus.app.services.user_service import UserService
@@ -22,7 +27,7 @@ def initialize_services() -> dict[str, BaseService]:
     Note:
         This function assumes all required settings are properly configured in
         the settings module using Dynaconf. The following settings are required:
-        - NEO4J_URI, NEO4J_USERNAME, NEO4J_PASSWORD
+        - NEO4J_URI, NEO4J_USERNAME, NEO4J_PASSWORD, unless GRAPH_STORE is "embedded"
         - LITELLM_MODEL
         - NEO4J_BATCH_SIZE
         - KNOWLEDGE_GRAPH_MAX_AST_DEPTH
@@ -32,10 +37,31 @@ def initialize_services() -> dict[str, BaseService]:
     Returns:
         A fully configured ServiceCoordinator instance managing all services.
     """
+    embedded_graph_store_dir = None
+    snapshot_dir = Path(settings.WORKING_DIRECTORY) / "knowledge_graph_snapshot"
+    if settings.GRAPH_STORE == "embedded":
+        embedded_graph_store_dir = Path(settings.WORKING_DIRECTORY) / "embedded_graph_store"
+        # The embedded store already keeps the knowledge graphs in memory
+        snapshot_dir = None
     neo4j_service = Neo4jService(
-        settings.NEO4J_URI, settings.NEO4J_USERNAME, settings.NEO4J_PASSWORD
+        settings.NEO4J_URI,
+        settings.NEO4J_USERNAME,
+        settings.NEO4J_PASSWORD,
+        embedded_graph_store_dir,
     )
     database_service = DatabaseService(settings.DATABASE_URL)
+    checkpoint_service = CheckpointService(
+        settings.DATABASE_URL, settings.MAX_CONCURRENT_ISSUE_JOBS
+    )
+    embeddings = get_embeddings(
+        settings.EMBEDDING_MODEL,
+        settings.OPENAI_FORMAT_API_KEY,
+        settings.OPENAI_FORMAT_BASE_URL,
+        settings.GEMINI_API_KEY,
+    )
+    context_cache_service = ContextCacheService(
+        database_service, embeddings, settings.CONTEXT_CACHE_SIMILARITY_THRESHOLD
+    )
     llm_service = LLMService(
         settings.ADVANCED_MODEL,
         settings.BASE_MODEL,
@@ -56,14 +82,24 @@ def initialize_services() -> dict[str, BaseService]:
         settings.KNOWLEDGE_GRAPH_MAX_AST_DEPTH,
         settings.KNOWLEDGE_GRAPH_CHUNK_SIZE,
         settings.KNOWLEDGE_GRAPH_CHUNK_OVERLAP,
+        embeddings,
+        Path(settings.WORKING_DIRECTORY) / "semantic_index",
+        settings.KNOWLEDGE_GRAPH_SELECTIVE_AST,
+        snapshot_dir,
+        settings.KNOWLEDGE_GRAPH_MAX_FILE_SIZE,
     )
     repository_service = RepositoryService(
-        knowledge_graph_service, database_service, settings.WORKING_DIRECTORY
+        knowledge_graph_service,
+        database_service,
+        settings.WORKING_DIRECTORY,
+        settings.REPOSITORY_LEASE_TTL,
     )
     issue_service = IssueService(
         neo4j_service,
         repository_service,
         llm_service,
+        checkpoint_service,
+        context_cache_service,
         settings.MAX_TOKEN_PER_NEO4J_RESULT,
         settings.WORKING_DIRECTORY,
         settings.LOGGING_LEVEL,
@@ -71,14 +107,27 @@ def initialize_services() -> dict[str, BaseService]:
 
     user_service = UserService(database_service)
     invitation_code_service = InvitationCodeService(database_service)
+    issue_job_service = IssueJobService(
+        database_service,
+        repository_service,
+        knowledge_graph_service,
+        issue_service,
+        user_service,
+        settings.MAX_CONCURRENT_ISSUE_JOBS,
+    )
 
+    # Services are started in this order, the database tables must exist before the other
+    # services start
     return {
+        "database_service": database_service,
+        "checkpoint_service": checkpoint_service,
+        "context_cache_service": context_cache_service,
         "neo4j_service": neo4j_service,
         "llm_service": llm_service,
         "knowledge_graph_service": knowledge_graph_service,
         "repository_service": repository_service,
         "issue_service": issue_service,
-        "database_service": database_service,
         "user_service": user_service,
         "invitation_code_service": invitation_code_service,
+        "issue_job_service": issue_job_service,
     }
@@ -0,0 +1,24 @@
+from datetime import datetime, timezone
+
+from sqlmodel import Field, SQLModel
+
+
+class ContextCacheEntry(SQLModel, table=True):
+    """
+    ContextCacheEntry model for the context retrieved for a query on a knowledge graph,
+    which is reused by later issues of the same repository.
+    """
+
+    id: int = Field(primary_key=True, description="ID")
+    kg_root_node_id: int = Field(
+        index=True, description="The root node ID of the knowledge graph the query is about."
+    )
+    scope: str = Field(max_length=100, description="The retrieval stage that asked the query.")
+    query_hash: str = Field(
+        index=True, max_length=64, description="SHA-256 of the normalized query."
+    )
+    embedding: str = Field(description="The embedding of the similarity text, as a JSON list.")
+    contexts: str = Field(description="The retrieved Context list, serialized as JSON.")
+    created_at: datetime = Field(
+        default_factory=lambda: datetime.now(timezone.utc), description="Creation time."
+    )
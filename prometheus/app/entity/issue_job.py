@@ -0,0 +1,53 @@
+from datetime import datetime, timezone
+from enum import StrEnum
+from typing import Optional
+
+from sqlmodel import Field, SQLModel
+
+
+class IssueJobStatus(StrEnum):
+    PENDING = "pending"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+
+class IssueJob(SQLModel, table=True):
+    """
+    IssueJob model for tracking the asynchronous processing of an issue.
+    """
+
+    id: int = Field(primary_key=True, description="ID")
+    repository_id: int = Field(index=True, description="The ID of the repository of the issue.")
+    user_id: Optional[int] = Field(
+        default=None, index=True, nullable=True, description="The ID of the user who submitted it."
+    )
+    status: IssueJobStatus = Field(
+        default=IssueJobStatus.PENDING, index=True, description="The status of the job."
+    )
+    progress: Optional[str] = Field(
+        default=None, nullable=True, description="The step the job is currently working on."
+    )
+    request: str = Field(description="The IssueRequest of the job, serialized as JSON.")
+
+    patch: Optional[str] = Field(default=None, nullable=True, description="The generated patch.")
+    passed_reproducing_test: bool = Field(default=False)
+    passed_build: bool = Field(default=False)
+    passed_regression_test: bool = Field(default=False)
+    passed_existing_test: bool = Field(default=False)
+    issue_response: Optional[str] = Field(
+        default=None, nullable=True, description="The response generated for the issue."
+    )
+    issue_type: Optional[str] = Field(
+        default=None, nullable=True, description="The classified type of the issue."
+    )
+    error: Optional[str] = Field(
+        default=None, nullable=True, description="Why the job failed, if it did."
+    )
+
+    created_at: datetime = Field(
+        default_factory=lambda: datetime.now(timezone.utc), description="Submission time."
+    )
+    started_at: Optional[datetime] = Field(default=None, nullable=True)
+    finished_at: Optional[datetime] = Field(default=None, nullable=True)
@@ -0,0 +1,33 @@
+from datetime import datetime, timezone
+from typing import Optional
+
+from sqlmodel import Field, SQLModel
+
+
+class KnowledgeGraphDeletion(SQLModel, table=True):
+    """
+    KnowledgeGraphDeletion model for the knowledge graph of a deleted repository, which is
+    deleted in the background.
+
+    The deletion is persisted with the deletion of the repository, and removed once the
+    knowledge graph is deleted, so that a deletion interrupted by a restart is run again.
+    """
+
+    id: int = Field(primary_key=True, description="ID")
+    repository_id: int = Field(index=True, description="The ID of the deleted repository.")
+    user_id: Optional[int] = Field(
+        default=None,
+        index=True,
+        nullable=True,
+        description="The ID of the user who uploaded the repository.",
+    )
+    kg_root_node_id: int = Field(
+        unique=True, description="The ID of the root node of the knowledge graph to delete."
+    )
+    progress: str = Field(
+        default="Waiting to start", max_length=200, description="The progress of the deletion."
+    )
+    created_time: datetime = Field(
+        default_factory=lambda: datetime.now(timezone.utc),
+        description="Time the repository was deleted.",
+    )
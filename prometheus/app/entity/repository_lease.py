@@ -0,0 +1,26 @@
+from datetime import datetime, timezone
+
+from sqlmodel import Field, SQLModel
+
+
+class RepositoryLease(SQLModel, table=True):
+    """
+    RepositoryLease model for a run that works on a repository in its own worktree.
+
+    The holder renews the lease with heartbeats while it runs, so a lease whose expiration
+    time has passed belongs to a run that crashed, and its worktree can be removed.
+    """
+
+    id: int = Field(primary_key=True, description="ID")
+    repository_id: int = Field(index=True, description="The ID of the leased repository.")
+    holder: str = Field(max_length=100, description="Description of the run holding the lease.")
+    worktree_path: str = Field(
+        unique=True, max_length=300, description="The path of the worktree of the run."
+    )
+    heartbeat_time: datetime = Field(
+        default_factory=lambda: datetime.now(timezone.utc),
+        description="Last time the holder renewed the lease.",
+    )
+    expiration_time: datetime = Field(
+        index=True, description="Time after which the lease is considered abandoned."
+    )
@@ -31,12 +31,18 @@ logger.info(f"ENVIRONMENT={settings.ENVIRONMENT}")
 logger.info(f"BACKEND_CORS_ORIGINS={settings.BACKEND_CORS_ORIGINS}")
 logger.info(f"ADVANCED_MODEL={settings.ADVANCED_MODEL}")
 logger.info(f"BASE_MODEL={settings.BASE_MODEL}")
+logger.info(f"EMBEDDING_MODEL={settings.EMBEDDING_MODEL}")
 logger.info(f"NEO4J_BATCH_SIZE={settings.NEO4J_BATCH_SIZE}")
 logger.info(f"WORKING_DIRECTORY={settings.WORKING_DIRECTORY}")
 logger.info(f"KNOWLEDGE_GRAPH_MAX_AST_DEPTH={settings.KNOWLEDGE_GRAPH_MAX_AST_DEPTH}")
 logger.info(f"KNOWLEDGE_GRAPH_CHUNK_SIZE={settings.KNOWLEDGE_GRAPH_CHUNK_SIZE}")
 logger.info(f"KNOWLEDGE_GRAPH_CHUNK_OVERLAP={settings.KNOWLEDGE_GRAPH_CHUNK_OVERLAP}")
+logger.info(f"KNOWLEDGE_GRAPH_SELECTIVE_AST={settings.KNOWLEDGE_GRAPH_SELECTIVE_AST}")
+logger.info(f"KNOWLEDGE_GRAPH_MAX_FILE_SIZE={settings.KNOWLEDGE_GRAPH_MAX_FILE_SIZE}")
 logger.info(f"MAX_TOKEN_PER_NEO4J_RESULT={settings.MAX_TOKEN_PER_NEO4J_RESULT}")
+logger.info(f"MAX_CONCURRENT_ISSUE_JOBS={settings.MAX_CONCURRENT_ISSUE_JOBS}")
+logger.info(f"REPOSITORY_LEASE_TTL={settings.REPOSITORY_LEASE_TTL}")
+logger.info(f"CONTEXT_CACHE_SIMILARITY_THRESHOLD={settings.CONTEXT_CACHE_SIMILARITY_THRESHOLD}")
 
 
 @asynccontextmanager
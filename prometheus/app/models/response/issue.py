@@ -1,5 +1,8 @@
+from datetime import datetime
+
 from pydantic import BaseModel
 
+from prometheus.app.entity.issue_job import IssueJob, IssueJobStatus
 from prometheus.lang_graph.graphs.issue_state import IssueType
 
 
@@ -11,3 +14,30 @@ class IssueResponse(BaseModel):
     passed_existing_test: bool
     issue_response: str | None = None
     issue_type: IssueType | None = None
+
+
+class IssueJobResponse(BaseModel):
+    """
+    Response model for an issue job. The result fields are only set once the job succeeded.
+    """
+
+    model_config = {
+        "from_attributes": True,
+    }
+
+    id: int
+    repository_id: int
+    status: IssueJobStatus
+    progress: str | None = None
+    error: str | None = None
+    created_at: datetime
+    started_at: datetime | None = None
+    finished_at: datetime | None = None
+    result: IssueResponse | None = None
+
+    @classmethod
+    def from_job(cls, job: IssueJob) -> "IssueJobResponse":
+        response = cls.model_validate(job)
+        if job.status == IssueJobStatus.SUCCEEDED:
+            response.result = IssueResponse.model_validate(job, from_attributes=True)
+        return response
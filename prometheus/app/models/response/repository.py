@@ -1,3 +1,5 @@
+from datetime import datetime
+
 from pydantic import BaseModel
 
 
@@ -13,8 +15,24 @@ class RepositoryResponse(BaseModel):
     id: int
     url: str
     commit_id: str | None
+    # Whether issues are currently being processed for the repository
     is_working: bool
     user_id: int | None
     kg_max_ast_depth: int
     kg_chunk_size: int
     kg_chunk_overlap: int
+
+
+class KnowledgeGraphDeletionResponse(BaseModel):
+    """
+    Response model for the knowledge graph of a deleted repository that is being deleted.
+    """
+
+    model_config = {
+        "from_attributes": True,
+    }
+
+    repository_id: int
+    user_id: int | None
+    progress: str
+    created_time: datetime
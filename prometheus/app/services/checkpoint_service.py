@@ -0,0 +1,66 @@
+"""Service for the checkpoints of LangGraph runs, persisted in PostgreSQL."""
+
+import logging
+
+from langgraph.checkpoint.postgres import PostgresSaver
+from psycopg.rows import dict_row
+from psycopg_pool import ConnectionPool
+from sqlalchemy.engine import make_url
+
+from prometheus.app.services.base_service import BaseService
+
+
+class CheckpointService(BaseService):
+    """Persists the state of graph runs after every step, so that they can be resumed.
+
+    A graph compiled with the checkpointer of this service saves its state under the
+    thread_id of its config after each completed node, including the nodes of the
+    subgraphs it invokes. Invoking it again with the same thread_id and no input resumes
+    the run from the last completed node.
+    """
+
+    def __init__(self, database_url: str, max_connections: int):
+        """Initializes the checkpoint service.
+
+        Args:
+          database_url: SQLAlchemy URL of the PostgreSQL database the checkpoints are stored in.
+          max_connections: Maximum number of connections to the database, one per concurrent run.
+        """
+        # psycopg does not understand the driver of SQLAlchemy URLs, like postgresql+psycopg2://
+        conninfo = (
+            make_url(database_url)
+            .set(drivername="postgresql")
+            .render_as_string(hide_password=False)
+        )
+        self.pool = ConnectionPool(
+            conninfo,
+            min_size=1,
+            max_size=max(max_connections, 1),
+            kwargs={"autocommit": True, "prepare_threshold": 0, "row_factory": dict_row},
+            open=False,
+        )
+        self.checkpointer = PostgresSaver(self.pool)
+        self._logger = logging.getLogger("prometheus.app.services.checkpoint_service")
+
+    def start(self):
+        """
+        Open the connection pool and create the checkpoint tables if they do not exist.
+        """
+        self.pool.open()
+        self.checkpointer.setup()
+        self._logger.info("Checkpoint tables created successfully.")
+
+    def close(self):
+        """
+        Close the connections to the database.
+        """
+        self.pool.close()
+
+    def delete_checkpoints(self, thread_id: str):
+        """
+        Deletes all checkpoints of a run, once it does not need to be resumed anymore.
+
+        Args:
+            thread_id: The thread_id the run was checkpointed under.
+        """
+        self.checkpointer.delete_thread(thread_id)
@@ -0,0 +1,78 @@
+"""Service for the cache of retrieved context, shared by the issues of a repository."""
+
+import json
+from typing import Optional, Sequence
+
+from langchain_core.embeddings import Embeddings
+from pydantic import TypeAdapter
+from sqlmodel import Session, col, delete, select
+
+from prometheus.app.entity.context_cache_entry import ContextCacheEntry
+from prometheus.app.services.base_service import BaseService
+from prometheus.app.services.database_service import DatabaseService
+from prometheus.models.context import Context
+from prometheus.utils.context_cache import CachedContexts, ContextCache
+
+_contexts_adapter = TypeAdapter(Sequence[Context])
+
+
+class ContextCacheService(ContextCache, BaseService):
+    """
+    A ContextCache whose entries are persisted in the database, so that they survive
+    restarts. The vector index of a knowledge graph is loaded from the database the first
+    time it is used.
+    """
+
+    def __init__(
+        self,
+        database_service: DatabaseService,
+        embeddings: Optional[Embeddings],
+        similarity_threshold: float,
+        max_entries_per_graph: int = 1000,
+    ):
+        super().__init__(embeddings, similarity_threshold, max_entries_per_graph)
+        self.engine = database_service.engine
+
+    def _load_entries(self, kg_root_node_id: int) -> Sequence[CachedContexts]:
+        with Session(self.engine) as session:
+            statement = (
+                select(ContextCacheEntry)
+                .where(ContextCacheEntry.kg_root_node_id == kg_root_node_id)
+                .order_by(col(ContextCacheEntry.id))
+            )
+            return [
+                CachedContexts(
+                    scope=entry.scope,
+                    query_hash=entry.query_hash,
+                    embedding=json.loads(entry.embedding),
+                    contexts=_contexts_adapter.validate_json(entry.contexts),
+                )
+                for entry in session.exec(statement).all()
+            ]
+
+    def _save_entry(self, kg_root_node_id: int, entry: CachedContexts):
+        with Session(self.engine) as session:
+            session.add(
+                ContextCacheEntry(
+                    kg_root_node_id=kg_root_node_id,
+                    scope=entry.scope,
+                    query_hash=entry.query_hash,
+                    embedding=json.dumps(list(entry.embedding)),
+                    contexts=_contexts_adapter.dump_json(entry.contexts).decode("utf-8"),
+                )
+            )
+            session.commit()
+
+    def _delete_entries(
+        self, kg_root_node_id: int, scope: Optional[str] = None, query_hash: Optional[str] = None
+    ):
+        statement = delete(ContextCacheEntry).where(
+            ContextCacheEntry.kg_root_node_id == kg_root_node_id
+        )
+        if scope is not None:
+            statement = statement.where(ContextCacheEntry.scope == scope)
+        if query_hash is not None:
+            statement = statement.where(ContextCacheEntry.query_hash == query_hash)
+        with Session(self.engine) as session:
+            session.exec(statement)
+            session.commit()
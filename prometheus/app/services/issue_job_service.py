@@ -0,0 +1,438 @@
+"""Service for answering issues asynchronously on a bounded pool of workers."""
+
+import logging
+import threading
+import traceback
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import List, Optional, Sequence, Tuple
+
+from sqlmodel import Session, select
+
+from prometheus.app.entity.issue_job import IssueJob, IssueJobStatus
+from prometheus.app.models.requests.issue import IssueRequest
+from prometheus.app.services.base_service import BaseService
+from prometheus.app.services.database_service import DatabaseService
+from prometheus.app.services.issue_service import IssueService
+from prometheus.app.services.knowledge_graph_service import KnowledgeGraphService
+from prometheus.app.services.repository_service import RepositoryService
+from prometheus.app.services.user_service import UserService
+from prometheus.exceptions.issue_cancelled_exception import IssueCancelledException
+from prometheus.models.issue_event import IssueEvent
+
+ACTIVE_JOB_STATUSES = (IssueJobStatus.PENDING, IssueJobStatus.RUNNING)
+# Jobs that stopped before they finished, which can be resumed from their last checkpoint
+RESUMABLE_JOB_STATUSES = (IssueJobStatus.FAILED, IssueJobStatus.CANCELLED)
+# Number of finished jobs whose events are kept in memory for clients that stream them late
+MAX_FINISHED_EVENT_LOGS = 100
+
+
+class _JobEventLog:
+    """The events of a job submitted to this process, and the means to cancel it."""
+
+    def __init__(self):
+        self.events: List[IssueEvent] = []
+        self.finished = False
+        self.cancel_event = threading.Event()
+        self.last_patch: Optional[str] = None
+
+
+class IssueJobService(BaseService):
+    """Manages the jobs that answer issues.
+
+    Answering an issue can take tens of minutes, which is longer than most clients and
+    proxies keep a request open. Instead, every issue is submitted as a job that is
+    persisted in the database and processed by a local pool of worker threads, whose size
+    bounds the number of issues answered concurrently. Clients poll the job for its
+    status, progress and result, or stream the events of the job as they happen.
+
+    The processing of a job is checkpointed after every step, so a job that failed, was
+    cancelled or was interrupted by a restart resumes from the last step it completed.
+    """
+
+    def __init__(
+        self,
+        database_service: DatabaseService,
+        repository_service: RepositoryService,
+        knowledge_graph_service: KnowledgeGraphService,
+        issue_service: IssueService,
+        user_service: UserService,
+        max_workers: int,
+    ):
+        """Initializes the issue job service.
+
+        Args:
+          database_service: Database service where the jobs are persisted.
+          repository_service: Repository service to load the repository of a job.
+          knowledge_graph_service: Knowledge graph service to load the knowledge graph of a job.
+          issue_service: Issue service that answers the issue of a job.
+          user_service: User service to deduct the issue credit of a user.
+          max_workers: Maximum number of jobs that are processed concurrently.
+        """
+        self.engine = database_service.engine
+        self.repository_service = repository_service
+        self.knowledge_graph_service = knowledge_graph_service
+        self.issue_service = issue_service
+        self.user_service = user_service
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="issue-job")
+        self._event_logs: OrderedDict[int, _JobEventLog] = OrderedDict()
+        self._condition = threading.Condition()
+        self._closing = False
+        self._logger = logging.getLogger("prometheus.app.services.issue_job_service")
+
+    def start(self):
+        """
+        Queue the jobs that were left unfinished when the service was last stopped again,
+        since the local queue does not survive a restart. They resume from their last
+        checkpoint.
+        """
+        with Session(self.engine) as session:
+            statement = select(IssueJob).where(IssueJob.status.in_(ACTIVE_JOB_STATUSES))
+            jobs = session.exec(statement).all()
+            for job in jobs:
+                job.status = IssueJobStatus.PENDING
+                job.progress = "Waiting for a free worker to resume after a restart"
+                session.add(job)
+            session.commit()
+            job_ids = [job.id for job in jobs]
+        for job_id in job_ids:
+            self._logger.info(f"Resuming job {job_id} that was interrupted by a restart")
+            self._queue_job(job_id)
+
+    def close(self):
+        """
+        Stop the workers, interrupting the running jobs and the jobs that did not start yet.
+        They are resumed when the service starts again.
+        """
+        with self._condition:
+            self._closing = True
+            for event_log in self._event_logs.values():
+                event_log.cancel_event.set()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    def submit_job(self, issue: IssueRequest, user_id: Optional[int]) -> IssueJob:
+        """
+        Persists a new job for an issue and queues it for processing.
+
+        Args:
+            issue: The issue to answer.
+            user_id: Optional ID of the user who submitted the issue, whose issue credit is
+                deducted when the job succeeds.
+
+        Returns:
+            The newly created job.
+        """
+        with Session(self.engine) as session:
+            job = IssueJob(
+                repository_id=issue.repository_id,
+                user_id=user_id,
+                progress="Waiting for a free worker",
+                request=issue.model_dump_json(),
+            )
+            session.add(job)
+            session.commit()
+            session.refresh(job)
+        self._queue_job(job.id)
+        self._logger.info(f"Submitted job {job.id} for repository {job.repository_id}")
+        return job
+
+    def resume_job(self, job_id: int) -> Optional[IssueJob]:
+        """
+        Queues a job that failed or was cancelled again. It resumes from the last step it
+        completed, keeping the context, reproduction and candidate patches found so far.
+
+        Args:
+            job_id: The ID of the job to resume.
+
+        Returns:
+            The job, or None if it does not exist. Jobs that are not failed or cancelled are
+            returned unchanged.
+        """
+        with Session(self.engine) as session:
+            job = session.get(IssueJob, job_id, with_for_update=True)
+            if job is None or job.status not in RESUMABLE_JOB_STATUSES:
+                return job
+            job.status = IssueJobStatus.PENDING
+            job.progress = "Waiting for a free worker to resume"
+            job.error = None
+            job.finished_at = None
+            session.add(job)
+            session.commit()
+            session.refresh(job)
+        self._queue_job(job_id)
+        self._logger.info(f"Resumed job {job_id}")
+        return job
+
+    def _queue_job(self, job_id: int):
+        with self._condition:
+            self._event_logs[job_id] = _JobEventLog()
+        self.executor.submit(self.run_job, job_id)
+
+    def get_job_by_id(self, job_id: int) -> Optional[IssueJob]:
+        """
+        Retrieves a job by its ID.
+
+        Args:
+            job_id: The ID of the job to retrieve.
+
+        Returns:
+            The IssueJob instance if found, otherwise None.
+        """
+        with Session(self.engine) as session:
+            return session.get(IssueJob, job_id)
+
+    def get_jobs_by_user_id(self, user_id: int) -> Sequence[IssueJob]:
+        """
+        Retrieves all jobs submitted by a specific user ID, newest first.
+        """
+        with Session(self.engine) as session:
+            statement = (
+                select(IssueJob).where(IssueJob.user_id == user_id).order_by(IssueJob.id.desc())
+            )
+            return session.exec(statement).all()
+
+    def get_all_jobs(self) -> Sequence[IssueJob]:
+        """
+        Retrieves all jobs in the database, newest first.
+        """
+        with Session(self.engine) as session:
+            statement = select(IssueJob).order_by(IssueJob.id.desc())
+            return session.exec(statement).all()
+
+    def has_active_job(self, repository_id: int) -> bool:
+        """
+        Checks whether a repository has a job that is waiting or being processed.
+
+        Args:
+            repository_id: The ID of the repository.
+        """
+        with Session(self.engine) as session:
+            statement = select(IssueJob.id).where(
+                IssueJob.repository_id == repository_id,
+                IssueJob.status.in_(ACTIVE_JOB_STATUSES),
+            )
+            return session.exec(statement).first() is not None
+
+    def cancel_job(self, job_id: int) -> Optional[IssueJob]:
+        """
+        Cancels a job. A job that is waiting is cancelled immediately, a running job stops at
+        the next step of the pipeline and keeps the last candidate patch it generated.
+
+        Args:
+            job_id: The ID of the job to cancel.
+
+        Returns:
+            The job, or None if it does not exist.
+        """
+        job = self.get_job_by_id(job_id)
+        if job is None:
+            return None
+        with self._condition:
+            event_log = self._event_logs.get(job_id)
+            if event_log is not None:
+                event_log.cancel_event.set()
+        if job.status == IssueJobStatus.PENDING:
+            self.update_job(
+                job_id,
+                status=IssueJobStatus.CANCELLED,
+                progress=None,
+                finished_at=datetime.now(timezone.utc),
+            )
+        return self.get_job_by_id(job_id)
+
+    def wait_for_events(
+        self, job_id: int, start: int, timeout: float
+    ) -> Tuple[Sequence[IssueEvent], bool]:
+        """
+        Waits until a job emits events after a given position, or finishes.
+
+        Args:
+            job_id: The ID of the job.
+            start: Number of events of the job that were already read.
+            timeout: Maximum number of seconds to wait.
+
+        Returns:
+            The new events, which may be empty if the timeout expired, and whether the job
+            finished. Jobs whose events are not available, like jobs of a previous run of the
+            server, are reported as finished.
+        """
+        with self._condition:
+            event_log = self._event_logs.get(job_id)
+            if event_log is None:
+                return [], True
+            self._condition.wait_for(
+                lambda: len(event_log.events) > start or event_log.finished, timeout
+            )
+            return event_log.events[start:], event_log.finished
+
+    def update_job(self, job_id: int, **fields):
+        """
+        Updates the given fields of a job.
+
+        Args:
+            job_id: The ID of the job to update.
+            **fields: The fields of the IssueJob to set.
+        """
+        with Session(self.engine) as session:
+            job = session.get(IssueJob, job_id)
+            if job:
+                for name, value in fields.items():
+                    setattr(job, name, value)
+                session.add(job)
+                session.commit()
+
+    def run_job(self, job_id: int):
+        """
+        Processes a job on the current worker thread, recording its progress and result.
+
+        Args:
+            job_id: The ID of the job to process.
+        """
+        with self._condition:
+            event_log = self._event_logs.setdefault(job_id, _JobEventLog())
+        job = self._claim_job(job_id)
+        if job is None:
+            # The job was cancelled while it was waiting, or is run by another worker after
+            # it was resumed
+            job = self.get_job_by_id(job_id)
+            if job is None or job.status not in ACTIVE_JOB_STATUSES:
+                self._finish_event_log(job_id, event_log)
+            return
+        try:
+            self._answer_issue(job, event_log)
+        except IssueCancelledException:
+            if self._closing:
+                self._logger.info(f"Job {job_id} was interrupted by a shutdown")
+                self.update_job(
+                    job_id,
+                    status=IssueJobStatus.PENDING,
+                    progress="Waiting for the server to restart to resume",
+                )
+                return
+            self._logger.info(f"Job {job_id} was cancelled")
+            self.update_job(
+                job_id,
+                status=IssueJobStatus.CANCELLED,
+                progress=None,
+                # A resumed job keeps the patch of its previous run if it found no new one
+                patch=event_log.last_patch or job.patch,
+                finished_at=datetime.now(timezone.utc),
+            )
+        except Exception as e:
+            self._logger.error(f"Error in job {job_id}: {str(e)}\n{traceback.format_exc()}")
+            self.update_job(
+                job_id,
+                status=IssueJobStatus.FAILED,
+                progress=None,
+                error=str(e),
+                finished_at=datetime.now(timezone.utc),
+            )
+        finally:
+            self._finish_event_log(job_id, event_log)
+
+    def _claim_job(self, job_id: int) -> Optional[IssueJob]:
+        with Session(self.engine) as session:
+            job = session.get(IssueJob, job_id, with_for_update=True)
+            if job is None or job.status != IssueJobStatus.PENDING:
+                return None
+            job.status = IssueJobStatus.RUNNING
+            job.progress = "Loading the repository and its knowledge graph"
+            job.started_at = job.started_at or datetime.now(timezone.utc)
+            session.add(job)
+            session.commit()
+            session.refresh(job)
+            return job
+
+    def _record_event(self, job_id: int, event_log: _JobEventLog, event: IssueEvent):
+        with self._condition:
+            event_log.events.append(event)
+            self._condition.notify_all()
+        if event.type == "node":
+            self.update_job(job_id, progress=f"Running {' > '.join([*event.path, event.node])}")
+        elif event.type == "patch":
+            patches = event.data if isinstance(event.data, list) else [event.data]
+            event_log.last_patch = patches[-1]
+
+    def _finish_event_log(self, job_id: int, event_log: _JobEventLog):
+        with self._condition:
+            event_log.finished = True
+            self._condition.notify_all()
+            self._event_logs.move_to_end(job_id)
+            finished_job_ids = [
+                finished_job_id
+                for finished_job_id, finished_event_log in self._event_logs.items()
+                if finished_event_log.finished
+            ]
+            for finished_job_id in finished_job_ids[:-MAX_FINISHED_EVENT_LOGS]:
+                del self._event_logs[finished_job_id]
+
+    def _answer_issue(self, job: IssueJob, event_log: _JobEventLog):
+        issue = IssueRequest.model_validate_json(job.request)
+        repository = self.repository_service.get_repository_by_id(job.repository_id)
+        if not repository:
+            raise ValueError("Repository not found")
+        git_repository = self.repository_service.get_repository(repository.playground_path)
+        knowledge_graph = self.knowledge_graph_service.get_knowledge_graph(
+            repository.kg_root_node_id,
+            repository.kg_max_ast_depth,
+            repository.kg_chunk_size,
+            repository.kg_chunk_overlap,
+        )
+        semantic_index = self.knowledge_graph_service.get_semantic_index(knowledge_graph)
+
+        self.update_job(job.id, progress="Answering the issue")
+        (
+            patch,
+            passed_reproducing_test,
+            passed_build,
+            passed_regression_test,
+            passed_existing_test,
+            issue_response,
+            issue_type,
+        ) = self.issue_service.answer_issue(
+            repository_id=repository.id,
+            repository=git_repository,
+            knowledge_graph=knowledge_graph,
+            issue_title=issue.issue_title,
+            issue_body=issue.issue_body,
+            issue_comments=issue.issue_comments if issue.issue_comments else [],
+            issue_type=issue.issue_type,
+            run_build=issue.run_build,
+            run_existing_test=issue.run_existing_test,
+            run_regression_test=issue.run_regression_test,
+            run_reproduce_test=issue.run_reproduce_test,
+            number_of_candidate_patch=issue.number_of_candidate_patch,
+            dockerfile_content=issue.dockerfile_content,
+            image_name=issue.image_name,
+            workdir=issue.workdir,
+            build_commands=issue.build_commands,
+            test_commands=issue.test_commands,
+            event_callback=lambda event: self._record_event(job.id, event_log, event),
+            cancel_event=event_log.cancel_event,
+            thread_id=f"issue-job-{job.id}",
+            semantic_index=semantic_index,
+        )
+
+        # All outputs in their initial state indicate a failure
+        if issue_type is None:
+            raise RuntimeError("Failed to process the issue. Please try again later.")
+
+        # Deduct issue credit after successful processing
+        if job.user_id is not None:
+            user_issue_credit = self.user_service.get_issue_credit(job.user_id)
+            self.user_service.update_issue_credit(job.user_id, max(user_issue_credit - 1, 0))
+
+        self.update_job(
+            job.id,
+            status=IssueJobStatus.SUCCEEDED,
+            progress=None,
+            patch=patch,
+            passed_reproducing_test=passed_reproducing_test,
+            passed_build=passed_build,
+            passed_regression_test=passed_regression_test,
+            passed_existing_test=passed_existing_test,
+            issue_response=issue_response,
+            issue_type=issue_type,
+            finished_at=datetime.now(timezone.utc),
+        )
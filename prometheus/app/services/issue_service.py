@@ -3,17 +3,22 @@ import threading
 import traceback
 from datetime import datetime
 from pathlib import Path
-from typing import Mapping, Optional, Sequence
+from typing import Callable, Mapping, Optional, Sequence
 
 from prometheus.app.services.base_service import BaseService
+from prometheus.app.services.checkpoint_service import CheckpointService
+from prometheus.app.services.context_cache_service import ContextCacheService
 from prometheus.app.services.llm_service import LLMService
 from prometheus.app.services.neo4j_service import Neo4jService
 from prometheus.docker.general_container import GeneralContainer
 from prometheus.docker.user_defined_container import UserDefinedContainer
+from prometheus.exceptions.issue_cancelled_exception import IssueCancelledException
 from prometheus.git.git_repository import GitRepository
 from prometheus.graph.knowledge_graph import KnowledgeGraph
+from prometheus.graph.semantic_index import SemanticIndex
 from prometheus.lang_graph.graphs.issue_graph import IssueGraph
 from prometheus.lang_graph.graphs.issue_state import IssueType
+from prometheus.models.issue_event import IssueEvent
 
 
 class IssueService(BaseService):
@@ -22,6 +27,8 @@ class IssueService(BaseService):
         neo4j_service: Neo4jService,
         repository_service,
         llm_service: LLMService,
+        checkpoint_service: CheckpointService,
+        context_cache_service: ContextCacheService,
         max_token_per_neo4j_result: int,
         working_directory: str,
         logging_level: str,
@@ -29,6 +36,8 @@ class IssueService(BaseService):
         self.neo4j_service = neo4j_service
         self.repository_service = repository_service
         self.llm_service = llm_service
+        self.checkpoint_service = checkpoint_service
+        self.context_cache_service = context_cache_service
         self.max_token_per_neo4j_result = max_token_per_neo4j_result
         self.working_directory = working_directory
         self.answer_issue_log_dir = Path(self.working_directory) / "answer_issue_logs"
@@ -54,6 +63,10 @@ class IssueService(BaseService):
         dockerfile_content: Optional[str] = None,
         image_name: Optional[str] = None,
         workdir: Optional[str] = None,
+        event_callback: Optional[Callable[[IssueEvent], None]] = None,
+        cancel_event: Optional[threading.Event] = None,
+        thread_id: Optional[str] = None,
+        semantic_index: Optional[SemanticIndex] = None,
     ) -> (
         tuple[None, bool, bool, bool, bool, None, None]
         | tuple[str, bool, bool, bool, bool, str, IssueType]
@@ -62,8 +75,9 @@ class IssueService(BaseService):
         Processes an issue, generates patches if needed, runs optional builds and tests, and returning the results.
 
         Args:
-            repository_id: The ID of the repository to update.
-            repository (GitRepository): The Git repository instance.
+            repository_id: The ID of the repository.
+            repository (GitRepository): The Git repository instance, the issue is processed in a
+                worktree of it.
             knowledge_graph (KnowledgeGraph): The knowledge graph instance.
             issue_title (str): The title of the issue.
             issue_body (str): The body of the issue.
@@ -79,6 +93,15 @@ class IssueService(BaseService):
             workdir (Optional[str]): Working directory for the container.
             build_commands (Optional[Sequence[str]]): Commands to build the project.
             test_commands (Optional[Sequence[str]]): Commands to test the project.
+            event_callback (Optional[Callable[[IssueEvent], None]]): Receives the progress and
+                partial results of the issue as they happen.
+            cancel_event (Optional[threading.Event]): Set it to stop processing the issue, which
+                raises IssueCancelledException. The command running in the container is killed.
+            thread_id (Optional[str]): If given, the processing is checkpointed under this ID,
+                and an unfinished processing with the same ID is resumed from its last
+                completed step. The checkpoints are deleted once the processing finishes.
+            semantic_index (Optional[SemanticIndex]): Embedding index of the knowledge graph,
+                used to find the first candidates of each context retrieval.
         Returns:
             Tuple containing:
                 - edit_patch (str): The generated patch for the issue.
@@ -98,47 +121,59 @@ class IssueService(BaseService):
         file_handler.setFormatter(formatter)
         logger.addHandler(file_handler)
 
-        # Construct the working directory
-        if dockerfile_content or image_name:
-            container = UserDefinedContainer(
-                repository.get_working_directory(),
-                workdir,
-                build_commands,
-                test_commands,
-                dockerfile_content,
-                image_name,
-            )
-        else:
-            container = GeneralContainer(repository.get_working_directory())
+        try:
+            # Work in a worktree of its own, the checkout of the repository is shared by all runs
+            with self.repository_service.checkout_worktree(
+                repository_id, repository, f"answer_issue thread-{threading.get_ident()}"
+            ) as worktree:
+                # Construct the working directory
+                if dockerfile_content or image_name:
+                    container = UserDefinedContainer(
+                        worktree.get_working_directory(),
+                        workdir,
+                        build_commands,
+                        test_commands,
+                        dockerfile_content,
+                        image_name,
+                    )
+                else:
+                    container = GeneralContainer(worktree.get_working_directory())
+                container.cancel_event = cancel_event
+                container.repository_id = repository_id
 
-        # Initialize the IssueGraph with the provided services and parameters
-        issue_graph = IssueGraph(
-            advanced_model=self.llm_service.advanced_model,
-            base_model=self.llm_service.base_model,
-            kg=knowledge_graph,
-            git_repo=repository,
-            neo4j_driver=self.neo4j_service.neo4j_driver,
-            max_token_per_neo4j_result=self.max_token_per_neo4j_result,
-            container=container,
-            build_commands=build_commands,
-            test_commands=test_commands,
-        )
+                # Initialize the IssueGraph with the provided services and parameters
+                issue_graph = IssueGraph(
+                    advanced_model=self.llm_service.advanced_model,
+                    base_model=self.llm_service.base_model,
+                    kg=knowledge_graph,
+                    git_repo=worktree,
+                    graph_store=self.neo4j_service.graph_store,
+                    max_token_per_neo4j_result=self.max_token_per_neo4j_result,
+                    container=container,
+                    build_commands=build_commands,
+                    test_commands=test_commands,
+                    checkpointer=self.checkpoint_service.checkpointer if thread_id else None,
+                    context_cache=self.context_cache_service,
+                    semantic_index=semantic_index,
+                )
 
-        # Update the repository status to working
-        self.repository_service.update_repository_status(repository_id, is_working=True)
-        try:
-            # Invoke the issue graph with the provided parameters
-            output_state = issue_graph.invoke(
-                issue_title,
-                issue_body,
-                issue_comments,
-                issue_type,
-                run_build,
-                run_existing_test,
-                run_regression_test,
-                run_reproduce_test,
-                number_of_candidate_patch,
-            )
+                # Invoke the issue graph with the provided parameters
+                output_state = issue_graph.invoke(
+                    issue_title,
+                    issue_body,
+                    issue_comments,
+                    issue_type,
+                    run_build,
+                    run_existing_test,
+                    run_regression_test,
+                    run_reproduce_test,
+                    number_of_candidate_patch,
+                    event_callback=event_callback,
+                    cancel_event=cancel_event,
+                    thread_id=thread_id,
+                )
+            if thread_id:
+                self.checkpoint_service.delete_checkpoints(thread_id)
             return (
                 output_state["edit_patch"],
                 output_state["passed_reproducing_test"],
@@ -148,10 +183,16 @@ class IssueService(BaseService):
                 output_state["issue_response"],
                 output_state["issue_type"],
             )
+        except IssueCancelledException:
+            logger.info("The processing of the issue was cancelled")
+            raise
         except Exception as e:
+            # Killing the command of a cancelled run may make the node that ran it fail
+            if cancel_event is not None and cancel_event.is_set():
+                logger.info("The processing of the issue was cancelled")
+                raise IssueCancelledException("The processing of the issue was cancelled") from e
             logger.error(f"Error in answer_issue: {str(e)}\n{traceback.format_exc()}")
             return None, False, False, False, False, None, None
         finally:
-            self.repository_service.update_repository_status(repository_id, is_working=False)
             logger.removeHandler(file_handler)
             file_handler.close()
@@ -1,11 +1,20 @@
 """Service for managing and interacting with Knowledge Graphs in Neo4j."""
 
 import asyncio
+import logging
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from typing import Callable, Optional, Set
+
+from langchain_core.embeddings import Embeddings
 
 from prometheus.app.services.base_service import BaseService
 from prometheus.app.services.neo4j_service import Neo4jService
+from prometheus.graph.embedded_graph_store import EmbeddedGraphStore
 from prometheus.graph.knowledge_graph import KnowledgeGraph
+from prometheus.graph.semantic_index import SemanticIndex
 from prometheus.neo4j import knowledge_graph_handler
 
 
@@ -24,6 +33,11 @@ class KnowledgeGraphService(BaseService):
         max_ast_depth: int,
         chunk_size: int,
         chunk_overlap: int,
+        embeddings: Optional[Embeddings] = None,
+        semantic_index_dir: Optional[Path] = None,
+        selective_ast: bool = False,
+        snapshot_dir: Optional[Path] = None,
+        max_file_size: Optional[int] = None,
     ):
         """Initializes the Knowledge Graph service.
 
@@ -33,14 +47,44 @@ class KnowledgeGraphService(BaseService):
           max_ast_depth: Maximum depth to traverse when building AST representations.
           chunk_size: Chunk size for processing text files.
           chunk_overlap: Overlap size for processing text files.
+          embeddings: The model that embeds the nodes for the semantic index.
+          semantic_index_dir: Directory where the semantic indexes of the knowledge graphs are
+            stored. Knowledge graphs get no semantic index unless both this and embeddings
+            are given.
+          selective_ast: Whether to only materialize the definitions, imports, calls and
+            docstrings of the source files, instead of all AST nodes down to max_ast_depth.
+          snapshot_dir: Directory where the binary snapshots of the knowledge graphs are stored,
+            to load them without reading them from Neo4j. Knowledge graphs are always read from
+            Neo4j if not given.
+          max_file_size: The size in bytes above which a file is only indexed shallowly,
+            without its AST and symbols. file_classifier.MAX_FILE_SIZE by default.
         """
-        self.kg_handler = knowledge_graph_handler.KnowledgeGraphHandler(
-            neo4j_service.neo4j_driver, neo4j_batch_size
-        )
+        if isinstance(neo4j_service.graph_store, EmbeddedGraphStore):
+            # The embedded store has the methods of KnowledgeGraphHandler
+            self.kg_handler = neo4j_service.graph_store
+        else:
+            self.kg_handler = knowledge_graph_handler.KnowledgeGraphHandler(
+                neo4j_service.neo4j_driver, neo4j_batch_size
+            )
         self.max_ast_depth = max_ast_depth
         self.chunk_size = chunk_size
         self.chunk_overlap = chunk_overlap
-        self.writing_lock = asyncio.Lock()
+        self.embeddings = embeddings
+        self.semantic_index_dir = semantic_index_dir
+        self.selective_ast = selective_ast
+        self.snapshot_dir = snapshot_dir
+        self.max_file_size = max_file_size
+        # The missing semantic indexes are built one at a time, in the background
+        self._semantic_index_executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="semantic-index"
+        )
+        self._building_semantic_indexes: Set[int] = set()
+        self._semantic_index_lock = threading.Lock()
+        self._logger = logging.getLogger("prometheus.app.services.knowledge_graph_service")
+
+    def close(self):
+        """Stop building the semantic indexes, they are built again when they are needed."""
+        self._semantic_index_executor.shutdown(wait=False, cancel_futures=True)
 
     async def build_and_save_knowledge_graph(self, path: Path) -> int:
         """Builds a new Knowledge Graph from source code and saves it to Neo4j.
@@ -54,17 +98,105 @@ class KnowledgeGraphService(BaseService):
         Returns:
             The root node ID of the newly created Knowledge Graph.
         """
-        async with self.writing_lock:  # Ensure only one build operation at a time
-            root_node_id = self.kg_handler.get_new_knowledge_graph_root_node_id()
-            kg = KnowledgeGraph(
-                self.max_ast_depth, self.chunk_size, self.chunk_overlap, root_node_id
-            )
-            await kg.build_graph(path)
-            self.kg_handler.write_knowledge_graph(kg)
-            return kg.root_node_id
+        # Several knowledge graphs are built at the same time, each one is given a block of
+        # node IDs once its number of nodes is known
+        kg = KnowledgeGraph(
+            self.max_ast_depth,
+            self.chunk_size,
+            self.chunk_overlap,
+            0,
+            selective_ast=self.selective_ast,
+            max_file_size=self.max_file_size,
+        )
+        await kg.build_graph(path)
+        root_node_id = await asyncio.to_thread(
+            self.kg_handler.allocate_node_ids, kg.get_next_node_id()
+        )
+        await asyncio.to_thread(kg.move_node_ids, root_node_id)
+        await asyncio.to_thread(self.kg_handler.write_knowledge_graph, kg)
+        if self.snapshot_dir is not None:
+            await asyncio.to_thread(self._save_snapshot, kg)
+        if self._semantic_index_enabled():
+            await asyncio.to_thread(self._build_semantic_index, kg)
+        return kg.root_node_id
 
-    def clear_kg(self, root_node_id: int):
-        self.kg_handler.clear_knowledge_graph(root_node_id)
+    async def clear_kg(
+        self, root_node_id: int, progress_callback: Optional[Callable[[int, int], None]] = None
+    ):
+        """Deletes a knowledge graph, with its snapshot and semantic index.
+
+        Deleting a large knowledge graph takes a while, the API runs it in the background.
+        The knowledge graphs written meanwhile wait for the batch of files being deleted only,
+        see KnowledgeGraphHandler.clear_knowledge_graph.
+
+        Args:
+            root_node_id: The root node ID of the knowledge graph.
+            progress_callback: Called with the number of deleted files and the number of
+                files of the graph, as the deletion progresses.
+        """
+        if self.snapshot_dir is not None:
+            self._get_snapshot_path(root_node_id).unlink(missing_ok=True)
+        if self._semantic_index_enabled():
+            self._get_semantic_index_path(root_node_id).unlink(missing_ok=True)
+        await asyncio.to_thread(
+            self.kg_handler.clear_knowledge_graph, root_node_id, progress_callback
+        )
+
+    def get_semantic_index(self, kg: KnowledgeGraph) -> Optional[SemanticIndex]:
+        """Loads the semantic index of a knowledge graph.
+
+        The index is built when the knowledge graph is built. If it does not exist, like for
+        knowledge graphs that were built before semantic indexes were introduced, or is
+        stale, because it was embedded by another model, it is built in the background
+        instead, for the next issues.
+
+        Args:
+          kg: The knowledge graph.
+
+        Returns:
+          The semantic index, or None if semantic indexes are not enabled or the index is not
+          built yet.
+        """
+        if not self._semantic_index_enabled():
+            return None
+        path = self._get_semantic_index_path(kg.root_node_id)
+        if path.exists():
+            try:
+                return SemanticIndex.load(path, kg, self.embeddings)
+            except ValueError as e:
+                self._logger.warning(f"Rebuilding the stale semantic index at {path}: {e}")
+        self._build_semantic_index_in_background(kg)
+        return None
+
+    def _semantic_index_enabled(self) -> bool:
+        return self.embeddings is not None and self.semantic_index_dir is not None
+
+    def _get_semantic_index_path(self, root_node_id: int) -> Path:
+        return Path(self.semantic_index_dir) / f"{root_node_id}.npz"
+
+    def _build_semantic_index_in_background(self, kg: KnowledgeGraph):
+        with self._semantic_index_lock:
+            if kg.root_node_id in self._building_semantic_indexes:
+                return
+            self._building_semantic_indexes.add(kg.root_node_id)
+
+        def build():
+            try:
+                self._build_semantic_index(kg)
+            except Exception:
+                self._logger.exception(
+                    f"Failed to build the semantic index of knowledge graph {kg.root_node_id}"
+                )
+            finally:
+                with self._semantic_index_lock:
+                    self._building_semantic_indexes.discard(kg.root_node_id)
+
+        self._semantic_index_executor.submit(build)
+
+    def _build_semantic_index(self, kg: KnowledgeGraph) -> SemanticIndex:
+        semantic_index = SemanticIndex.build(kg, self.embeddings)
+        semantic_index.save(self._get_semantic_index_path(kg.root_node_id))
+        return semantic_index
 
     def get_knowledge_graph(
         self,
@@ -73,6 +205,37 @@ class KnowledgeGraphService(BaseService):
         chunk_size: int,
         chunk_overlap: int,
     ) -> KnowledgeGraph:
-        return self.kg_handler.read_knowledge_graph(
+        """Loads a knowledge graph, from its snapshot if it is up to date, otherwise from Neo4j.
+
+        The snapshot is written if it does not exist yet, like for knowledge graphs that were
+        built before snapshots were introduced. The knowledge graph keeps the selective_ast it
+        was built with, whatever the current one of the service.
+        """
+        if self.snapshot_dir is None:
+            return self.kg_handler.read_knowledge_graph(
+                root_node_id, max_ast_depth, chunk_size, chunk_overlap
+            )
+
+        path = self._get_snapshot_path(root_node_id)
+        version = self.kg_handler.get_knowledge_graph_version(root_node_id)
+        if version is not None and path.exists():
+            try:
+                return KnowledgeGraph.load_snapshot(
+                    path, version, max_ast_depth, chunk_size, chunk_overlap
+                )
+            except ValueError as e:
+                self._logger.warning(f"Rewriting the knowledge graph snapshot at {path}: {e}")
+        kg = self.kg_handler.read_knowledge_graph(
             root_node_id, max_ast_depth, chunk_size, chunk_overlap
         )
+        self._save_snapshot(kg, version)
+        return kg
+
+    def _get_snapshot_path(self, root_node_id: int) -> Path:
+        return Path(self.snapshot_dir) / f"{root_node_id}.kg"
+
+    def _save_snapshot(self, kg: KnowledgeGraph, version: Optional[str] = None):
+        if version is None:
+            version = uuid.uuid4().hex
+            self.kg_handler.set_knowledge_graph_version(kg.root_node_id, version)
+        kg.save_snapshot(self._get_snapshot_path(kg.root_node_id), version)
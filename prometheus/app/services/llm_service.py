@@ -1,11 +1,14 @@
 from typing import Optional
 
 from langchain_anthropic import ChatAnthropic
+from langchain_core.embeddings import Embeddings
 from langchain_core.language_models.chat_models import BaseChatModel
-from langchain_google_genai import ChatGoogleGenerativeAI
+from langchain_google_genai import ChatGoogleGenerativeAI, GoogleGenerativeAIEmbeddings
+from langchain_openai import OpenAIEmbeddings
 
 from prometheus.app.services.base_service import BaseService
 from prometheus.chat_models.custom_chat_openai import CustomChatOpenAI
+from prometheus.utils.embedding_util import HashingEmbeddings
 
 
 class LLMService(BaseService):
@@ -85,3 +88,28 @@ def get_model(
             max_tokens=max_output_tokens,
             max_retries=3,
         )
+
+
+def get_embeddings(
+    model_name: str,
+    openai_format_api_key: Optional[str] = None,
+    openai_format_base_url: Optional[str] = None,
+    gemini_api_key: Optional[str] = None,
+) -> Optional[Embeddings]:
+    """
+    Returns the embedding model of the semantic index and the context cache. "hashing" embeds
+    locally without a model, and "none" disables the embeddings.
+    """
+    if model_name == "none":
+        return None
+    elif model_name == "hashing":
+        return HashingEmbeddings()
+    elif "gemini" in model_name or model_name.startswith("models/"):
+        return GoogleGenerativeAIEmbeddings(model=model_name, google_api_key=gemini_api_key)
+    else:
+        return OpenAIEmbeddings(
+            model=model_name,
+            api_key=openai_format_api_key,
+            base_url=openai_format_base_url,
+            max_retries=3,
+        )
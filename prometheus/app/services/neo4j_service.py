@@ -1,15 +1,40 @@
 """Service for managing Neo4j database driver."""
 
 import logging
+from pathlib import Path
+from typing import Optional
 
-from neo4j import GraphDatabase
+from neo4j import Driver, GraphDatabase
 
 from prometheus.app.services.base_service import BaseService
+from prometheus.graph.embedded_graph_store import EmbeddedGraphStore
+from prometheus.graph.graph_store import GraphStore
+from prometheus.neo4j.neo4j_graph_store import Neo4jGraphStore
 
 
 class Neo4jService(BaseService):
-    def __init__(self, neo4j_uri: str, neo4j_username: str, neo4j_password: str):
+    def __init__(
+        self,
+        neo4j_uri: Optional[str],
+        neo4j_username: Optional[str],
+        neo4j_password: Optional[str],
+        embedded_graph_store_dir: Optional[Path] = None,
+    ):
+        """
+        Args:
+          neo4j_uri: The URI of the Neo4j server.
+          neo4j_username: The username of the Neo4j server.
+          neo4j_password: The password of the Neo4j server.
+          embedded_graph_store_dir: When given, the knowledge graphs are stored in an
+            EmbeddedGraphStore in this directory instead of in the Neo4j server, and
+            neo4j_driver is None.
+        """
         self._logger = logging.getLogger("prometheus.app.services.neo4j_service")
+        self.neo4j_driver: Optional[Driver] = None
+        self.graph_store: GraphStore
+        if embedded_graph_store_dir is not None:
+            self.graph_store = EmbeddedGraphStore(embedded_graph_store_dir)
+            return
         self.neo4j_driver = GraphDatabase.driver(
             neo4j_uri,
             auth=(neo4j_username, neo4j_password),
@@ -17,7 +42,10 @@ class Neo4jService(BaseService):
             max_transaction_retry_time=1200,
             keep_alive=True,
         )
+        self.graph_store = Neo4jGraphStore(self.neo4j_driver)
 
     def close(self):
+        if self.neo4j_driver is None:
+            return
         self.neo4j_driver.close()
         self._logger.info("Neo4j driver connection closed.")
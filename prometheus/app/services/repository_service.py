@@ -1,13 +1,21 @@
 """Service for managing repository (GitHub or local) operations."""
 
+import asyncio
+import logging
 import shutil
+import threading
 import uuid
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
-from typing import Optional
+from typing import Iterator, List, Optional
 
+from git import GitCommandError
 from sqlmodel import Session, select
 
+from prometheus.app.entity.knowledge_graph_deletion import KnowledgeGraphDeletion
 from prometheus.app.entity.repository import Repository
+from prometheus.app.entity.repository_lease import RepositoryLease
 from prometheus.app.services.base_service import BaseService
 from prometheus.app.services.database_service import DatabaseService
 from prometheus.app.services.knowledge_graph_service import KnowledgeGraphService
@@ -21,6 +29,15 @@ class RepositoryService(BaseService):
     cloning repositories, managing commits, pushing changes, and maintaining
     a clean working directory. It integrates with a knowledge graph service
     to track repository state and avoid redundant operations.
+
+    The checkout of a repository is never modified by the runs that work on it. Every run
+    gets its own worktree instead, and holds a lease on the repository that it renews with
+    heartbeats, so that many runs can work on the same repository at the same time and the
+    worktrees of crashed runs can be cleaned up.
+
+    The knowledge graph of a deleted repository is deleted in the background. The deletion
+    is persisted with the deletion of the repository, with its progress, and run again on
+    startup if it was interrupted.
     """
 
     def __init__(
@@ -28,19 +45,42 @@ class RepositoryService(BaseService):
         kg_service: KnowledgeGraphService,
         database_service: DatabaseService,
         working_dir: str,
+        lease_ttl: int = 300,
     ):
         """Initializes the repository service.
 
         Args:
           kg_service: Knowledge graph service instance for codebase tracking.
           working_dir: Base directory for repository operations. A 'repositories'
-              subdirectory will be created under this path.
+              subdirectory will be created under this path, and a 'worktrees' subdirectory
+              for the worktrees of the runs.
+          lease_ttl: Seconds after which the lease of a run that stopped sending heartbeats
+              expires. Heartbeats are sent three times per lease_ttl.
         """
         self.kg_service = kg_service
         self.database_service = database_service
         self.engine = database_service.engine
         self.target_directory = Path(working_dir) / "repositories"
         self.target_directory.mkdir(parents=True, exist_ok=True)
+        self.worktree_directory = Path(working_dir) / "worktrees"
+        self.worktree_directory.mkdir(parents=True, exist_ok=True)
+        self.lease_ttl = lease_ttl
+        self._logger = logging.getLogger("prometheus.app.services.repository_service")
+
+    def start(self):
+        """
+        Remove the worktrees of the runs whose leases expired, e.g. because the server crashed,
+        and delete the knowledge graphs whose deletion was interrupted in the background.
+        """
+        self.clean_expired_leases()
+        deletions = self.get_knowledge_graph_deletions()
+        if deletions:
+            threading.Thread(
+                target=self._resume_knowledge_graph_deletions,
+                args=([deletion.id for deletion in deletions],),
+                name="knowledge-graph-deletion",
+                daemon=True,
+            ).start()
 
     def get_new_playground_path(self) -> Path:
         """Generates a new unique playground path for cloning a repository.
@@ -172,40 +212,245 @@ class RepositoryService(BaseService):
             )
             return session.exec(statement).first()
 
-    def update_repository_status(self, repository_id: int, is_working: bool):
+    def acquire_lease(self, repository_id: int, holder: str) -> RepositoryLease:
         """
-        Updates the working status of a repository.
+        Acquires a lease on a repository, with a new path for the worktree of the holder.
 
         Args:
-            repository_id: The ID of the repository to update.
-            is_working: The new working status to set for the repository.
+            repository_id: The ID of the repository to lease.
+            holder: Description of the run that holds the lease, for debugging.
+
+        Returns:
+            The new lease.
+        """
+        now = datetime.now(timezone.utc)
+        with Session(self.engine) as session:
+            lease = RepositoryLease(
+                repository_id=repository_id,
+                holder=holder,
+                worktree_path=str(self.worktree_directory / uuid.uuid4().hex),
+                heartbeat_time=now,
+                expiration_time=now + timedelta(seconds=self.lease_ttl),
+            )
+            session.add(lease)
+            session.commit()
+            session.refresh(lease)
+        return lease
+
+    def renew_lease(self, lease_id: int) -> bool:
+        """
+        Renews a lease for another lease_ttl seconds.
+
+        Args:
+            lease_id: The ID of the lease to renew.
+
+        Returns:
+            False if the lease does not exist anymore, True otherwise.
         """
+        now = datetime.now(timezone.utc)
         with Session(self.engine) as session:
-            repository = session.get(Repository, repository_id)
-            if repository:
-                repository.is_working = is_working
-                session.add(repository)
+            lease = session.get(RepositoryLease, lease_id)
+            if lease is None:
+                return False
+            lease.heartbeat_time = now
+            lease.expiration_time = now + timedelta(seconds=self.lease_ttl)
+            session.add(lease)
+            session.commit()
+        return True
+
+    def release_lease(self, lease_id: int):
+        """
+        Releases a lease.
+
+        Args:
+            lease_id: The ID of the lease to release.
+        """
+        with Session(self.engine) as session:
+            lease = session.get(RepositoryLease, lease_id)
+            if lease:
+                session.delete(lease)
                 session.commit()
 
+    def has_active_lease(self, repository_id: int) -> bool:
+        """
+        Checks whether a run is currently working on a repository.
+
+        Args:
+            repository_id: The ID of the repository.
+        """
+        with Session(self.engine) as session:
+            statement = select(RepositoryLease).where(
+                RepositoryLease.repository_id == repository_id
+            )
+            leases = session.exec(statement).all()
+        now = datetime.now(timezone.utc)
+        return any(not self._is_expired(lease, now) for lease in leases)
+
+    @staticmethod
+    def _is_expired(lease: RepositoryLease, now: datetime) -> bool:
+        expiration_time = lease.expiration_time
+        # If our database returned a naive datetime, assume it's UTC
+        if expiration_time.tzinfo is None:
+            expiration_time = expiration_time.replace(tzinfo=timezone.utc)
+        return expiration_time < now
+
+    def clean_expired_leases(self):
+        """
+        Removes the worktrees of the expired leases and releases them.
+        """
+        now = datetime.now(timezone.utc)
+        with Session(self.engine) as session:
+            leases = session.exec(select(RepositoryLease)).all()
+        for lease in leases:
+            if not self._is_expired(lease, now):
+                continue
+            self._logger.warning(
+                f"Lease {lease.id} of {lease.holder} on repository {lease.repository_id} "
+                "expired, removing its worktree"
+            )
+            repository = self.get_repository_by_id(lease.repository_id)
+            try:
+                if repository is not None:
+                    git_repo = self.get_repository(repository.playground_path)
+                    git_repo.remove_worktree(Path(lease.worktree_path))
+                else:
+                    shutil.rmtree(lease.worktree_path, ignore_errors=True)
+            except GitCommandError as e:
+                self._logger.error(f"Failed to remove worktree {lease.worktree_path}: {e}")
+            self.release_lease(lease.id)
+
+    def _send_heartbeats(self, lease_id: int, stop_event: threading.Event):
+        while not stop_event.wait(self.lease_ttl / 3):
+            if not self.renew_lease(lease_id):
+                self._logger.error(f"Lease {lease_id} was released while still in use")
+                return
+
+    @contextmanager
+    def checkout_worktree(
+        self, repository_id: int, git_repo: GitRepository, holder: str
+    ) -> Iterator[GitRepository]:
+        """
+        Leases a repository and creates a worktree of it for a run, which are both removed
+        when the context exits. The lease is renewed in the background while the run works.
+
+        Args:
+            repository_id: The ID of the repository.
+            git_repo: The checkout of the repository, which is not modified.
+            holder: Description of the run, for debugging.
+
+        Yields:
+            The worktree of the run.
+        """
+        lease = self.acquire_lease(repository_id, holder)
+        stop_event = threading.Event()
+        heartbeat = threading.Thread(
+            target=self._send_heartbeats,
+            args=(lease.id, stop_event),
+            name=f"lease-heartbeat-{lease.id}",
+            daemon=True,
+        )
+        heartbeat.start()
+        worktree_path = Path(lease.worktree_path)
+        try:
+            yield git_repo.create_worktree(worktree_path)
+        finally:
+            stop_event.set()
+            heartbeat.join()
+            try:
+                git_repo.remove_worktree(worktree_path)
+            except GitCommandError as e:
+                self._logger.error(f"Failed to remove worktree {worktree_path}: {e}")
+            self.release_lease(lease.id)
+
     def clean_repository(self, repository: Repository):
         path = Path(repository.playground_path)
         if path.exists():
             shutil.rmtree(repository.playground_path)
             path.parent.rmdir()
 
-    def delete_repository(self, repository: Repository):
+    def delete_repository(self, repository: Repository) -> Optional[KnowledgeGraphDeletion]:
         """
-        deletes a repository from the database.
+        deletes a repository from the database, and records the deletion of its knowledge
+        graph, see delete_knowledge_graph.
 
         Args:
             repository: The repository instance to mark as cleaned.
+
+        Returns:
+            The deletion of the knowledge graph, or None if the repository was already deleted.
         """
         with Session(self.engine) as session:
             obj = session.get(Repository, repository.id)
-            if obj:
-                session.delete(obj)
+            if not obj:
+                return None
+            deletion = KnowledgeGraphDeletion(
+                repository_id=obj.id, user_id=obj.user_id, kg_root_node_id=obj.kg_root_node_id
+            )
+            session.add(deletion)
+            session.delete(obj)
+            session.commit()
+            session.refresh(deletion)
+        return deletion
+
+    async def delete_knowledge_graph(self, deletion_id: int):
+        """
+        Deletes the knowledge graph of a deleted repository, recording the progress on its
+        deletion, which is removed once the knowledge graph is deleted.
+
+        Args:
+            deletion_id: The ID of the KnowledgeGraphDeletion.
+        """
+        with Session(self.engine) as session:
+            deletion = session.get(KnowledgeGraphDeletion, deletion_id)
+        if deletion is None:
+            return
+
+        def report_progress(n_deleted_files: int, n_files: int):
+            self._set_deletion_progress(
+                deletion_id, f"Deleted {n_deleted_files} of {n_files} files"
+            )
+
+        self._set_deletion_progress(deletion_id, "Deleting the knowledge graph")
+        await self.kg_service.clear_kg(deletion.kg_root_node_id, report_progress)
+        with Session(self.engine) as session:
+            deletion = session.get(KnowledgeGraphDeletion, deletion_id)
+            if deletion:
+                session.delete(deletion)
+                session.commit()
+
+    def _set_deletion_progress(self, deletion_id: int, progress: str):
+        with Session(self.engine) as session:
+            deletion = session.get(KnowledgeGraphDeletion, deletion_id)
+            if deletion:
+                deletion.progress = progress
+                session.add(deletion)
                 session.commit()
 
+    def _resume_knowledge_graph_deletions(self, deletion_ids: List[int]):
+        for deletion_id in deletion_ids:
+            self._logger.info(
+                f"Resuming knowledge graph deletion {deletion_id} that was interrupted by a restart"
+            )
+            try:
+                asyncio.run(self.delete_knowledge_graph(deletion_id))
+            except Exception as e:
+                self._logger.error(f"Failed to run knowledge graph deletion {deletion_id}: {e}")
+
+    def get_knowledge_graph_deletions(
+        self, user_id: Optional[int] = None
+    ) -> List[KnowledgeGraphDeletion]:
+        """
+        Retrieves the knowledge graphs of deleted repositories that are still being deleted.
+
+        Args:
+            user_id: If given, only the ones of the repositories of this user.
+        """
+        with Session(self.engine) as session:
+            statement = select(KnowledgeGraphDeletion).order_by(KnowledgeGraphDeletion.id)
+            if user_id is not None:
+                statement = statement.where(KnowledgeGraphDeletion.user_id == user_id)
+            return list(session.exec(statement).all())
+
     def get_repository(self, local_path) -> GitRepository:
         git_repo = GitRepository()
         git_repo.from_local_repository(Path(local_path))
@@ -6,6 +6,7 @@ from langchain_core.runnables import RunnableConfig
 from langchain_openai import ChatOpenAI
 from pydantic import PrivateAttr
 
+from prometheus.utils.lang_graph_util import is_read_only_tool
 from prometheus.utils.llm_util import tiktoken_counter
 
 
@@ -17,7 +18,9 @@ class CustomChatOpenAI(ChatOpenAI):
         self._max_input_tokens = max_input_tokens
 
     def bind_tools(self, tools, tool_choice=None, **kwargs):
-        kwargs["parallel_tool_calls"] = False
+        # Read-only tool calls are independent and are run concurrently by the ToolNode, calls
+        # of tools that change files or run commands must see the effects of the previous ones
+        kwargs.setdefault("parallel_tool_calls", all(is_read_only_tool(tool) for tool in tools))
         return super().bind_tools(tools, tool_choice=tool_choice, **kwargs)
 
     def invoke(
@@ -20,9 +20,12 @@ class Settings(BaseSettings):
     LOGGING_LEVEL: Literal["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"]
 
     # Neo4j
-    NEO4J_URI: str
-    NEO4J_USERNAME: str
-    NEO4J_PASSWORD: str
+    # "embedded" stores the knowledge graphs in the process, under WORKING_DIRECTORY, instead
+    # of in the Neo4j server, which is then not needed
+    GRAPH_STORE: Literal["neo4j", "embedded"] = "neo4j"
+    NEO4J_URI: Optional[str] = None
+    NEO4J_USERNAME: Optional[str] = None
+    NEO4J_PASSWORD: Optional[str] = None
     NEO4J_BATCH_SIZE: int
 
     # Knowledge Graph
@@ -30,11 +33,20 @@ class Settings(BaseSettings):
     KNOWLEDGE_GRAPH_MAX_AST_DEPTH: int
     KNOWLEDGE_GRAPH_CHUNK_SIZE: int
     KNOWLEDGE_GRAPH_CHUNK_OVERLAP: int
+    # Only materialize the definitions, imports, calls and docstrings of the source files, at
+    # any depth, instead of all AST nodes down to KNOWLEDGE_GRAPH_MAX_AST_DEPTH
+    KNOWLEDGE_GRAPH_SELECTIVE_AST: bool = False
+    # Larger files are only indexed shallowly, in text chunks, without their AST and symbols
+    KNOWLEDGE_GRAPH_MAX_FILE_SIZE: int = 1_000_000
     MAX_TOKEN_PER_NEO4J_RESULT: int
 
     # LLM models
     ADVANCED_MODEL: str
     BASE_MODEL: str
+    # Model that embeds the semantic index and the issues compared by the context cache, "hashing"
+    # embeds locally without a model and "none" disables the semantic index and the reuse of the
+    # context of similar issues
+    EMBEDDING_MODEL: str = "hashing"
 
     # API Keys
     ANTHROPIC_API_KEY: Optional[str] = None
@@ -54,6 +66,14 @@ class Settings(BaseSettings):
     # Database
     DATABASE_URL: str
 
+    # Maximum number of issues answered concurrently
+    MAX_CONCURRENT_ISSUE_JOBS: int = 2
+    # Seconds after which the worktree of a run that stopped sending heartbeats is removed
+    REPOSITORY_LEASE_TTL: int = 300
+    # Minimum similarity of two issues for the context retrieved for one to seed the context
+    # retrieval of the other, above 1 only the context of identical queries is reused
+    CONTEXT_CACHE_SIMILARITY_THRESHOLD: float = 0.8
+
     # JWT Configuration
     JWT_SECRET_KEY: str
     ACCESS_TOKEN_EXPIRE_TIME: int = 30  # days
@@ -1,13 +1,87 @@
+import asyncio
+import hashlib
+import io
 import logging
+import shlex
 import shutil
 import tarfile
 import tempfile
 import threading
+import time
+import uuid
 from abc import ABC, abstractmethod
 from pathlib import Path
-from typing import Optional, Sequence
+from typing import AsyncIterator, Iterator, Optional, Sequence
 
 import docker
+from git import Repo
+
+from prometheus.docker.environment_cache import (
+    DOCKERFILE_NAME,
+    ENVIRONMENT_CACHE_MAX_AGE,
+    ENVIRONMENT_CACHE_MAX_BYTES,
+    ENVIRONMENT_CACHE_REPOSITORY,
+    SETUP_COMMANDS_LABEL,
+    TEST_COMMANDS_LABEL,
+    decode_commands_label,
+    decode_saved_at_label,
+    encode_commands_labels,
+    get_environment_cache_key,
+    is_setup_command,
+    is_test_command,
+)
+
+# Seconds before a command that was not killed yet is killed again, doubled after every attempt
+KILL_RETRY_INTERVAL = 0.1
+MAX_KILL_RETRY_INTERVAL = 2.0
+
+
+class HeadTailBuffer:
+    """A bounded output buffer that keeps the beginning and the end of a stream.
+
+    Once more than max_bytes have been written, the middle of the output is dropped and
+    only the first and last max_bytes // 2 bytes are kept, so memory usage does not grow
+    with the size of the output.
+    """
+
+    def __init__(self, max_bytes: Optional[int] = None):
+        """
+        Args:
+          max_bytes: Maximum number of bytes to keep. None keeps the whole output.
+        """
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self._head = bytearray()
+        self._tail = bytearray()
+
+    def write(self, chunk: bytes):
+        self.total_bytes += len(chunk)
+        if self.max_bytes is None:
+            self._head += chunk
+            return
+
+        head_limit = self.max_bytes - self.max_bytes // 2
+        if len(self._head) < head_limit:
+            head_part = chunk[: head_limit - len(self._head)]
+            self._head += head_part
+            chunk = chunk[len(head_part) :]
+        if chunk:
+            self._tail += chunk
+            tail_limit = self.max_bytes // 2
+            if len(self._tail) > tail_limit:
+                del self._tail[: len(self._tail) - tail_limit]
+
+    @property
+    def truncated_bytes(self) -> int:
+        return self.total_bytes - len(self._head) - len(self._tail)
+
+    def getvalue(self) -> str:
+        if not self.truncated_bytes:
+            # Decoded together, so a character split between the head and the tail is kept
+            return (self._head + self._tail).decode("utf-8", errors="replace")
+        head = self._head.decode("utf-8", errors="replace")
+        tail = self._tail.decode("utf-8", errors="replace")
+        return f"{head}\n... [{self.truncated_bytes} bytes of output truncated] ...\n{tail}"
 
 
 class BaseContainer(ABC):
@@ -41,6 +115,8 @@ class BaseContainer(ABC):
         temp_dir = Path(tempfile.mkdtemp())
         temp_project_path = temp_dir / project_path.name
         shutil.copytree(project_path, temp_project_path)
+        if (temp_project_path / ".git").is_file():
+            self._init_standalone_git_repository(temp_project_path)
         self.project_path = temp_project_path.absolute()
         self._logger.info(f"Created temporary project directory: {self.project_path}")
 
@@ -49,6 +125,41 @@ class BaseContainer(ABC):
         self._logger.debug(f"Using workdir: {self.workdir}")
 
         self.container = None
+        # Content hashes of the files we have copied into the running container,
+        # keyed by their posix path relative to the workdir.
+        self._synced_file_hashes = {}
+
+        # Setup and test commands that succeeded in this container, and the ones that
+        # succeeded in the cached environment it was started from.
+        self.successful_setup_commands = []
+        self.successful_test_commands = []
+        self.cached_setup_commands = []
+        self.cached_test_commands = []
+        self._environment_cache_key = None
+
+        # Set by the run that owns the container, cancels every command once it is set
+        self.cancel_event: Optional[threading.Event] = None
+        # Set by the run that owns the container, the cached environments are per repository
+        self.repository_id: Optional[int] = None
+
+    def _init_standalone_git_repository(self, project_path: Path):
+        """Replace the .git file of a copied git worktree with a repository of its own.
+
+        The .git file of a worktree points to a directory of the main repository on the host,
+        so no git command works in the container. The copy gets a new repository instead,
+        whose only commit has the files of the worktree.
+
+        Args:
+          project_path: Path to the copy of the worktree.
+        """
+        self._logger.info(f"Creating a standalone git repository for {project_path}")
+        (project_path / ".git").unlink()
+        repo = Repo.init(project_path)
+        with repo.config_writer() as config_writer:
+            config_writer.set_value("user", "name", "Prometheus")
+            config_writer.set_value("user", "email", "prometheus@localhost")
+        repo.git.add("-A")
+        repo.git.commit("--quiet", "--no-verify", "--allow-empty", "-m", "Initial commit")
 
     @abstractmethod
     def get_dockerfile_content(self) -> str:
@@ -63,22 +174,121 @@ class BaseContainer(ABC):
         """Build a Docker image using the Dockerfile content.
 
         Creates a Dockerfile in the project directory and builds a Docker image
-        using the specified tag name.
+        using the specified tag name. If an environment of the same repository, with the same
+        Dockerfile and dependency manifests, was cached by a previous issue, the image is built
+        on top of it and only the project files are copied in.
         """
         dockerfile_content = self.get_dockerfile_content()
-        dockerfile_path = self.project_path / "prometheus.Dockerfile"
+        self._environment_cache_key = get_environment_cache_key(
+            self.project_path, dockerfile_content, self.repository_id
+        )
+        cached_image = self._get_cached_environment_image()
+        if cached_image is not None:
+            self._logger.info(f"Using cached environment {cached_image.tags}")
+            labels = cached_image.labels or {}
+            self.cached_setup_commands = decode_commands_label(labels, SETUP_COMMANDS_LABEL)
+            self.cached_test_commands = decode_commands_label(labels, TEST_COMMANDS_LABEL)
+            # The cached workdir holds the files of an older version of the project, they are
+            # removed before the project is copied in. Files ignored by git, like installed
+            # dependencies, are part of the environment and are kept.
+            dockerfile_content = (
+                f"FROM {ENVIRONMENT_CACHE_REPOSITORY}:{self._environment_cache_key}\n"
+                f"RUN cd {self.workdir} && "
+                "if git rev-parse --is-inside-work-tree > /dev/null 2>&1; then "
+                "git ls-files -z --cached --others --exclude-standard | xargs -0 -r rm -f -- "
+                "&& rm -rf .git; "
+                "else find . -mindepth 1 -delete; fi\n"
+                f"COPY . {self.workdir}/\n"
+            )
+        dockerfile_path = self.project_path / DOCKERFILE_NAME
         dockerfile_path.write_text(dockerfile_content)
         self._logger.info(f"Building docker image {self.tag_name}")
         self.client.images.build(
             path=str(self.project_path), dockerfile=dockerfile_path.name, tag=self.tag_name
         )
 
+    def _get_cached_environment_image(self) -> Optional[docker.models.images.Image]:
+        try:
+            return self.client.images.get(
+                f"{ENVIRONMENT_CACHE_REPOSITORY}:{self._environment_cache_key}"
+            )
+        except docker.errors.ImageNotFound:
+            return None
+
+    def save_environment_cache(self):
+        """Commit the running container as the cached environment of the project.
+
+        The workdir is reset to the checked out version of the project first, so that the
+        edits, patches and reproduction files of this run are not part of the environment.
+        Nothing is saved if the image was not built from a Dockerfile, if no setup command
+        succeeded that is not already part of the cached environment, or if the workdir
+        cannot be reset. Saving evicts the oldest cached environments once the cache is full.
+        """
+        if self._environment_cache_key is None or not self.container:
+            return
+        new_setup_commands = [
+            command
+            for command in self.successful_setup_commands
+            if command not in self.cached_setup_commands
+        ]
+        if not new_setup_commands:
+            return
+
+        setup_commands = list(dict.fromkeys(self.cached_setup_commands + new_setup_commands))
+        test_commands = list(
+            dict.fromkeys(self.cached_test_commands + self.successful_test_commands)
+        )
+        reset_result = self.container.exec_run(
+            ["/bin/bash", "-c", "git reset -q --hard && git clean -fdq"], workdir=self.workdir
+        )
+        if reset_result.exit_code != 0:
+            self._logger.warning(
+                f"Not saving the environment cache, the workdir could not be reset: "
+                f"{reset_result.output}"
+            )
+            return
+        self._logger.info(
+            f"Saving environment cache {self._environment_cache_key} with setup commands "
+            f"{setup_commands}"
+        )
+        self.container.commit(
+            repository=ENVIRONMENT_CACHE_REPOSITORY,
+            tag=self._environment_cache_key,
+            conf={"Labels": encode_commands_labels(setup_commands, test_commands)},
+        )
+        self._evict_environment_cache()
+
+    def _evict_environment_cache(self):
+        images = sorted(
+            self.client.images.list(name=ENVIRONMENT_CACHE_REPOSITORY),
+            key=lambda image: decode_saved_at_label(image.labels or {}),
+            reverse=True,
+        )
+        now = time.time()
+        total_bytes = 0
+        for image in images:
+            size = image.attrs.get("Size", 0)
+            age = now - decode_saved_at_label(image.labels or {})
+            if (
+                age <= ENVIRONMENT_CACHE_MAX_AGE
+                and total_bytes + size <= ENVIRONMENT_CACHE_MAX_BYTES
+            ):
+                total_bytes += size
+                continue
+            self._logger.info(f"Evicting cached environment {image.tags}")
+            try:
+                self.client.images.remove(image.id)
+            except docker.errors.APIError as e:
+                # Still used by the image of a running container
+                self._logger.warning(f"Failed to evict cached environment {image.tags}: {e}")
+
     def start_container(self):
         """Start a Docker container from the built image.
 
         Starts a detached container with TTY enabled and mounts the Docker socket.
         """
         self._logger.info(f"Starting container from image {self.tag_name}")
+        self._synced_file_hashes = {}
         self.container = self.client.containers.run(
             self.tag_name,
             detach=True,
@@ -96,36 +306,63 @@ class BaseContainer(ABC):
     ):
         """Update files in the running container with files from a local directory.
 
-        Creates a tar archive of the new files and copies them into the workdir of the container.
+        Only files whose content differs from what was last copied into the container are
+        sent. All removals and parent directory creations are applied with a single command,
+        and the changed files are copied with a single in-memory tar archive, so a sync takes
+        at most two round trips to the container.
 
         Args:
-          new_project_path: Path to the directory containing new files.
+          project_root_path: Absolute path to the local directory containing the files.
+          updated_files: Paths of the added or modified files, relative to project_root_path.
+          removed_files: Paths of the removed files, relative to project_root_path.
         """
         if not project_root_path.is_absolute():
-            raise ValueError("project_root_path {project_root_path} must be a absolute path")
+            raise ValueError(f"project_root_path {project_root_path} must be a absolute path")
 
         self._logger.info("Updating files in the container after edits.")
+        changed_files = []
+        for file in updated_files:
+            content = (project_root_path / file).read_bytes()
+            content_hash = hashlib.sha256(content).hexdigest()
+            if self._synced_file_hashes.get(file.as_posix()) == content_hash:
+                self._logger.debug(f"Skipping {file} because it is unchanged in the container")
+                continue
+            changed_files.append((file, content, content_hash))
+
+        shell_commands = []
+        if removed_files:
+            self._logger.info(f"Removing {len(removed_files)} files in the container")
+            shell_commands.append(
+                "rm -rf -- " + " ".join(shlex.quote(file.as_posix()) for file in removed_files)
+            )
+        parent_dirs = sorted(
+            {file.parent.as_posix() for file, _, _ in changed_files if file.parent != Path(".")}
+        )
+        if parent_dirs:
+            shell_commands.append(
+                "mkdir -p -- " + " ".join(shlex.quote(dir_path) for dir_path in parent_dirs)
+            )
+        if shell_commands:
+            self.execute_command(" && ".join(shell_commands))
         for file in removed_files:
-            self._logger.info(f"Removing file {file} in the container")
-            self.execute_command(f"rm {file}")
-
-        parent_dirs = {str(file.parent) for file in updated_files}
-        for dir_path in sorted(parent_dirs):
-            self._logger.info(f"Creating directory {dir_path} in the container")
-            self.execute_command(f"mkdir -p {dir_path}")
-
-        with tempfile.NamedTemporaryFile() as temp_tar:
-            with tarfile.open(fileobj=temp_tar, mode="w") as tar:
-                for file in updated_files:
-                    local_absolute_file = project_root_path / file
-                    self._logger.info(f"Updating {file} in the container")
-                    tar.add(local_absolute_file, arcname=str(file))
-
-            temp_tar.seek(0)
-
-            self.container.put_archive(self.workdir, temp_tar.read())
+            self._synced_file_hashes.pop(file.as_posix(), None)
 
-        self._logger.info("Files updated successfully")
+        if changed_files:
+            tar_buffer = io.BytesIO()
+            with tarfile.open(fileobj=tar_buffer, mode="w") as tar:
+                for file, content, _ in changed_files:
+                    self._logger.info(f"Updating {file} in the container")
+                    tarinfo = tar.gettarinfo(project_root_path / file, arcname=file.as_posix())
+                    tarinfo.size = len(content)
+                    tar.addfile(tarinfo, io.BytesIO(content))
+            self.container.put_archive(self.workdir, tar_buffer.getvalue())
+            for file, _, content_hash in changed_files:
+                self._synced_file_hashes[file.as_posix()] = content_hash
+
+        self._logger.info(
+            f"Files updated successfully, {len(changed_files)} copied and "
+            f"{len(updated_files) - len(changed_files)} unchanged"
+        )
 
     @abstractmethod
     def run_build(self):
@@ -143,31 +380,169 @@ class BaseContainer(ABC):
         """
         pass
 
-    def execute_command(self, command: str) -> str:
-        """Execute a command in the running container.
+    def stream_command(
+        self, command: str, cancel_event: Optional[threading.Event] = None
+    ) -> Iterator[bytes]:
+        """Execute a command in the running container and stream its output.
+
+        The output is yielded chunk by chunk as the command produces it, so callers never
+        have to hold the whole output in memory. The command is killed when it runs longer
+        than self.timeout, when cancel_event or self.cancel_event is set, or when the caller
+        stops consuming the iterator before the command finishes.
 
         Args:
             command: Command to execute in the container.
+            cancel_event: Optional event that cancels the command once it is set.
 
-        Returns:
-            str: Output of the command as a string.
+        Yields:
+            bytes: Chunks of the combined stdout and stderr of the command.
         """
-        timeout_msg = f"""
+        pid_file = f"/tmp/prometheus-exec-{uuid.uuid4().hex}.pid"
+        # The command is passed as $0 so that it does not need any extra quoting. Recording the
+        # pid of timeout lets us kill the command, together with its process group, on cancel.
+        wrapper = (
+            f'timeout -k 5 {self.timeout}s /bin/bash -lc "$0" & echo $! > {pid_file}; '
+            f"wait $!; exit_code=$?; rm -f {pid_file}; exit $exit_code"
+        )
+        self._logger.debug(f"Streaming command in container: {command}")
+        exec_id = self.client.api.exec_create(
+            self.container.id, ["/bin/bash", "-c", wrapper, command], workdir=self.workdir
+        )["Id"]
+        output = self.client.api.exec_start(exec_id, stream=True)
+
+        finished = threading.Event()
+        cancel_events = [event for event in (cancel_event, self.cancel_event) if event is not None]
+        if cancel_events:
+            threading.Thread(
+                target=self._kill_command_on_cancel,
+                args=(exec_id, pid_file, cancel_events, finished),
+                daemon=True,
+            ).start()
+
+        completed = False
+        try:
+            for chunk in output:
+                yield chunk
+            completed = True
+        finally:
+            finished.set()
+            if not completed:
+                self._kill_command(exec_id, pid_file)
+                output.close()
+
+        if any(event.is_set() for event in cancel_events):
+            yield f"\n{command} was cancelled\n".encode("utf-8")
+            return
+        exit_code = self.client.api.exec_inspect(exec_id)["ExitCode"]
+        self._record_command(command, exit_code)
+        if exit_code in (124, 137):
+            yield f"""
 *******************************************************************************
 {command} timeout after {self.timeout} seconds
 *******************************************************************************
-"""
-        bash_cmd = ["/bin/bash", "-lc", command]
-        full_cmd = " ".join(["timeout", "-k", "5", f"{self.timeout}s", *bash_cmd])
-        self._logger.debug(f"Running command in container: {command}")
-        exec_result = self.container.exec_run(full_cmd, workdir=self.workdir)
-        exec_result_str = exec_result.output.decode("utf-8")
-
-        if exec_result.exit_code in (124, 137):
-            exec_result_str += timeout_msg
-
-        self._logger.debug(f"Command output:\n{exec_result_str}")
-        return exec_result_str
+""".encode("utf-8")
+
+    async def astream_command(
+        self, command: str, cancel_event: Optional[threading.Event] = None
+    ) -> AsyncIterator[bytes]:
+        """Asynchronous version of stream_command.
+
+        Chunks are read in a worker thread, so the event loop is never blocked while the
+        command runs. Cancelling the consuming task also kills the command and closes its
+        output stream.
+
+        Args:
+            command: Command to execute in the container.
+            cancel_event: Optional event that cancels the command once it is set.
+
+        Yields:
+            bytes: Chunks of the combined stdout and stderr of the command.
+        """
+        cancel_event = cancel_event or threading.Event()
+        chunks = self.stream_command(command, cancel_event)
+        loop = asyncio.get_running_loop()
+        next_chunk = None
+        try:
+            while True:
+                next_chunk = loop.run_in_executor(None, next, chunks, None)
+                # Shielded, so that a cancelled consumer can still wait for the read to finish
+                chunk = await asyncio.shield(next_chunk)
+                if chunk is None:
+                    return
+                yield chunk
+        finally:
+            # Kills the command, which ends the read that may still be running in the worker
+            cancel_event.set()
+            if next_chunk is not None and not next_chunk.done():
+                await asyncio.wait([next_chunk])
+            # The stream can only be closed once no thread is reading it anymore
+            await asyncio.to_thread(chunks.close)
+
+    def execute_command(
+        self,
+        command: str,
+        max_output_bytes: Optional[int] = None,
+        cancel_event: Optional[threading.Event] = None,
+    ) -> str:
+        """Execute a command in the running container.
+
+        Args:
+            command: Command to execute in the container.
+            max_output_bytes: If set, only the first and last max_output_bytes // 2 bytes of
+              the output are kept, and the middle is replaced with a truncation marker.
+            cancel_event: Optional event that cancels the command once it is set.
+
+        Returns:
+            str: Output of the command as a string.
+        """
+        output = HeadTailBuffer(max_output_bytes)
+        for chunk in self.stream_command(command, cancel_event):
+            output.write(chunk)
+        output_str = output.getvalue()
+
+        self._logger.debug(f"Command output:\n{output_str}")
+        return output_str
+
+    def _record_command(self, command: str, exit_code: int):
+        if exit_code == 0 and is_setup_command(command):
+            self.successful_setup_commands.append(command)
+        # Failing tests also exit with 1, the command itself is still the right one
+        if exit_code in (0, 1) and is_test_command(command):
+            self.successful_test_commands.append(command)
+
+    def _kill_command(self, exec_id: str, pid_file: str):
+        """Kills a command until its exec has finished.
+
+        A command cancelled right after it started may not have written its pid file yet, the
+        kill is then retried, with a backoff. The command is killed by timeout at the latest,
+        after self.timeout seconds.
+        """
+        self._logger.info("Killing the running command in the container")
+        interval = KILL_RETRY_INTERVAL
+        deadline = time.monotonic() + self.timeout + 10
+        while True:
+            self.container.exec_run(
+                ["/bin/bash", "-c", f"[ -f {pid_file} ] && kill -TERM $(cat {pid_file})"]
+            )
+            if not self.client.api.exec_inspect(exec_id)["Running"]:
+                return
+            if time.monotonic() > deadline:
+                self._logger.warning("The killed command is still running in the container")
+                return
+            time.sleep(interval)
+            interval = min(interval * 2, MAX_KILL_RETRY_INTERVAL)
+
+    def _kill_command_on_cancel(
+        self,
+        exec_id: str,
+        pid_file: str,
+        cancel_events: Sequence[threading.Event],
+        finished: threading.Event,
+    ):
+        while not finished.wait(0.5):
+            if any(event.is_set() for event in cancel_events):
+                self._kill_command(exec_id, pid_file)
+                return
 
     def restart_container(self):
         self._logger.info("Restarting the container")
@@ -0,0 +1,144 @@
+"""Caching of prepared container environments across issues of the same repository.
+
+Agents usually spend a large part of every issue discovering and installing the
+dependencies of a project. Once they succeeded, the container is committed to an image,
+keyed by the repository, the Dockerfile and the content of the dependency manifests of the
+project, so that later issues with the same dependencies start from the prepared environment. The
+commands that worked are stored as image labels and given to the agents as known-good
+defaults.
+"""
+
+import hashlib
+import json
+import os
+import re
+import time
+from pathlib import Path
+from typing import Mapping, Optional, Sequence
+
+ENVIRONMENT_CACHE_REPOSITORY = "prometheus_environment_cache"
+SETUP_COMMANDS_LABEL = "prometheus.setup_commands"
+TEST_COMMANDS_LABEL = "prometheus.test_commands"
+SAVED_AT_LABEL = "prometheus.saved_at"
+# The Dockerfile written into the project directory, it is not a file of the project
+DOCKERFILE_NAME = "prometheus.Dockerfile"
+# Cached environments are evicted, oldest first, once they are older than the maximum age or
+# once all of them together are larger than the maximum size
+ENVIRONMENT_CACHE_MAX_AGE = 14 * 24 * 60 * 60
+ENVIRONMENT_CACHE_MAX_BYTES = 50 * 1024**3
+
+# Files that determine which dependencies a project needs.
+DEPENDENCY_MANIFEST_FILES = frozenset(
+    {
+        "Cargo.lock",
+        "Cargo.toml",
+        "Gemfile",
+        "Gemfile.lock",
+        "Pipfile",
+        "Pipfile.lock",
+        "build.gradle",
+        "build.gradle.kts",
+        "composer.json",
+        "composer.lock",
+        "environment.yml",
+        "go.mod",
+        "go.sum",
+        "package-lock.json",
+        "package.json",
+        "pnpm-lock.yaml",
+        "poetry.lock",
+        "pom.xml",
+        "pyproject.toml",
+        "setup.cfg",
+        "setup.py",
+        "uv.lock",
+        "yarn.lock",
+    }
+)
+_REQUIREMENTS_FILE_RE = re.compile(r"^requirements.*\.(txt|in)$")
+# Directories that contain installed dependencies or VCS data, never manifests of the project.
+_SKIPPED_DIRS = frozenset({".git", ".venv", "venv", "node_modules", "vendor", "target", "build"})
+
+_SETUP_COMMAND_RE = re.compile(
+    r"\b(?:pip3?|uv pip|conda|mamba|poetry|pipenv|npm|pnpm|yarn|bundle|composer|gem|"
+    r"apt(?:-get)?|apk|yum|dnf|go|cargo|mvn|gradle|\./gradlew)\s+"
+    r"(?:install|ci|add|sync|get|fetch|mod download|dependency:resolve|dependencies|build)\b"
+    r"|\bpython3? -m pip install\b|\bpython3? setup\.py (?:develop|install)\b"
+)
+_TEST_COMMAND_RE = re.compile(
+    r"\b(?:pytest|tox|nox|jest|mocha|vitest|rspec|phpunit|ctest)\b"
+    r"|\bpython3? -m (?:pytest|unittest)\b"
+    r"|\b(?:npm|pnpm|yarn) (?:run )?test\b"
+    r"|\b(?:go|cargo|mvn|gradle|\./gradlew|make) test\b"
+)
+
+
+def get_environment_cache_key(
+    project_path: Path, dockerfile_content: str, repository_id: Optional[int] = None
+) -> str:
+    """Computes the cache key of the environment for a project.
+
+    Projects without dependency manifests often share the same Dockerfile, so the key also
+    depends on the repository and on the files at the top of the project. Otherwise, they
+    would reuse the build artifacts and the known-good commands of each other.
+
+    Args:
+      project_path: Path to the project directory.
+      dockerfile_content: Content of the Dockerfile the environment is built from.
+      repository_id: The ID of the repository of the project, if known.
+
+    Returns:
+      A hex digest that changes whenever the repository, the Dockerfile, the files at the top
+      of the project or a dependency manifest changes.
+    """
+    digest = hashlib.sha256(dockerfile_content.encode("utf-8"))
+    digest.update(f"\0repository:{repository_id}\0".encode("utf-8"))
+    top_level_names = sorted(
+        entry.name
+        for entry in project_path.iterdir()
+        if entry.name not in _SKIPPED_DIRS and entry.name != DOCKERFILE_NAME
+    )
+    digest.update(json.dumps(top_level_names).encode("utf-8"))
+    manifests = []
+    for dir_path, dir_names, file_names in os.walk(project_path):
+        dir_names[:] = [dir_name for dir_name in dir_names if dir_name not in _SKIPPED_DIRS]
+        for file_name in file_names:
+            if file_name in DEPENDENCY_MANIFEST_FILES or _REQUIREMENTS_FILE_RE.match(file_name):
+                manifests.append(Path(dir_path) / file_name)
+    for manifest in sorted(manifests):
+        digest.update(manifest.relative_to(project_path).as_posix().encode("utf-8"))
+        digest.update(hashlib.sha256(manifest.read_bytes()).digest())
+    return digest.hexdigest()
+
+
+def is_setup_command(command: str) -> bool:
+    return bool(_SETUP_COMMAND_RE.search(command))
+
+
+def is_test_command(command: str) -> bool:
+    # Installing a test framework is a setup command, not a test command
+    return bool(_TEST_COMMAND_RE.search(command)) and not is_setup_command(command)
+
+
+def encode_commands_labels(
+    setup_commands: Sequence[str], test_commands: Sequence[str]
+) -> Mapping[str, str]:
+    return {
+        SETUP_COMMANDS_LABEL: json.dumps(list(setup_commands)),
+        TEST_COMMANDS_LABEL: json.dumps(list(test_commands)),
+        SAVED_AT_LABEL: str(int(time.time())),
+    }
+
+
+def decode_saved_at_label(labels: Mapping[str, str]) -> int:
+    try:
+        return int(labels.get(SAVED_AT_LABEL, "0"))
+    except ValueError:
+        return 0
+
+
+def decode_commands_label(labels: Mapping[str, str], label: str) -> Sequence[str]:
+    try:
+        return json.loads(labels.get(label, "[]"))
+    except json.JSONDecodeError:
+        return []
@@ -0,0 +1,6 @@
+class IssueCancelledException(Exception):
+    """
+    Exception raised when the processing of an issue is cancelled before it finished.
+    """
+
+    pass
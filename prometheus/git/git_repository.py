@@ -131,6 +131,45 @@ class GitRepository:
             shutil.rmtree(self.repo.working_dir)
             self.repo = None
 
+    def create_worktree(self, worktree_path: Path) -> "GitRepository":
+        """Create a detached worktree of the current commit.
+
+        Worktrees share the object database of this repository, so they are cheap to create
+        and let several runs modify their own copy of the files at the same time.
+
+        Args:
+            worktree_path: Path where the worktree is created, it must not exist.
+
+        Returns:
+            A GitRepository for the worktree.
+        """
+        if self.repo is None:
+            raise InvalidGitRepositoryError("No repository is currently set.")
+        # Forget worktrees whose directory was deleted, e.g. by a run that crashed
+        self.repo.git.worktree("prune")
+        self.repo.git.worktree("add", "--detach", str(worktree_path), "HEAD")
+        worktree = GitRepository()
+        worktree.repo = Repo(worktree_path)
+        worktree.playground_path = worktree_path
+        # The worktree is detached, it has the default branch of this repository
+        worktree.default_branch = self.default_branch
+        return worktree
+
+    def remove_worktree(self, worktree_path: Path):
+        """Remove a worktree of this repository, including any changes made in it.
+
+        Args:
+            worktree_path: Path of the worktree.
+        """
+        if self.repo is None:
+            raise InvalidGitRepositoryError("No repository is currently set.")
+        try:
+            self.repo.git.worktree("remove", "--force", str(worktree_path))
+        except GitCommandError:
+            # The worktree may be partially created or already deleted
+            shutil.rmtree(worktree_path, ignore_errors=True)
+            self.repo.git.worktree("prune")
+
     def apply_patch(self, patch: str):
         """Apply a patch to the current repository."""
         with tempfile.NamedTemporaryFile(mode="w", suffix=".patch") as tmp_file:
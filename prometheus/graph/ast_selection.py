@@ -0,0 +1,109 @@
+"""Selection of the tree-sitter nodes that are worth materializing in the knowledge graph.
+
+Materializing every tree-sitter node down to a depth creates mostly punctuation, identifier
+and operator nodes, while the context retrieval searches for definitions and their usages.
+In the selective mode of the FileGraphBuilder, only the nodes selected here become ASTNodes:
+
+* The definitions and imports of the symbol table queries.
+* The calls, which connect the code to the definitions it uses.
+* The docstrings and comments, which document the code around them.
+
+The rest of the code is kept as compact ranges, see FileGraphBuilder.
+"""
+
+import functools
+from pathlib import Path
+from typing import Optional, Sequence
+
+from tree_sitter import Node, Query, Tree
+
+from prometheus.graph.symbol_table import DEFINITION_QUERIES
+from prometheus.parser.file_types import FileType
+from prometheus.parser.tree_sitter_parser import FILE_TYPE_TO_LANG, get_language
+
+# Captures: @selected, in addition to the @definition and @import of the DEFINITION_QUERIES
+SELECTION_QUERIES = {
+    "bash": """
+(command) @selected
+(comment) @selected
+""",
+    "c": """
+(call_expression) @selected
+(comment) @selected
+""",
+    "c_sharp": """
+[(invocation_expression) (object_creation_expression)] @selected
+(comment) @selected
+""",
+    "cpp": """
+[(call_expression) (new_expression)] @selected
+(comment) @selected
+""",
+    "go": """
+(call_expression) @selected
+(comment) @selected
+""",
+    "java": """
+[(method_invocation) (object_creation_expression)] @selected
+[(line_comment) (block_comment)] @selected
+""",
+    "javascript": """
+[(call_expression) (new_expression)] @selected
+(comment) @selected
+""",
+    "kotlin": """
+(call_expression) @selected
+[(line_comment) (multiline_comment)] @selected
+""",
+    "php": """
+[(function_call_expression) (member_call_expression) (scoped_call_expression) (object_creation_expression)] @selected
+(comment) @selected
+""",
+    "python": """
+(call) @selected
+(module . (expression_statement (string)) @selected)
+(block . (expression_statement (string)) @selected)
+""",
+    "ruby": """
+(call) @selected
+(comment) @selected
+""",
+    "rust": """
+[(call_expression) (macro_invocation)] @selected
+[(line_comment) (block_comment)] @selected
+""",
+    "typescript": """
+[(call_expression) (new_expression)] @selected
+(comment) @selected
+""",
+}
+
+
+@functools.cache
+def _get_query(lang: str) -> Optional[Query]:
+    if lang not in SELECTION_QUERIES or lang not in DEFINITION_QUERIES:
+        return None
+    return get_language(lang).query(DEFINITION_QUERIES[lang] + SELECTION_QUERIES[lang])
+
+
+def get_selected_nodes(file: Path, tree: Tree) -> Optional[Sequence[Node]]:
+    """Selects the tree-sitter nodes of a source file that should be materialized.
+
+    Args:
+      file: The source file, its extension determines the language.
+      tree: The tree-sitter tree of the file.
+
+    Returns:
+      The selected tree-sitter nodes, or None if the language has no selection query, in
+      which case the file should be materialized by depth.
+    """
+    lang = FILE_TYPE_TO_LANG.get(FileType.from_path(file))
+    query = _get_query(lang) if lang is not None else None
+    if query is None:
+        return None
+
+    return [
+        node
+        for node, capture_name in query.captures(tree.root_node)
+        if capture_name in ("definition", "import", "selected")
+    ]
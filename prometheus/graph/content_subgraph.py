@@ -0,0 +1,99 @@
+"""The content of the files of a knowledge graph, as subgraphs keyed by a hash.
+
+The content of a file is the subgraph below its FileNode: the root ASTNode and all its
+descendants, or the TextNodes of its chunks, the edges between them, and their DEFINES,
+REFERENCES and IMPORTS edges to the SymbolNodes. Two commits of a repository share most of
+their files, and the content of a file is then the same in both knowledge graphs, but for the
+node IDs. The hash of a content subgraph identifies it whatever its node IDs: the nodes are
+hashed in the order of their IDs, which is the order they were built in, and the edges by
+the positions of their nodes in that order, and by name for the SymbolNodes.
+"""
+
+import dataclasses
+import hashlib
+import itertools
+from collections import defaultdict
+from typing import Dict, List
+
+from prometheus.graph.graph_types import (
+    KnowledgeGraphEdge,
+    KnowledgeGraphEdgeType,
+    KnowledgeGraphNode,
+)
+from prometheus.graph.knowledge_graph import KnowledgeGraph
+
+
+@dataclasses.dataclass
+class ContentSubgraph:
+    """The content subgraph of a file.
+
+    Attributes:
+      file_node: The FileNode of the file.
+      content_hash: The hash of the subgraph, the same for the same content in any graph.
+      kg_nodes: The ASTNodes or TextNodes of the file, by node ID.
+      kg_edges: The HAS_AST or HAS_TEXT edges of the file, and the edges from kg_nodes.
+    """
+
+    file_node: KnowledgeGraphNode
+    content_hash: str
+    kg_nodes: List[KnowledgeGraphNode]
+    kg_edges: List[KnowledgeGraphEdge]
+
+
+def get_content_subgraphs(kg: KnowledgeGraph) -> List[ContentSubgraph]:
+    """Returns the content subgraphs of the files of a knowledge graph that have content.
+
+    Directories, and the files that were skipped, like binary files, have no content.
+    """
+    content_edges: Dict[int, List[KnowledgeGraphEdge]] = defaultdict(list)
+    edges_from: Dict[int, List[KnowledgeGraphEdge]] = defaultdict(list)
+    for kg_edge in itertools.chain(kg.get_has_ast_edges(), kg.get_has_text_edges()):
+        content_edges[kg_edge.source.node_id].append(kg_edge)
+    for kg_edge in itertools.chain(
+        kg.get_parent_of_edges(), kg.get_next_chunk_edges(), kg.get_symbol_edges()
+    ):
+        edges_from[kg_edge.source.node_id].append(kg_edge)
+
+    content_subgraphs = []
+    for kg_node in kg.get_file_nodes():
+        if kg_node.node_id not in content_edges:
+            continue
+        kg_edges = list(content_edges[kg_node.node_id])
+        kg_nodes = []
+        stack = [kg_edge.target for kg_edge in kg_edges]
+        while stack:
+            content_node = stack.pop()
+            kg_nodes.append(content_node)
+            for kg_edge in edges_from[content_node.node_id]:
+                kg_edges.append(kg_edge)
+                if kg_edge.type == KnowledgeGraphEdgeType.parent_of:
+                    stack.append(kg_edge.target)
+        kg_nodes.sort(key=lambda content_node: content_node.node_id)
+        content_subgraphs.append(
+            ContentSubgraph(kg_node, _hash_content(kg_node, kg_nodes, kg_edges), kg_nodes, kg_edges)
+        )
+    return content_subgraphs
+
+
+def _hash_content(
+    file_node: KnowledgeGraphNode,
+    kg_nodes: List[KnowledgeGraphNode],
+    kg_edges: List[KnowledgeGraphEdge],
+) -> str:
+    positions = {file_node.node_id: -1}
+    positions.update((kg_node.node_id, i) for i, kg_node in enumerate(kg_nodes))
+    # The SymbolNodes are not part of the content, the edges to them are hashed by name
+    edges = sorted(
+        (
+            positions[kg_edge.source.node_id],
+            str(kg_edge.type),
+            positions.get(kg_edge.target.node_id, -1),
+            getattr(kg_edge.target.node, "name", ""),
+        )
+        for kg_edge in kg_edges
+    )
+    content_hash = hashlib.sha256()
+    for kg_node in kg_nodes:
+        content_hash.update(repr(kg_node.node).encode("utf-8", "surrogatepass"))
+    content_hash.update(repr(edges).encode("utf-8", "surrogatepass"))
+    return content_hash.hexdigest()
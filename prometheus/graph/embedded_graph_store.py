@@ -0,0 +1,466 @@
+"""A store of knowledge graphs embedded in the process, for deployments without Neo4j.
+
+For a single-node deployment that indexes a few codebases, a Neo4j server adds a network
+round trip to every tool call, and the memory and the operation of a JVM. The
+EmbeddedGraphStore keeps the knowledge graphs in memory instead, with an index for each
+lookup of the graph traversal tools:
+
+* the FileNodes under the root by basename and by relative path;
+* the ASTNodes of every file, and its root ASTNode;
+* the TextNodes of every file, and the next chunk of every TextNode;
+* the definitions, references and imports of every symbol name.
+
+The store has the same methods as KnowledgeGraphHandler to write, read and delete
+knowledge graphs, and is a GraphStore (see graph_store) for the graph traversal tools, with
+the same rows in the same order as Neo4jGraphStore. The knowledge graphs are saved as
+snapshots (see knowledge_graph_snapshot) in a directory, and loaded when they are first
+used after a restart.
+"""
+
+import logging
+import threading
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Mapping, Optional, Sequence, Tuple
+
+from prometheus.graph import knowledge_graph_snapshot
+from prometheus.graph.graph_types import (
+    KnowledgeGraphEdge,
+    KnowledgeGraphEdgeType,
+    KnowledgeGraphNode,
+)
+from prometheus.graph.knowledge_graph import KnowledgeGraph
+
+# The snapshots of the store are only read by the store, they do not need a version
+_SNAPSHOT_VERSION = "embedded"
+
+
+class _IndexedKnowledgeGraph:
+    """The nodes and edges of a knowledge graph, indexed for the graph traversal tools."""
+
+    def __init__(
+        self,
+        root_node_id: int,
+        kg_nodes: Sequence[KnowledgeGraphNode],
+        kg_edges: Sequence[KnowledgeGraphEdge],
+        selective_ast: bool = False,
+    ):
+        self.root_node_id = root_node_id
+        self.kg_nodes = kg_nodes
+        self.kg_edges = kg_edges
+        self.selective_ast = selective_ast
+        node_id_to_node = {kg_node.node_id: kg_node for kg_node in kg_nodes}
+        if root_node_id not in node_id_to_node:
+            raise ValueError(f"Node with node_id {root_node_id} not found.")
+        self.root_node = node_id_to_node[root_node_id]
+
+        children: Dict[int, List[KnowledgeGraphNode]] = defaultdict(list)
+        kg_edges_by_type: Dict[KnowledgeGraphEdgeType, List[KnowledgeGraphEdge]] = defaultdict(list)
+        for kg_edge in kg_edges:
+            kg_edges_by_type[kg_edge.type].append(kg_edge)
+            if kg_edge.type in (KnowledgeGraphEdgeType.has_file, KnowledgeGraphEdgeType.parent_of):
+                children[kg_edge.source.node_id].append(kg_edge.target)
+
+        # The files and directories under the root, like (root)-[:HAS_FILE*]->(f)
+        self.file_nodes: List[KnowledgeGraphNode] = []
+        stack = [self.root_node]
+        while stack:
+            for child in children[stack.pop().node_id]:
+                self.file_nodes.append(child)
+                stack.append(child)
+        self.file_nodes.sort(key=lambda kg_node: kg_node.node_id)
+        self._file_nodes_by_basename: Dict[str, List[KnowledgeGraphNode]] = defaultdict(list)
+        self._file_nodes_by_relative_path: Dict[str, List[KnowledgeGraphNode]] = defaultdict(list)
+        for file_node in self.file_nodes:
+            self._file_nodes_by_basename[file_node.node.basename].append(file_node)
+            self._file_nodes_by_relative_path[file_node.node.relative_path].append(file_node)
+        file_node_ids = {file_node.node_id for file_node in self.file_nodes}
+
+        # The ASTNodes under the root ASTNode of every file, like
+        # (f)-[:HAS_AST]->(:ASTNode)-[:PARENT_OF*]->(a), and the file of every ASTNode
+        self.ast_root_nodes: Dict[int, KnowledgeGraphNode] = {}
+        self.ast_nodes: Dict[int, List[KnowledgeGraphNode]] = {}
+        self.ast_node_files: Dict[int, KnowledgeGraphNode] = {}
+        for kg_edge in kg_edges_by_type[KnowledgeGraphEdgeType.has_ast]:
+            file_node = kg_edge.source
+            if file_node.node_id not in file_node_ids:
+                continue
+            self.ast_root_nodes[file_node.node_id] = kg_edge.target
+            self.ast_node_files[kg_edge.target.node_id] = file_node
+            ast_nodes = []
+            stack = [kg_edge.target]
+            while stack:
+                for child in reversed(children[stack.pop().node_id]):
+                    ast_nodes.append(child)
+                    self.ast_node_files[child.node_id] = file_node
+                    stack.append(child)
+            self.ast_nodes[file_node.node_id] = ast_nodes
+
+        # The TextNodes of every file, the file of every TextNode and the next chunks
+        self.text_nodes: Dict[int, List[KnowledgeGraphNode]] = defaultdict(list)
+        self.text_node_files: Dict[int, KnowledgeGraphNode] = {}
+        for kg_edge in kg_edges_by_type[KnowledgeGraphEdgeType.has_text]:
+            if kg_edge.source.node_id in file_node_ids:
+                self.text_nodes[kg_edge.source.node_id].append(kg_edge.target)
+                self.text_node_files[kg_edge.target.node_id] = kg_edge.source
+        self.next_text_nodes: Dict[int, List[KnowledgeGraphNode]] = defaultdict(list)
+        for kg_edge in kg_edges_by_type[KnowledgeGraphEdgeType.next_chunk]:
+            self.next_text_nodes[kg_edge.source.node_id].append(kg_edge.target)
+        self.not_first_text_node_ids = {
+            kg_edge.target.node_id
+            for kg_edge in kg_edges_by_type[KnowledgeGraphEdgeType.next_chunk]
+        }
+
+        # The ASTNodes that define, reference or import every symbol name
+        self.symbol_occurrences: Dict[
+            str, List[Tuple[KnowledgeGraphNode, KnowledgeGraphEdgeType]]
+        ] = defaultdict(list)
+        for edge_type in (
+            KnowledgeGraphEdgeType.defines,
+            KnowledgeGraphEdgeType.references,
+            KnowledgeGraphEdgeType.imports,
+        ):
+            for kg_edge in kg_edges_by_type[edge_type]:
+                if kg_edge.source.node_id in self.ast_node_files:
+                    self.symbol_occurrences[kg_edge.target.node.name].append(
+                        (kg_edge.source, edge_type)
+                    )
+
+    def get_file_nodes(
+        self, basename: Optional[str] = None, relative_path: Optional[str] = None
+    ) -> Sequence[KnowledgeGraphNode]:
+        """Returns the FileNodes with a basename or a relative path, or all, by node ID."""
+        if relative_path is not None:
+            return self._file_nodes_by_relative_path.get(relative_path, [])
+        if basename is not None:
+            return self._file_nodes_by_basename.get(basename, [])
+        return self.file_nodes
+
+
+class EmbeddedGraphStore:
+    """Stores knowledge graphs in memory and in a directory, instead of in Neo4j.
+
+    It can be shared by threads.
+    """
+
+    def __init__(self, storage_dir: Path):
+        """
+        Args:
+          storage_dir: The directory where the knowledge graphs are saved.
+        """
+        self.storage_dir = Path(storage_dir)
+        self.storage_dir.mkdir(parents=True, exist_ok=True)
+        self._graphs: Dict[int, _IndexedKnowledgeGraph] = {}
+        self._versions: Dict[int, str] = {}
+        self._lock = threading.Lock()
+        self._logger = logging.getLogger("prometheus.graph.embedded_graph_store")
+
+        # The ID after the largest node ID of every stored knowledge graph, by root node ID
+        self._next_node_ids: Dict[int, int] = {}
+        for path in self.storage_dir.glob("*.kg"):
+            try:
+                root_node_id, n_nodes = knowledge_graph_snapshot.read_snapshot_size(path)
+            except ValueError as e:
+                self._logger.warning(f"Ignoring the knowledge graph at {path}: {e}")
+                continue
+            self._next_node_ids[root_node_id] = root_node_id + n_nodes
+        # The first node ID that was not allocated yet
+        self._next_free_node_id = max(self._next_node_ids.values(), default=0)
+
+    ###########################################################################
+    #                   The methods of KnowledgeGraphHandler                  #
+    ###########################################################################
+
+    def write_knowledge_graph(self, kg: KnowledgeGraph):
+        """Stores a knowledge graph, and saves it to the storage directory."""
+        kg_nodes = [
+            *kg.get_file_nodes(),
+            *kg.get_ast_nodes(),
+            *kg.get_text_nodes(),
+            *kg.get_symbol_nodes(),
+        ]
+        kg_edges = [
+            *kg.get_has_file_edges(),
+            *kg.get_has_ast_edges(),
+            *kg.get_parent_of_edges(),
+            *kg.get_has_text_edges(),
+            *kg.get_next_chunk_edges(),
+            *kg.get_symbol_edges(),
+        ]
+        graph = _IndexedKnowledgeGraph(kg.root_node_id, kg_nodes, kg_edges, kg.selective_ast)
+        knowledge_graph_snapshot.write_snapshot(
+            self._get_path(kg.root_node_id),
+            _SNAPSHOT_VERSION,
+            kg.root_node_id,
+            kg_nodes,
+            kg_edges,
+            kg.selective_ast,
+        )
+        with self._lock:
+            self._graphs[kg.root_node_id] = graph
+            self._next_node_ids[kg.root_node_id] = kg.get_next_node_id()
+            self._next_free_node_id = max(self._next_free_node_id, kg.get_next_node_id())
+
+    def read_knowledge_graph(
+        self,
+        root_node_id: int,
+        max_ast_depth: int,
+        chunk_size: int,
+        chunk_overlap: int,
+    ) -> KnowledgeGraph:
+        """Returns a stored knowledge graph, with the selective_ast it was built with.
+
+        Raises:
+          ValueError: If there is no knowledge graph with this root node ID.
+        """
+        graph = self._get_graph(root_node_id)
+        if graph is None:
+            raise ValueError(f"Node with node_id {root_node_id} not found.")
+        return KnowledgeGraph(
+            max_ast_depth,
+            chunk_size,
+            chunk_overlap,
+            root_node_id,
+            graph.root_node,
+            list(graph.kg_nodes),
+            list(graph.kg_edges),
+            graph.selective_ast,
+        )
+
+    def knowledge_graph_exists(self, root_node_id: int) -> bool:
+        with self._lock:
+            return root_node_id in self._next_node_ids
+
+    def set_knowledge_graph_version(self, root_node_id: int, version: str):
+        """Stores the version of a knowledge graph, in memory only.
+
+        The store needs no snapshots of its own graphs, the versions are only kept for
+        the callers of KnowledgeGraphHandler.
+        """
+        with self._lock:
+            self._versions[root_node_id] = version
+
+    def get_knowledge_graph_version(self, root_node_id: int) -> Optional[str]:
+        with self._lock:
+            return self._versions.get(root_node_id)
+
+    def allocate_node_ids(self, n_nodes: int) -> int:
+        """Allocates a block of node IDs for a new knowledge graph, and returns its first ID."""
+        with self._lock:
+            node_id = self._next_free_node_id
+            self._next_free_node_id += n_nodes
+            return node_id
+
+    def clear_knowledge_graph(
+        self, root_node_id: int, progress_callback: Optional[Callable[[int, int], None]] = None
+    ):
+        # The knowledge graph is deleted at once, without progress to report
+        with self._lock:
+            self._graphs.pop(root_node_id, None)
+            self._versions.pop(root_node_id, None)
+            self._next_node_ids.pop(root_node_id, None)
+            self._get_path(root_node_id).unlink(missing_ok=True)
+
+    def clear_all_knowledge_graph(self):
+        with self._lock:
+            for root_node_id in list(self._next_node_ids):
+                self._get_path(root_node_id).unlink(missing_ok=True)
+            self._graphs = {}
+            self._versions = {}
+            self._next_node_ids = {}
+            self._next_free_node_id = 0
+
+    def close(self):
+        """Nothing to release, the knowledge graphs are saved when they are written."""
+
+    ###########################################################################
+    #                   The queries of the graph traversal tools              #
+    ###########################################################################
+
+    def find_file_nodes(
+        self,
+        root_node_id: int,
+        basename: Optional[str] = None,
+        relative_path: Optional[str] = None,
+        limit: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        """Finds the files and directories with a basename or relative path, by node ID."""
+        graph = self._get_graph(root_node_id)
+        if graph is None:
+            return []
+        return [
+            {"FileNode": _to_row(file_node)}
+            for file_node in graph.get_file_nodes(basename, relative_path)
+        ][:limit]
+
+    def find_ast_nodes(
+        self,
+        root_node_id: int,
+        basename: Optional[str] = None,
+        relative_path: Optional[str] = None,
+        text: Optional[str] = None,
+        type: Optional[str] = None,
+        limit: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        """Finds the ASTNodes that contain a text or have a type in the files with a basename
+        or relative path, the shortest first. The root ASTNodes of the files are excluded."""
+        graph = self._get_graph(root_node_id)
+        if graph is None:
+            return []
+        rows = []
+        for file_node in graph.get_file_nodes(basename, relative_path):
+            for kg_node in graph.ast_nodes.get(file_node.node_id, ()):
+                if text is not None and text not in kg_node.node.text:
+                    continue
+                if type is not None and kg_node.node.type != type:
+                    continue
+                rows.append({"FileNode": _to_row(file_node), "ASTNode": _to_row(kg_node)})
+        rows.sort(key=lambda row: len(row["ASTNode"]["text"]))
+        return rows[:limit]
+
+    def find_symbol_occurrences(
+        self,
+        root_node_id: int,
+        name: str,
+        edge_types: Sequence[KnowledgeGraphEdgeType],
+        with_reference_type: bool = False,
+        limit: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        """Finds the ASTNodes that define, reference or import a name, by file and line.
+
+        Args:
+          root_node_id: The root node ID of the knowledge graph.
+          name: The symbol name.
+          edge_types: The types of the occurrences, DEFINES, REFERENCES or IMPORTS.
+          with_reference_type: Whether the rows have the type of the occurrence, in their
+            "reference_type" key.
+          limit: The maximum number of rows.
+        """
+        graph = self._get_graph(root_node_id)
+        if graph is None:
+            return []
+        rows = []
+        for kg_node, edge_type in graph.symbol_occurrences.get(name, ()):
+            if edge_type not in edge_types:
+                continue
+            row = {
+                "FileNode": _to_row(graph.ast_node_files[kg_node.node_id]),
+                "ASTNode": _to_row(kg_node),
+            }
+            if with_reference_type:
+                row["reference_type"] = edge_type.value
+            rows.append(row)
+        rows.sort(key=lambda row: (row["FileNode"]["relative_path"], row["ASTNode"]["start_line"]))
+        return rows[:limit]
+
+    def find_text_nodes(
+        self,
+        root_node_id: int,
+        text: str,
+        basename: Optional[str] = None,
+        limit: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        """Finds the TextNodes that contain a text, in the files with a basename, by node ID."""
+        graph = self._get_graph(root_node_id)
+        if graph is None:
+            return []
+        rows = [
+            {"FileNode": _to_row(file_node), "TextNode": _to_row(kg_node)}
+            for file_node in graph.get_file_nodes(basename)
+            for kg_node in graph.text_nodes.get(file_node.node_id, ())
+            if text in kg_node.node.text
+        ]
+        rows.sort(key=lambda row: row["TextNode"]["node_id"])
+        return rows[:limit]
+
+    def get_next_text_nodes(self, root_node_id: int, node_id: int) -> List[Dict[str, Any]]:
+        """Returns the next chunk of a TextNode."""
+        graph = self._get_graph(root_node_id)
+        if graph is None or node_id not in graph.text_node_files:
+            return []
+        file_node = graph.text_node_files[node_id]
+        return [
+            {"FileNode": _to_row(file_node), "TextNode": _to_row(kg_node)}
+            for kg_node in graph.next_text_nodes.get(node_id, ())
+        ]
+
+    def get_ast_root_nodes(
+        self,
+        root_node_id: int,
+        basename: Optional[str] = None,
+        relative_path: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        """Returns the root ASTNode, with the whole source code, of the files with a basename
+        or relative path, by node ID of the file."""
+        graph = self._get_graph(root_node_id)
+        if graph is None:
+            return []
+        return [
+            {
+                "FileNode": _to_row(file_node),
+                "ASTNode": _to_row(graph.ast_root_nodes[file_node.node_id]),
+            }
+            for file_node in graph.get_file_nodes(basename, relative_path)
+            if file_node.node_id in graph.ast_root_nodes
+        ]
+
+    def get_first_text_nodes(
+        self,
+        root_node_id: int,
+        basename: Optional[str] = None,
+        relative_path: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        """Returns the first chunks of the files with a basename or relative path, by node ID
+        of the file."""
+        graph = self._get_graph(root_node_id)
+        if graph is None:
+            return []
+        return [
+            {"FileNode": _to_row(file_node), "TextNode": _to_row(kg_node)}
+            for file_node in graph.get_file_nodes(basename, relative_path)
+            for kg_node in graph.text_nodes.get(file_node.node_id, ())
+            if kg_node.node_id not in graph.not_first_text_node_ids
+        ]
+
+    def get_text_nodes(
+        self,
+        root_node_id: int,
+        basename: Optional[str] = None,
+        relative_path: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        """Returns all the chunks of the files with a basename or relative path, by node ID of
+        the file and of the chunk."""
+        graph = self._get_graph(root_node_id)
+        if graph is None:
+            return []
+        return [
+            {"FileNode": _to_row(file_node), "TextNode": _to_row(kg_node)}
+            for file_node in graph.get_file_nodes(basename, relative_path)
+            for kg_node in sorted(
+                graph.text_nodes.get(file_node.node_id, ()), key=lambda kg_node: kg_node.node_id
+            )
+        ]
+
+    def _get_graph(self, root_node_id: int) -> Optional[_IndexedKnowledgeGraph]:
+        """Returns a stored knowledge graph, loading it from its snapshot the first time."""
+        with self._lock:
+            if root_node_id in self._graphs:
+                return self._graphs[root_node_id]
+            if root_node_id not in self._next_node_ids:
+                return None
+            path = self._get_path(root_node_id)
+            self._logger.info(f"Loading the knowledge graph at {path}")
+            _, kg_nodes, kg_edges, selective_ast = knowledge_graph_snapshot.read_snapshot(
+                path, _SNAPSHOT_VERSION
+            )
+            graph = _IndexedKnowledgeGraph(root_node_id, kg_nodes, kg_edges, selective_ast)
+            self._graphs[root_node_id] = graph
+            return graph
+
+    def _get_path(self, root_node_id: int) -> Path:
+        return self.storage_dir / f"{root_node_id}.kg"
+
+
+def _to_row(kg_node: KnowledgeGraphNode) -> Mapping[str, Any]:
+    """Returns the properties of a node, like the rows of a Neo4j query."""
+    return kg_node.to_neo4j_node()
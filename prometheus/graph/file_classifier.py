@@ -0,0 +1,115 @@
+"""Classification of the files that are not worth a full knowledge graph.
+
+Minified bundles, generated code, vendored dependencies and very large files have a
+supported extension, but parsing them takes most of the build time and their ASTNodes,
+which duplicate the text at every level of the tree, most of the graph, while the agents
+rarely need them. They are indexed shallowly instead: the FileNode and the text of the
+file in chunks, read from disk one chunk at a time. Binary files are skipped.
+
+A file is classified from its path, its size and its first bytes only.
+"""
+
+import enum
+import re
+import threading
+from collections import defaultdict
+from pathlib import Path, PurePosixPath
+from typing import Dict, Optional, Tuple
+
+from prometheus.parser import decoded_source
+
+# Larger files are indexed shallowly, by default, see PROMETHEUS_KNOWLEDGE_GRAPH_MAX_FILE_SIZE
+MAX_FILE_SIZE = 1_000_000
+# The number of bytes read at the start of a file to classify it
+HEAD_SIZE = 8192
+# The number of lines at the start of a file searched for a generated code comment
+HEADER_LINES = 5
+# Files whose first lines are longer than this on average are minified
+MAX_AVERAGE_LINE_LENGTH = 300
+
+_MINIFIED_NAME_RE = re.compile(r"[.-]min\.(js|css|mjs)$|\.bundle\.js$")
+_GENERATED_NAME_RE = re.compile(r"_pb2(_grpc)?\.pyi?$|\.pb\.(go|cc|h)$|\.g\.dart$|\.designer\.cs$")
+_GENERATED_HEADER_RE = re.compile(
+    rb"@generated|do not edit|code generated by|auto-?generated|generated by the protocol buffer",
+    re.IGNORECASE,
+)
+VENDORED_DIRS = frozenset(
+    {"vendor", "third_party", "thirdparty", "third-party", "node_modules", "bower_components"}
+)
+
+
+class FileClass(enum.StrEnum):
+    """How a file is indexed in the knowledge graph."""
+
+    REGULAR = "regular"
+    BINARY = "binary"
+    GENERATED = "generated"
+    MINIFIED = "minified"
+    VENDORED = "vendored"
+    LARGE = "large"
+
+
+def classify_file(file: Path, relative_path: str, max_file_size: Optional[int] = None) -> FileClass:
+    """Classifies a file that has a supported extension.
+
+    Args:
+      file: The file to classify.
+      relative_path: The path of the file relative to the root of the codebase, for the
+        vendored directories.
+      max_file_size: The size in bytes above which a file is LARGE, MAX_FILE_SIZE by default.
+
+    Returns:
+      FileClass.REGULAR if the file should be fully indexed.
+    """
+    with file.open("rb") as f:
+        head = f.read(HEAD_SIZE)
+    is_full_head = len(head) == HEAD_SIZE
+    # UTF-16 and UTF-32 text is full of NUL bytes, it is classified from its UTF-8 encoding
+    encoding, bom_length = decoded_source.detect_encoding(head)
+    if bom_length:
+        head = head[bom_length:].decode(encoding, errors="ignore").encode("utf-8")
+    elif b"\0" in head:
+        return FileClass.BINARY
+    header = b"\n".join(head.split(b"\n", HEADER_LINES)[:HEADER_LINES])
+    if _GENERATED_NAME_RE.search(file.name) or _GENERATED_HEADER_RE.search(header):
+        return FileClass.GENERATED
+    if _MINIFIED_NAME_RE.search(file.name) or (
+        is_full_head and len(head) / (head.count(b"\n") + 1) > MAX_AVERAGE_LINE_LENGTH
+    ):
+        return FileClass.MINIFIED
+    if VENDORED_DIRS.intersection(PurePosixPath(relative_path).parts[:-1]):
+        return FileClass.VENDORED
+    if max_file_size is None:
+        max_file_size = MAX_FILE_SIZE
+    if file.stat().st_size > max_file_size:
+        return FileClass.LARGE
+    return FileClass.REGULAR
+
+
+class FileClassStats:
+    """Counts the files and bytes that were indexed shallowly or skipped, by class.
+
+    It can be shared by threads.
+    """
+
+    def __init__(self):
+        self._stats: Dict[FileClass, Tuple[int, int]] = defaultdict(lambda: (0, 0))
+        self._lock = threading.Lock()
+
+    def add(self, file_class: FileClass, n_bytes: int):
+        with self._lock:
+            files, total_bytes = self._stats[file_class]
+            self._stats[file_class] = (files + 1, total_bytes + n_bytes)
+
+    def get(self) -> Dict[FileClass, Tuple[int, int]]:
+        """Returns the number of files and bytes by class."""
+        with self._lock:
+            return dict(self._stats)
+
+    def format(self) -> str:
+        """Formats the stats as one line per class, the most bytes first."""
+        stats = sorted(self.get().items(), key=lambda item: item[1][1], reverse=True)
+        return "\n".join(
+            f"{file_class}: {files} files, {n_bytes / 1e6:.2f} MB"
+            for file_class, (files, n_bytes) in stats
+        )
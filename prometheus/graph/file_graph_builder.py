@@ -1,20 +1,38 @@
 """Building knowledge graph for a single file."""
 
+import dataclasses
 from collections import deque
 from pathlib import Path
-from typing import Sequence, Tuple
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
 
 from langchain_core.documents import Document
 from langchain_text_splitters import RecursiveCharacterTextSplitter
+from tree_sitter import Node, Tree
 
+from prometheus.graph import ast_selection, file_classifier
+from prometheus.graph.file_classifier import FileClass
 from prometheus.graph.graph_types import (
     ASTNode,
+    FileNode,
     KnowledgeGraphEdge,
     KnowledgeGraphEdgeType,
     KnowledgeGraphNode,
     TextNode,
 )
-from prometheus.parser import tree_sitter_parser
+from prometheus.graph.symbol_table import SymbolTable
+from prometheus.parser import decoded_source, tree_sitter_parser
+from prometheus.parser.decoded_source import DecodedSource
+
+# The type of the ASTNodes of the code between the selected nodes, in the selective mode
+SKIPPED_RANGE_NODE_TYPE = "skipped_range"
+
+
+@dataclasses.dataclass
+class _SkippedRange:
+    """Consecutive unselected subtrees with the same closest materialized ancestor."""
+
+    kg_parent_node: KnowledgeGraphNode
+    nodes: List[Node] = dataclasses.field(default_factory=list)
 
 
 class FileGraphBuilder:
@@ -29,7 +47,14 @@ class FileGraphBuilder:
     edges (KnowledgeGraphEdge) with different relationship types (KnowledgeGraphEdgeType).
     """
 
-    def __init__(self, max_ast_depth: int, chunk_size: int, chunk_overlap: int):
+    def __init__(
+        self,
+        max_ast_depth: int,
+        chunk_size: int,
+        chunk_overlap: int,
+        selective_ast: bool = False,
+        max_file_size: Optional[int] = None,
+    ):
         """Initialize the FileGraphBuilder.
 
         Args:
@@ -37,10 +62,26 @@ class FileGraphBuilder:
             Higher values create more detailed but larger graphs.
           chunk_size: The chunk size for text files.
           chunk_overlap: The overlap size for text files.
+          selective_ast: Whether to only materialize the definitions, imports, calls and
+            docstrings of the source files, at any depth, instead of all nodes down to
+            max_ast_depth. The languages without a selection query are still materialized
+            down to max_ast_depth.
+          max_file_size: The size in bytes above which a file is only indexed shallowly,
+            file_classifier.MAX_FILE_SIZE by default.
         """
         self.max_ast_depth = max_ast_depth
         self.chunk_size = chunk_size
         self.chunk_overlap = chunk_overlap
+        self.selective_ast = selective_ast
+        self.max_file_size = (
+            max_file_size if max_file_size is not None else file_classifier.MAX_FILE_SIZE
+        )
+        # The largest files that are parsed are always mapped into memory
+        self._mmap_threshold = min(decoded_source.MMAP_THRESHOLD, self.max_file_size // 4)
+        # The throughput of the files parsed by the builder, by language
+        self.parse_stats = tree_sitter_parser.ParseStats()
+        # The files that were indexed shallowly or skipped, see file_classifier
+        self.file_class_stats = file_classifier.FileClassStats()
 
     def support_code_file(self, file: Path) -> bool:
         return tree_sitter_parser.supports_file(file)
@@ -53,7 +94,13 @@ class FileGraphBuilder:
         return self.support_code_file(file) or self.support_text_file(file)
 
     def build_file_graph(
-        self, parent_node: KnowledgeGraphNode, file: Path, next_node_id: int
+        self,
+        parent_node: KnowledgeGraphNode,
+        file: Path,
+        next_node_id: int,
+        symbol_table: Optional[SymbolTable] = None,
+        tree: Optional[Tree] = None,
+        source: Optional[DecodedSource] = None,
     ) -> Tuple[int, Sequence[KnowledgeGraphNode], Sequence[KnowledgeGraphEdge]]:
         """Build knowledge graph for a single file.
 
@@ -62,21 +109,43 @@ class FileGraphBuilder:
             The node attribute should have type FileNode.
           file: The file to build knowledge graph.
           next_node_id: The next available node id.
+          symbol_table: If given, the symbols of a source file are added to it.
+          tree: The tree-sitter tree of a source file, if it is already parsed.
+          source: The decoded source file that the tree was parsed from.
 
         Returns:
           A tuple of (next_node_id, kg_nodes, kg_edges), where next_node_id is the
           new next_node_id, kg_nodes is a list of all nodes created for the file,
           and kg_edges is a list of all edges created for this file.
         """
+        relative_path = (
+            parent_node.node.relative_path if isinstance(parent_node.node, FileNode) else file.name
+        )
+        file_class = file_classifier.classify_file(file, relative_path, self.max_file_size)
+        if file_class != FileClass.REGULAR:
+            self.file_class_stats.add(file_class, file.stat().st_size)
+            # Binary files only have their FileNode
+            if file_class == FileClass.BINARY:
+                return next_node_id, [], []
+            return self._shallow_file_graph(parent_node, file, next_node_id, file_class)
+
         # In this case, it is a file that tree sitter can parse (source code)
         if self.support_code_file(file):
-            return self._tree_sitter_file_graph(parent_node, file, next_node_id)
+            return self._tree_sitter_file_graph(
+                parent_node, file, next_node_id, symbol_table, tree, source
+            )
         # otherwise it is a text file that we can parse using langchain text splitter
         else:
             return self._text_file_graph(parent_node, file, next_node_id)
 
     def _tree_sitter_file_graph(
-        self, parent_node: KnowledgeGraphNode, file: Path, next_node_id: int
+        self,
+        parent_node: KnowledgeGraphNode,
+        file: Path,
+        next_node_id: int,
+        symbol_table: Optional[SymbolTable] = None,
+        tree: Optional[Tree] = None,
+        source: Optional[DecodedSource] = None,
     ) -> Tuple[int, Sequence[KnowledgeGraphNode], Sequence[KnowledgeGraphEdge]]:
         """
         Parse a file into a tree-sitter based abstract syntax tree (AST) and build a corresponding knowledge graph.
@@ -90,6 +159,11 @@ class FileGraphBuilder:
             parent_node (KnowledgeGraphNode): The parent knowledge graph node representing the file (should wrap a FileNode).
             file (Path): The file to be parsed and included in the knowledge graph.
             next_node_id (int): The next available node id (to ensure global uniqueness in the graph).
+            symbol_table (Optional[SymbolTable]): If given, the definitions, references and imports
+                of the file are added to it, while its tree-sitter tree is available.
+            tree (Optional[Tree]): The tree-sitter tree of the file. If not given, the file is parsed.
+            source (Optional[DecodedSource]): The decoded file that the tree was parsed from. If
+                not given, the file is read and decoded.
 
         Returns:
             Tuple[int, Sequence[KnowledgeGraphNode], Sequence[KnowledgeGraphEdge]]:
@@ -108,7 +182,8 @@ class FileGraphBuilder:
 
         Notes:
             - If the parsed tree is empty or contains errors, no nodes/edges are added.
-            - AST node text is decoded to utf-8 to ensure string compatibility.
+            - The file is decoded once, whatever its encoding, and the text of the AST nodes is
+              sliced from the decoded text.
             - The function only builds the AST subgraph for one file; integration into the global graph is done by the caller.
         """
 
@@ -116,8 +191,16 @@ class FileGraphBuilder:
         tree_sitter_nodes = []
         tree_sitter_edges = []
 
+        if source is None:
+            # A large file is only mapped into memory while its graph is built
+            with decoded_source.open_source(file, self._mmap_threshold) as source:
+                return self._tree_sitter_file_graph(
+                    parent_node, file, next_node_id, symbol_table, tree, source
+                )
+
         # Parse the file into a tree-sitter AST
-        tree = tree_sitter_parser.parse(file)
+        if tree is None:
+            tree = tree_sitter_parser.parse_source(file, source.data, stats=self.parse_stats)
         if tree.root_node.has_error or tree.root_node.child_count == 0:
             # Return empty results if the file cannot be parsed properly
             return next_node_id, tree_sitter_nodes, tree_sitter_edges
@@ -127,22 +210,41 @@ class FileGraphBuilder:
             type=tree.root_node.type,
             start_line=tree.root_node.start_point[0] + 1,
             end_line=tree.root_node.end_point[0] + 1,
-            text=tree.root_node.text.decode("utf-8"),
+            text=source.get_text(tree.root_node.start_byte, tree.root_node.end_byte),
         )
         kg_ast_root_node = KnowledgeGraphNode(next_node_id, ast_root_node)
         next_node_id += 1
         tree_sitter_nodes.append(kg_ast_root_node)
+        # Maps the tree-sitter nodes to their KnowledgeGraphNode, for the symbol table
+        kg_nodes_by_tree_sitter_id = {tree.root_node.id: kg_ast_root_node}
 
         # Add the HAS_AST edge connecting the file node to its AST root node
         tree_sitter_edges.append(
             KnowledgeGraphEdge(parent_node, kg_ast_root_node, KnowledgeGraphEdgeType.has_ast)
         )
 
+        selected_nodes = (
+            ast_selection.get_selected_nodes(file, tree) if self.selective_ast else None
+        )
+
         # Use an explicit stack for depth-first traversal of the AST
         node_stack = deque()
-        node_stack.append(
-            (tree.root_node, kg_ast_root_node, 1)
-        )  # (tree_sitter_node, kg_node, depth)
+        if selected_nodes is None:
+            node_stack.append(
+                (tree.root_node, kg_ast_root_node, 1)
+            )  # (tree_sitter_node, kg_node, depth)
+        else:
+            # In the selective mode, the depth-first traversal below is replaced
+            next_node_id = self._add_selected_ast_nodes(
+                source,
+                tree.root_node,
+                kg_ast_root_node,
+                selected_nodes,
+                next_node_id,
+                tree_sitter_nodes,
+                tree_sitter_edges,
+                kg_nodes_by_tree_sitter_id,
+            )
         while node_stack:
             tree_sitter_node, kg_node, depth = node_stack.pop()
 
@@ -157,12 +259,15 @@ class FileGraphBuilder:
                     type=tree_sitter_child_node.type,
                     start_line=tree_sitter_child_node.start_point[0] + 1,
                     end_line=tree_sitter_child_node.end_point[0] + 1,
-                    text=tree_sitter_child_node.text.decode("utf-8"),
+                    text=source.get_text(
+                        tree_sitter_child_node.start_byte, tree_sitter_child_node.end_byte
+                    ),
                 )
                 kg_child_ast_node = KnowledgeGraphNode(next_node_id, child_ast_node)
                 next_node_id += 1
 
                 tree_sitter_nodes.append(kg_child_ast_node)
+                kg_nodes_by_tree_sitter_id[tree_sitter_child_node.id] = kg_child_ast_node
                 # Add a PARENT_OF edge from the parent to this child
                 tree_sitter_edges.append(
                     KnowledgeGraphEdge(kg_node, kg_child_ast_node, KnowledgeGraphEdgeType.parent_of)
@@ -171,22 +276,178 @@ class FileGraphBuilder:
                 # Add the child node to the stack to continue traversal
                 node_stack.append((tree_sitter_child_node, kg_child_ast_node, depth + 1))
 
+        if symbol_table is not None:
+            symbol_table.add_file(file, tree, kg_nodes_by_tree_sitter_id)
+
         # Return the updated next_node_id, all nodes, and all edges for this file's AST subgraph
         return next_node_id, tree_sitter_nodes, tree_sitter_edges
 
+    def _add_selected_ast_nodes(
+        self,
+        source: DecodedSource,
+        root_node: Node,
+        kg_root_node: KnowledgeGraphNode,
+        selected_nodes: Sequence[Node],
+        next_node_id: int,
+        kg_nodes: List[KnowledgeGraphNode],
+        kg_edges: List[KnowledgeGraphEdge],
+        kg_nodes_by_tree_sitter_id: Dict[int, KnowledgeGraphNode],
+    ) -> int:
+        """Materializes the selected tree-sitter nodes under a root, and the code between them.
+
+        Every selected node becomes a child of its closest selected ancestor, whatever its
+        depth. The unselected subtrees between two selected nodes with the same parent are
+        merged into a single ASTNode of type SKIPPED_RANGE_NODE_TYPE, so that all the code
+        remains searchable in nodes smaller than the whole file.
+
+        Args:
+          source: The decoded file that the tree was parsed from.
+          root_node: The tree-sitter root node, already materialized as kg_root_node.
+          kg_root_node: The ASTNode of the root.
+          selected_nodes: The tree-sitter nodes to materialize.
+          next_node_id: The next available node id.
+          kg_nodes: The list the created ASTNodes are appended to.
+          kg_edges: The list the created PARENT_OF edges are appended to.
+          kg_nodes_by_tree_sitter_id: The mapping the created ASTNodes are added to, by the ID
+            of their tree-sitter node.
+
+        Returns:
+          The new next_node_id.
+        """
+        selected_node_ids = {node.id for node in selected_nodes}
+        # The unselected nodes that contain a selected node are traversed, not materialized
+        traversed_node_ids: Set[int] = set()
+        for node in selected_nodes:
+            ancestor = node.parent
+            while ancestor is not None and ancestor.id not in traversed_node_ids:
+                traversed_node_ids.add(ancestor.id)
+                ancestor = ancestor.parent
+
+        def add_kg_node(ast_node: ASTNode, kg_parent_node: KnowledgeGraphNode):
+            nonlocal next_node_id
+            kg_node = KnowledgeGraphNode(next_node_id, ast_node)
+            next_node_id += 1
+            kg_nodes.append(kg_node)
+            kg_edges.append(
+                KnowledgeGraphEdge(kg_parent_node, kg_node, KnowledgeGraphEdgeType.parent_of)
+            )
+            return kg_node
+
+        # The unselected subtrees not yet materialized, by the node ID of their parent
+        skipped_ranges: Dict[int, _SkippedRange] = {}
+        # The last line of the last selected child, by the node ID of its parent
+        last_selected_end_lines: Dict[int, int] = {}
+
+        def add_skipped_range(kg_parent_node: KnowledgeGraphNode, next_start_line: Optional[int]):
+            skipped_range = skipped_ranges.pop(kg_parent_node.node_id, None)
+            previous_end_line = last_selected_end_lines.get(kg_parent_node.node_id)
+            # Without a selected sibling, the parent itself is as small as the range
+            if skipped_range is None or (previous_end_line is None and next_start_line is None):
+                return
+            # The first line of a definition is its signature, already in the parent node
+            if previous_end_line is None and kg_parent_node is not kg_root_node:
+                previous_end_line = kg_parent_node.node.start_line - 1
+            # The code on the lines of the selected siblings is only a fragment of those lines
+            nodes = [
+                node
+                for node in skipped_range.nodes
+                if (previous_end_line is None or node.end_point[0] > previous_end_line)
+                and (next_start_line is None or node.start_point[0] < next_start_line)
+            ]
+            # Ranges of punctuation and keywords only are not worth a node
+            if not any(node.is_named for node in nodes):
+                return
+
+            add_kg_node(
+                ASTNode(
+                    type=SKIPPED_RANGE_NODE_TYPE,
+                    start_line=nodes[0].start_point[0] + 1,
+                    end_line=nodes[-1].end_point[0] + 1,
+                    text=source.get_text(nodes[0].start_byte, nodes[-1].end_byte),
+                ),
+                kg_parent_node,
+            )
+
+        # Depth-first traversal in source order, with the closest materialized ancestor
+        node_stack = deque((child, kg_root_node) for child in reversed(root_node.children))
+        while node_stack:
+            tree_sitter_node, kg_parent_node = node_stack.pop()
+            if tree_sitter_node.id in selected_node_ids:
+                add_skipped_range(kg_parent_node, tree_sitter_node.start_point[0])
+                last_selected_end_lines[kg_parent_node.node_id] = tree_sitter_node.end_point[0]
+                kg_node = add_kg_node(
+                    ASTNode(
+                        type=tree_sitter_node.type,
+                        start_line=tree_sitter_node.start_point[0] + 1,
+                        end_line=tree_sitter_node.end_point[0] + 1,
+                        text=source.get_text(
+                            tree_sitter_node.start_byte, tree_sitter_node.end_byte
+                        ),
+                    ),
+                    kg_parent_node,
+                )
+                kg_nodes_by_tree_sitter_id[tree_sitter_node.id] = kg_node
+                node_stack.extend((child, kg_node) for child in reversed(tree_sitter_node.children))
+            elif tree_sitter_node.id in traversed_node_ids:
+                node_stack.extend(
+                    (child, kg_parent_node) for child in reversed(tree_sitter_node.children)
+                )
+            else:
+                skipped_ranges.setdefault(
+                    kg_parent_node.node_id, _SkippedRange(kg_parent_node)
+                ).nodes.append(tree_sitter_node)
+
+        for skipped_range in list(skipped_ranges.values()):
+            add_skipped_range(skipped_range.kg_parent_node, None)
+        return next_node_id
+
     def _text_file_graph(
         self, parent_node: KnowledgeGraphNode, file: Path, next_node_id: int
     ) -> Tuple[int, Sequence[KnowledgeGraphNode], Sequence[KnowledgeGraphEdge]]:
         text_splitter = RecursiveCharacterTextSplitter(
             chunk_size=self.chunk_size, chunk_overlap=self.chunk_overlap, length_function=len
         )
-        text = file.open(encoding="utf-8").read()
+        with decoded_source.open_source(file, self._mmap_threshold) as source:
+            text = source.text
         documents = text_splitter.create_documents([text])
         return self._documents_to_file_graph(documents, parent_node, next_node_id)
 
+    def _shallow_file_graph(
+        self,
+        parent_node: KnowledgeGraphNode,
+        file: Path,
+        next_node_id: int,
+        file_class: FileClass,
+    ) -> Tuple[int, Sequence[KnowledgeGraphNode], Sequence[KnowledgeGraphEdge]]:
+        """Builds the TextNodes of a file that is not worth parsing, whatever its type."""
+        documents = (
+            Document(page_content=chunk, metadata={"file_class": file_class.value})
+            for chunk in self._read_chunks(file)
+        )
+        return self._documents_to_file_graph(documents, parent_node, next_node_id)
+
+    def _read_chunks(self, file: Path) -> Iterator[str]:
+        """Reads a file in overlapping chunks of chunk_size characters, one chunk at a time."""
+        chunk_size = max(self.chunk_size, 1)
+        step = max(chunk_size - self.chunk_overlap, 1)
+        with file.open("rb") as f:
+            encoding, bom_length = decoded_source.detect_encoding(
+                f.read(decoded_source.SAMPLE_SIZE)
+            )
+        with file.open(encoding=encoding, errors="replace") as f:
+            f.seek(bom_length)
+            chunk = f.read(chunk_size)
+            while chunk:
+                yield chunk
+                if len(chunk) < chunk_size:
+                    return
+                chunk = chunk[step:] + f.read(step)
+                if len(chunk) <= chunk_size - step:
+                    return
+
     def _documents_to_file_graph(
         self,
-        documents: Sequence[Document],
+        documents: Iterable[Document],
         parent_node: KnowledgeGraphNode,
         next_node_id: int,
     ) -> Tuple[int, Sequence[KnowledgeGraphNode], Sequence[KnowledgeGraphEdge]]:
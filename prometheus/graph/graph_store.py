@@ -0,0 +1,101 @@
+"""The queries of the graph traversal tools on a store of knowledge graphs.
+
+The graph traversal tools do not know where the knowledge graphs are stored: they call a
+GraphStore, implemented with Cypher queries for Neo4j by Neo4jGraphStore, and with indexes in
+memory by EmbeddedGraphStore. Every query returns rows like the rows of a Neo4j query, a
+mapping from "FileNode", "ASTNode", "TextNode" to the properties of the node, and both
+stores return the same rows in the same order.
+"""
+
+from typing import Any, Dict, List, Optional, Protocol, Sequence
+
+from prometheus.graph.graph_types import KnowledgeGraphEdgeType
+
+
+class GraphStore(Protocol):
+    def find_file_nodes(
+        self,
+        root_node_id: int,
+        basename: Optional[str] = None,
+        relative_path: Optional[str] = None,
+        limit: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        """Finds the files and directories with a basename or relative path, by node ID."""
+        ...
+
+    def find_ast_nodes(
+        self,
+        root_node_id: int,
+        basename: Optional[str] = None,
+        relative_path: Optional[str] = None,
+        text: Optional[str] = None,
+        type: Optional[str] = None,
+        limit: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        """Finds the ASTNodes that contain a text or have a type in the files with a basename
+        or relative path, the shortest first. The root ASTNodes of the files are excluded."""
+        ...
+
+    def find_symbol_occurrences(
+        self,
+        root_node_id: int,
+        name: str,
+        edge_types: Sequence[KnowledgeGraphEdgeType],
+        with_reference_type: bool = False,
+        limit: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        """Finds the ASTNodes that define, reference or import a name, by file and line.
+
+        Args:
+          root_node_id: The root node ID of the knowledge graph.
+          name: The symbol name.
+          edge_types: The types of the occurrences, DEFINES, REFERENCES or IMPORTS.
+          with_reference_type: Whether the rows have the type of the occurrence, in their
+            "reference_type" key.
+          limit: The maximum number of rows.
+        """
+        ...
+
+    def find_text_nodes(
+        self,
+        root_node_id: int,
+        text: str,
+        basename: Optional[str] = None,
+        limit: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        """Finds the TextNodes that contain a text, in the files with a basename, by node ID."""
+        ...
+
+    def get_next_text_nodes(self, root_node_id: int, node_id: int) -> List[Dict[str, Any]]:
+        """Returns the next chunk of a TextNode."""
+        ...
+
+    def get_ast_root_nodes(
+        self,
+        root_node_id: int,
+        basename: Optional[str] = None,
+        relative_path: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        """Returns the root ASTNode, with the whole source code, of the files with a basename
+        or relative path, by node ID of the file."""
+        ...
+
+    def get_first_text_nodes(
+        self,
+        root_node_id: int,
+        basename: Optional[str] = None,
+        relative_path: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        """Returns the first chunks of the files with a basename or relative path, by node ID
+        of the file."""
+        ...
+
+    def get_text_nodes(
+        self,
+        root_node_id: int,
+        basename: Optional[str] = None,
+        relative_path: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        """Returns all the chunks of the files with a basename or relative path, by node ID of
+        the file and of the chunk."""
+        ...
@@ -48,19 +48,32 @@ class TextNode:
     metadata: str
 
 
+@dataclasses.dataclass(frozen=True)
+class SymbolNode:
+    """A node representing a name that is defined in the codebase.
+
+    Attributes:
+      name: The name of a function, class, method, type..., like 'parse' or 'FileNode'.
+    """
+
+    name: str
+
+
 @dataclasses.dataclass(frozen=True)
 class KnowledgeGraphNode:
     """A node in the knowledge graph.
 
     Attributes:
       node_id: A id that uniquely identifies a node in the graph.
-      node: The node itself, can be a FileNode, ASTNode or TextNode.
+      node: The node itself, can be a FileNode, ASTNode, TextNode or SymbolNode.
     """
 
     node_id: int
-    node: Union[FileNode, ASTNode, TextNode]
+    node: Union[FileNode, ASTNode, TextNode, SymbolNode]
 
-    def to_neo4j_node(self) -> Union["Neo4jFileNode", "Neo4jASTNode", "Neo4jTextNode"]:
+    def to_neo4j_node(
+        self,
+    ) -> Union["Neo4jFileNode", "Neo4jASTNode", "Neo4jTextNode", "Neo4jSymbolNode"]:
         """Convert the KnowledgeGraphNode into a Neo4j node format."""
         match self.node:
             case FileNode():
@@ -83,6 +96,8 @@ class KnowledgeGraphNode:
                     text=self.node.text,
                     metadata=self.node.metadata,
                 )
+            case SymbolNode():
+                return Neo4jSymbolNode(node_id=self.node_id, name=self.node.name)
             case _:
                 raise ValueError("Unknown KnowledgeGraphNode.node type")
 
@@ -115,6 +130,10 @@ class KnowledgeGraphNode:
             node=TextNode(text=node["text"], metadata=node["metadata"]),
         )
 
+    @classmethod
+    def from_neo4j_symbol_node(cls, node: "Neo4jSymbolNode") -> "KnowledgeGraphNode":
+        return cls(node_id=node["node_id"], node=SymbolNode(name=node["name"]))
+
 
 class KnowledgeGraphEdgeType(enum.StrEnum):
     """Enum of all knowledge graph edge types"""
@@ -124,6 +143,9 @@ class KnowledgeGraphEdgeType(enum.StrEnum):
     has_ast = "HAS_AST"  # FileNode -> ASTNode
     has_text = "HAS_TEXT"  # FileNode -> TextNode
     next_chunk = "NEXT_CHUNK"  # TextNode -> TextNode
+    defines = "DEFINES"  # ASTNode -> SymbolNode
+    references = "REFERENCES"  # ASTNode -> SymbolNode
+    imports = "IMPORTS"  # ASTNode -> SymbolNode
 
 
 @dataclasses.dataclass(frozen=True)
@@ -148,6 +170,7 @@ class KnowledgeGraphEdge:
         "Neo4jParentOfEdge",
         "Neo4jHasTextEdge",
         "Neo4jNextChunkEdge",
+        "Neo4jSymbolEdge",
     ]:
         """Convert the KnowledgeGraphEdge into a Neo4j edge format."""
         match self.type:
@@ -176,6 +199,15 @@ class KnowledgeGraphEdge:
                     source=self.source.to_neo4j_node(),
                     target=self.target.to_neo4j_node(),
                 )
+            case (
+                KnowledgeGraphEdgeType.defines
+                | KnowledgeGraphEdgeType.references
+                | KnowledgeGraphEdgeType.imports
+            ):
+                return Neo4jSymbolEdge(
+                    source=self.source.to_neo4j_node(),
+                    target=self.target.to_neo4j_node(),
+                )
             case _:
                 raise ValueError(f"Unknown edge type: {self.type}")
 
@@ -212,6 +244,11 @@ class Neo4jTextNode(TypedDict):
     metadata: str
 
 
+class Neo4jSymbolNode(TypedDict):
+    node_id: int
+    name: str
+
+
 class Neo4jHasFileEdge(TypedDict):
     source: Neo4jFileNode
     target: Neo4jFileNode
@@ -235,3 +272,8 @@ class Neo4jHasTextEdge(TypedDict):
 class Neo4jNextChunkEdge(TypedDict):
     source: Neo4jTextNode
     target: Neo4jTextNode
+
+
+class Neo4jSymbolEdge(TypedDict):
+    source: Neo4jASTNode
+    target: Neo4jSymbolNode
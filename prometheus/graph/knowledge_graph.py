@@ -4,6 +4,7 @@ In the knowledge graph, we have the following node types:
 * FileNode: Represent a file/dir
 * ASTNode: Represent a tree-sitter node
 * TextNode: Represent a string
+* SymbolNode: Represent a name defined in the codebase
 
 and the following edge types:
 * HAS_FILE: Relationship between two FileNode, if one FileNode is the parent dir of another FileNode.
@@ -11,6 +12,9 @@ and the following edge types:
 * HAS_TEXT: Relationship between FileNode and TextNode, if the TextNode is a chunk of text from FileNode.
 * PARENT_OF: Relationship between two ASTNode, if one ASTNode is the parent of another ASTNode.
 * NEXT_CHUNK: Relationship between two TextNode, if one TextNode is the next chunk of text of another TextNode.
+* DEFINES: Relationship between ASTNode and SymbolNode, if the ASTNode is a definition of the name.
+* REFERENCES: Relationship between ASTNode and SymbolNode, if the code of the ASTNode uses the name.
+* IMPORTS: Relationship between ASTNode and SymbolNode, if the ASTNode is an import of the name.
 
 In this way, we have all the directory structure, source code, and text information in a single knowledge graph.
 This knowledge graph will be persisted in a graph database (neo4j), where an AI can use it to traverse the
@@ -24,8 +28,7 @@ from collections import defaultdict, deque
 from pathlib import Path
 from typing import Mapping, Optional, Sequence
 
-import igittigitt
-
+from prometheus.graph import knowledge_graph_snapshot
 from prometheus.graph.file_graph_builder import FileGraphBuilder
 from prometheus.graph.graph_types import (
     ASTNode,
@@ -40,9 +43,14 @@ from prometheus.graph.graph_types import (
     Neo4jHasTextEdge,
     Neo4jNextChunkEdge,
     Neo4jParentOfEdge,
+    Neo4jSymbolEdge,
+    Neo4jSymbolNode,
     Neo4jTextNode,
+    SymbolNode,
     TextNode,
 )
+from prometheus.graph.repository_walker import RepositoryWalker
+from prometheus.graph.symbol_table import SymbolTable
 
 
 class KnowledgeGraph:
@@ -55,6 +63,8 @@ class KnowledgeGraph:
         root_node: Optional[KnowledgeGraphNode] = None,
         knowledge_graph_nodes: Optional[Sequence[KnowledgeGraphNode]] = None,
         knowledge_graph_edges: Optional[Sequence[KnowledgeGraphEdge]] = None,
+        selective_ast: bool = False,
+        max_file_size: Optional[int] = None,
     ):
         """Initializes the knowledge graph.
 
@@ -66,8 +76,13 @@ class KnowledgeGraph:
           root_node: The root node for the knowledge graph.
           knowledge_graph_nodes: The initial list of knowledge graph nodes.
           knowledge_graph_edges: The initial list of knowledge graph edges.
+          selective_ast: Whether to only build the ASTNodes of the definitions, imports, calls
+            and docstrings, at any depth, see FileGraphBuilder.
+          max_file_size: The size in bytes above which a file is only indexed shallowly, see
+            FileGraphBuilder.
         """
         self.max_ast_depth = max_ast_depth
+        self.selective_ast = selective_ast
         self.root_node_id = root_node_id
         self._root_node = root_node
         self._knowledge_graph_nodes = (
@@ -78,7 +93,9 @@ class KnowledgeGraph:
         )
         self._next_node_id = root_node_id + len(self._knowledge_graph_nodes)
 
-        self._file_graph_builder = FileGraphBuilder(max_ast_depth, chunk_size, chunk_overlap)
+        self._file_graph_builder = FileGraphBuilder(
+            max_ast_depth, chunk_size, chunk_overlap, selective_ast, max_file_size
+        )
         self._logger = logging.getLogger("prometheus.graph.knowledge_graph")
 
     async def build_graph(self, root_dir: Path):
@@ -96,9 +113,7 @@ class KnowledgeGraph:
             root_dir: The codebase root directory.
         """
         root_dir = root_dir.absolute()
-        gitignore_parser = igittigitt.IgnoreParser()
-        gitignore_parser.parse_rule_files(root_dir)
-        gitignore_parser.add_rule(".git", root_dir)
+        repository_walker = RepositoryWalker(root_dir)
 
         # The root node for the whole graph
         root_dir_node = FileNode(basename=root_dir.name, relative_path=".")
@@ -108,24 +123,24 @@ class KnowledgeGraph:
         self._root_node = kg_root_dir_node
 
         file_stack = deque()
-        file_stack.append((root_dir, kg_root_dir_node))
+        file_stack.append((root_dir, kg_root_dir_node, True))
+        symbol_table = SymbolTable()
 
         # Now we traverse the file system to parse all the files and create all relationships
         while file_stack:
-            file, kg_file_path_node = file_stack.pop()
+            file, kg_file_path_node, is_dir = file_stack.pop()
 
             # If the file is a directory, we create FileNode for all supported children files.
-            if file.is_dir():
+            if is_dir:
                 self._logger.info(f"Processing directory {file}")
-                for child_file in sorted(file.iterdir()):
+                for entry in repository_walker.scandir(file):
+                    child_file = Path(entry.path)
                     # Skip if the child is not a file or it is not supported by the file graph builder.
-                    if child_file.is_file() and not self._file_graph_builder.supports_file(
-                        child_file
-                    ):
+                    if entry.is_file() and not self._file_graph_builder.supports_file(child_file):
                         self._logger.info(f"Skip parsing {child_file} because it is not supported")
                         continue
 
-                    if gitignore_parser.match(child_file):
+                    if repository_walker.is_ignored(entry):
                         self._logger.info(f"Skipping {child_file} because it is ignored")
                         continue
 
@@ -144,21 +159,85 @@ class KnowledgeGraph:
                         )
                     )
 
-                    file_stack.append((child_file, kg_child_file_node))
+                    file_stack.append((child_file, kg_child_file_node, entry.is_dir()))
             # Process the file otherwise.
             else:
                 self._logger.info(f"Processing file {file}")
-                try:
-                    next_node_id, kg_nodes, kg_edges = self._file_graph_builder.build_file_graph(
-                        kg_file_path_node, file, self._next_node_id
-                    )
-                except UnicodeDecodeError:
-                    self._logger.warning(f"UnicodeDecodeError when processing {file}")
-                    continue
+                next_node_id, kg_nodes, kg_edges = self._file_graph_builder.build_file_graph(
+                    kg_file_path_node, file, self._next_node_id, symbol_table
+                )
                 self._next_node_id = next_node_id
                 self._knowledge_graph_nodes.extend(kg_nodes)
                 self._knowledge_graph_edges.extend(kg_edges)
 
+        # The symbols are only known once all files are parsed
+        self._next_node_id, symbol_nodes, symbol_edges = symbol_table.build(self._next_node_id)
+        self._knowledge_graph_nodes.extend(symbol_nodes)
+        self._knowledge_graph_edges.extend(symbol_edges)
+        self._logger.info(
+            f"Found {len(symbol_nodes)} symbols with {len(symbol_edges)} definitions, "
+            "references and imports"
+        )
+        self._logger.info(
+            f"Parse throughput by language:\n{self._file_graph_builder.parse_stats.format()}"
+        )
+        if file_class_stats := self._file_graph_builder.file_class_stats.format():
+            self._logger.info(f"Files indexed shallowly or skipped:\n{file_class_stats}")
+
+    @classmethod
+    def load_snapshot(
+        cls,
+        path: Path,
+        version: str,
+        max_ast_depth: int,
+        chunk_size: int,
+        chunk_overlap: int,
+    ) -> "KnowledgeGraph":
+        """Loads a knowledge graph saved with save_snapshot, with the selective_ast it was
+        built with.
+
+        Args:
+          path: The snapshot file.
+          version: The version of the knowledge graph, see save_snapshot.
+          max_ast_depth: The maximum depth of tree-sitter nodes to parse.
+          chunk_size: The chunk size for text files.
+          chunk_overlap: The overlap size for text files.
+
+        Raises:
+          ValueError: If the file is not a snapshot of the current format or of this version.
+        """
+        root_node_id, kg_nodes, kg_edges, selective_ast = knowledge_graph_snapshot.read_snapshot(
+            path, version
+        )
+        root_node = next(kg_node for kg_node in kg_nodes if kg_node.node_id == root_node_id)
+        return cls(
+            max_ast_depth,
+            chunk_size,
+            chunk_overlap,
+            root_node_id,
+            root_node,
+            kg_nodes,
+            kg_edges,
+            selective_ast,
+        )
+
+    def save_snapshot(self, path: Path, version: str):
+        """Saves the knowledge graph to a binary snapshot file, see knowledge_graph_snapshot.
+
+        Args:
+          path: The snapshot file.
+          version: The version of the knowledge graph, like the one stored with it in Neo4j.
+            A snapshot is only loaded for the same version.
+        """
+        knowledge_graph_snapshot.write_snapshot(
+            path,
+            version,
+            self.root_node_id,
+            self._knowledge_graph_nodes,
+            self._knowledge_graph_edges,
+            self.selective_ast,
+        )
+
     @classmethod
     def from_neo4j(
         cls,
@@ -174,10 +253,19 @@ class KnowledgeGraph:
         has_ast_edges_ids: Sequence[Mapping[str, int]],
         has_text_edges_ids: Sequence[Mapping[str, int]],
         next_chunk_edges_ids: Sequence[Mapping[str, int]],
+        symbol_nodes: Sequence[KnowledgeGraphNode] = (),
+        symbol_edges_ids: Sequence[Mapping[str, int | str]] = (),
+        selective_ast: bool = False,
     ):
-        """Creates a knowledge graph from nodes and edges stored in neo4j."""
+        """Creates a knowledge graph from nodes and edges stored in neo4j.
+
+        The symbol_edges_ids also contain the type of the DEFINES, REFERENCES and IMPORTS
+        edges, in their "type" key. selective_ast is the one the knowledge graph was built with.
+        """
         # All nodes
-        knowledge_graph_nodes = [x for x in itertools.chain(file_nodes, ast_nodes, text_nodes)]
+        knowledge_graph_nodes = [
+            x for x in itertools.chain(file_nodes, ast_nodes, text_nodes, symbol_nodes)
+        ]
 
         # All edges
         node_id_to_node = {x.node_id: x for x in knowledge_graph_nodes}
@@ -221,10 +309,23 @@ class KnowledgeGraph:
             )
             for next_chunk_edge_ids in next_chunk_edges_ids
         ]
+        symbol_edges = [
+            KnowledgeGraphEdge(
+                node_id_to_node[symbol_edge_ids["source_id"]],
+                node_id_to_node[symbol_edge_ids["target_id"]],
+                KnowledgeGraphEdgeType(symbol_edge_ids["type"]),
+            )
+            for symbol_edge_ids in symbol_edges_ids
+        ]
         knowledge_graph_edges = [
             x
             for x in itertools.chain(
-                parent_of_edges, has_file_edges, has_ast_edges, has_text_edges, next_chunk_edges
+                parent_of_edges,
+                has_file_edges,
+                has_ast_edges,
+                has_text_edges,
+                next_chunk_edges,
+                symbol_edges,
             )
         ]
 
@@ -245,6 +346,7 @@ class KnowledgeGraph:
             root_node=root_node,
             knowledge_graph_nodes=knowledge_graph_nodes,
             knowledge_graph_edges=knowledge_graph_edges,
+            selective_ast=selective_ast,
         )
 
     def get_file_tree(self, max_depth: int = 5, max_lines: int = 5000) -> str:
@@ -339,6 +441,54 @@ class KnowledgeGraph:
             ast_node_types.add(ast_node.node.type)
         return list(ast_node_types)
 
+    def get_next_node_id(self) -> int:
+        """Returns the ID after the largest node ID of the graph."""
+        return self._next_node_id
+
+    def replace_node_ids(self, node_ids: Mapping[int, int]):
+        """Replaces the IDs of some nodes, like the ones shared with other graphs in neo4j.
+
+        Args:
+          node_ids: The new node IDs, by current node ID. The node IDs must stay unique in the
+            graph.
+        """
+        if not node_ids:
+            return
+        kg_nodes = {
+            kg_node.node_id: KnowledgeGraphNode(node_ids[kg_node.node_id], kg_node.node)
+            if kg_node.node_id in node_ids
+            else kg_node
+            for kg_node in self._knowledge_graph_nodes
+        }
+        self._knowledge_graph_nodes = list(kg_nodes.values())
+        self._knowledge_graph_edges = [
+            KnowledgeGraphEdge(
+                kg_nodes[kg_edge.source.node_id], kg_nodes[kg_edge.target.node_id], kg_edge.type
+            )
+            for kg_edge in self._knowledge_graph_edges
+        ]
+        self._root_node = kg_nodes[self._root_node.node_id]
+
+    def move_node_ids(self, root_node_id: int):
+        """Moves the node IDs of the graph to the block of IDs that starts at root_node_id.
+
+        A graph can be built before a block of node IDs is allocated for it, once its number
+        of nodes is known.
+
+        Args:
+          root_node_id: The first ID of the block, the new ID of the root node.
+        """
+        offset = root_node_id - self.root_node_id
+        self.replace_node_ids(
+            {kg_node.node_id: kg_node.node_id + offset for kg_node in self._knowledge_graph_nodes}
+        )
+        self.root_node_id = root_node_id
+        self._next_node_id += offset
+
+    def get_file_graph_builder(self) -> FileGraphBuilder:
+        """Returns the builder of the file subgraphs, configured like the graph."""
+        return self._file_graph_builder
+
     def _get_file_node_adjacency_dict(
         self,
     ) -> Mapping[KnowledgeGraphNode, Sequence[KnowledgeGraphNode]]:
@@ -362,6 +512,13 @@ class KnowledgeGraph:
             kg_node for kg_node in self._knowledge_graph_nodes if isinstance(kg_node.node, TextNode)
         ]
 
+    def get_symbol_nodes(self) -> Sequence[KnowledgeGraphNode]:
+        return [
+            kg_node
+            for kg_node in self._knowledge_graph_nodes
+            if isinstance(kg_node.node, SymbolNode)
+        ]
+
     def get_has_ast_edges(self) -> Sequence[KnowledgeGraphEdge]:
         return [
             kg_edge
@@ -397,6 +554,19 @@ class KnowledgeGraph:
             if kg_edge.type == KnowledgeGraphEdgeType.parent_of
         ]
 
+    def get_symbol_edges(self) -> Sequence[KnowledgeGraphEdge]:
+        """Returns the DEFINES, REFERENCES and IMPORTS edges."""
+        return [
+            kg_edge
+            for kg_edge in self._knowledge_graph_edges
+            if kg_edge.type
+            in (
+                KnowledgeGraphEdgeType.defines,
+                KnowledgeGraphEdgeType.references,
+                KnowledgeGraphEdgeType.imports,
+            )
+        ]
+
     def get_neo4j_file_nodes(self) -> Sequence[Neo4jFileNode]:
         return [kg_node.to_neo4j_node() for kg_node in self.get_file_nodes()]
 
@@ -406,6 +576,9 @@ class KnowledgeGraph:
     def get_neo4j_text_nodes(self) -> Sequence[Neo4jTextNode]:
         return [kg_node.to_neo4j_node() for kg_node in self.get_text_nodes()]
 
+    def get_neo4j_symbol_nodes(self) -> Sequence[Neo4jSymbolNode]:
+        return [kg_node.to_neo4j_node() for kg_node in self.get_symbol_nodes()]
+
     def get_neo4j_has_ast_edges(self) -> Sequence[Neo4jHasASTEdge]:
         return [kg_edge.to_neo4j_edge() for kg_edge in self.get_has_ast_edges()]
 
@@ -421,6 +594,9 @@ class KnowledgeGraph:
     def get_neo4j_parent_of_edges(self) -> Sequence[Neo4jParentOfEdge]:
         return [kg_edge.to_neo4j_edge() for kg_edge in self.get_parent_of_edges()]
 
+    def get_neo4j_symbol_edges(self) -> Sequence[Neo4jSymbolEdge]:
+        return [kg_edge.to_neo4j_edge() for kg_edge in self.get_symbol_edges()]
+
     def __eq__(self, other: "KnowledgeGraph") -> bool:
         if not isinstance(other, KnowledgeGraph):
             return False
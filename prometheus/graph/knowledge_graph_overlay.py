@@ -0,0 +1,222 @@
+"""The changes made to a codebase after its knowledge graph was built.
+
+The agents edit the files of the playground, while the knowledge graph in Neo4j still
+describes the code as it was when the graph was built. The overlay keeps the subgraph of
+every touched file up to date with its current content, so that graph queries about those
+files are answered from the overlay instead of from the stale graph.
+
+A source file is re-parsed incrementally: the byte range that changed since its previous
+version is passed to Tree.edit, and tree-sitter reuses the unchanged parts of the previous
+tree. Only the touched files are processed, which takes milliseconds, while rebuilding the
+whole knowledge graph takes minutes for large codebases.
+"""
+
+import dataclasses
+import logging
+import threading
+from pathlib import Path
+from typing import Dict, Optional, Sequence, Set, Tuple
+
+from tree_sitter import Tree
+
+from prometheus.graph.graph_types import (
+    FileNode,
+    KnowledgeGraphEdge,
+    KnowledgeGraphEdgeType,
+    KnowledgeGraphNode,
+)
+from prometheus.graph.knowledge_graph import KnowledgeGraph
+from prometheus.graph.symbol_table import SymbolTable
+from prometheus.parser import decoded_source, tree_sitter_parser
+from prometheus.parser.decoded_source import DecodedSource
+
+
+@dataclasses.dataclass(frozen=True)
+class OverlayFile:
+    """The current subgraph of a touched file.
+
+    Attributes:
+      file_node: The FileNode of the file. A file that is in the knowledge graph keeps its
+        FileNode, a created file gets a new one.
+      kg_nodes: The ASTNodes or TextNodes of the current content of the file.
+      kg_edges: The HAS_AST, PARENT_OF, HAS_TEXT and NEXT_CHUNK edges of the file.
+      symbol_table: The definitions, references and imports of a source file.
+      source: The current content of the file, in UTF-8 like the data of a DecodedSource.
+      tree: The tree-sitter tree of a source file, reused by the next re-parse.
+    """
+
+    file_node: KnowledgeGraphNode
+    kg_nodes: Sequence[KnowledgeGraphNode]
+    kg_edges: Sequence[KnowledgeGraphEdge]
+    symbol_table: Optional[SymbolTable]
+    source: bytes
+    tree: Optional[Tree]
+
+    def get_ast_root_node(self) -> Optional[KnowledgeGraphNode]:
+        """Returns the root ASTNode of a source file, None if it could not be parsed."""
+        for kg_edge in self.kg_edges:
+            if kg_edge.type == KnowledgeGraphEdgeType.has_ast:
+                return kg_edge.target
+        return None
+
+    def get_text_nodes(self) -> Sequence[KnowledgeGraphNode]:
+        """Returns the TextNodes of a text file, in the order of their chunks."""
+        return [
+            kg_edge.target
+            for kg_edge in self.kg_edges
+            if kg_edge.type == KnowledgeGraphEdgeType.has_text
+        ]
+
+
+class KnowledgeGraphOverlay:
+    """
+    The current subgraphs of the files of a codebase that were created, edited or deleted
+    since its knowledge graph was built.
+
+    The files are recorded with update_file after every change, and the overlay is cleared
+    when the changes are discarded, like when the repository is reset.
+    """
+
+    def __init__(self, kg: KnowledgeGraph, root_path: str):
+        """
+        Args:
+          kg: The knowledge graph of the codebase before the changes.
+          root_path: The directory of the codebase that is changed.
+        """
+        self.kg = kg
+        self.root_path = Path(root_path)
+        self._file_graph_builder = kg.get_file_graph_builder()
+        # Looked up on the first change, most overlays never record any
+        self._kg_file_nodes: Optional[Dict[str, KnowledgeGraphNode]] = None
+        # The nodes of the overlay never reuse an ID of the knowledge graph
+        self._next_node_id = kg.get_next_node_id()
+        self._files: Dict[str, OverlayFile] = {}
+        self._deleted_paths: Set[str] = set()
+        self._lock = threading.Lock()
+        self._logger = logging.getLogger("prometheus.graph.knowledge_graph_overlay")
+
+    def update_file(self, relative_path: str):
+        """Records the current content of a file or directory after it may have changed.
+
+        Args:
+          relative_path: The path of the file or directory, relative to the root path.
+        """
+        relative_path = Path(relative_path).as_posix()
+        file = self.root_path / relative_path
+        with self._lock:
+            if not file.exists():
+                self._delete_path(relative_path)
+                return
+            if not file.is_file() or not self._file_graph_builder.supports_file(file):
+                return
+
+            source = decoded_source.decode_source(file.read_bytes())
+            previous_file = self._files.get(relative_path)
+            if previous_file is not None and previous_file.source == source.data:
+                return
+            self._deleted_paths.discard(relative_path)
+            self._files[relative_path] = self._build_file(
+                relative_path, file, source, previous_file
+            )
+
+    def is_touched(self, relative_path: str) -> bool:
+        """Whether the knowledge graph is stale for a file or directory."""
+        with self._lock:
+            if relative_path in self._files:
+                return True
+            return any(
+                relative_path == deleted_path or relative_path.startswith(deleted_path + "/")
+                for deleted_path in self._deleted_paths
+            )
+
+    def get_files(self) -> Sequence[OverlayFile]:
+        """Returns the current subgraphs of the touched files that still exist."""
+        with self._lock:
+            return list(self._files.values())
+
+    def is_empty(self) -> bool:
+        with self._lock:
+            return not self._files and not self._deleted_paths
+
+    def clear(self):
+        """Discards all changes, after the codebase is reset to its original content."""
+        with self._lock:
+            self._files = {}
+            self._deleted_paths = set()
+
+    def _delete_path(self, relative_path: str):
+        self._deleted_paths.add(relative_path)
+        self._files = {
+            path: overlay_file
+            for path, overlay_file in self._files.items()
+            if path != relative_path and not path.startswith(relative_path + "/")
+        }
+
+    def _build_file(
+        self,
+        relative_path: str,
+        file: Path,
+        source: DecodedSource,
+        previous_file: Optional[OverlayFile],
+    ) -> OverlayFile:
+        if self._kg_file_nodes is None:
+            self._kg_file_nodes = {
+                kg_node.node.relative_path: kg_node for kg_node in self.kg.get_file_nodes()
+            }
+        if previous_file is not None:
+            file_node = previous_file.file_node
+        elif relative_path in self._kg_file_nodes:
+            file_node = self._kg_file_nodes[relative_path]
+        else:
+            file_node = KnowledgeGraphNode(
+                self._next_node_id, FileNode(basename=file.name, relative_path=relative_path)
+            )
+            self._next_node_id += 1
+
+        tree = None
+        symbol_table = None
+        if self._file_graph_builder.support_code_file(file):
+            old_tree = None
+            if previous_file is not None and previous_file.tree is not None:
+                old_tree = previous_file.tree
+                old_tree.edit(**_get_edit(previous_file.source, source.data))
+            tree = tree_sitter_parser.parse_source(file, source.data, old_tree)
+            symbol_table = SymbolTable()
+            self._logger.debug(
+                f"Re-parsed {relative_path} {'incrementally' if old_tree else 'from scratch'}"
+            )
+
+        self._next_node_id, kg_nodes, kg_edges = self._file_graph_builder.build_file_graph(
+            file_node, file, self._next_node_id, symbol_table, tree, source
+        )
+        return OverlayFile(file_node, kg_nodes, kg_edges, symbol_table, source.data, tree)
+
+
+def _get_edit(old_source: bytes, new_source: bytes) -> Dict[str, int | Tuple[int, int]]:
+    """Computes the arguments of Tree.edit for the single changed range between two sources."""
+    max_prefix = min(len(old_source), len(new_source))
+    start_byte = 0
+    while start_byte < max_prefix and old_source[start_byte] == new_source[start_byte]:
+        start_byte += 1
+
+    max_suffix = max_prefix - start_byte
+    suffix = 0
+    while suffix < max_suffix and old_source[-suffix - 1] == new_source[-suffix - 1]:
+        suffix += 1
+
+    old_end_byte = len(old_source) - suffix
+    new_end_byte = len(new_source) - suffix
+    return {
+        "start_byte": start_byte,
+        "old_end_byte": old_end_byte,
+        "new_end_byte": new_end_byte,
+        "start_point": _get_point(old_source, start_byte),
+        "old_end_point": _get_point(old_source, old_end_byte),
+        "new_end_point": _get_point(new_source, new_end_byte),
+    }
+
+
+def _get_point(source: bytes, byte: int) -> Tuple[int, int]:
+    """Returns the (row, column) of a byte offset, as tree-sitter counts them."""
+    row = source.count(b"\n", 0, byte)
+    return row, byte - (source.rfind(b"\n", 0, byte) + 1)
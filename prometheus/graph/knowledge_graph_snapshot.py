@@ -0,0 +1,251 @@
+"""A compact binary file of a knowledge graph, loaded without Neo4j.
+
+Reading a knowledge graph back from Neo4j takes one query per node and edge type, and
+transfers every string of the graph, for every issue. A snapshot holds the same nodes and
+edges in flat numpy arrays:
+
+* every distinct string of the graph is stored once, in one UTF-8 blob, and the nodes refer
+  to their strings by index;
+* the nodes are stored as parallel arrays of IDs, kinds, string indices and line numbers;
+* the edges as arrays of source IDs, target IDs and types.
+
+The file is a small JSON header followed by the arrays, aligned, so that loading it is a
+memory map of the file, one decode of the strings and the creation of the node objects.
+A snapshot records the version of the graph it was written for, and is only loaded for
+that version, and whether the graph was built with selective ASTs.
+"""
+
+import gc
+import json
+import mmap
+import os
+import struct
+from pathlib import Path
+from typing import Any, Dict, List, Sequence, Tuple
+
+import numpy as np
+
+from prometheus.graph.graph_types import (
+    ASTNode,
+    FileNode,
+    KnowledgeGraphEdge,
+    KnowledgeGraphEdgeType,
+    KnowledgeGraphNode,
+    SymbolNode,
+    TextNode,
+)
+
+_MAGIC = b"PKGS"
+# Incremented when the layout changes, older snapshots are then ignored
+FORMAT_VERSION = 1
+_PREAMBLE = struct.Struct("<4sII")
+_ALIGNMENT = 8
+
+_EDGE_TYPES = list(KnowledgeGraphEdgeType)
+
+
+def write_snapshot(
+    path: Path,
+    version: str,
+    root_node_id: int,
+    kg_nodes: Sequence[KnowledgeGraphNode],
+    kg_edges: Sequence[KnowledgeGraphEdge],
+    selective_ast: bool = False,
+):
+    """Writes the nodes and edges of a knowledge graph to a snapshot file.
+
+    The file is replaced atomically, a concurrent reader sees either the old or the new one.
+
+    Args:
+      path: The snapshot file.
+      version: The version of the knowledge graph, checked by read_snapshot.
+      root_node_id: The ID of the root FileNode.
+      kg_nodes: The nodes of the knowledge graph.
+      kg_edges: The edges of the knowledge graph.
+      selective_ast: Whether the knowledge graph was built with selective ASTs.
+    """
+    string_ids: Dict[str, int] = {}
+
+    def intern(string: str) -> int:
+        return string_ids.setdefault(string, len(string_ids))
+
+    node_kinds = np.empty(len(kg_nodes), dtype=np.uint8)
+    node_strings = np.full((len(kg_nodes), 2), -1, dtype=np.int32)
+    node_lines = np.zeros((len(kg_nodes), 2), dtype=np.int32)
+    for i, kg_node in enumerate(kg_nodes):
+        match kg_node.node:
+            case FileNode(basename=basename, relative_path=relative_path):
+                node_kinds[i] = 0
+                node_strings[i] = intern(basename), intern(relative_path)
+            case ASTNode(type=node_type, start_line=start_line, end_line=end_line, text=text):
+                node_kinds[i] = 1
+                node_strings[i] = intern(node_type), intern(text)
+                node_lines[i] = start_line, end_line
+            case TextNode(text=text, metadata=metadata):
+                node_kinds[i] = 2
+                node_strings[i] = intern(text), intern(metadata)
+            case SymbolNode(name=name):
+                node_kinds[i] = 3
+                node_strings[i, 0] = intern(name)
+            case _:
+                raise ValueError("Unknown KnowledgeGraphNode.node type")
+
+    # The offsets are in characters, the strings are sliced from the decoded blob
+    string_offsets = np.zeros(len(string_ids) + 1, dtype=np.int64)
+    np.cumsum([len(string) for string in string_ids], out=string_offsets[1:])
+    edge_type_ids = {edge_type: i for i, edge_type in enumerate(_EDGE_TYPES)}
+    arrays = {
+        "node_ids": np.fromiter((n.node_id for n in kg_nodes), np.int64, len(kg_nodes)),
+        "node_kinds": node_kinds,
+        "node_strings": node_strings,
+        "node_lines": node_lines,
+        "edge_sources": np.fromiter((e.source.node_id for e in kg_edges), np.int64, len(kg_edges)),
+        "edge_targets": np.fromiter((e.target.node_id for e in kg_edges), np.int64, len(kg_edges)),
+        "edge_types": np.fromiter(
+            (edge_type_ids[e.type] for e in kg_edges), np.uint8, len(kg_edges)
+        ),
+        "string_offsets": string_offsets,
+        "strings": np.frombuffer("".join(string_ids).encode("utf-8"), dtype=np.uint8),
+    }
+
+    array_headers = {}
+    offset = 0
+    for name, array in arrays.items():
+        offset = _align(offset)
+        array_headers[name] = {"dtype": array.dtype.str, "shape": array.shape, "offset": offset}
+        offset += array.nbytes
+    header = json.dumps(
+        {
+            "version": version,
+            "root_node_id": root_node_id,
+            "selective_ast": selective_ast,
+            "arrays": array_headers,
+        }
+    ).encode("utf-8")
+    data_start = _align(_PREAMBLE.size + len(header))
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    with tmp_path.open("wb") as f:
+        f.write(_PREAMBLE.pack(_MAGIC, FORMAT_VERSION, len(header)))
+        f.write(header)
+        for name, array in arrays.items():
+            f.seek(data_start + array_headers[name]["offset"])
+            f.write(array.tobytes())
+    os.replace(tmp_path, path)
+
+
+def read_snapshot(
+    path: Path, version: str
+) -> Tuple[int, List[KnowledgeGraphNode], List[KnowledgeGraphEdge], bool]:
+    """Reads a snapshot written by write_snapshot.
+
+    Args:
+      path: The snapshot file.
+      version: The version of the knowledge graph that the snapshot must have been written for.
+
+    Returns:
+      A tuple of (root_node_id, kg_nodes, kg_edges, selective_ast).
+
+    Raises:
+      ValueError: If the file is not a snapshot of this format, or of another version.
+    """
+    with path.open("rb") as f:
+        data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    header, data_start = _read_header(path, data)
+    if header["version"] != version:
+        raise ValueError(f"{path} is of version {header['version']}, not {version}")
+
+    arrays = {
+        name: _read_array(data, data_start, **array_header)
+        for name, array_header in header["arrays"].items()
+    }
+
+    blob = str(memoryview(arrays["strings"]), "utf-8")
+    string_offsets = arrays["string_offsets"].tolist()
+    strings = [blob[start:end] for start, end in zip(string_offsets, string_offsets[1:])]
+
+    # All the objects created here are kept, collecting garbage while creating them only
+    # slows the load down
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        kg_nodes, kg_edges = _create_graph(arrays, strings)
+        # The snapshots written before selective ASTs are of full ASTs
+        return header["root_node_id"], kg_nodes, kg_edges, header.get("selective_ast", False)
+    finally:
+        if gc_enabled:
+            gc.enable()
+
+
+def read_snapshot_size(path: Path) -> Tuple[int, int]:
+    """Reads the root node ID and the number of nodes of a snapshot, without reading the graph.
+
+    Raises:
+      ValueError: If the file is not a snapshot of this format.
+    """
+    with path.open("rb") as f:
+        data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    header, _ = _read_header(path, data)
+    return header["root_node_id"], header["arrays"]["node_ids"]["shape"][0]
+
+
+def _read_header(path: Path, data: mmap.mmap) -> Tuple[Dict[str, Any], int]:
+    """Returns the header of a snapshot and the offset of its arrays."""
+    if len(data) < _PREAMBLE.size:
+        raise ValueError(f"{path} is not a knowledge graph snapshot")
+    magic, format_version, header_size = _PREAMBLE.unpack_from(data)
+    if magic != _MAGIC or format_version != FORMAT_VERSION:
+        raise ValueError(f"{path} is not a knowledge graph snapshot of format {FORMAT_VERSION}")
+    header = json.loads(data[_PREAMBLE.size : _PREAMBLE.size + header_size])
+    return header, _align(_PREAMBLE.size + header_size)
+
+
+def _create_graph(
+    arrays: Dict[str, np.ndarray], strings: List[str]
+) -> Tuple[List[KnowledgeGraphNode], List[KnowledgeGraphEdge]]:
+    kg_nodes = []
+    for node_id, node_kind, (first, second), (start_line, end_line) in zip(
+        arrays["node_ids"].tolist(),
+        arrays["node_kinds"].tolist(),
+        arrays["node_strings"].tolist(),
+        arrays["node_lines"].tolist(),
+    ):
+        if node_kind == 0:
+            node = FileNode(basename=strings[first], relative_path=strings[second])
+        elif node_kind == 1:
+            node = ASTNode(
+                type=strings[first], start_line=start_line, end_line=end_line, text=strings[second]
+            )
+        elif node_kind == 2:
+            node = TextNode(text=strings[first], metadata=strings[second])
+        else:
+            node = SymbolNode(name=strings[first])
+        kg_nodes.append(KnowledgeGraphNode(node_id, node))
+
+    node_id_to_node = {kg_node.node_id: kg_node for kg_node in kg_nodes}
+    kg_edges = [
+        KnowledgeGraphEdge(node_id_to_node[source_id], node_id_to_node[target_id], _EDGE_TYPES[t])
+        for source_id, target_id, t in zip(
+            arrays["edge_sources"].tolist(),
+            arrays["edge_targets"].tolist(),
+            arrays["edge_types"].tolist(),
+        )
+    ]
+    return kg_nodes, kg_edges
+
+
+def _read_array(
+    data: mmap.mmap, data_start: int, dtype: str, shape: List[int], offset: int
+) -> np.ndarray:
+    count = int(np.prod(shape))
+    # An empty array may start after the end of the file
+    if count == 0:
+        return np.empty(shape, dtype=np.dtype(dtype))
+    return np.frombuffer(
+        data, dtype=np.dtype(dtype), count=count, offset=data_start + offset
+    ).reshape(shape)
+
+
+def _align(offset: int) -> int:
+    return (offset + _ALIGNMENT - 1) // _ALIGNMENT * _ALIGNMENT
@@ -0,0 +1,128 @@
+"""Lists the files and directories of a codebase that are not ignored.
+
+Matching every path against the .gitignore rules with igittigitt is slow for large
+codebases: igittigitt first globs the whole tree for .gitignore files, including ignored
+directories like node_modules, and then tries every rule for every path. When the codebase
+is a git repository, git already knows which files are not ignored, and one
+`git ls-files` lists them all at once. A file is then kept if git lists it, and a
+directory if git lists a file under it.
+
+The few directories that have no listed file, like empty directories or directories that
+only contain ignored files, are still matched with igittigitt, with only the .gitignore
+files that git listed. The same goes for the whole content of the directories that git
+does not list, like symlinked directories, and for codebases that are not git
+repositories.
+
+The directories are listed with os.scandir, whose entries cache the type of the files.
+"""
+
+import logging
+import os
+from pathlib import Path
+from typing import List, Optional, Set
+
+import igittigitt
+from git import Git, GitError
+
+
+def get_global_ignore_file() -> Optional[Path]:
+    """Returns the default global ignore file of git, that igittigitt also reads."""
+    xdg_config_home = os.environ.get("XDG_CONFIG_HOME")
+    home = os.environ.get("HOME")
+    if xdg_config_home:
+        global_ignore_file = Path(xdg_config_home) / "git" / "ignore"
+    elif home:
+        global_ignore_file = Path(home) / ".config" / "git" / "ignore"
+    else:
+        return None
+    return global_ignore_file if global_ignore_file.is_file() else None
+
+
+class RepositoryWalker:
+    """Decides which files and directories of a codebase are ignored, like .gitignore."""
+
+    def __init__(self, root_dir: Path):
+        """
+        Args:
+          root_dir: The absolute path of the codebase.
+        """
+        self.root_dir = root_dir
+        self._root_prefix = os.path.join(root_dir, "")
+        self._logger = logging.getLogger("prometheus.graph.repository_walker")
+
+        # The files that are not ignored and the directories that contain one of them, relative
+        # to the root directory, or None if the codebase is not a git repository
+        self._git_files: Optional[Set[str]] = None
+        self._git_dirs: Set[str] = set()
+        self._matcher: Optional[igittigitt.IgnoreParser] = None
+
+        git_files = self._list_git_files() if (root_dir / ".git").exists() else None
+        if git_files is None:
+            self._matcher = igittigitt.IgnoreParser()
+            self._matcher.parse_rule_files(root_dir)
+            self._matcher.add_rule(".git", root_dir)
+            return
+
+        self._git_files = git_files
+        self._git_dirs.add("")
+        for relative_path in git_files:
+            parent, _, _ = relative_path.rpartition("/")
+            while parent not in self._git_dirs:
+                self._git_dirs.add(parent)
+                parent, _, _ = parent.rpartition("/")
+
+    def scandir(self, directory: Path) -> List[os.DirEntry]:
+        """Returns the entries of a directory, sorted by name, ignored or not."""
+        with os.scandir(directory) as entries:
+            return sorted(entries, key=lambda entry: entry.name)
+
+    def is_ignored(self, entry: os.DirEntry) -> bool:
+        """Whether an entry returned by scandir is ignored."""
+        if self._git_files is not None:
+            relative_path = entry.path[len(self._root_prefix) :].replace(os.sep, "/")
+            parent, _, _ = relative_path.rpartition("/")
+            if parent in self._git_dirs:
+                if entry.name == ".git":
+                    return True
+                if not entry.is_dir():
+                    return relative_path not in self._git_files
+                if relative_path in self._git_dirs:
+                    return False
+        return self._get_matcher().match(entry.path)
+
+    def _get_matcher(self) -> igittigitt.IgnoreParser:
+        if self._matcher is None:
+            self._matcher = igittigitt.IgnoreParser()
+            global_ignore_file = get_global_ignore_file()
+            if global_ignore_file is not None:
+                self._matcher.parse_rule_file(global_ignore_file, base_dir=self.root_dir)
+            # Shallow first, so that the rules of deeper .gitignore files win, like in git
+            rule_files = sorted(
+                (
+                    relative_path
+                    for relative_path in self._git_files
+                    if relative_path.rpartition("/")[2] == ".gitignore"
+                ),
+                key=lambda relative_path: (relative_path.count("/"), relative_path),
+            )
+            for rule_file in rule_files:
+                self._matcher.parse_rule_file(self.root_dir / rule_file)
+            self._matcher.add_rule(".git", self.root_dir)
+        return self._matcher
+
+    def _list_git_files(self) -> Optional[Set[str]]:
+        """Lists the tracked and untracked files that the .gitignore rules do not ignore."""
+        exclude_args = ["--exclude-per-directory=.gitignore"]
+        global_ignore_file = get_global_ignore_file()
+        if global_ignore_file is not None:
+            exclude_args.append(f"--exclude-from={global_ignore_file}")
+
+        git = Git(self.root_dir)
+        try:
+            files = git.ls_files("-z", "--cached", "--others", *exclude_args)
+            # Tracked files are listed even if they are ignored, but they were not in the graph
+            ignored_files = git.ls_files("-z", "--cached", "--ignored", *exclude_args)
+        except GitError as e:
+            self._logger.warning(f"Cannot list the files of {self.root_dir} with git: {e}")
+            return None
+        return set(files.split("\0")) - set(ignored_files.split("\0")) - {""}
@@ -0,0 +1,236 @@
+"""Embedding index over the code and text of the knowledge graph.
+
+The index embeds every function/class level ASTNode and every TextNode of a knowledge
+graph, so that the context retrieval can start from the nodes that are semantically
+closest to a query, instead of guessing basenames and exact substrings. It is a flat index:
+a search compares the query embedding to every node embedding, which takes a few
+milliseconds even for large codebases.
+
+Only the node IDs and their embeddings are stored on disk, with the model that embedded them,
+the nodes themselves are resolved through the knowledge graph the index was built from. An
+index embedded by another model than the current one is stale, and fails to load.
+"""
+
+import dataclasses
+import logging
+from collections import defaultdict
+from pathlib import Path
+from typing import Mapping, Optional, Sequence
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from prometheus.graph.graph_types import KnowledgeGraphNode
+from prometheus.graph.knowledge_graph import KnowledgeGraph
+from prometheus.graph.test_impact_index import DEFINITION_NODE_TYPES
+
+# Longer nodes are embedded by their beginning, which contains the signature or heading
+MAX_EMBEDDED_CHARACTERS = 4000
+EMBEDDING_BATCH_SIZE = 256
+
+
+@dataclasses.dataclass(frozen=True)
+class SemanticSearchResult:
+    """A node found by a semantic search.
+
+    Attributes:
+      file_node: The file that contains the node.
+      kg_node: The ASTNode or TextNode that was found.
+      score: The cosine similarity between the query and the node.
+    """
+
+    file_node: KnowledgeGraphNode
+    kg_node: KnowledgeGraphNode
+    score: float
+
+
+class SemanticIndex:
+    """A flat embedding index of the ASTNodes and TextNodes of a knowledge graph."""
+
+    def __init__(
+        self,
+        kg: KnowledgeGraph,
+        embeddings: Embeddings,
+        node_ids: Sequence[int],
+        vectors: np.ndarray,
+        model: Optional[str] = None,
+    ):
+        """Creates an index from already computed embeddings, see build and load.
+
+        Args:
+          kg: The knowledge graph the index was built from.
+          embeddings: The model that embedded the nodes, used to embed the queries.
+          node_ids: The IDs of the indexed nodes.
+          vectors: The L2-normalized embeddings of the nodes, one row per node ID.
+          model: The name of the model that embedded the nodes, that of embeddings by default.
+        """
+        if len(node_ids) != len(vectors):
+            raise ValueError(f"Got {len(node_ids)} node IDs but {len(vectors)} embeddings")
+        if model is not None and model != _get_model_name(embeddings):
+            raise ValueError(
+                f"The index was embedded by {model}, not by {_get_model_name(embeddings)}"
+            )
+        dimensions = getattr(embeddings, "dimensions", None)
+        if len(vectors) and isinstance(dimensions, int) and np.shape(vectors)[1] != dimensions:
+            raise ValueError(
+                f"The index has {np.shape(vectors)[1]} dimensions, the model has {dimensions}"
+            )
+        self.embeddings = embeddings
+        self.model = _get_model_name(embeddings)
+        self._node_ids = np.asarray(node_ids, dtype=np.int64)
+        self._vectors = np.asarray(vectors, dtype=np.float32)
+
+        self._file_nodes = _get_file_nodes(kg)
+        self._kg_nodes = {
+            kg_node.node_id: kg_node for kg_node in kg.get_ast_nodes() + kg.get_text_nodes()
+        }
+        missing_node_ids = [
+            node_id for node_id in self._node_ids.tolist() if node_id not in self._file_nodes
+        ]
+        if missing_node_ids:
+            raise ValueError(
+                f"The index does not belong to this knowledge graph, nodes {missing_node_ids[:5]} "
+                "are not in it"
+            )
+        self._logger = logging.getLogger("prometheus.graph.semantic_index")
+
+    @classmethod
+    def build(cls, kg: KnowledgeGraph, embeddings: Embeddings) -> "SemanticIndex":
+        """Embeds the function/class level ASTNodes and the TextNodes of a knowledge graph.
+
+        Args:
+          kg: The knowledge graph.
+          embeddings: The model that embeds the nodes and the queries.
+        """
+        file_nodes = _get_file_nodes(kg)
+        kg_nodes = [
+            kg_node
+            for kg_node in kg.get_ast_nodes()
+            if kg_node.node.type in DEFINITION_NODE_TYPES and kg_node.node_id in file_nodes
+        ] + [kg_node for kg_node in kg.get_text_nodes() if kg_node.node_id in file_nodes]
+
+        texts = [
+            f"{file_nodes[kg_node.node_id].node.relative_path}\n"
+            f"{kg_node.node.text[:MAX_EMBEDDED_CHARACTERS]}"
+            for kg_node in kg_nodes
+        ]
+        vectors = np.zeros((len(texts), 0), dtype=np.float32)
+        if texts:
+            vectors = np.concatenate(
+                [
+                    np.asarray(
+                        embeddings.embed_documents(texts[start : start + EMBEDDING_BATCH_SIZE]),
+                        dtype=np.float32,
+                    )
+                    for start in range(0, len(texts), EMBEDDING_BATCH_SIZE)
+                ]
+            )
+        index = cls(kg, embeddings, [kg_node.node_id for kg_node in kg_nodes], _normalize(vectors))
+        index._logger.info(f"Indexed {len(kg_nodes)} nodes of knowledge graph {kg.root_node_id}")
+        return index
+
+    @classmethod
+    def load(cls, path: Path, kg: KnowledgeGraph, embeddings: Embeddings) -> "SemanticIndex":
+        """Loads an index saved with save.
+
+        Args:
+          path: The file of the index.
+          kg: The knowledge graph the index was built from.
+          embeddings: The model that embeds the queries.
+
+        Raises:
+          ValueError: If the index is stale, because it was built from another knowledge
+            graph or embedded by another model.
+        """
+        with np.load(path) as data:
+            if "model" not in data:
+                raise ValueError("The index was embedded by an unknown model")
+            return cls(kg, embeddings, data["node_ids"], data["vectors"], str(data["model"]))
+
+    def save(self, path: Path):
+        """Saves the node IDs and embeddings of the index, and the name of its model, to a file.
+
+        Args:
+          path: The file to write, conventionally with a .npz suffix.
+        """
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # The index can be loaded while it is saved, it replaces the previous file at once
+        tmp_path = path.with_name(f"{path.name}.tmp")
+        with tmp_path.open("wb") as f:
+            np.savez(f, node_ids=self._node_ids, vectors=self._vectors, model=self.model)
+        tmp_path.replace(path)
+
+    def __len__(self) -> int:
+        return len(self._node_ids)
+
+    def search(self, query: str, top_k: int) -> Sequence[SemanticSearchResult]:
+        """Finds the nodes that are the most similar to a query.
+
+        Args:
+          query: The natural language or code query.
+          top_k: The maximum number of results.
+
+        Returns:
+          The top_k most similar nodes, the most similar first.
+        """
+        if len(self) == 0 or top_k <= 0:
+            return []
+        query_vector = _normalize(
+            np.asarray([self.embeddings.embed_query(query)], dtype=np.float32)
+        )[0]
+        if query_vector.shape[0] != self._vectors.shape[1]:
+            # The index is stale, it is rebuilt when it is loaded again
+            self._logger.warning(
+                f"The query embedding has {query_vector.shape[0]} dimensions, "
+                f"the index has {self._vectors.shape[1]}"
+            )
+            return []
+        scores = self._vectors @ query_vector
+        top_k = min(top_k, len(scores))
+        top_indices = np.argpartition(-scores, top_k - 1)[:top_k]
+        top_indices = top_indices[np.argsort(-scores[top_indices], kind="stable")]
+
+        results = []
+        for index in top_indices.tolist():
+            if scores[index] <= 0:
+                break
+            node_id = int(self._node_ids[index])
+            results.append(
+                SemanticSearchResult(
+                    file_node=self._file_nodes[node_id],
+                    kg_node=self._kg_nodes[node_id],
+                    score=float(scores[index]),
+                )
+            )
+        return results
+
+
+def _get_file_nodes(kg: KnowledgeGraph) -> Mapping[int, KnowledgeGraphNode]:
+    """Maps the ID of every ASTNode and TextNode to the FileNode of the file it is from."""
+    children = defaultdict(list)
+    for parent_of_edge in kg.get_parent_of_edges():
+        children[parent_of_edge.source.node_id].append(parent_of_edge.target)
+
+    file_nodes = {}
+    for has_text_edge in kg.get_has_text_edges():
+        file_nodes[has_text_edge.target.node_id] = has_text_edge.source
+    for has_ast_edge in kg.get_has_ast_edges():
+        stack = [has_ast_edge.target]
+        while stack:
+            kg_node = stack.pop()
+            file_nodes[kg_node.node_id] = has_ast_edge.source
+            stack.extend(children.get(kg_node.node_id, []))
+    return file_nodes
+
+
+def _get_model_name(embeddings: Embeddings) -> str:
+    """Names the model of embeddings by its class, and its model attribute if it has one, like
+    the embeddings of the OpenAI and HuggingFace integrations."""
+    model = getattr(embeddings, "model", None) or getattr(embeddings, "model_name", None)
+    name = type(embeddings).__qualname__
+    return f"{name}:{model}" if isinstance(model, str) else name
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.where(norms == 0, 1, norms)
@@ -0,0 +1,340 @@
+"""Symbol table of the definitions, references and imports of a codebase.
+
+While the knowledge graph is built, the tree-sitter tree of every source file is matched
+against a per-language query that captures the definitions (functions, classes, methods,
+types...) with their names, the import statements and the identifiers. After all files
+are parsed, every name that is defined in the codebase becomes a SymbolNode, connected to
+the ASTNodes that define, reference or import it:
+
+* DEFINES: from the ASTNode of the definition.
+* REFERENCES: from the ASTNode of the innermost definition that uses the name.
+* IMPORTS: from the ASTNode of the import statement.
+
+Only some tree-sitter nodes are in the knowledge graph, the ones down to max_ast_depth or
+the selected ones, so an occurrence whose node is not in it is attached to its closest
+ancestor that is. Names that are not defined in the codebase, like the ones of the standard
+library, get no SymbolNode.
+"""
+
+import functools
+from pathlib import Path
+from typing import Dict, Mapping, Optional, Sequence, Tuple
+
+from tree_sitter import Node, Query, Tree
+
+from prometheus.graph.graph_types import (
+    KnowledgeGraphEdge,
+    KnowledgeGraphEdgeType,
+    KnowledgeGraphNode,
+    SymbolNode,
+)
+from prometheus.parser.file_types import FileType
+from prometheus.parser.tree_sitter_parser import FILE_TYPE_TO_LANG, get_language
+
+# Captures: @definition with its @name, and @import for import statements. The identifiers
+# of an import statement are the names it imports.
+DEFINITION_QUERIES = {
+    "bash": """
+(function_definition name: (word) @name) @definition
+""",
+    "c": """
+(function_definition declarator: (function_declarator declarator: (identifier) @name)) @definition
+(function_definition declarator: (pointer_declarator declarator: (function_declarator declarator: (identifier) @name))) @definition
+(struct_specifier name: (type_identifier) @name body: (field_declaration_list)) @definition
+(enum_specifier name: (type_identifier) @name body: (enumerator_list)) @definition
+(type_definition declarator: (type_identifier) @name) @definition
+(preproc_function_def name: (identifier) @name) @definition
+(preproc_def name: (identifier) @name) @definition
+(preproc_include) @import
+""",
+    "c_sharp": """
+(class_declaration name: (identifier) @name) @definition
+(interface_declaration name: (identifier) @name) @definition
+(struct_declaration name: (identifier) @name) @definition
+(enum_declaration name: (identifier) @name) @definition
+(record_declaration name: (identifier) @name) @definition
+(method_declaration name: (identifier) @name) @definition
+(constructor_declaration name: (identifier) @name) @definition
+(property_declaration name: (identifier) @name) @definition
+(using_directive) @import
+""",
+    "cpp": """
+(function_definition declarator: (function_declarator declarator: [(identifier) (field_identifier) (qualified_identifier) (destructor_name)] @name)) @definition
+(function_definition declarator: (pointer_declarator declarator: (function_declarator declarator: [(identifier) (field_identifier) (qualified_identifier)] @name))) @definition
+(function_definition declarator: (reference_declarator (function_declarator declarator: [(identifier) (field_identifier) (qualified_identifier)] @name))) @definition
+(class_specifier name: (type_identifier) @name body: (field_declaration_list)) @definition
+(struct_specifier name: (type_identifier) @name body: (field_declaration_list)) @definition
+(enum_specifier name: (type_identifier) @name body: (enumerator_list)) @definition
+(type_definition declarator: (type_identifier) @name) @definition
+(alias_declaration name: (type_identifier) @name) @definition
+(namespace_definition name: (namespace_identifier) @name) @definition
+(preproc_function_def name: (identifier) @name) @definition
+(preproc_def name: (identifier) @name) @definition
+(preproc_include) @import
+(using_declaration) @import
+""",
+    "go": """
+(function_declaration name: (identifier) @name) @definition
+(method_declaration name: (field_identifier) @name) @definition
+(type_spec name: (type_identifier) @name) @definition
+(import_declaration) @import
+""",
+    "java": """
+(class_declaration name: (identifier) @name) @definition
+(interface_declaration name: (identifier) @name) @definition
+(enum_declaration name: (identifier) @name) @definition
+(record_declaration name: (identifier) @name) @definition
+(annotation_type_declaration name: (identifier) @name) @definition
+(method_declaration name: (identifier) @name) @definition
+(constructor_declaration name: (identifier) @name) @definition
+(import_declaration) @import
+""",
+    "javascript": """
+(function_declaration name: (identifier) @name) @definition
+(generator_function_declaration name: (identifier) @name) @definition
+(class_declaration name: (identifier) @name) @definition
+(method_definition name: (property_identifier) @name) @definition
+(variable_declarator name: (identifier) @name value: [(arrow_function) (function) (class)]) @definition
+(import_statement) @import
+""",
+    "kotlin": """
+(class_declaration (type_identifier) @name) @definition
+(object_declaration (type_identifier) @name) @definition
+(function_declaration (simple_identifier) @name) @definition
+(import_header) @import
+""",
+    "php": """
+(function_definition name: (name) @name) @definition
+(class_declaration name: (name) @name) @definition
+(interface_declaration name: (name) @name) @definition
+(trait_declaration name: (name) @name) @definition
+(method_declaration name: (name) @name) @definition
+(namespace_use_declaration) @import
+""",
+    "python": """
+(function_definition name: (identifier) @name) @definition
+(class_definition name: (identifier) @name) @definition
+(import_statement) @import
+(import_from_statement) @import
+""",
+    "ruby": """
+(method name: (_) @name) @definition
+(singleton_method name: (_) @name) @definition
+(class name: (constant) @name) @definition
+(module name: (constant) @name) @definition
+""",
+    "rust": """
+(function_item name: (identifier) @name) @definition
+(struct_item name: (type_identifier) @name) @definition
+(enum_item name: (type_identifier) @name) @definition
+(trait_item name: (type_identifier) @name) @definition
+(type_item name: (type_identifier) @name) @definition
+(mod_item name: (identifier) @name) @definition
+(macro_definition name: (identifier) @name) @definition
+(use_declaration) @import
+""",
+    "typescript": """
+(function_declaration name: (identifier) @name) @definition
+(generator_function_declaration name: (identifier) @name) @definition
+(class_declaration name: (type_identifier) @name) @definition
+(abstract_class_declaration name: (type_identifier) @name) @definition
+(interface_declaration name: (type_identifier) @name) @definition
+(type_alias_declaration name: (type_identifier) @name) @definition
+(enum_declaration name: (identifier) @name) @definition
+(method_definition name: (property_identifier) @name) @definition
+(variable_declarator name: (identifier) @name value: [(arrow_function) (function) (class)]) @definition
+(import_statement) @import
+""",
+}
+
+# Captures: @reference for the identifiers that may refer to a definition
+REFERENCE_QUERIES = {
+    "bash": """
+(command name: (command_name (word) @reference))
+""",
+    "c": """
+[(identifier) (type_identifier) (field_identifier)] @reference
+""",
+    "c_sharp": """
+(identifier) @reference
+""",
+    "cpp": """
+[(identifier) (type_identifier) (field_identifier) (namespace_identifier)] @reference
+""",
+    "go": """
+[(identifier) (type_identifier) (field_identifier)] @reference
+""",
+    "java": """
+[(identifier) (type_identifier)] @reference
+""",
+    "javascript": """
+[(identifier) (property_identifier) (shorthand_property_identifier)] @reference
+""",
+    "kotlin": """
+[(simple_identifier) (type_identifier)] @reference
+""",
+    "php": """
+(name) @reference
+""",
+    "python": """
+(identifier) @reference
+""",
+    "ruby": """
+[(identifier) (constant)] @reference
+""",
+    "rust": """
+[(identifier) (type_identifier) (field_identifier)] @reference
+""",
+    "typescript": """
+[(identifier) (type_identifier) (property_identifier) (shorthand_property_identifier)] @reference
+""",
+}
+
+
+@functools.cache
+def _get_query(lang: str) -> Optional[Query]:
+    if lang not in DEFINITION_QUERIES:
+        return None
+    return get_language(lang).query(DEFINITION_QUERIES[lang] + REFERENCE_QUERIES[lang])
+
+
+def _get_symbol_name(name_node: Node) -> str:
+    # Qualified C++ definitions like Foo::bar are referenced by their last component
+    return name_node.text.decode("utf-8").rsplit("::", 1)[-1]
+
+
+class SymbolTable:
+    """Collects the symbol occurrences of the files of a knowledge graph.
+
+    Usage: call add_file for every parsed source file, then build to create the SymbolNodes
+    and their edges.
+    """
+
+    def __init__(self):
+        # (name, ASTNode ID, edge type) -> ASTNode, in the order the occurrences were found
+        self._occurrences: Dict[Tuple[str, int, KnowledgeGraphEdgeType], KnowledgeGraphNode] = {}
+
+    def add_file(self, file: Path, tree: Tree, kg_nodes: Mapping[int, KnowledgeGraphNode]):
+        """Collects the definitions, references and imports of a source file.
+
+        Args:
+          file: The source file, its extension determines the language.
+          tree: The tree-sitter tree of the file.
+          kg_nodes: The ASTNodes created for the file, by the ID of their tree-sitter node.
+        """
+        lang = FILE_TYPE_TO_LANG.get(FileType.from_path(file))
+        query = _get_query(lang) if lang is not None else None
+        if query is None:
+            return
+
+        definitions: Dict[int, Tuple[Node, str]] = {}
+        definition_name_ids = set()
+        imports: Dict[int, Node] = {}
+        references = []
+        for _, captures in query.matches(tree.root_node):
+            if "definition" in captures and "name" in captures:
+                definition_node = captures["definition"]
+                definitions[definition_node.id] = (
+                    definition_node,
+                    _get_symbol_name(captures["name"]),
+                )
+                definition_name_ids.add(captures["name"].id)
+            elif "import" in captures:
+                imports[captures["import"].id] = captures["import"]
+            elif "reference" in captures:
+                references.append(captures["reference"])
+
+        for definition_node, name in definitions.values():
+            self._add_occurrence(
+                name, self._get_kg_node(definition_node, kg_nodes), KnowledgeGraphEdgeType.defines
+            )
+
+        for reference_node in references:
+            if reference_node.id in definition_name_ids:
+                continue
+            import_node = None
+            enclosing_definition = None
+            closest_kg_node = None
+            ancestor = reference_node.parent
+            while ancestor is not None:
+                if ancestor.id in imports:
+                    import_node = ancestor
+                    break
+                if ancestor.id in kg_nodes:
+                    if closest_kg_node is None:
+                        closest_kg_node = kg_nodes[ancestor.id]
+                    if enclosing_definition is None and ancestor.id in definitions:
+                        enclosing_definition = kg_nodes[ancestor.id]
+                ancestor = ancestor.parent
+
+            name = reference_node.text.decode("utf-8")
+            if import_node is not None:
+                self._add_occurrence(
+                    name, self._get_kg_node(import_node, kg_nodes), KnowledgeGraphEdgeType.imports
+                )
+            else:
+                self._add_occurrence(
+                    name,
+                    enclosing_definition or closest_kg_node,
+                    KnowledgeGraphEdgeType.references,
+                )
+
+    def build(
+        self, next_node_id: int
+    ) -> Tuple[int, Sequence[KnowledgeGraphNode], Sequence[KnowledgeGraphEdge]]:
+        """Creates a SymbolNode for every defined name, and the edges of its occurrences.
+
+        Args:
+          next_node_id: The next available node id.
+
+        Returns:
+          A tuple of (next_node_id, kg_nodes, kg_edges), where next_node_id is the
+          new next_node_id, kg_nodes is a list of the SymbolNodes and kg_edges is a list
+          of the DEFINES, REFERENCES and IMPORTS edges.
+        """
+        defined_names = sorted(
+            {
+                name
+                for name, _, edge_type in self._occurrences
+                if edge_type == KnowledgeGraphEdgeType.defines
+            }
+        )
+        symbol_nodes = {}
+        for name in defined_names:
+            symbol_nodes[name] = KnowledgeGraphNode(next_node_id, SymbolNode(name=name))
+            next_node_id += 1
+
+        symbol_edges = [
+            KnowledgeGraphEdge(kg_node, symbol_nodes[name], edge_type)
+            for (name, _, edge_type), kg_node in self._occurrences.items()
+            if name in symbol_nodes
+        ]
+        return next_node_id, list(symbol_nodes.values()), symbol_edges
+
+    def get_occurrences(
+        self, name: str
+    ) -> Sequence[Tuple[KnowledgeGraphNode, KnowledgeGraphEdgeType]]:
+        """Returns the ASTNodes that define, reference or import a name, with the edge type.
+
+        Unlike the edges created by build, the occurrences of names that are not defined in
+        the collected files are also returned.
+        """
+        return [
+            (kg_node, edge_type)
+            for (occurrence_name, _, edge_type), kg_node in self._occurrences.items()
+            if occurrence_name == name
+        ]
+
+    def _add_occurrence(
+        self, name: str, kg_node: KnowledgeGraphNode, edge_type: KnowledgeGraphEdgeType
+    ):
+        self._occurrences.setdefault((name, kg_node.node_id, edge_type), kg_node)
+
+    @staticmethod
+    def _get_kg_node(
+        tree_sitter_node: Node, kg_nodes: Mapping[int, KnowledgeGraphNode]
+    ) -> KnowledgeGraphNode:
+        """Returns the ASTNode of a tree-sitter node, or of its closest ancestor in the graph."""
+        while tree_sitter_node.id not in kg_nodes:
+            tree_sitter_node = tree_sitter_node.parent
+        return kg_nodes[tree_sitter_node.id]
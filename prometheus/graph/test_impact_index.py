@@ -0,0 +1,482 @@
+"""Static test-impact analysis on top of the knowledge graph.
+
+The index maps every definition in the codebase (functions, classes, ...) to the
+identifiers it uses, and every file to the files it imports. Given a patch, it finds the
+definitions the patch changes, and follows the references to them up to the tests: a test
+is affected if it uses a changed definition, or a definition that uses one, and so on. So
+that regression tests that cannot be affected by a patch do not have to be run.
+
+The analysis is deliberately conservative: whenever it cannot tell whether a test is
+affected (a changed file that is not in the knowledge graph, a changed definition whose
+name or callers it cannot resolve, ...), every test is treated as affected.
+"""
+
+import logging
+import posixpath
+import re
+from collections import defaultdict
+from dataclasses import dataclass
+from pathlib import PurePosixPath
+from typing import Dict, FrozenSet, List, Mapping, Optional, Sequence, Set, Tuple
+
+from unidiff import PatchSet
+
+from prometheus.graph.graph_types import ASTNode, FileNode, KnowledgeGraphNode
+from prometheus.graph.knowledge_graph import KnowledgeGraph
+
+# tree-sitter node types that define a named symbol, across the supported languages.
+DEFINITION_NODE_TYPES = frozenset(
+    {
+        "class_declaration",
+        "class_definition",
+        "class_specifier",
+        "enum_declaration",
+        "function_declaration",
+        "function_definition",
+        "function_item",
+        "impl_item",
+        "interface_declaration",
+        "method",
+        "method_declaration",
+        "struct_item",
+        "struct_specifier",
+        "trait_item",
+        "type_declaration",
+    }
+)
+
+_DEFINITION_NAME_RE = re.compile(
+    r"\b(?:def|class|func|function|fn|struct|interface|enum|trait|impl|type)\s+"
+    r"(?:\([^)]*\)\s*)?([A-Za-z_]\w*)"
+)
+_JAVA_STYLE_METHOD_NAME_RE = re.compile(r"([A-Za-z_]\w*)\s*\(")
+_IDENTIFIER_RE = re.compile(r"[A-Za-z_]\w*")
+_IMPORT_LINE_RE = re.compile(
+    r"^\s*(?:import|from|use|using|require|include|#include|package)\b.*$|.*\brequire\(.*$",
+    re.MULTILINE,
+)
+_TEST_FILE_RE = re.compile(
+    r"(^|/)(tests?|__tests__|spec)/"
+    r"|(^|/)test_[^/]*$"
+    r"|_tests?\.[^/.]+$"
+    r"|[^/]*Tests?\.[^/.]+$"
+    r"|\.(test|spec)\.[^/.]+$"
+)
+_QUOTED_IMPORT_RE = re.compile(r"""["'<]([^"'<>\s]+)[">']""")
+_PYTHON_FROM_IMPORT_RE = re.compile(r"^\s*from\s+(\.*[\w.]*)\s+import\s+(.*)$", re.DOTALL)
+_MODULE_PATH_RE = re.compile(r"\.*[A-Za-z_]\w*(?:(?:\.|::)\w+)*")
+_IMPORT_KEYWORDS = frozenset(
+    {"as", "from", "import", "include", "mod", "require", "static", "type", "use", "using"}
+)
+# Path segments of an import that are not the name of a module
+_IMPORT_PATH_PREFIXES = frozenset({"crate", "self", "super"})
+# Files that are imported under the name of their directory
+_PACKAGE_FILE_STEMS = frozenset({"__init__", "index", "mod"})
+
+
+@dataclass(frozen=True)
+class IndexedTest:
+    """A test known to the index.
+
+    Attributes:
+      file_path: Relative path of the file that contains the test.
+      name: Name of the test function, or None when the test functions in this file cannot
+        be told apart and the file is indexed as a single test.
+      references: Identifiers used by the test.
+    """
+
+    file_path: str
+    name: Optional[str]
+    references: FrozenSet[str]
+
+    def matches(self, test_identifier: str) -> bool:
+        """Checks if a free-form test identifier, like 'tests/test_foo.py::test_bar', refers
+        to this test."""
+        if self.file_path not in test_identifier:
+            # The file may also be named by its stem, like in 'tests.test_foo.TestFoo'
+            stem = re.escape(PurePosixPath(self.file_path).stem)
+            if not re.search(rf"(?<![\w-]){stem}(?![\w-])", test_identifier):
+                return False
+        if self.name is None:
+            return True
+        return self.name in _IDENTIFIER_RE.findall(test_identifier)
+
+
+@dataclass(frozen=True)
+class _Definition:
+    name: Optional[str]
+    start_line: int
+    end_line: int
+    references: FrozenSet[str]
+
+
+class TestImpactIndex:
+    """An index of test functions and the symbols they depend on."""
+
+    def __init__(self, kg: KnowledgeGraph):
+        """Builds the index from the AST nodes of a knowledge graph.
+
+        Args:
+          kg: The knowledge graph of the codebase.
+        """
+        self._logger = logging.getLogger("prometheus.graph.test_impact_index")
+        self._definitions: Mapping[str, Sequence[_Definition]] = {}
+        self._tests: Sequence[IndexedTest] = []
+        # Names of the definitions that reference a name, and the files whose module level
+        # code references it
+        self._referrers: Mapping[str, Set[str]] = {}
+        self._module_referrers: Mapping[str, Set[str]] = {}
+        # Files that import a file
+        self._importers: Mapping[str, Set[str]] = {}
+        self._build(kg)
+        self._logger.info(
+            f"Indexed {len(self._tests)} tests and {len(self._definitions)} source files"
+        )
+
+    @property
+    def tests(self) -> Sequence[IndexedTest]:
+        return self._tests
+
+    @staticmethod
+    def is_test_file(relative_path: str) -> bool:
+        return bool(_TEST_FILE_RE.search(relative_path))
+
+    def _build(self, kg: KnowledgeGraph):
+        children = defaultdict(list)
+        for parent_of_edge in kg.get_parent_of_edges():
+            children[parent_of_edge.source.node_id].append(parent_of_edge.target)
+
+        definitions = {}
+        tests = []
+        import_statements = {}
+        module_references = {}
+        for has_ast_edge in kg.get_has_ast_edges():
+            file_node: FileNode = has_ast_edge.source.node
+            root_ast_node: ASTNode = has_ast_edge.target.node
+            file_definitions = []
+            file_tests = []
+            for kg_node in self._iter_definition_nodes(has_ast_edge.target, children):
+                name = self._get_definition_name(kg_node.node)
+                references = frozenset(_IDENTIFIER_RE.findall(kg_node.node.text))
+                file_definitions.append(
+                    _Definition(name, kg_node.node.start_line, kg_node.node.end_line, references)
+                )
+                if name is not None and self._is_test_definition(name, kg_node.node):
+                    file_tests.append(IndexedTest(file_node.relative_path, name, references))
+            definitions[file_node.relative_path] = file_definitions
+            file_imports, module_lines = self._split_module_code(root_ast_node, file_definitions)
+            import_statements[file_node.relative_path] = file_imports
+            module_references[file_node.relative_path] = frozenset(
+                _IDENTIFIER_RE.findall("\n".join(module_lines))
+            )
+
+            if not self.is_test_file(file_node.relative_path):
+                continue
+            if not file_tests:
+                file_tests = [
+                    IndexedTest(
+                        file_node.relative_path,
+                        None,
+                        frozenset(_IDENTIFIER_RE.findall(root_ast_node.text)),
+                    )
+                ]
+            tests.extend(file_tests)
+
+        defined_names = {
+            definition.name
+            for file_definitions in definitions.values()
+            for definition in file_definitions
+        }
+        referrers = defaultdict(set)
+        for file_definitions in definitions.values():
+            for definition in file_definitions:
+                for name in definition.references & defined_names:
+                    if name != definition.name:
+                        referrers[name].add(definition.name)
+        module_referrers = defaultdict(set)
+        for file_path, references in module_references.items():
+            for name in references & defined_names:
+                module_referrers[name].add(file_path)
+
+        module_files = self._get_module_files(definitions)
+        importers = defaultdict(set)
+        for file_path, statements in import_statements.items():
+            for statement in statements:
+                for imported_file in self._resolve_import(file_path, statement, module_files):
+                    if imported_file != file_path:
+                        importers[imported_file].add(file_path)
+
+        self._definitions = definitions
+        self._tests = tests
+        self._referrers = referrers
+        self._module_referrers = module_referrers
+        self._importers = importers
+
+    @staticmethod
+    def _iter_definition_nodes(root: KnowledgeGraphNode, children: Mapping[int, list]):
+        stack = [root]
+        while stack:
+            kg_node = stack.pop()
+            if kg_node.node.type in DEFINITION_NODE_TYPES:
+                yield kg_node
+            stack.extend(children.get(kg_node.node_id, []))
+
+    @staticmethod
+    def _split_module_code(
+        root_ast_node: ASTNode, definitions: Sequence[_Definition]
+    ) -> Tuple[List[str], List[str]]:
+        """Splits the code of a file that is not part of a definition into its import
+        statements and its other lines."""
+        lines = root_ast_node.text.splitlines()
+        in_definition = [False] * len(lines)
+        for definition in definitions:
+            start = max(definition.start_line - root_ast_node.start_line, 0)
+            end = min(definition.end_line - root_ast_node.start_line + 1, len(lines))
+            in_definition[start:end] = [True] * max(end - start, 0)
+
+        import_statements = []
+        module_lines = []
+        index = 0
+        while index < len(lines):
+            line = lines[index]
+            index += 1
+            if in_definition[index - 1]:
+                continue
+            if not _IMPORT_LINE_RE.match(line):
+                module_lines.append(line)
+                continue
+            # Imports can continue over several lines, like 'from a import (\n b,\n c\n)'
+            statement = line
+            while index < len(lines) and (
+                statement.count("(") > statement.count(")")
+                or statement.count("{") > statement.count("}")
+                or statement.endswith("\\")
+            ):
+                statement = statement.removesuffix("\\") + "\n" + lines[index]
+                index += 1
+            import_statements.append(statement)
+        return import_statements, module_lines
+
+    @staticmethod
+    def _get_module_files(definitions: Mapping[str, Sequence[_Definition]]) -> Dict[str, Set[str]]:
+        """Maps every module path an import could use for a file, like 'util', 'pkg/util'
+        and 'src/pkg/util' for 'src/pkg/util.py', to the files."""
+        module_files = defaultdict(set)
+        for file_path in definitions:
+            parts = PurePosixPath(file_path).with_suffix("").parts
+            for index in range(len(parts)):
+                module_files["/".join(parts[index:])].add(file_path)
+            if parts[-1] in _PACKAGE_FILE_STEMS:
+                for index in range(len(parts) - 1):
+                    module_files["/".join(parts[index:-1])].add(file_path)
+        return module_files
+
+    @staticmethod
+    def _resolve_import(
+        file_path: str, statement: str, module_files: Mapping[str, Set[str]]
+    ) -> Set[str]:
+        """Resolves an import statement to the indexed files it may import."""
+        if statement.lstrip().startswith("package"):
+            return set()
+        directory = posixpath.dirname(file_path)
+        module_paths = []
+        for path in _QUOTED_IMPORT_RE.findall(statement):
+            if path.startswith("."):
+                path = posixpath.normpath(posixpath.join(directory, path))
+            module_paths.append(str(PurePosixPath(path).with_suffix("")))
+
+        statement = _QUOTED_IMPORT_RE.sub(" ", statement)
+        python_from_import = _PYTHON_FROM_IMPORT_RE.match(statement)
+        if python_from_import:
+            module, names = python_from_import.groups()
+            separator = "" if module.endswith(".") else "."
+            specs = [module] + [
+                f"{module}{separator}{name}"
+                for name in _IDENTIFIER_RE.findall(names)
+                if name not in _IMPORT_KEYWORDS
+            ]
+        else:
+            specs = [
+                spec for spec in _MODULE_PATH_RE.findall(statement) if spec not in _IMPORT_KEYWORDS
+            ]
+        for spec in specs:
+            base = None
+            level = len(spec) - len(spec.lstrip("."))
+            if level:
+                # A relative Python import, from the package of the file
+                base = directory
+                for _ in range(level - 1):
+                    base = posixpath.dirname(base)
+                if base:
+                    module_paths.append(base)
+            parts = [
+                part
+                for part in re.split(r"\.|::", spec.lstrip("."))
+                if part and part not in _IMPORT_PATH_PREFIXES
+            ]
+            for index in range(1, len(parts) + 1):
+                module_path = "/".join(parts[:index])
+                module_paths.append(posixpath.join(base, module_path) if base else module_path)
+
+        imported_files = set()
+        for module_path in module_paths:
+            imported_files.update(module_files.get(module_path, ()))
+        return imported_files
+
+    @staticmethod
+    def _get_definition_name(ast_node: ASTNode) -> Optional[str]:
+        # Skip decorators and annotations, so that the name comes from the signature
+        signature_lines = [
+            line for line in ast_node.text.splitlines() if not line.lstrip().startswith("@")
+        ]
+        signature = signature_lines[0] if signature_lines else ""
+        match = _DEFINITION_NAME_RE.search(signature)
+        if match:
+            return match.group(1)
+        if ast_node.type == "method_declaration":
+            match = _JAVA_STYLE_METHOD_NAME_RE.search(signature)
+            if match:
+                return match.group(1)
+        return None
+
+    @staticmethod
+    def _is_test_definition(name: str, ast_node: ASTNode) -> bool:
+        return name.lower().startswith("test") or "@Test" in ast_node.text
+
+    def _is_referenced(self, name: str) -> bool:
+        return name in self._referrers or name in self._module_referrers
+
+    def get_affected_tests(self, patch: str) -> Optional[Set[IndexedTest]]:
+        """Computes the tests that may be affected by a patch.
+
+        A test is affected if it uses a definition the patch changes, directly or through
+        other definitions, or if it is in a file that imports, directly or not, a module
+        whose module level code the patch changes.
+
+        Args:
+          patch: A unified diff.
+
+        Returns:
+          The affected tests, or None if the patch changes files that are not in the index,
+          or definitions that cannot be resolved, in which case any test may be affected.
+        """
+        changed_names = set()
+        changed_modules = set()
+        changed_test_files = set()
+        for patched_file in PatchSet(patch):
+            if patched_file.is_added_file:
+                # New files can only be used through changes in existing files
+                continue
+            file_path = patched_file.path
+            is_test_file = self.is_test_file(file_path)
+            if is_test_file:
+                changed_test_files.add(file_path)
+            if file_path not in self._definitions:
+                self._logger.debug(f"{file_path} is not indexed, every test may be affected")
+                return None
+            if patched_file.is_removed_file:
+                changed_modules.add(file_path)
+                continue
+
+            # Lines of the original file that are removed, or after which lines are added.
+            # Like the line numbers of the AST nodes, they start at 1.
+            changed_lines = set()
+            for hunk in patched_file:
+                previous_source_line = hunk.source_start - 1
+                for line in hunk:
+                    if line.is_added:
+                        changed_lines.add(previous_source_line)
+                    else:
+                        previous_source_line = line.source_line_no
+                        if line.is_removed:
+                            changed_lines.add(previous_source_line)
+            for changed_line in changed_lines:
+                definitions = [
+                    definition
+                    for definition in self._definitions[file_path]
+                    if definition.start_line <= changed_line <= definition.end_line
+                ]
+                if not definitions:
+                    changed_modules.add(file_path)
+                    continue
+                if any(definition.name is None for definition in definitions):
+                    self._logger.debug(
+                        f"Cannot resolve the definition changed at {file_path}:{changed_line}, "
+                        "every test may be affected"
+                    )
+                    return None
+                changed_names.update(definition.name for definition in definitions)
+                # A definition nothing refers to is used dynamically, by callers the index
+                # cannot follow
+                outermost_definition = min(definitions, key=lambda d: d.start_line - d.end_line)
+                if not is_test_file and not self._is_referenced(outermost_definition.name):
+                    self._logger.debug(
+                        f"Cannot resolve the users of {outermost_definition.name} in {file_path}, "
+                        "every test may be affected"
+                    )
+                    return None
+
+        affected_modules = set()
+        pending_modules = list(changed_modules)
+        pending_names = list(changed_names)
+        while pending_modules or pending_names:
+            if pending_modules:
+                file_path = pending_modules.pop()
+                if file_path in affected_modules:
+                    continue
+                affected_modules.add(file_path)
+                # Every definition of a module may depend on its module level code
+                for definition in self._definitions.get(file_path, ()):
+                    if definition.name is not None and definition.name not in changed_names:
+                        changed_names.add(definition.name)
+                        pending_names.append(definition.name)
+                pending_modules.extend(self._importers.get(file_path, ()))
+            else:
+                name = pending_names.pop()
+                for referrer in self._referrers.get(name, ()):
+                    if referrer is None:
+                        self._logger.debug(
+                            f"Cannot resolve a definition that uses {name}, "
+                            "every test may be affected"
+                        )
+                        return None
+                    if referrer not in changed_names:
+                        changed_names.add(referrer)
+                        pending_names.append(referrer)
+                pending_modules.extend(self._module_referrers.get(name, ()))
+
+        # Tests in the same package may use a module without importing it
+        changed_packages = {PurePosixPath(file_path).parent for file_path in changed_modules}
+        return {
+            test
+            for test in self._tests
+            if test.file_path in changed_test_files
+            or test.file_path in affected_modules
+            or test.references & changed_names
+            or PurePosixPath(test.file_path).parent in changed_packages
+        }
+
+    def filter_regression_tests(self, regression_tests: Sequence[str], patch: str) -> Sequence[str]:
+        """Removes the regression tests that cannot be affected by a patch.
+
+        Regression tests that can not be resolved to an indexed test are always kept.
+
+        Args:
+          regression_tests: Free-form identifiers of the regression tests.
+          patch: A unified diff.
+
+        Returns:
+          The regression tests that may be affected by the patch, in their original order.
+        """
+        affected_tests = self.get_affected_tests(patch)
+        if affected_tests is None:
+            return list(regression_tests)
+
+        filtered_regression_tests = []
+        for regression_test in regression_tests:
+            indexed_tests = [test for test in self._tests if test.matches(regression_test)]
+            if not indexed_tests or any(test in affected_tests for test in indexed_tests):
+                filtered_regression_tests.append(regression_test)
+            else:
+                self._logger.info(f"Skipping regression test {regression_test}, not affected")
+        return filtered_regression_tests
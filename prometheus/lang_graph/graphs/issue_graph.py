@@ -1,12 +1,17 @@
-from typing import Mapping, Optional, Sequence
+import threading
+from typing import Any, Callable, Mapping, Optional, Sequence
 
-import neo4j
+from langchain_core.callbacks import BaseCallbackHandler
 from langchain_core.language_models.chat_models import BaseChatModel
+from langgraph.checkpoint.base import BaseCheckpointSaver
 from langgraph.graph import END, StateGraph
 
 from prometheus.docker.base_container import BaseContainer
+from prometheus.exceptions.issue_cancelled_exception import IssueCancelledException
 from prometheus.git.git_repository import GitRepository
+from prometheus.graph.graph_store import GraphStore
 from prometheus.graph.knowledge_graph import KnowledgeGraph
+from prometheus.graph.semantic_index import SemanticIndex
 from prometheus.lang_graph.graphs.issue_state import IssueState, IssueType
 from prometheus.lang_graph.nodes.issue_bug_subgraph_node import IssueBugSubgraphNode
 from prometheus.lang_graph.nodes.issue_classification_subgraph_node import (
@@ -14,6 +19,25 @@ from prometheus.lang_graph.nodes.issue_classification_subgraph_node import (
 )
 from prometheus.lang_graph.nodes.issue_question_subgraph_node import IssueQuestionSubgraphNode
 from prometheus.lang_graph.nodes.noop_node import NoopNode
+from prometheus.models.issue_event import IssueEvent
+from prometheus.utils.context_cache import ContextCache
+from prometheus.utils.issue_context_store import IssueContextStore
+
+
+class CancellationCallbackHandler(BaseCallbackHandler):
+    """
+    Stops a graph run at the next node that starts once the cancel event is set, including
+    nodes of the subgraphs that run inside other nodes.
+    """
+
+    raise_error = True
+
+    def __init__(self, cancel_event: threading.Event):
+        self.cancel_event = cancel_event
+
+    def on_chain_start(self, serialized: Any, inputs: Any, **kwargs: Any):
+        if self.cancel_event.is_set():
+            raise IssueCancelledException("The processing of the issue was cancelled")
 
 
 class IssueGraph:
@@ -30,13 +54,18 @@ class IssueGraph:
         base_model: BaseChatModel,
         kg: KnowledgeGraph,
         git_repo: GitRepository,
-        neo4j_driver: neo4j.Driver,
+        graph_store: GraphStore,
         max_token_per_neo4j_result: int,
         container: BaseContainer,
         build_commands: Optional[Sequence[str]] = None,
         test_commands: Optional[Sequence[str]] = None,
+        checkpointer: Optional[BaseCheckpointSaver] = None,
+        context_cache: Optional[ContextCache] = None,
+        semantic_index: Optional[SemanticIndex] = None,
     ):
         self.git_repo = git_repo
+        # The context retrieved by each stage of an issue is reused by the later stages
+        self.context_store = IssueContextStore()
 
         # Entrance point for the issue handling workflow
         issue_type_branch_node = NoopNode()
@@ -46,8 +75,11 @@ class IssueGraph:
             model=base_model,
             kg=kg,
             local_path=git_repo.playground_path,
-            neo4j_driver=neo4j_driver,
+            graph_store=graph_store,
             max_token_per_neo4j_result=max_token_per_neo4j_result,
+            context_cache=context_cache,
+            context_store=self.context_store,
+            semantic_index=semantic_index,
         )
 
         # Subgraph node for handling bug issues
@@ -57,10 +89,13 @@ class IssueGraph:
             container=container,
             kg=kg,
             git_repo=git_repo,
-            neo4j_driver=neo4j_driver,
+            graph_store=graph_store,
             max_token_per_neo4j_result=max_token_per_neo4j_result,
             build_commands=build_commands,
             test_commands=test_commands,
+            context_cache=context_cache,
+            context_store=self.context_store,
+            semantic_index=semantic_index,
         )
 
         # Subgraph node for handling question issues
@@ -69,8 +104,11 @@ class IssueGraph:
             base_model=base_model,
             kg=kg,
             git_repo=git_repo,
-            neo4j_driver=neo4j_driver,
+            graph_store=graph_store,
             max_token_per_neo4j_result=max_token_per_neo4j_result,
+            context_cache=context_cache,
+            context_store=self.context_store,
+            semantic_index=semantic_index,
         )
 
         # Create the state graph for the issue handling workflow
@@ -110,7 +148,8 @@ class IssueGraph:
         workflow.add_edge("issue_bug_subgraph_node", END)
         workflow.add_edge("issue_question_subgraph_node", END)
 
-        self.graph = workflow.compile()
+        # The subgraphs invoked by the nodes are checkpointed by the same checkpointer
+        self.graph = workflow.compile(checkpointer=checkpointer)
 
     def invoke(
         self,
@@ -123,11 +162,30 @@ class IssueGraph:
         run_regression_test: bool,
         run_reproduce_test: bool,
         number_of_candidate_patch: int,
+        event_callback: Optional[Callable[[IssueEvent], None]] = None,
+        cancel_event: Optional[threading.Event] = None,
+        thread_id: Optional[str] = None,
     ):
         """
         Invoke the issue handling workflow with the provided parameters.
+
+        When an event callback is given, the workflow is streamed and the callback receives
+        the node transitions, retrieved context, candidate patches and test results of the
+        workflow and all of its subgraphs as they happen. When a cancel event is given and
+        gets set, the workflow stops at the next node and raises IssueCancelledException.
+
+        When the graph has a checkpointer, the workflow is checkpointed under thread_id. If a
+        previous run of the same thread_id did not finish, because it failed or was
+        cancelled, the workflow resumes from its last completed node instead of starting
+        over, and the issue parameters are ignored.
         """
-        config = None
+        self.context_store.clear()
+
+        config = {}
+        if cancel_event is not None:
+            config["callbacks"] = [CancellationCallbackHandler(cancel_event)]
+        if thread_id is not None:
+            config["configurable"] = {"thread_id": thread_id}
 
         input_state = {
             "issue_title": issue_title,
@@ -140,7 +198,24 @@ class IssueGraph:
             "run_reproduce_test": run_reproduce_test,
             "number_of_candidate_patch": number_of_candidate_patch,
         }
+        output_state = input_state
+        if self.graph.checkpointer is not None:
+            saved_state = self.graph.get_state(config)
+            if saved_state.next:
+                # Passing no input resumes from the checkpoint
+                input_state = None
+                output_state = saved_state.values
 
-        output_state = self.graph.invoke(input_state, config)
+        if event_callback is None:
+            return self.graph.invoke(input_state, config)
 
+        for namespace, mode, chunk in self.graph.stream(
+            input_state, config, stream_mode=["updates", "values"], subgraphs=True
+        ):
+            if mode == "values":
+                if not namespace:
+                    output_state = chunk
+                continue
+            for event in IssueEvent.from_graph_update(namespace, chunk):
+                event_callback(event)
         return output_state
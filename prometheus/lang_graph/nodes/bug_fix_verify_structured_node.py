@@ -2,11 +2,13 @@ import logging
 import threading
 
 from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import ToolMessage
 from langchain_core.prompts import ChatPromptTemplate
 from pydantic import BaseModel, Field
 
 from prometheus.lang_graph.subgraphs.bug_fix_verification_state import BugFixVerificationState
 from prometheus.utils.lang_graph_util import get_last_message_content
+from prometheus.utils.test_result_util import parse_test_output
 
 
 class BugFixVerifyStructureOutput(BaseModel):
@@ -96,7 +98,31 @@ Important:
         )
 
     def __call__(self, state: BugFixVerificationState):
-        bug_fix_verify_message = get_last_message_content(state["bug_fix_verify_messages"])
+        command_outputs = [
+            message.content
+            for message in state["bug_fix_verify_messages"]
+            if isinstance(message, ToolMessage) and isinstance(message.content, str)
+        ]
+        test_results = [parse_test_output(command_output) for command_output in command_outputs]
+        # The LLM can only be skipped if the output of every command, and in particular of
+        # the final reproduction command, is a test run that passed. The output of other
+        # commands, like 'python reproduce.py', can only be judged by the LLM.
+        if test_results and all(
+            test_result is not None and test_result.total > 0 and test_result.num_failed == 0
+            for test_result in test_results
+        ):
+            self._logger.debug("All test runs passed, skipping the LLM")
+            return {"reproducing_test_fail_log": ""}
+
+        if any(test_result is not None for test_result in test_results):
+            # Parsed test runs are passed on to the LLM as compact results, that contain just
+            # the failures, the output of the other commands is passed on unchanged
+            bug_fix_verify_message = "\n\n".join(
+                command_output if test_result is None else test_result.format()
+                for command_output, test_result in zip(command_outputs, test_results)
+            )
+        else:
+            bug_fix_verify_message = get_last_message_content(state["bug_fix_verify_messages"])
         response = self.model.invoke({"bug_reproducing_logs": bug_fix_verify_message})
 
         self._logger.debug(response)
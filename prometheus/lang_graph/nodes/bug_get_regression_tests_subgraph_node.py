@@ -1,17 +1,20 @@
 import logging
 import threading
-from typing import Dict
+from typing import Dict, Optional
 
-import neo4j
 from langchain_core.language_models.chat_models import BaseChatModel
 from langgraph.errors import GraphRecursionError
 
 from prometheus.docker.base_container import BaseContainer
 from prometheus.git.git_repository import GitRepository
+from prometheus.graph.graph_store import GraphStore
 from prometheus.graph.knowledge_graph import KnowledgeGraph
+from prometheus.graph.semantic_index import SemanticIndex
 from prometheus.lang_graph.subgraphs.bug_get_regression_tests_subgraph import (
     BugGetRegressionTestsSubgraph,
 )
+from prometheus.utils.context_cache import ContextCache
+from prometheus.utils.issue_context_store import IssueContextStore
 
 
 class BugGetRegressionTestsSubgraphNode:
@@ -22,8 +25,11 @@ class BugGetRegressionTestsSubgraphNode:
         container: BaseContainer,
         kg: KnowledgeGraph,
         git_repo: GitRepository,
-        neo4j_driver: neo4j.Driver,
+        graph_store: GraphStore,
         max_token_per_neo4j_result: int,
+        context_cache: Optional[ContextCache] = None,
+        context_store: Optional[IssueContextStore] = None,
+        semantic_index: Optional[SemanticIndex] = None,
     ):
         self._logger = logging.getLogger(
             f"thread-{threading.get_ident()}.prometheus.lang_graph.nodes.bug_get_regression_tests_subgraph_node"
@@ -34,8 +40,11 @@ class BugGetRegressionTestsSubgraphNode:
             container=container,
             kg=kg,
             git_repo=git_repo,
-            neo4j_driver=neo4j_driver,
+            graph_store=graph_store,
             max_token_per_neo4j_result=max_token_per_neo4j_result,
+            context_cache=context_cache,
+            context_store=context_store,
+            semantic_index=semantic_index,
         )
 
     def __call__(self, state: Dict):
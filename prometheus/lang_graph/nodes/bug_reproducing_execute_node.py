@@ -53,6 +53,7 @@ User provided test commands:
         test_commands: Optional[Sequence[str]] = None,
     ):
         self.test_commands = test_commands
+        self.container = container
         self.tools = self._init_tools(container)
         self.model_with_tools = model.bind_tools(self.tools)
         self.system_prompt = SystemMessage(self.SYS_PROMPT)
@@ -92,15 +93,17 @@ User provided test commands:
         test_commands_str = ""
         if self.test_commands:
             test_commands_str = format_test_commands(self.test_commands)
-        return HumanMessage(
-            self.HUMAN_PROMPT.format(
-                title=state["issue_title"],
-                body=state["issue_body"],
-                comments=state["issue_comments"],
-                reproduced_bug_file=reproduced_bug_file,
-                test_commands=test_commands_str,
-            )
+        message = self.HUMAN_PROMPT.format(
+            title=state["issue_title"],
+            body=state["issue_body"],
+            comments=state["issue_comments"],
+            reproduced_bug_file=reproduced_bug_file,
+            test_commands=test_commands_str,
         )
+        known_good_commands = container_command.format_known_good_commands(self.container)
+        if known_good_commands:
+            message += f"\n{known_good_commands}"
+        return HumanMessage(message)
 
     def __call__(self, state: BugReproductionState):
         try:
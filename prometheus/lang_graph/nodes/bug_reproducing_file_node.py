@@ -9,7 +9,7 @@ from langchain_core.messages import HumanMessage, SystemMessage
 from prometheus.graph.knowledge_graph import KnowledgeGraph
 from prometheus.lang_graph.subgraphs.bug_reproduction_state import BugReproductionState
 from prometheus.tools import file_operation
-from prometheus.utils.lang_graph_util import get_last_message_content
+from prometheus.utils.lang_graph_util import READ_ONLY_TOOL_METADATA, get_last_message_content
 
 
 class BugReproducingFileNode:
@@ -62,6 +62,7 @@ Current project structure:
             name=file_operation.read_file.__name__,
             description=file_operation.READ_FILE_DESCRIPTION,
             args_schema=file_operation.ReadFileInput,
+            metadata=READ_ONLY_TOOL_METADATA,
         )
         tools.append(read_file_tool)
 
@@ -8,6 +8,7 @@ from langchain_core.messages import SystemMessage
 
 from prometheus.lang_graph.subgraphs.bug_reproduction_state import BugReproductionState
 from prometheus.tools import file_operation
+from prometheus.utils.lang_graph_util import READ_ONLY_TOOL_METADATA
 
 
 class BugReproducingWriteNode:
@@ -136,6 +137,7 @@ def test_empty_array_parsing(parser):
             name=file_operation.read_file.__name__,
             description=file_operation.READ_FILE_DESCRIPTION,
             args_schema=file_operation.ReadFileInput,
+            metadata=READ_ONLY_TOOL_METADATA,
         )
         tools.append(read_file_tool)
 
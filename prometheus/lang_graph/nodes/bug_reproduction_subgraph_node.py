@@ -2,15 +2,18 @@ import logging
 import threading
 from typing import Optional, Sequence
 
-import neo4j
 from langchain_core.language_models.chat_models import BaseChatModel
 from langgraph.errors import GraphRecursionError
 
 from prometheus.docker.base_container import BaseContainer
 from prometheus.git.git_repository import GitRepository
+from prometheus.graph.graph_store import GraphStore
 from prometheus.graph.knowledge_graph import KnowledgeGraph
+from prometheus.graph.semantic_index import SemanticIndex
 from prometheus.lang_graph.subgraphs.bug_reproduction_subgraph import BugReproductionSubgraph
 from prometheus.lang_graph.subgraphs.issue_bug_state import IssueBugState
+from prometheus.utils.context_cache import ContextCache
+from prometheus.utils.issue_context_store import IssueContextStore
 
 
 class BugReproductionSubgraphNode:
@@ -21,9 +24,12 @@ class BugReproductionSubgraphNode:
         container: BaseContainer,
         kg: KnowledgeGraph,
         git_repo: GitRepository,
-        neo4j_driver: neo4j.Driver,
+        graph_store: GraphStore,
         max_token_per_neo4j_result: int,
         test_commands: Optional[Sequence[str]],
+        context_cache: Optional[ContextCache] = None,
+        context_store: Optional[IssueContextStore] = None,
+        semantic_index: Optional[SemanticIndex] = None,
     ):
         self._logger = logging.getLogger(
             f"thread-{threading.get_ident()}.prometheus.lang_graph.nodes.bug_reproduction_subgraph_node"
@@ -35,9 +41,12 @@ class BugReproductionSubgraphNode:
             container=container,
             kg=kg,
             git_repo=git_repo,
-            neo4j_driver=neo4j_driver,
+            graph_store=graph_store,
             max_token_per_neo4j_result=max_token_per_neo4j_result,
             test_commands=test_commands,
+            context_cache=context_cache,
+            context_store=context_store,
+            semantic_index=semantic_index,
         )
 
     def __call__(self, state: IssueBugState):
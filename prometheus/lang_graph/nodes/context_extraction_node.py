@@ -128,8 +128,9 @@ class ContextExtractionNode:
         The final contexts are with line numbers.
         """
         self._logger.info("Starting context extraction process")
-        # Get Context List with existing context
+        # Get Context List with existing context, the known context is not extracted again
         final_context = state.get("context", [])
+        known_context = state.get("known_context", [])
         # Get a human message
         human_message = self.get_human_message(state)
         self._logger.debug(human_message)
@@ -165,7 +166,7 @@ class ContextExtractionNode:
                 end_line_number=context_.end_line,
                 content=content,
             )
-            if context not in final_context:
+            if context not in final_context and context not in known_context:
                 final_context = final_context + [context]
 
         self._logger.info(f"Context extraction complete, returning context {final_context}")
@@ -8,15 +8,18 @@ with structured tools to systematically search and analyze the codebase Knowledg
 import functools
 import logging
 import threading
-from typing import Dict
+from typing import Callable, Dict, Optional
 
-import neo4j
 from langchain.tools import StructuredTool
 from langchain_core.language_models.chat_models import BaseChatModel
 from langchain_core.messages import SystemMessage
 
+from prometheus.graph.graph_store import GraphStore
 from prometheus.graph.knowledge_graph import KnowledgeGraph
-from prometheus.tools import graph_traversal
+from prometheus.graph.knowledge_graph_overlay import KnowledgeGraphOverlay
+from prometheus.graph.semantic_index import SemanticIndex
+from prometheus.tools import graph_traversal, graph_traversal_overlay, semantic_search
+from prometheus.utils.lang_graph_util import READ_ONLY_TOOL_METADATA
 
 
 class ContextProviderNode:
@@ -27,10 +30,11 @@ class ContextProviderNode:
     It uses a combination of file structure navigation, AST analysis, and text
     search to gather comprehensive context for queries.
 
-    The knowledge graph contains three main types of nodes:
+    The knowledge graph contains four main types of nodes:
     - FileNode: Represents files and directories
     - ASTNode: Represents syntactic elements from the code
     - TextNode: Represents documentation and text content
+    - SymbolNode: Represents the names defined in the code
     """
 
     SYS_PROMPT = """\
@@ -43,6 +47,7 @@ Knowledge Graph Structure:
    - FileNode: Files and directories in the codebase
    - ASTNode: Abstract Syntax Tree nodes representing code structure
    - TextNode: Documentation, comments, and other text content
+   - SymbolNode: Names of the functions, classes and types defined in the codebase
 
 2. Core Relationships:
    - HAS_FILE: Directory → File relationships
@@ -50,11 +55,13 @@ Knowledge Graph Structure:
    - HAS_TEXT: File → Text chunk linkage
    - PARENT_OF: AST node hierarchy
    - NEXT_CHUNK: Sequential text chunk connections
+   - DEFINES/REFERENCES/IMPORTS: AST node → SymbolNode it defines, uses or imports
 
 Search Strategy Guidelines:
 1. Source Code Search:
    - Prioritize relative_path tools when exact file location is known
    - Fall back to basename tools for filename-only searches
+   - Use find_definition and find_references when the name of a function/class is known
    - Use AST node searches to find specific code structures
    - Use preview_* or read_* tools with more than hundred lines to get more context than class/function
    - If a search returns no results, try alternative approaches with broader scope
@@ -66,6 +73,7 @@ Search Strategy Guidelines:
    - Be flexible with search terms if initial attempts fail
 
 3. Exploratory Search:
+   - Start with the semantic_search results, if available, when names or exact text are unknown
    - Start with find_file_node_* to verify paths
    - Use preview_file_content_* for quick content scanning
    - Use read_code_* tools to read more content beyond previews
@@ -73,6 +81,7 @@ Search Strategy Guidelines:
 
 4. Critical Rules:
    - Do not repeat the same query!
+   - Call independent searches together in a single response, they run in parallel
 
 In your response, just provide a short summary with a few sentences (3-4 sentences) on what you have done.
 As your searched are automatically visible to the user, you do not need to repeat them. 
@@ -89,8 +98,10 @@ PLEASE CALL THE MINIMUM NUMBER OF TOOLS NEEDED TO ANSWER THE QUERY!
         self,
         model: BaseChatModel,
         kg: KnowledgeGraph,
-        neo4j_driver: neo4j.Driver,
+        graph_store: GraphStore,
         max_token_per_result: int,
+        semantic_index: Optional[SemanticIndex] = None,
+        kg_overlay: Optional[KnowledgeGraphOverlay] = None,
     ):
         """Initializes the ContextProviderNode with model, knowledge graph, and database connection.
 
@@ -104,12 +115,17 @@ PLEASE CALL THE MINIMUM NUMBER OF TOOLS NEEDED TO ANSWER THE QUERY!
             tool binding.
           kg: Knowledge graph instance containing the processed codebase structure.
             Used to obtain the file tree for system prompts.
-          neo4j_driver: Neo4j driver instance for executing graph queries. This
-            driver should be properly configured with authentication and
-            connection details.
+          graph_store: Graph store of the knowledge graph, Neo4j or embedded, queried by
+            the graph traversal tools.
           max_token_per_result: Maximum number of tokens per retrieved Neo4j result.
+          semantic_index: Embedding index of the knowledge graph. When given, the
+            semantic_search tool is available.
+          kg_overlay: The files changed since the knowledge graph was built. When given, the
+            graph traversal tools return the current content of those files.
         """
-        self.neo4j_driver = neo4j_driver
+        self.graph_store = graph_store
+        self.semantic_index = semantic_index
+        self.kg_overlay = kg_overlay
         self.root_node_id = kg.root_node_id
         self.max_token_per_result = max_token_per_result
 
@@ -123,6 +139,12 @@ PLEASE CALL THE MINIMUM NUMBER OF TOOLS NEEDED TO ANSWER THE QUERY!
             f"thread-{threading.get_ident()}.prometheus.lang_graph.nodes.context_provider_node"
         )
 
+    def _with_overlay(self, tool_fn: functools.partial) -> Callable:
+        """Makes a graph traversal tool return the current content of the changed files."""
+        if self.kg_overlay is None:
+            return tool_fn
+        return graph_traversal_overlay.with_overlay(tool_fn, self.kg_overlay)
+
     def _init_tools(self):
         """
         Initializes KnowledgeGraph traversal tools.
@@ -138,16 +160,17 @@ PLEASE CALL THE MINIMUM NUMBER OF TOOLS NEEDED TO ANSWER THE QUERY!
         # Used when only the filename (not full path) is known
         find_file_node_with_basename_fn = functools.partial(
             graph_traversal.find_file_node_with_basename,
-            driver=self.neo4j_driver,
+            graph_store=self.graph_store,
             max_token_per_result=self.max_token_per_result,
             root_node_id=self.root_node_id,
         )
         find_file_node_with_basename_tool = StructuredTool.from_function(
-            func=find_file_node_with_basename_fn,
+            func=self._with_overlay(find_file_node_with_basename_fn),
             name=graph_traversal.find_file_node_with_basename.__name__,
             description=graph_traversal.FIND_FILE_NODE_WITH_BASENAME_DESCRIPTION,
             args_schema=graph_traversal.FindFileNodeWithBasenameInput,
             response_format="content_and_artifact",
+            metadata=READ_ONLY_TOOL_METADATA,
         )
         tools.append(find_file_node_with_basename_tool)
 
@@ -155,16 +178,17 @@ PLEASE CALL THE MINIMUM NUMBER OF TOOLS NEEDED TO ANSWER THE QUERY!
         # Preferred method when the exact file path is known
         find_file_node_with_relative_path_fn = functools.partial(
             graph_traversal.find_file_node_with_relative_path,
-            driver=self.neo4j_driver,
+            graph_store=self.graph_store,
             max_token_per_result=self.max_token_per_result,
             root_node_id=self.root_node_id,
         )
         find_file_node_with_relative_path_tool = StructuredTool.from_function(
-            func=find_file_node_with_relative_path_fn,
+            func=self._with_overlay(find_file_node_with_relative_path_fn),
             name=graph_traversal.find_file_node_with_relative_path.__name__,
             description=graph_traversal.FIND_FILE_NODE_WITH_RELATIVE_PATH_DESCRIPTION,
             args_schema=graph_traversal.FindFileNodeWithRelativePathInput,
             response_format="content_and_artifact",
+            metadata=READ_ONLY_TOOL_METADATA,
         )
         tools.append(find_file_node_with_relative_path_tool)
 
@@ -174,32 +198,34 @@ PLEASE CALL THE MINIMUM NUMBER OF TOOLS NEEDED TO ANSWER THE QUERY!
         # Useful for searching specific snippets or patterns in unknown locations
         find_ast_node_with_text_in_file_with_basename_fn = functools.partial(
             graph_traversal.find_ast_node_with_text_in_file_with_basename,
-            driver=self.neo4j_driver,
+            graph_store=self.graph_store,
             max_token_per_result=self.max_token_per_result,
             root_node_id=self.root_node_id,
         )
         find_ast_node_with_text_in_file_with_basename_tool = StructuredTool.from_function(
-            func=find_ast_node_with_text_in_file_with_basename_fn,
+            func=self._with_overlay(find_ast_node_with_text_in_file_with_basename_fn),
             name=graph_traversal.find_ast_node_with_text_in_file_with_basename.__name__,
             description=graph_traversal.FIND_AST_NODE_WITH_TEXT_IN_FILE_WITH_BASENAME_DESCRIPTION,
             args_schema=graph_traversal.FindASTNodeWithTextInFileWithBasenameInput,
             response_format="content_and_artifact",
+            metadata=READ_ONLY_TOOL_METADATA,
         )
         tools.append(find_ast_node_with_text_in_file_with_basename_tool)
 
         # Tool: Find AST node by text match in file (by relative path)
         find_ast_node_with_text_in_file_with_relative_path_fn = functools.partial(
             graph_traversal.find_ast_node_with_text_in_file_with_relative_path,
-            driver=self.neo4j_driver,
+            graph_store=self.graph_store,
             max_token_per_result=self.max_token_per_result,
             root_node_id=self.root_node_id,
         )
         find_ast_node_with_text_in_file_with_relative_path_tool = StructuredTool.from_function(
-            func=find_ast_node_with_text_in_file_with_relative_path_fn,
+            func=self._with_overlay(find_ast_node_with_text_in_file_with_relative_path_fn),
             name=graph_traversal.find_ast_node_with_text_in_file_with_relative_path.__name__,
             description=graph_traversal.FIND_AST_NODE_WITH_TEXT_IN_FILE_WITH_RELATIVE_PATH_DESCRIPTION,
             args_schema=graph_traversal.FindASTNodeWithTextInFileWithRelativePathInput,
             response_format="content_and_artifact",
+            metadata=READ_ONLY_TOOL_METADATA,
         )
         tools.append(find_ast_node_with_text_in_file_with_relative_path_tool)
 
@@ -207,82 +233,125 @@ PLEASE CALL THE MINIMUM NUMBER OF TOOLS NEEDED TO ANSWER THE QUERY!
         # Example types: FunctionDef, ClassDef, Assign, etc.
         find_ast_node_with_type_in_file_with_basename_fn = functools.partial(
             graph_traversal.find_ast_node_with_type_in_file_with_basename,
-            driver=self.neo4j_driver,
+            graph_store=self.graph_store,
             max_token_per_result=self.max_token_per_result,
             root_node_id=self.root_node_id,
         )
         find_ast_node_with_type_in_file_with_basename_tool = StructuredTool.from_function(
-            func=find_ast_node_with_type_in_file_with_basename_fn,
+            func=self._with_overlay(find_ast_node_with_type_in_file_with_basename_fn),
             name=graph_traversal.find_ast_node_with_type_in_file_with_basename.__name__,
             description=graph_traversal.FIND_AST_NODE_WITH_TYPE_IN_FILE_WITH_BASENAME_DESCRIPTION,
             args_schema=graph_traversal.FindASTNodeWithTypeInFileWithBasenameInput,
             response_format="content_and_artifact",
+            metadata=READ_ONLY_TOOL_METADATA,
         )
         tools.append(find_ast_node_with_type_in_file_with_basename_tool)
 
         # Tool: Find AST node by type in file (by relative path)
         find_ast_node_with_type_in_file_with_relative_path_fn = functools.partial(
             graph_traversal.find_ast_node_with_type_in_file_with_relative_path,
-            driver=self.neo4j_driver,
+            graph_store=self.graph_store,
             max_token_per_result=self.max_token_per_result,
             root_node_id=self.root_node_id,
         )
         find_ast_node_with_type_in_file_with_relative_path_tool = StructuredTool.from_function(
-            func=find_ast_node_with_type_in_file_with_relative_path_fn,
+            func=self._with_overlay(find_ast_node_with_type_in_file_with_relative_path_fn),
             name=graph_traversal.find_ast_node_with_type_in_file_with_relative_path.__name__,
             description=graph_traversal.FIND_AST_NODE_WITH_TYPE_IN_FILE_WITH_RELATIVE_PATH_DESCRIPTION,
             args_schema=graph_traversal.FindASTNodeWithTypeInFileWithRelativePathInput,
             response_format="content_and_artifact",
+            metadata=READ_ONLY_TOOL_METADATA,
         )
         tools.append(find_ast_node_with_type_in_file_with_relative_path_tool)
 
+        # === SYMBOL SEARCH TOOLS ===
+
+        # Tool: Find the definitions of a name
+        # Useful to jump from a name in an issue or a traceback to its implementation
+        find_definition_fn = functools.partial(
+            graph_traversal.find_definition,
+            graph_store=self.graph_store,
+            max_token_per_result=self.max_token_per_result,
+            root_node_id=self.root_node_id,
+        )
+        find_definition_tool = StructuredTool.from_function(
+            func=self._with_overlay(find_definition_fn),
+            name=graph_traversal.find_definition.__name__,
+            description=graph_traversal.FIND_DEFINITION_DESCRIPTION,
+            args_schema=graph_traversal.FindDefinitionInput,
+            response_format="content_and_artifact",
+            metadata=READ_ONLY_TOOL_METADATA,
+        )
+        tools.append(find_definition_tool)
+
+        # Tool: Find the functions/classes that use or import a name
+        # Useful to find the callers of a function
+        find_references_fn = functools.partial(
+            graph_traversal.find_references,
+            graph_store=self.graph_store,
+            max_token_per_result=self.max_token_per_result,
+            root_node_id=self.root_node_id,
+        )
+        find_references_tool = StructuredTool.from_function(
+            func=self._with_overlay(find_references_fn),
+            name=graph_traversal.find_references.__name__,
+            description=graph_traversal.FIND_REFERENCES_DESCRIPTION,
+            args_schema=graph_traversal.FindReferencesInput,
+            response_format="content_and_artifact",
+            metadata=READ_ONLY_TOOL_METADATA,
+        )
+        tools.append(find_references_tool)
+
         # === TEXT/DOCUMENT SEARCH TOOLS ===
 
         # Tool: Find text node globally by keyword
         find_text_node_with_text_fn = functools.partial(
             graph_traversal.find_text_node_with_text,
-            driver=self.neo4j_driver,
+            graph_store=self.graph_store,
             max_token_per_result=self.max_token_per_result,
             root_node_id=self.root_node_id,
         )
         find_text_node_with_text_tool = StructuredTool.from_function(
-            func=find_text_node_with_text_fn,
+            func=self._with_overlay(find_text_node_with_text_fn),
             name=graph_traversal.find_text_node_with_text.__name__,
             description=graph_traversal.FIND_TEXT_NODE_WITH_TEXT_DESCRIPTION,
             args_schema=graph_traversal.FindTextNodeWithTextInput,
             response_format="content_and_artifact",
+            metadata=READ_ONLY_TOOL_METADATA,
         )
         tools.append(find_text_node_with_text_tool)
 
         # Tool: Find text node by keyword in specific file
         find_text_node_with_text_in_file_fn = functools.partial(
             graph_traversal.find_text_node_with_text_in_file,
-            driver=self.neo4j_driver,
+            graph_store=self.graph_store,
             max_token_per_result=self.max_token_per_result,
             root_node_id=self.root_node_id,
         )
         find_text_node_with_text_in_file_tool = StructuredTool.from_function(
-            func=find_text_node_with_text_in_file_fn,
+            func=self._with_overlay(find_text_node_with_text_in_file_fn),
             name=graph_traversal.find_text_node_with_text_in_file.__name__,
             description=graph_traversal.FIND_TEXT_NODE_WITH_TEXT_IN_FILE_DESCRIPTION,
             args_schema=graph_traversal.FindTextNodeWithTextInFileInput,
             response_format="content_and_artifact",
+            metadata=READ_ONLY_TOOL_METADATA,
         )
         tools.append(find_text_node_with_text_in_file_tool)
 
         # Tool: Fetch the next text node chunk in a chain (used for long docs/comments)
         get_next_text_node_with_node_id_fn = functools.partial(
             graph_traversal.get_next_text_node_with_node_id,
-            driver=self.neo4j_driver,
+            graph_store=self.graph_store,
             max_token_per_result=self.max_token_per_result,
             root_node_id=self.root_node_id,
         )
         get_next_text_node_with_node_id_tool = StructuredTool.from_function(
-            func=get_next_text_node_with_node_id_fn,
+            func=self._with_overlay(get_next_text_node_with_node_id_fn),
             name=graph_traversal.get_next_text_node_with_node_id.__name__,
             description=graph_traversal.GET_NEXT_TEXT_NODE_WITH_NODE_ID_DESCRIPTION,
             args_schema=graph_traversal.GetNextTextNodeWithNodeIdInput,
             response_format="content_and_artifact",
+            metadata=READ_ONLY_TOOL_METADATA,
         )
         tools.append(get_next_text_node_with_node_id_tool)
 
@@ -291,67 +360,91 @@ PLEASE CALL THE MINIMUM NUMBER OF TOOLS NEEDED TO ANSWER THE QUERY!
         # Tool: Preview contents of file by basename
         preview_file_content_with_basename_fn = functools.partial(
             graph_traversal.preview_file_content_with_basename,
-            driver=self.neo4j_driver,
+            graph_store=self.graph_store,
             max_token_per_result=self.max_token_per_result,
             root_node_id=self.root_node_id,
         )
         preview_file_content_with_basename_tool = StructuredTool.from_function(
-            func=preview_file_content_with_basename_fn,
+            func=self._with_overlay(preview_file_content_with_basename_fn),
             name=graph_traversal.preview_file_content_with_basename.__name__,
             description=graph_traversal.PREVIEW_FILE_CONTENT_WITH_BASENAME_DESCRIPTION,
             args_schema=graph_traversal.PreviewFileContentWithBasenameInput,
             response_format="content_and_artifact",
+            metadata=READ_ONLY_TOOL_METADATA,
         )
         tools.append(preview_file_content_with_basename_tool)
 
         # Tool: Preview contents of file by relative path
         preview_file_content_with_relative_path_fn = functools.partial(
             graph_traversal.preview_file_content_with_relative_path,
-            driver=self.neo4j_driver,
+            graph_store=self.graph_store,
             max_token_per_result=self.max_token_per_result,
             root_node_id=self.root_node_id,
         )
         preview_file_content_with_relative_path_tool = StructuredTool.from_function(
-            func=preview_file_content_with_relative_path_fn,
+            func=self._with_overlay(preview_file_content_with_relative_path_fn),
             name=graph_traversal.preview_file_content_with_relative_path.__name__,
             description=graph_traversal.PREVIEW_FILE_CONTENT_WITH_RELATIVE_PATH_DESCRIPTION,
             args_schema=graph_traversal.PreviewFileContentWithRelativePathInput,
             response_format="content_and_artifact",
+            metadata=READ_ONLY_TOOL_METADATA,
         )
         tools.append(preview_file_content_with_relative_path_tool)
 
         # Tool: Read entire code file by basename
         read_code_with_basename_fn = functools.partial(
             graph_traversal.read_code_with_basename,
-            driver=self.neo4j_driver,
+            graph_store=self.graph_store,
             max_token_per_result=self.max_token_per_result,
             root_node_id=self.root_node_id,
         )
         read_code_with_basename_tool = StructuredTool.from_function(
-            func=read_code_with_basename_fn,
+            func=self._with_overlay(read_code_with_basename_fn),
             name=graph_traversal.read_code_with_basename.__name__,
             description=graph_traversal.READ_CODE_WITH_BASENAME_DESCRIPTION,
             args_schema=graph_traversal.ReadCodeWithBasenameInput,
             response_format="content_and_artifact",
+            metadata=READ_ONLY_TOOL_METADATA,
         )
         tools.append(read_code_with_basename_tool)
 
         # Tool: Read entire code file by relative path
         read_code_with_relative_path_fn = functools.partial(
             graph_traversal.read_code_with_relative_path,
-            driver=self.neo4j_driver,
+            graph_store=self.graph_store,
             max_token_per_result=self.max_token_per_result,
             root_node_id=self.root_node_id,
         )
         read_code_with_relative_path_tool = StructuredTool.from_function(
-            func=read_code_with_relative_path_fn,
+            func=self._with_overlay(read_code_with_relative_path_fn),
             name=graph_traversal.read_code_with_relative_path.__name__,
             description=graph_traversal.READ_CODE_WITH_RELATIVE_PATH_DESCRIPTION,
             args_schema=graph_traversal.ReadCodeWithRelativePathInput,
             response_format="content_and_artifact",
+            metadata=READ_ONLY_TOOL_METADATA,
         )
         tools.append(read_code_with_relative_path_tool)
 
+        # === SEMANTIC SEARCH TOOLS ===
+
+        # Tool: Find AST and text nodes by similarity of meaning
+        # Useful as a starting point when names and exact text are unknown
+        if self.semantic_index is not None:
+            semantic_search_fn = functools.partial(
+                semantic_search.semantic_search,
+                semantic_index=self.semantic_index,
+                max_token_per_result=self.max_token_per_result,
+            )
+            semantic_search_tool = StructuredTool.from_function(
+                func=semantic_search_fn,
+                name=semantic_search.semantic_search.__name__,
+                description=semantic_search.SEMANTIC_SEARCH_DESCRIPTION,
+                args_schema=semantic_search.SemanticSearchInput,
+                response_format="content_and_artifact",
+                metadata=READ_ONLY_TOOL_METADATA,
+            )
+            tools.append(semantic_search_tool)
+
         return tools
 
     def __call__(self, state: Dict):
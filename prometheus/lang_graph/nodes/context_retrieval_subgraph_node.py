@@ -1,13 +1,18 @@
 import logging
 import threading
-from typing import Dict, Sequence
+from typing import Dict, Optional, Sequence
 
-import neo4j
 from langchain_core.language_models.chat_models import BaseChatModel
 
+from prometheus.graph.graph_store import GraphStore
 from prometheus.graph.knowledge_graph import KnowledgeGraph
+from prometheus.graph.knowledge_graph_overlay import KnowledgeGraphOverlay
+from prometheus.graph.semantic_index import SemanticIndex
 from prometheus.lang_graph.subgraphs.context_retrieval_subgraph import ContextRetrievalSubgraph
 from prometheus.models.context import Context
+from prometheus.utils.context_cache import ContextCache
+from prometheus.utils.issue_context_store import IssueContextStore
+from prometheus.utils.issue_util import format_issue_info
 
 
 class ContextRetrievalSubgraphNode:
@@ -16,10 +21,14 @@ class ContextRetrievalSubgraphNode:
         model: BaseChatModel,
         kg: KnowledgeGraph,
         local_path: str,
-        neo4j_driver: neo4j.Driver,
+        graph_store: GraphStore,
         max_token_per_neo4j_result: int,
         query_key_name: str,
         context_key_name: str,
+        context_cache: Optional[ContextCache] = None,
+        context_store: Optional[IssueContextStore] = None,
+        semantic_index: Optional[SemanticIndex] = None,
+        kg_overlay: Optional[KnowledgeGraphOverlay] = None,
     ):
         self._logger = logging.getLogger(
             f"thread-{threading.get_ident()}.prometheus.lang_graph.nodes.context_retrieval_subgraph_node"
@@ -28,16 +37,85 @@ class ContextRetrievalSubgraphNode:
             model=model,
             kg=kg,
             local_path=local_path,
-            neo4j_driver=neo4j_driver,
+            graph_store=graph_store,
             max_token_per_neo4j_result=max_token_per_neo4j_result,
+            semantic_index=semantic_index,
+            kg_overlay=kg_overlay,
         )
+        self.kg = kg
         self.query_key_name = query_key_name
         self.context_key_name = context_key_name
+        self.context_cache = context_cache
+        self.context_store = context_store
+
+    def get_similarity_text(self, state: Dict) -> str:
+        # Queries mostly consist of the prompt of the stage, the issue tells them apart
+        if "issue_title" in state:
+            return format_issue_info(
+                state["issue_title"], state["issue_body"], state.get("issue_comments", [])
+            )
+        return state[self.query_key_name]
 
     def __call__(self, state: Dict) -> Dict[str, Sequence[Context]]:
         self._logger.info("Enter context retrieval subgraph")
+        query = state[self.query_key_name]
+
+        cache_hit = None
+        if self.context_cache is not None:
+            # The context key name identifies the stage that asks the query
+            cache_hit = self.context_cache.lookup(
+                self.kg.root_node_id,
+                self.context_key_name,
+                query,
+                self.get_similarity_text(state),
+            )
+            if cache_hit is not None and cache_hit.exact:
+                self._logger.info(f"Context retrieved from the cache: {cache_hit.contexts}")
+                if self.context_store is not None:
+                    self.context_store.add_contexts(cache_hit.contexts)
+                return {self.context_key_name: cache_hit.contexts}
+            if cache_hit is not None:
+                self._logger.info(
+                    f"Starting from the cached context of a similar query "
+                    f"(similarity {cache_hit.similarity:.2f})"
+                )
+
+        # Start from the context that earlier stages of the issue and similar queries retrieved
+        known_context = []
+        if self.context_store is not None:
+            known_context = list(self.context_store.get_contexts())
+            if known_context:
+                self._logger.info(
+                    f"Starting from {len(known_context)} contexts retrieved for the issue"
+                )
+        if cache_hit is not None:
+            known_context += [
+                context for context in cache_hit.contexts if context not in known_context
+            ]
+
         output_state = self.context_retrieval_subgraph.invoke(
-            state[self.query_key_name], state["max_refined_query_loop"]
+            query,
+            state["max_refined_query_loop"],
+            known_context=known_context,
         )
         self._logger.info(f"Context retrieved: {output_state['context']}")
-        return {self.context_key_name: output_state["context"]}
+
+        # The context of the earlier stages was retrieved for other queries, the query only
+        # gets the context retrieved for it, and for the similar query
+        context = list(output_state["context"])
+        if cache_hit is not None:
+            context = [c for c in cache_hit.contexts if c not in context] + context
+        if self.context_store is not None:
+            self.context_store.add_contexts(context)
+        if self.context_cache is not None and output_state["context"]:
+            self.context_cache.store(
+                self.kg.root_node_id,
+                self.context_key_name,
+                query,
+                self.get_similarity_text(state),
+                context,
+            )
+        if not context:
+            # Nothing was missing from the context of the earlier stages
+            context = known_context
+        return {self.context_key_name: context}
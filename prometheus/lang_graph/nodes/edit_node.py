@@ -9,13 +9,16 @@ while maintaining code integrity.
 import functools
 import logging
 import threading
-from typing import Dict
+from typing import Callable, Dict, Optional
 
 from langchain.tools import StructuredTool
 from langchain_core.language_models.chat_models import BaseChatModel
 from langchain_core.messages import SystemMessage
 
-from prometheus.tools import file_operation
+from prometheus.graph.graph_store import GraphStore
+from prometheus.graph.knowledge_graph_overlay import KnowledgeGraphOverlay
+from prometheus.tools import file_operation, graph_traversal, graph_traversal_overlay
+from prometheus.utils.lang_graph_util import READ_ONLY_TOOL_METADATA
 
 
 class EditNode:
@@ -118,14 +121,55 @@ MANDATORY REQUIREMENTS:
 7. NEVER write tests, your change will be tested by reproduction tests and regression tests later
 """
 
-    def __init__(self, model: BaseChatModel, local_path: str):
-        self.system_prompt = SystemMessage(self.SYS_PROMPT)
+    SYMBOL_TOOLS_PROMPT = """
+FINDING DEFINITIONS AND USAGES:
+Use find_definition and find_references to find where a function, class or method is defined
+and used before you change its name, signature or behavior, so that all its callers stay
+consistent with your change. Their results include the edits you already made.
+"""
+
+    def __init__(
+        self,
+        model: BaseChatModel,
+        local_path: str,
+        kg_overlay: Optional[KnowledgeGraphOverlay] = None,
+        graph_store: Optional[GraphStore] = None,
+        max_token_per_neo4j_result: Optional[int] = None,
+    ):
+        """
+        Args:
+          model: The model that edits the files.
+          local_path: The directory of the codebase to edit.
+          kg_overlay: The overlay every created, edited or deleted file is recorded in.
+          graph_store: The graph store of the knowledge graph of kg_overlay. When given
+            with kg_overlay, the find_definition and find_references tools are available.
+          max_token_per_neo4j_result: Maximum number of tokens per retrieved Neo4j result.
+        """
+        self.kg_overlay = kg_overlay
+        self.graph_store = graph_store
+        self.max_token_per_neo4j_result = max_token_per_neo4j_result
+        system_prompt = self.SYS_PROMPT
+        if kg_overlay is not None and graph_store is not None:
+            system_prompt += self.SYMBOL_TOOLS_PROMPT
+        self.system_prompt = SystemMessage(system_prompt)
         self.tools = self._init_tools(local_path)
         self.model_with_tools = model.bind_tools(self.tools)
         self._logger = logging.getLogger(
             f"thread-{threading.get_ident()}.prometheus.lang_graph.nodes.edit_node"
         )
 
+    def _record_in_overlay(self, tool_fn: functools.partial) -> Callable:
+        """Records the file changed by a file operation tool in the knowledge graph overlay."""
+        if self.kg_overlay is None:
+            return tool_fn
+
+        def record(relative_path: str, **kwargs) -> str:
+            result = tool_fn(relative_path=relative_path, **kwargs)
+            self.kg_overlay.update_file(relative_path)
+            return result
+
+        return record
+
     def _init_tools(self, root_path: str):
         """Initializes file operation tools with the given root path.
 
@@ -143,6 +187,7 @@ MANDATORY REQUIREMENTS:
             name=file_operation.read_file.__name__,
             description=file_operation.READ_FILE_DESCRIPTION,
             args_schema=file_operation.ReadFileInput,
+            metadata=READ_ONLY_TOOL_METADATA,
         )
         tools.append(read_file_tool)
 
@@ -154,12 +199,13 @@ MANDATORY REQUIREMENTS:
             name=file_operation.read_file_with_line_numbers.__name__,
             description=file_operation.READ_FILE_WITH_LINE_NUMBERS_DESCRIPTION,
             args_schema=file_operation.ReadFileWithLineNumbersInput,
+            metadata=READ_ONLY_TOOL_METADATA,
         )
         tools.append(read_file_with_line_numbers_tool)
 
         create_file_fn = functools.partial(file_operation.create_file, root_path=root_path)
         create_file_tool = StructuredTool.from_function(
-            func=create_file_fn,
+            func=self._record_in_overlay(create_file_fn),
             name=file_operation.create_file.__name__,
             description=file_operation.CREATE_FILE_DESCRIPTION,
             args_schema=file_operation.CreateFileInput,
@@ -168,7 +214,7 @@ MANDATORY REQUIREMENTS:
 
         delete_fn = functools.partial(file_operation.delete, root_path=root_path)
         delete_tool = StructuredTool.from_function(
-            func=delete_fn,
+            func=self._record_in_overlay(delete_fn),
             name=file_operation.delete.__name__,
             description=file_operation.DELETE_DESCRIPTION,
             args_schema=file_operation.DeleteInput,
@@ -177,13 +223,48 @@ MANDATORY REQUIREMENTS:
 
         edit_file_fn = functools.partial(file_operation.edit_file, root_path=root_path)
         edit_file_tool = StructuredTool.from_function(
-            func=edit_file_fn,
+            func=self._record_in_overlay(edit_file_fn),
             name=file_operation.edit_file.__name__,
             description=file_operation.EDIT_FILE_DESCRIPTION,
             args_schema=file_operation.EditFileInput,
         )
         tools.append(edit_file_tool)
 
+        if self.kg_overlay is None or self.graph_store is None:
+            return tools
+
+        find_definition_fn = functools.partial(
+            graph_traversal.find_definition,
+            graph_store=self.graph_store,
+            max_token_per_result=self.max_token_per_neo4j_result,
+            root_node_id=self.kg_overlay.kg.root_node_id,
+        )
+        find_definition_tool = StructuredTool.from_function(
+            func=graph_traversal_overlay.with_overlay(find_definition_fn, self.kg_overlay),
+            name=graph_traversal.find_definition.__name__,
+            description=graph_traversal.FIND_DEFINITION_DESCRIPTION,
+            args_schema=graph_traversal.FindDefinitionInput,
+            response_format="content_and_artifact",
+            metadata=READ_ONLY_TOOL_METADATA,
+        )
+        tools.append(find_definition_tool)
+
+        find_references_fn = functools.partial(
+            graph_traversal.find_references,
+            graph_store=self.graph_store,
+            max_token_per_result=self.max_token_per_neo4j_result,
+            root_node_id=self.kg_overlay.kg.root_node_id,
+        )
+        find_references_tool = StructuredTool.from_function(
+            func=graph_traversal_overlay.with_overlay(find_references_fn, self.kg_overlay),
+            name=graph_traversal.find_references.__name__,
+            description=graph_traversal.FIND_REFERENCES_DESCRIPTION,
+            args_schema=graph_traversal.FindReferencesInput,
+            response_format="content_and_artifact",
+            metadata=READ_ONLY_TOOL_METADATA,
+        )
+        tools.append(find_references_tool)
+
         return tools
 
     def __call__(self, state: Dict):
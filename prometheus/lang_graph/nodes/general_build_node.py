@@ -44,6 +44,7 @@ Remember:
 
     def __init__(self, model: BaseChatModel, container: BaseContainer, kg: KnowledgeGraph):
         self.kg = kg
+        self.container = container
         self.tools = self._init_tools(container)
         self.model_with_tools = model.bind_tools(self.tools)
         self.system_prompt = SystemMessage(self.SYS_PROMPT)
@@ -69,6 +70,9 @@ Remember:
         message = f"The (incomplete) project structure is:\n{self.kg.get_file_tree()}"
         if "build_command_summary" in state and state["build_command_summary"]:
             message += f"\n\nThe previous build summary is:\n{state['build_command_summary']}"
+        known_good_commands = container_command.format_known_good_commands(self.container)
+        if known_good_commands:
+            message += f"\n\n{known_good_commands}"
         return HumanMessage(message)
 
     def __call__(self, state: BuildAndTestState):
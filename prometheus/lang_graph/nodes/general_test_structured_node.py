@@ -14,7 +14,10 @@ from langchain_core.prompts import ChatPromptTemplate
 from pydantic import BaseModel, Field
 
 from prometheus.lang_graph.subgraphs.build_and_test_state import BuildAndTestState
-from prometheus.utils.lang_graph_util import format_agent_tool_message_history
+from prometheus.utils.lang_graph_util import (
+    compact_test_tool_messages,
+    format_agent_tool_message_history,
+)
 
 
 class TestStructuredOutput(BaseModel):
@@ -306,7 +309,9 @@ Output:
           - test_command_summary: String describing test framework and required commands
           - existing_test_fail_log: String containing test failure details (empty if all passed)
         """
-        test_history = format_agent_tool_message_history(state["test_messages"])
+        test_history = format_agent_tool_message_history(
+            compact_test_tool_messages(state["test_messages"])
+        )
         response = self.model.invoke({"test_history": test_history})
         self._logger.debug(response)
         return {
@@ -7,6 +7,7 @@ from langgraph.errors import GraphRecursionError
 
 from prometheus.docker.base_container import BaseContainer
 from prometheus.git.git_repository import GitRepository
+from prometheus.graph.knowledge_graph import KnowledgeGraph
 from prometheus.lang_graph.subgraphs.get_pass_regression_test_patch_subgraph import (
     GetPassRegressionTestPatchSubgraph,
 )
@@ -19,6 +20,7 @@ class GetPassRegressionTestPatchSubgraphNode:
         model: BaseChatModel,
         container: BaseContainer,
         git_repo: GitRepository,
+        kg: KnowledgeGraph,
         testing_patch_key: str,
         is_testing_patch_list: bool,
     ):
@@ -29,6 +31,7 @@ class GetPassRegressionTestPatchSubgraphNode:
             base_model=model,
             container=container,
             git_repo=git_repo,
+            kg=kg,
         )
         self.git_repo = git_repo
         self.testing_patch_key = testing_patch_key
@@ -2,6 +2,8 @@ import logging
 import threading
 
 from prometheus.git.git_repository import GitRepository
+from prometheus.graph.knowledge_graph import KnowledgeGraph
+from prometheus.graph.test_impact_index import TestImpactIndex
 from prometheus.lang_graph.subgraphs.get_pass_regression_test_patch_state import (
     GetPassRegressionTestPatchState,
 )
@@ -10,13 +12,19 @@ from prometheus.lang_graph.subgraphs.get_pass_regression_test_patch_state import
 class GetPassRegressionTestPatchUpdateNode:
     """
     Reset the Git repository and apply the first untested patch to the Git repository.
+    The selected regression tests are narrowed down to the ones the patch can affect,
+    using a test impact index built from the knowledge graph.
     """
 
     def __init__(
         self,
         git_repo: GitRepository,
+        kg: KnowledgeGraph,
     ):
         self.git_repo = git_repo
+        self.kg = kg
+        # Built on first use, so that issues without patches to test never pay for it
+        self._test_impact_index = None
         self._logger = logging.getLogger(
             f"thread-{threading.get_ident()}.prometheus.lang_graph.nodes.get_pass_regression_test_patch_update_node"
         )
@@ -26,7 +34,7 @@ class GetPassRegressionTestPatchUpdateNode:
         Reset the Git repository and apply the first untested patch to the Git repository.
 
         Args:
-          state: Current state containing untested patches.
+          state: Current state containing untested patches and selected regression tests.
         """
         if not state["untested_patches"]:
             self._logger.warning("No untested patches available to apply.")
@@ -41,7 +49,18 @@ class GetPassRegressionTestPatchUpdateNode:
         # Apply the patch
         self.git_repo.apply_patch(patch)
 
+        if self._test_impact_index is None:
+            self._test_impact_index = TestImpactIndex(self.kg)
+        current_regression_tests = self._test_impact_index.filter_regression_tests(
+            state["selected_regression_tests"], patch
+        )
+        self._logger.info(
+            f"{len(current_regression_tests)} of {len(state['selected_regression_tests'])} "
+            "selected regression tests may be affected by the patch"
+        )
+
         return {
             "untested_patches": state["untested_patches"][1:],  # Remove the applied patch
             "current_patch": patch,  # Store the current patch
+            "current_regression_tests": current_regression_tests,
         }
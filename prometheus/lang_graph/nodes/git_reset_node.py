@@ -1,15 +1,20 @@
 import logging
 import threading
+from typing import Optional
 
 from prometheus.git.git_repository import GitRepository
+from prometheus.graph.knowledge_graph_overlay import KnowledgeGraphOverlay
 
 
 class GitResetNode:
     def __init__(
         self,
         git_repo: GitRepository,
+        kg_overlay: Optional[KnowledgeGraphOverlay] = None,
     ):
         self.git_repo = git_repo
+        # The changes recorded in the overlay are discarded with the reset
+        self.kg_overlay = kg_overlay
         self._logger = logging.getLogger(
             f"thread-{threading.get_ident()}.prometheus.lang_graph.nodes.git_reset_node"
         )
@@ -17,3 +22,5 @@ class GitResetNode:
     def __call__(self, _):
         self._logger.debug("Resetting the git repository")
         self.git_repo.reset_repository()
+        if self.kg_overlay is not None:
+            self.kg_overlay.clear()
@@ -2,15 +2,19 @@ import logging
 import threading
 from typing import Optional, Sequence
 
-import neo4j
+import docker
 from langchain_core.language_models.chat_models import BaseChatModel
 from langgraph.errors import GraphRecursionError
 
 from prometheus.docker.base_container import BaseContainer
 from prometheus.git.git_repository import GitRepository
+from prometheus.graph.graph_store import GraphStore
 from prometheus.graph.knowledge_graph import KnowledgeGraph
+from prometheus.graph.semantic_index import SemanticIndex
 from prometheus.lang_graph.graphs.issue_state import IssueState
 from prometheus.lang_graph.subgraphs.issue_bug_subgraph import IssueBugSubgraph
+from prometheus.utils.context_cache import ContextCache
+from prometheus.utils.issue_context_store import IssueContextStore
 
 
 class IssueBugSubgraphNode:
@@ -25,10 +29,13 @@ class IssueBugSubgraphNode:
         container: BaseContainer,
         kg: KnowledgeGraph,
         git_repo: GitRepository,
-        neo4j_driver: neo4j.Driver,
+        graph_store: GraphStore,
         max_token_per_neo4j_result: int,
         build_commands: Optional[Sequence[str]] = None,
         test_commands: Optional[Sequence[str]] = None,
+        context_cache: Optional[ContextCache] = None,
+        context_store: Optional[IssueContextStore] = None,
+        semantic_index: Optional[SemanticIndex] = None,
     ):
         self._logger = logging.getLogger(
             f"thread-{threading.get_ident()}.prometheus.lang_graph.nodes.issue_bug_subgraph_node"
@@ -40,10 +47,13 @@ class IssueBugSubgraphNode:
             container=container,
             kg=kg,
             git_repo=git_repo,
-            neo4j_driver=neo4j_driver,
+            graph_store=graph_store,
             max_token_per_neo4j_result=max_token_per_neo4j_result,
             build_commands=build_commands,
             test_commands=test_commands,
+            context_cache=context_cache,
+            context_store=context_store,
+            semantic_index=semantic_index,
         )
 
     def __call__(self, state: IssueState):
@@ -90,4 +100,9 @@ class IssueBugSubgraphNode:
                 "issue_response": None,
             }
         finally:
+            try:
+                # Let later issues of this repository start from the prepared environment
+                self.container.save_environment_cache()
+            except docker.errors.DockerException as e:
+                self._logger.warning(f"Failed to save the environment cache: {e}")
             self.container.cleanup()
@@ -1,14 +1,18 @@
 import logging
 import threading
+from typing import Optional
 
-import neo4j
 from langchain_core.language_models.chat_models import BaseChatModel
 
+from prometheus.graph.graph_store import GraphStore
 from prometheus.graph.knowledge_graph import KnowledgeGraph
+from prometheus.graph.semantic_index import SemanticIndex
 from prometheus.lang_graph.graphs.issue_state import IssueState
 from prometheus.lang_graph.subgraphs.issue_classification_subgraph import (
     IssueClassificationSubgraph,
 )
+from prometheus.utils.context_cache import ContextCache
+from prometheus.utils.issue_context_store import IssueContextStore
 
 
 class IssueClassificationSubgraphNode:
@@ -17,8 +21,11 @@ class IssueClassificationSubgraphNode:
         model: BaseChatModel,
         kg: KnowledgeGraph,
         local_path: str,
-        neo4j_driver: neo4j.Driver,
+        graph_store: GraphStore,
         max_token_per_neo4j_result: int,
+        context_cache: Optional[ContextCache] = None,
+        context_store: Optional[IssueContextStore] = None,
+        semantic_index: Optional[SemanticIndex] = None,
     ):
         self._logger = logging.getLogger(
             f"thread-{threading.get_ident()}.prometheus.lang_graph.nodes.issue_classification_subgraph_node"
@@ -27,8 +34,11 @@ class IssueClassificationSubgraphNode:
             model=model,
             kg=kg,
             local_path=local_path,
-            neo4j_driver=neo4j_driver,
+            graph_store=graph_store,
             max_token_per_neo4j_result=max_token_per_neo4j_result,
+            context_cache=context_cache,
+            context_store=context_store,
+            semantic_index=semantic_index,
         )
 
     def __call__(self, state: IssueState):
@@ -1,14 +1,18 @@
 import logging
 import threading
+from typing import Optional
 
-import neo4j
 from langchain_core.language_models.chat_models import BaseChatModel
 from langgraph.errors import GraphRecursionError
 
 from prometheus.git.git_repository import GitRepository
+from prometheus.graph.graph_store import GraphStore
 from prometheus.graph.knowledge_graph import KnowledgeGraph
+from prometheus.graph.semantic_index import SemanticIndex
 from prometheus.lang_graph.graphs.issue_state import IssueState
 from prometheus.lang_graph.subgraphs.issue_question_subgraph import IssueQuestionSubgraph
+from prometheus.utils.context_cache import ContextCache
+from prometheus.utils.issue_context_store import IssueContextStore
 
 
 class IssueQuestionSubgraphNode:
@@ -22,8 +26,11 @@ class IssueQuestionSubgraphNode:
         base_model: BaseChatModel,
         kg: KnowledgeGraph,
         git_repo: GitRepository,
-        neo4j_driver: neo4j.Driver,
+        graph_store: GraphStore,
         max_token_per_neo4j_result: int,
+        context_cache: Optional[ContextCache] = None,
+        context_store: Optional[IssueContextStore] = None,
+        semantic_index: Optional[SemanticIndex] = None,
     ):
         self._logger = logging.getLogger(
             f"thread-{threading.get_ident()}.prometheus.lang_graph.nodes.issue_question_subgraph_node"
@@ -33,8 +40,11 @@ class IssueQuestionSubgraphNode:
             base_model=base_model,
             kg=kg,
             git_repo=git_repo,
-            neo4j_driver=neo4j_driver,
+            graph_store=graph_store,
             max_token_per_neo4j_result=max_token_per_neo4j_result,
+            context_cache=context_cache,
+            context_store=context_store,
+            semantic_index=semantic_index,
         )
 
     def __call__(self, state: IssueState):
@@ -55,6 +55,7 @@ Selected Regression Tests:
 """
 
     def __init__(self, model: BaseChatModel, container: BaseContainer):
+        self.container = container
         self.tools = self._init_tools(container)
         self.model_with_tools = model.bind_tools(self.tools)
         self.system_prompt = SystemMessage(self.SYS_PROMPT)
@@ -77,9 +78,13 @@ Selected Regression Tests:
         return tools
 
     def format_human_message(self, state: RunRegressionTestsState) -> HumanMessage:
-        return HumanMessage(
-            self.HUMAN_PROMPT.format(selected_regression_tests=state["selected_regression_tests"])
+        message = self.HUMAN_PROMPT.format(
+            selected_regression_tests=state["selected_regression_tests"]
         )
+        known_good_commands = container_command.format_known_good_commands(self.container)
+        if known_good_commands:
+            message += f"\n{known_good_commands}"
+        return HumanMessage(message)
 
     def __call__(self, state: RunRegressionTestsState):
         human_message = self.format_human_message(state)
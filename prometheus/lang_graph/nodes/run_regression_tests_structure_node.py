@@ -3,11 +3,13 @@ import threading
 from typing import Sequence
 
 from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import ToolMessage
 from langchain_core.prompts import ChatPromptTemplate
 from pydantic import BaseModel, Field
 
 from prometheus.lang_graph.subgraphs.run_regression_tests_state import RunRegressionTestsState
-from prometheus.utils.lang_graph_util import get_last_message_content
+from prometheus.utils.lang_graph_util import extract_test_results, get_last_message_content
+from prometheus.utils.str_util import truncate_text
 
 
 class RunRegressionTestsStructureOutput(BaseModel):
@@ -24,6 +26,8 @@ class RunRegressionTestsStructureOutput(BaseModel):
 
 
 class RunRegressionTestsStructuredNode:
+    MAX_RAW_OUTPUT_TOKENS = 10000
+
     SYS_PROMPT = """\
 You are a test result parser. Your only task is to check if the executed tests passed.
 
@@ -109,12 +113,29 @@ Don't forget to return the total number of tests run!
         )
 
     def get_human_message(self, state: RunRegressionTestsState) -> str:
+        # Use the compact parsed test results when possible, so that the LLM sees the passed
+        # test identifiers and the failure logs first. They only name the passed tests if the
+        # framework printed them, so the (truncated) raw output is kept next to them.
+        test_results = extract_test_results(state["run_regression_tests_messages"])
+        if test_results:
+            raw_output = "\n\n".join(
+                message.content
+                for message in state["run_regression_tests_messages"]
+                if isinstance(message, ToolMessage) and isinstance(message.content, str)
+            )
+            test_summary = "\n\n".join(test_result.format() for test_result in test_results)
+            run_regression_tests_messages = (
+                f"{test_summary}\n\n"
+                f"Raw test output:\n{truncate_text(raw_output, self.MAX_RAW_OUTPUT_TOKENS)}"
+            )
+        else:
+            run_regression_tests_messages = get_last_message_content(
+                state["run_regression_tests_messages"]
+            )
         # Format the human message using the state
         return self.HUMAN_PROMPT.format(
             selected_regression_tests="\n".join(state["selected_regression_tests"]),
-            run_regression_tests_messages=get_last_message_content(
-                state["run_regression_tests_messages"]
-            ),
+            run_regression_tests_messages=run_regression_tests_messages,
         )
 
     def __call__(self, state: RunRegressionTestsState):
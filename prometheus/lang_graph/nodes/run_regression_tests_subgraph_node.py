@@ -10,7 +10,11 @@ from prometheus.lang_graph.subgraphs.run_regression_tests_subgraph import RunReg
 
 class RunRegressionTestsSubgraphNode:
     def __init__(
-        self, model: BaseChatModel, container: BaseContainer, passed_regression_tests_key: str
+        self,
+        model: BaseChatModel,
+        container: BaseContainer,
+        passed_regression_tests_key: str,
+        selected_regression_tests_key: str = "selected_regression_tests",
     ):
         self._logger = logging.getLogger(
             f"thread-{threading.get_ident()}.prometheus.lang_graph.nodes.run_regression_tests_subgraph_node"
@@ -20,21 +24,21 @@ class RunRegressionTestsSubgraphNode:
             container=container,
         )
         self.passed_regression_tests_key = passed_regression_tests_key
+        self.selected_regression_tests_key = selected_regression_tests_key
 
     def __call__(self, state: Dict):
         self._logger.info("Enter run_regression_tests_subgraph_node")
-        if not state["selected_regression_tests"]:
+        selected_regression_tests = state[self.selected_regression_tests_key]
+        if not selected_regression_tests:
             self._logger.info("No regression tests selected, skipping regression tests subgraph.")
             return {
                 self.passed_regression_tests_key: [],
                 "regression_test_fail_log": "",
             }
 
-        self._logger.debug(f"selected_regression_tests: {state['selected_regression_tests']}")
+        self._logger.debug(f"selected_regression_tests: {selected_regression_tests}")
 
-        output_state = self.subgraph.invoke(
-            selected_regression_tests=state["selected_regression_tests"]
-        )
+        output_state = self.subgraph.invoke(selected_regression_tests=selected_regression_tests)
 
         self._logger.info(f"passed_regression_tests: {output_state['passed_regression_tests']}")
         self._logger.debug(f"regression_test_fail_log: {output_state['regression_test_fail_log']}")
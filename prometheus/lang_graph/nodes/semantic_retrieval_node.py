@@ -0,0 +1,52 @@
+import logging
+import threading
+import uuid
+
+from langchain_core.messages import AIMessage, ToolMessage
+
+from prometheus.graph.semantic_index import SemanticIndex
+from prometheus.lang_graph.subgraphs.context_retrieval_state import ContextRetrievalState
+from prometheus.tools import semantic_search
+
+
+class SemanticRetrievalNode:
+    """
+    First pass of the context retrieval. It searches the embedding index of the knowledge
+    graph with the query, and adds the results to the context provider messages as if the
+    context provider had called the semantic_search tool itself. The context provider
+    starts from these candidates, and the context extraction selects from them like from
+    the results of any other tool.
+    """
+
+    def __init__(self, semantic_index: SemanticIndex, max_token_per_result: int):
+        self.semantic_index = semantic_index
+        self.max_token_per_result = max_token_per_result
+        self._logger = logging.getLogger(
+            f"thread-{threading.get_ident()}.prometheus.lang_graph.nodes.semantic_retrieval_node"
+        )
+
+    def __call__(self, state: ContextRetrievalState):
+        query = state["query"]
+        content, artifact = semantic_search.semantic_search(
+            query, self.semantic_index, self.max_token_per_result
+        )
+        self._logger.info(f"Semantic search found {len(artifact)} candidates")
+        if not artifact:
+            return {"context_provider_messages": []}
+
+        tool_call_id = f"call_{uuid.uuid4().hex}"
+        tool_name = semantic_search.semantic_search.__name__
+        return {
+            "context_provider_messages": [
+                AIMessage(
+                    content="",
+                    tool_calls=[{"name": tool_name, "args": {"query": query}, "id": tool_call_id}],
+                ),
+                ToolMessage(
+                    content=content,
+                    artifact=artifact,
+                    name=tool_name,
+                    tool_call_id=tool_call_id,
+                ),
+            ]
+        }
@@ -1,13 +1,14 @@
-from typing import Mapping, Sequence
+from typing import Mapping, Optional, Sequence
 
-import neo4j
 from langchain_core.language_models.chat_models import BaseChatModel
 from langgraph.constants import END
 from langgraph.graph import StateGraph
 
 from prometheus.docker.base_container import BaseContainer
 from prometheus.git.git_repository import GitRepository
+from prometheus.graph.graph_store import GraphStore
 from prometheus.graph.knowledge_graph import KnowledgeGraph
+from prometheus.graph.semantic_index import SemanticIndex
 from prometheus.lang_graph.nodes.bug_get_regression_context_message_node import (
     BugGetRegressionContextMessageNode,
 )
@@ -21,6 +22,8 @@ from prometheus.lang_graph.nodes.run_regression_tests_subgraph_node import (
 from prometheus.lang_graph.subgraphs.bug_get_regression_tests_state import (
     BugGetRegressionTestsState,
 )
+from prometheus.utils.context_cache import ContextCache
+from prometheus.utils.issue_context_store import IssueContextStore
 
 
 class BugGetRegressionTestsSubgraph:
@@ -36,8 +39,11 @@ class BugGetRegressionTestsSubgraph:
         container: BaseContainer,
         kg: KnowledgeGraph,
         git_repo: GitRepository,
-        neo4j_driver: neo4j.Driver,
+        graph_store: GraphStore,
         max_token_per_neo4j_result: int,
+        context_cache: Optional[ContextCache] = None,
+        context_store: Optional[IssueContextStore] = None,
+        semantic_index: Optional[SemanticIndex] = None,
     ):
         """
         Initialize the run regression tests pipeline with all necessary parts.
@@ -48,7 +54,7 @@ class BugGetRegressionTestsSubgraph:
             container: Docker-based sandbox for running code.
             kg: Codebase knowledge graph used for context retrieval.
             git_repo: Git repository interface for codebase manipulation.
-            neo4j_driver: Neo4j driver used for graph traversal.
+            graph_store: Graph store of the knowledge graph, used for graph traversal.
             max_token_per_neo4j_result: Truncation budget per retrieved context chunk.
         """
 
@@ -60,10 +66,13 @@ class BugGetRegressionTestsSubgraph:
             base_model,
             kg,
             git_repo.playground_path,
-            neo4j_driver,
+            graph_store,
             max_token_per_neo4j_result,
             "select_regression_query",
             "select_regression_context",
+            context_cache=context_cache,
+            context_store=context_store,
+            semantic_index=semantic_index,
         )
         # Step 3: Select relevant regression tests based on the issue and retrieved context
         bug_get_regression_tests_selection_node = BugGetRegressionTestsSelectionNode(
@@ -1,14 +1,15 @@
 import functools
 from typing import Mapping, Optional, Sequence
 
-import neo4j
 from langchain_core.language_models.chat_models import BaseChatModel
 from langgraph.graph import END, StateGraph
 from langgraph.prebuilt import ToolNode, tools_condition
 
 from prometheus.docker.base_container import BaseContainer
 from prometheus.git.git_repository import GitRepository
+from prometheus.graph.graph_store import GraphStore
 from prometheus.graph.knowledge_graph import KnowledgeGraph
+from prometheus.graph.semantic_index import SemanticIndex
 from prometheus.lang_graph.nodes.bug_reproducing_execute_node import BugReproducingExecuteNode
 from prometheus.lang_graph.nodes.bug_reproducing_file_node import BugReproducingFileNode
 from prometheus.lang_graph.nodes.bug_reproducing_structured_node import BugReproducingStructuredNode
@@ -25,6 +26,8 @@ from prometheus.lang_graph.nodes.issue_bug_reproduction_context_message_node imp
 from prometheus.lang_graph.nodes.reset_messages_node import ResetMessagesNode
 from prometheus.lang_graph.nodes.update_container_node import UpdateContainerNode
 from prometheus.lang_graph.subgraphs.bug_reproduction_state import BugReproductionState
+from prometheus.utils.context_cache import ContextCache
+from prometheus.utils.issue_context_store import IssueContextStore
 
 
 class BugReproductionSubgraph:
@@ -41,9 +44,12 @@ class BugReproductionSubgraph:
         container: BaseContainer,
         kg: KnowledgeGraph,
         git_repo: GitRepository,
-        neo4j_driver: neo4j.Driver,
+        graph_store: GraphStore,
         max_token_per_neo4j_result: int,
         test_commands: Optional[Sequence[str]] = None,
+        context_cache: Optional[ContextCache] = None,
+        context_store: Optional[IssueContextStore] = None,
+        semantic_index: Optional[SemanticIndex] = None,
     ):
         """
         Initialize the bug reproduction pipeline with all necessary parts.
@@ -54,7 +60,7 @@ class BugReproductionSubgraph:
             container: Docker-based sandbox for running code.
             kg: Codebase knowledge graph used for context retrieval.
             git_repo: Git repository interface for codebase manipulation.
-            neo4j_driver: Neo4j driver used for graph traversal.
+            graph_store: Graph store of the knowledge graph, used for graph traversal.
             max_token_per_neo4j_result: Truncation budget per retrieved context chunk.
             test_commands: Optional list of test commands to verify reproduction success.
         """
@@ -68,10 +74,13 @@ class BugReproductionSubgraph:
             base_model,
             kg,
             git_repo.playground_path,
-            neo4j_driver,
+            graph_store,
             max_token_per_neo4j_result,
             "bug_reproducing_query",
             "bug_reproducing_context",
+            context_cache=context_cache,
+            context_store=context_store,
+            semantic_index=semantic_index,
         )
 
         # Step 3: Write a patch to reproduce the bug
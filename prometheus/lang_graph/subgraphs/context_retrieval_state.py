@@ -12,4 +12,7 @@ class ContextRetrievalState(TypedDict):
 
     context_provider_messages: Annotated[Sequence[BaseMessage], add_messages]
     refined_query: str
+    # Context that was known before the retrieval, like the context of earlier stages, which
+    # the refinement takes into account but is not part of the retrieved context
+    known_context: Sequence[Context]
     context: Sequence[Context]
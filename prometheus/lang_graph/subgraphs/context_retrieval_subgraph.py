@@ -1,17 +1,20 @@
 import functools
-from typing import Dict, Sequence
+from typing import Dict, Optional, Sequence
 
-import neo4j
 from langchain_core.language_models.chat_models import BaseChatModel
 from langgraph.graph import END, StateGraph
 from langgraph.prebuilt import ToolNode, tools_condition
 
+from prometheus.graph.graph_store import GraphStore
 from prometheus.graph.knowledge_graph import KnowledgeGraph
+from prometheus.graph.knowledge_graph_overlay import KnowledgeGraphOverlay
+from prometheus.graph.semantic_index import SemanticIndex
 from prometheus.lang_graph.nodes.context_extraction_node import ContextExtractionNode
 from prometheus.lang_graph.nodes.context_provider_node import ContextProviderNode
 from prometheus.lang_graph.nodes.context_query_message_node import ContextQueryMessageNode
 from prometheus.lang_graph.nodes.context_refine_node import ContextRefineNode
 from prometheus.lang_graph.nodes.reset_messages_node import ResetMessagesNode
+from prometheus.lang_graph.nodes.semantic_retrieval_node import SemanticRetrievalNode
 from prometheus.lang_graph.subgraphs.context_retrieval_state import ContextRetrievalState
 from prometheus.models.context import Context
 
@@ -23,13 +26,19 @@ class ContextRetrievalSubgraph:
 
     This subgraph performs an iterative retrieval process:
     1. Constructs a context query message from the user prompt
-    2. Uses tool-based retrieval (Neo4j-backed) to gather candidate context snippets
+    2. Uses tool-based retrieval (Neo4j-backed) to gather candidate context snippets,
+       starting from the results of a semantic search when an embedding index is given
     3. Selects relevant context with LLM assistance
     4. Optionally refines the query and retries if necessary
     5. Outputs the final selected context
 
+    When it is given known context, for example from a cache or from earlier stages, it
+    starts at step 4 and only retrieves what the known context lacks. The output only has
+    the context retrieved on top of it.
+
     Nodes:
         - ContextQueryMessageNode: Converts user query to internal query prompt
+        - SemanticRetrievalNode: Adds the nodes most similar to the query as candidates
         - ContextProviderNode: Queries knowledge graph using structured tools
         - ToolNode: Dynamically invokes retrieval tools based on tool condition
         - ContextSelectionNode: Uses LLM to select useful context snippets
@@ -42,8 +51,10 @@ class ContextRetrievalSubgraph:
         model: BaseChatModel,
         kg: KnowledgeGraph,
         local_path: str,
-        neo4j_driver: neo4j.Driver,
+        graph_store: GraphStore,
         max_token_per_neo4j_result: int,
+        semantic_index: Optional[SemanticIndex] = None,
+        kg_overlay: Optional[KnowledgeGraphOverlay] = None,
     ):
         """
         Initializes the context retrieval subgraph.
@@ -51,15 +62,19 @@ class ContextRetrievalSubgraph:
         Args:
             model (BaseChatModel): The LLM used for context selection and refinement.
             local_path (str): Local path to the codebase for context extraction.
-            neo4j_driver (neo4j.Driver): Driver for executing Cypher queries in Neo4j.
+            graph_store (GraphStore): Graph store for querying the knowledge graph.
             max_token_per_neo4j_result (int): Token limit for responses from graph tools.
+            semantic_index (Optional[SemanticIndex]): Embedding index of the knowledge graph,
+                used for the first retrieval pass and by the semantic_search tool.
+            kg_overlay (Optional[KnowledgeGraphOverlay]): The files changed since the knowledge
+                graph was built, whose current content the graph tools return.
         """
         # Step 1: Generate an initial query from the user's input
         context_query_message_node = ContextQueryMessageNode()
 
         # Step 2: Provide candidate context snippets using knowledge graph tools
         context_provider_node = ContextProviderNode(
-            model, kg, neo4j_driver, max_token_per_neo4j_result
+            model, kg, graph_store, max_token_per_neo4j_result, semantic_index, kg_overlay
         )
 
         # Step 3: Add tool node to handle tool-based retrieval invocation dynamically
@@ -84,6 +99,11 @@ class ContextRetrievalSubgraph:
 
         # Add all nodes to the graph
         workflow.add_node("context_query_message_node", context_query_message_node)
+        if semantic_index is not None:
+            workflow.add_node(
+                "semantic_retrieval_node",
+                SemanticRetrievalNode(semantic_index, max_token_per_neo4j_result),
+            )
         workflow.add_node("context_provider_node", context_provider_node)
         workflow.add_node("context_provider_tools", context_provider_tools)
         workflow.add_node("context_extraction_node", context_extraction_node)
@@ -92,10 +112,17 @@ class ContextRetrievalSubgraph:
         )
         workflow.add_node("context_refine_node", context_refine_node)
 
-        # Set the entry point for the workflow
-        workflow.set_entry_point("context_query_message_node")
+        # Set the entry point for the workflow, known context only needs to be refined
+        workflow.set_conditional_entry_point(
+            lambda state: bool(state.get("known_context")),
+            {True: "context_refine_node", False: "context_query_message_node"},
+        )
         # Define edges between nodes
-        workflow.add_edge("context_query_message_node", "context_provider_node")
+        if semantic_index is not None:
+            workflow.add_edge("context_query_message_node", "semantic_retrieval_node")
+            workflow.add_edge("semantic_retrieval_node", "context_provider_node")
+        else:
+            workflow.add_edge("context_query_message_node", "context_provider_node")
 
         # Conditional: Use tool node if tools_condition is satisfied
         workflow.add_conditional_edges(
@@ -117,17 +144,25 @@ class ContextRetrievalSubgraph:
         # Compile and store the subgraph
         self.subgraph = workflow.compile()
 
-    def invoke(self, query: str, max_refined_query_loop: int) -> Dict[str, Sequence[Context]]:
+    def invoke(
+        self,
+        query: str,
+        max_refined_query_loop: int,
+        known_context: Optional[Sequence[Context]] = None,
+    ) -> Dict[str, Sequence[Context]]:
         """
         Executes the context retrieval subgraph given an initial query.
 
         Args:
             query (str): The natural language query representing the information need.
             max_refined_query_loop (int): Maximum number of times the system can refine and retry the query.
+            known_context (Optional[Sequence[Context]]): Context that is already known for the
+                query, which is not part of the output.
 
         Returns:
             Dict with a single key:
-                - "context" (Sequence[Context]): A list of selected context snippets relevant to the query.
+                - "context" (Sequence[Context]): A list of selected context snippets relevant to the query,
+                  retrieved on top of the known context.
         """
         # Set the recursion limit based on the maximum number of refined query loops
         config = {"recursion_limit": (max_refined_query_loop + 1) * 40}
@@ -136,7 +171,9 @@ class ContextRetrievalSubgraph:
             "query": query,
             "max_refined_query_loop": max_refined_query_loop,
         }
+        if known_context:
+            input_state["known_context"] = known_context
 
         output_state = self.subgraph.invoke(input_state, config)
 
-        return {"context": output_state["context"]}
+        return {"context": output_state.get("context", [])}
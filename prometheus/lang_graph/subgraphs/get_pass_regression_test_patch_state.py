@@ -13,6 +13,8 @@ class GetPassRegressionTestPatchState(TypedDict):
     tested_patch_result: Annotated[Sequence[TestedPatchResult], add]
     # Current patch
     current_patch: str
+    # Selected regression tests that may be affected by the current patch
+    current_regression_tests: Sequence[str]
     # Current patch regression test failure log
     regression_test_fail_log: str
     # Current passed tests
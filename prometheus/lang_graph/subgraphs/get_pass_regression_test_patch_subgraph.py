@@ -6,6 +6,7 @@ from langgraph.graph import StateGraph
 
 from prometheus.docker.base_container import BaseContainer
 from prometheus.git.git_repository import GitRepository
+from prometheus.graph.knowledge_graph import KnowledgeGraph
 from prometheus.lang_graph.nodes.get_pass_regression_test_patch_check_result_node import (
     GetPassRegressionTestPatchCheckResultNode,
 )
@@ -33,6 +34,7 @@ class GetPassRegressionTestPatchSubgraph:
         base_model: BaseChatModel,
         container: BaseContainer,
         git_repo: GitRepository,
+        kg: KnowledgeGraph,
     ):
         """
         Initialize the pipeline with all necessary parts.
@@ -40,19 +42,22 @@ class GetPassRegressionTestPatchSubgraph:
         Args:
             base_model: Lighter LLM for simpler tasks (e.g., file selection).
             container: Docker-based sandbox for running code.
+            git_repo: Git repository interface for codebase manipulation.
+            kg: Codebase knowledge graph used to find the tests affected by each patch.
         """
         noop_nodes = NoopNode()
         # Step 1: Update the Git repository with the current testing patch
         get_pass_regression_test_patch_update_node = GetPassRegressionTestPatchUpdateNode(
-            git_repo=git_repo
+            git_repo=git_repo, kg=kg
         )
         # Step 2: Update the container with the current testing patch
         update_container_node = UpdateContainerNode(container=container, git_repo=git_repo)
-        # Step 3: Run regression tests on the current testing patch
+        # Step 3: Run the regression tests affected by the current testing patch
         run_regression_tests_subgraph_node = RunRegressionTestsSubgraphNode(
             model=base_model,
             container=container,
             passed_regression_tests_key="current_passed_tests",
+            selected_regression_tests_key="current_regression_tests",
         )
         # Step 4: Check the results of the regression tests
         get_pass_regression_test_patch_check_result_node = (
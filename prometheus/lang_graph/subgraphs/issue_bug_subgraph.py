@@ -1,12 +1,13 @@
 from typing import Mapping, Optional, Sequence
 
-import neo4j
 from langchain_core.language_models.chat_models import BaseChatModel
 from langgraph.graph import END, StateGraph
 
 from prometheus.docker.base_container import BaseContainer
 from prometheus.git.git_repository import GitRepository
+from prometheus.graph.graph_store import GraphStore
 from prometheus.graph.knowledge_graph import KnowledgeGraph
+from prometheus.graph.semantic_index import SemanticIndex
 from prometheus.lang_graph.nodes.bug_get_regression_tests_subgraph_node import (
     BugGetRegressionTestsSubgraphNode,
 )
@@ -19,6 +20,8 @@ from prometheus.lang_graph.nodes.issue_verified_bug_subgraph_node import (
     IssueVerifiedBugSubgraphNode,
 )
 from prometheus.lang_graph.subgraphs.issue_bug_state import IssueBugState
+from prometheus.utils.context_cache import ContextCache
+from prometheus.utils.issue_context_store import IssueContextStore
 
 
 class IssueBugSubgraph:
@@ -29,10 +32,13 @@ class IssueBugSubgraph:
         container: BaseContainer,
         kg: KnowledgeGraph,
         git_repo: GitRepository,
-        neo4j_driver: neo4j.Driver,
+        graph_store: GraphStore,
         max_token_per_neo4j_result: int,
         build_commands: Optional[Sequence[str]] = None,
         test_commands: Optional[Sequence[str]] = None,
+        context_cache: Optional[ContextCache] = None,
+        context_store: Optional[IssueContextStore] = None,
+        semantic_index: Optional[SemanticIndex] = None,
     ):
         # Construct bug reproduction node
         bug_reproduction_subgraph_node = BugReproductionSubgraphNode(
@@ -41,9 +47,12 @@ class IssueBugSubgraph:
             container=container,
             kg=kg,
             git_repo=git_repo,
-            neo4j_driver=neo4j_driver,
+            graph_store=graph_store,
             max_token_per_neo4j_result=max_token_per_neo4j_result,
             test_commands=test_commands,
+            context_cache=context_cache,
+            context_store=context_store,
+            semantic_index=semantic_index,
         )
         # Construct bug regression tests subgraph node
         bug_get_regression_tests_subgraph_node = BugGetRegressionTestsSubgraphNode(
@@ -52,8 +61,11 @@ class IssueBugSubgraph:
             container=container,
             kg=kg,
             git_repo=git_repo,
-            neo4j_driver=neo4j_driver,
+            graph_store=graph_store,
             max_token_per_neo4j_result=max_token_per_neo4j_result,
+            context_cache=context_cache,
+            context_store=context_store,
+            semantic_index=semantic_index,
         )
 
         # Construct issue bug verified subgraph nodes
@@ -63,10 +75,13 @@ class IssueBugSubgraph:
             container=container,
             kg=kg,
             git_repo=git_repo,
-            neo4j_driver=neo4j_driver,
+            graph_store=graph_store,
             max_token_per_neo4j_result=max_token_per_neo4j_result,
             build_commands=build_commands,
             test_commands=test_commands,
+            context_cache=context_cache,
+            context_store=context_store,
+            semantic_index=semantic_index,
         )
         # Construct issue not verified bug subgraph node
         issue_not_verified_bug_subgraph_node = IssueNotVerifiedBugSubgraphNode(
@@ -75,8 +90,11 @@ class IssueBugSubgraph:
             kg=kg,
             git_repo=git_repo,
             container=container,
-            neo4j_driver=neo4j_driver,
+            graph_store=graph_store,
             max_token_per_neo4j_result=max_token_per_neo4j_result,
+            context_cache=context_cache,
+            context_store=context_store,
+            semantic_index=semantic_index,
         )
         # Construct issue bug responder node
         issue_bug_responder_node = IssueBugResponderNode(base_model)
@@ -100,11 +118,13 @@ class IssueBugSubgraph:
         # otherwise start with bug_reproduction_subgraph_node if reproduce tests are to be run,
         # otherwise start with issue_not_verified_bug_subgraph_node
         workflow.set_conditional_entry_point(
-            lambda state: "bug_get_regression_tests_subgraph_node"
-            if state["run_regression_test"]
-            else "bug_reproduction_subgraph_node"
-            if state["run_reproduce_test"]
-            else "issue_not_verified_bug_subgraph_node",
+            lambda state: (
+                "bug_get_regression_tests_subgraph_node"
+                if state["run_regression_test"]
+                else "bug_reproduction_subgraph_node"
+                if state["run_reproduce_test"]
+                else "issue_not_verified_bug_subgraph_node"
+            ),
             {
                 "bug_get_regression_tests_subgraph_node": "bug_get_regression_tests_subgraph_node",
                 "bug_reproduction_subgraph_node": "bug_reproduction_subgraph_node",
@@ -121,9 +141,9 @@ class IssueBugSubgraph:
         # Go to verified bug subgraph if the bug is verified, otherwise go to not verified bug subgraph
         workflow.add_conditional_edges(
             "bug_reproduction_subgraph_node",
-            lambda state: state["reproduced_bug"]
-            or state["run_build"]
-            or state["run_existing_test"],
+            lambda state: (
+                state["reproduced_bug"] or state["run_build"] or state["run_existing_test"]
+            ),
             {
                 True: "issue_verified_bug_subgraph_node",
                 False: "issue_not_verified_bug_subgraph_node",
@@ -1,16 +1,19 @@
-from typing import Mapping, Sequence
+from typing import Mapping, Optional, Sequence
 
-import neo4j
 from langchain_core.language_models.chat_models import BaseChatModel
 from langgraph.graph import END, StateGraph
 
+from prometheus.graph.graph_store import GraphStore
 from prometheus.graph.knowledge_graph import KnowledgeGraph
+from prometheus.graph.semantic_index import SemanticIndex
 from prometheus.lang_graph.nodes.context_retrieval_subgraph_node import ContextRetrievalSubgraphNode
 from prometheus.lang_graph.nodes.issue_classification_context_message_node import (
     IssueClassificationContextMessageNode,
 )
 from prometheus.lang_graph.nodes.issue_classifier_node import IssueClassifierNode
 from prometheus.lang_graph.subgraphs.issue_classification_state import IssueClassificationState
+from prometheus.utils.context_cache import ContextCache
+from prometheus.utils.issue_context_store import IssueContextStore
 
 
 class IssueClassificationSubgraph:
@@ -19,18 +22,24 @@ class IssueClassificationSubgraph:
         model: BaseChatModel,
         kg: KnowledgeGraph,
         local_path: str,
-        neo4j_driver: neo4j.Driver,
+        graph_store: GraphStore,
         max_token_per_neo4j_result: int,
+        context_cache: Optional[ContextCache] = None,
+        context_store: Optional[IssueContextStore] = None,
+        semantic_index: Optional[SemanticIndex] = None,
     ):
         issue_classification_context_message_node = IssueClassificationContextMessageNode()
         context_retrieval_subgraph_node = ContextRetrievalSubgraphNode(
             model=model,
             kg=kg,
             local_path=local_path,
-            neo4j_driver=neo4j_driver,
+            graph_store=graph_store,
             max_token_per_neo4j_result=max_token_per_neo4j_result,
             query_key_name="issue_classification_query",
             context_key_name="issue_classification_context",
+            context_cache=context_cache,
+            context_store=context_store,
+            semantic_index=semantic_index,
         )
         issue_classifier_node = IssueClassifierNode(model)
 
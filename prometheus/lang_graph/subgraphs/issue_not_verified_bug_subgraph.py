@@ -1,14 +1,16 @@
 import functools
-from typing import Mapping, Sequence
+from typing import Mapping, Optional, Sequence
 
-import neo4j
 from langchain_core.language_models.chat_models import BaseChatModel
 from langgraph.graph import END, StateGraph
 from langgraph.prebuilt import ToolNode, tools_condition
 
 from prometheus.docker.base_container import BaseContainer
 from prometheus.git.git_repository import GitRepository
+from prometheus.graph.graph_store import GraphStore
 from prometheus.graph.knowledge_graph import KnowledgeGraph
+from prometheus.graph.knowledge_graph_overlay import KnowledgeGraphOverlay
+from prometheus.graph.semantic_index import SemanticIndex
 from prometheus.lang_graph.nodes.context_retrieval_subgraph_node import ContextRetrievalSubgraphNode
 from prometheus.lang_graph.nodes.edit_message_node import EditMessageNode
 from prometheus.lang_graph.nodes.edit_node import EditNode
@@ -24,6 +26,8 @@ from prometheus.lang_graph.nodes.issue_bug_context_message_node import IssueBugC
 from prometheus.lang_graph.nodes.patch_normalization_node import PatchNormalizationNode
 from prometheus.lang_graph.nodes.reset_messages_node import ResetMessagesNode
 from prometheus.lang_graph.subgraphs.issue_not_verified_bug_state import IssueNotVerifiedBugState
+from prometheus.utils.context_cache import ContextCache
+from prometheus.utils.issue_context_store import IssueContextStore
 
 
 class IssueNotVerifiedBugSubgraph:
@@ -34,25 +38,41 @@ class IssueNotVerifiedBugSubgraph:
         kg: KnowledgeGraph,
         git_repo: GitRepository,
         container: BaseContainer,
-        neo4j_driver: neo4j.Driver,
+        graph_store: GraphStore,
         max_token_per_neo4j_result: int,
+        context_cache: Optional[ContextCache] = None,
+        context_store: Optional[IssueContextStore] = None,
+        semantic_index: Optional[SemanticIndex] = None,
     ):
+        # The files edited by the edit node, until the repository is reset
+        kg_overlay = KnowledgeGraphOverlay(kg, git_repo.playground_path)
+
         issue_bug_context_message_node = IssueBugContextMessageNode()
         context_retrieval_subgraph_node = ContextRetrievalSubgraphNode(
             model=base_model,
             kg=kg,
             local_path=git_repo.playground_path,
-            neo4j_driver=neo4j_driver,
+            graph_store=graph_store,
             max_token_per_neo4j_result=max_token_per_neo4j_result,
             query_key_name="bug_fix_query",
             context_key_name="bug_fix_context",
+            context_cache=context_cache,
+            context_store=context_store,
+            semantic_index=semantic_index,
+            kg_overlay=kg_overlay,
         )
 
         issue_bug_analyzer_message_node = IssueBugAnalyzerMessageNode()
         issue_bug_analyzer_node = IssueBugAnalyzerNode(advanced_model)
 
         edit_message_node = EditMessageNode()
-        edit_node = EditNode(advanced_model, git_repo.playground_path)
+        edit_node = EditNode(
+            advanced_model,
+            git_repo.playground_path,
+            kg_overlay,
+            graph_store,
+            max_token_per_neo4j_result,
+        )
         edit_tools = ToolNode(
             tools=edit_node.tools,
             name="edit_tools",
@@ -60,7 +80,7 @@ class IssueNotVerifiedBugSubgraph:
         )
         git_diff_node = GitDiffNode(git_repo, "edit_patches", return_list=True)
 
-        git_reset_node = GitResetNode(git_repo)
+        git_reset_node = GitResetNode(git_repo, kg_overlay)
         reset_issue_bug_analyzer_messages_node = ResetMessagesNode("issue_bug_analyzer_messages")
         reset_edit_messages_node = ResetMessagesNode("edit_messages")
 
@@ -72,6 +92,7 @@ class IssueNotVerifiedBugSubgraph:
             model=base_model,
             container=container,
             git_repo=git_repo,
+            kg=kg,
             testing_patch_key="deduplicated_patches",
             is_testing_patch_list=True,
         )
@@ -1,14 +1,16 @@
 import functools
 from typing import Mapping, Optional, Sequence
 
-import neo4j
 from langchain_core.language_models.chat_models import BaseChatModel
 from langgraph.graph import END, StateGraph
 from langgraph.prebuilt import ToolNode, tools_condition
 
 from prometheus.docker.base_container import BaseContainer
 from prometheus.git.git_repository import GitRepository
+from prometheus.graph.graph_store import GraphStore
 from prometheus.graph.knowledge_graph import KnowledgeGraph
+from prometheus.graph.knowledge_graph_overlay import KnowledgeGraphOverlay
+from prometheus.graph.semantic_index import SemanticIndex
 from prometheus.lang_graph.nodes.bug_fix_verification_subgraph_node import (
     BugFixVerificationSubgraphNode,
 )
@@ -26,6 +28,8 @@ from prometheus.lang_graph.nodes.issue_bug_analyzer_node import IssueBugAnalyzer
 from prometheus.lang_graph.nodes.issue_bug_context_message_node import IssueBugContextMessageNode
 from prometheus.lang_graph.nodes.noop_node import NoopNode
 from prometheus.lang_graph.subgraphs.issue_verified_bug_state import IssueVerifiedBugState
+from prometheus.utils.context_cache import ContextCache
+from prometheus.utils.issue_context_store import IssueContextStore
 
 
 class IssueVerifiedBugSubgraph:
@@ -52,10 +56,13 @@ class IssueVerifiedBugSubgraph:
         container: BaseContainer,
         kg: KnowledgeGraph,
         git_repo: GitRepository,
-        neo4j_driver: neo4j.Driver,
+        graph_store: GraphStore,
         max_token_per_neo4j_result: int,
         build_commands: Optional[Sequence[str]] = None,
         test_commands: Optional[Sequence[str]] = None,
+        context_cache: Optional[ContextCache] = None,
+        context_store: Optional[IssueContextStore] = None,
+        semantic_index: Optional[SemanticIndex] = None,
     ):
         """
         Initialize the verified bug fix subgraph.
@@ -66,22 +73,29 @@ class IssueVerifiedBugSubgraph:
             container (BaseContainer): A build/test container to run code validations.
             kg (KnowledgeGraph): A knowledge graph used for context-aware retrieval of relevant code entities.
             git_repo (GitRepository): Git interface to apply patches and get diffs.
-            neo4j_driver (neo4j.Driver): Neo4j driver for executing graph-based semantic queries.
+            graph_store (GraphStore): Graph store for executing graph-based semantic queries.
             max_token_per_neo4j_result (int): Maximum tokens to limit output from Neo4j query results.
             build_commands (Optional[Sequence[str]]): Commands to build the project inside the container.
             test_commands (Optional[Sequence[str]]): Commands to test the project inside the container.
         """
 
+        # The files edited by the edit node, until the repository is reset
+        kg_overlay = KnowledgeGraphOverlay(kg, git_repo.playground_path)
+
         # Phase 1: Retrieve context related to the bug
         issue_bug_context_message_node = IssueBugContextMessageNode()
         context_retrieval_subgraph_node = ContextRetrievalSubgraphNode(
             model=base_model,
             kg=kg,
             local_path=git_repo.playground_path,
-            neo4j_driver=neo4j_driver,
+            graph_store=graph_store,
             max_token_per_neo4j_result=max_token_per_neo4j_result,
             query_key_name="bug_fix_query",
             context_key_name="bug_fix_context",
+            context_cache=context_cache,
+            context_store=context_store,
+            semantic_index=semantic_index,
+            kg_overlay=kg_overlay,
         )
 
         # Phase 2: Analyze the bug and generate hypotheses
@@ -90,7 +104,13 @@ class IssueVerifiedBugSubgraph:
 
         # Phase 3: Generate code edits and optionally apply toolchains
         edit_message_node = EditMessageNode()
-        edit_node = EditNode(advanced_model, git_repo.playground_path)
+        edit_node = EditNode(
+            advanced_model,
+            git_repo.playground_path,
+            kg_overlay,
+            graph_store,
+            max_token_per_neo4j_result,
+        )
         edit_tools = ToolNode(
             tools=edit_node.tools,
             name="edit_tools",
@@ -99,7 +119,7 @@ class IssueVerifiedBugSubgraph:
 
         # Phase 4: Generate the patch and reset the repository
         git_diff_node = GitDiffNode(git_repo, "edit_patch")
-        git_reset_node = GitResetNode(git_repo)
+        git_reset_node = GitResetNode(git_repo, kg_overlay)
 
         noop_node = NoopNode()
 
@@ -108,6 +128,7 @@ class IssueVerifiedBugSubgraph:
             model=base_model,
             container=container,
             git_repo=git_repo,
+            kg=kg,
             testing_patch_key="edit_patch",
             is_testing_patch_list=False,
         )
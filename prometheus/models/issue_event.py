@@ -0,0 +1,93 @@
+from typing import Any, Literal, Mapping, Optional, Sequence
+
+from pydantic import BaseModel
+
+from prometheus.models.context import Context
+from prometheus.models.test_patch_result import TestedPatchResult
+
+# State keys that hold candidate patches for the issue
+PATCH_KEYS = frozenset({"edit_patch", "edit_patches", "final_patch"})
+# State keys that hold the outcome of running the build or tests
+TEST_RESULT_KEYS = frozenset(
+    {
+        "reproduced_bug",
+        "reproduced_bug_failure_log",
+        "passed_reproducing_test",
+        "reproducing_test_fail_log",
+        "passed_build",
+        "build_fail_log",
+        "passed_existing_test",
+        "existing_test_fail_log",
+        "passed_regression_tests",
+        "regression_test_fail_log",
+        "tested_patch_result",
+    }
+)
+
+IssueEventType = Literal["node", "context", "patch", "test_result"]
+
+
+class IssueEvent(BaseModel):
+    """
+    An event emitted while an issue is being processed.
+
+    Every node that finishes emits a "node" event, followed by "context", "patch" and
+    "test_result" events for the retrieved context, candidate patches and test results
+    found in its state update.
+    """
+
+    type: IssueEventType
+    # Name of the node that emitted the event
+    node: str
+    # Names of the subgraph nodes the node runs in, from the outermost one
+    path: Sequence[str] = ()
+    # State key the data comes from, for events other than "node"
+    key: Optional[str] = None
+    data: Any = None
+
+    @classmethod
+    def from_graph_update(
+        cls, namespace: Sequence[str], update: Mapping[str, Optional[Mapping[str, Any]]]
+    ) -> Sequence["IssueEvent"]:
+        """
+        Converts an update streamed by LangGraph with stream_mode="updates" and
+        subgraphs=True into events.
+
+        Args:
+            namespace: The namespace of the graph that emitted the update, as
+                "node_name:task_id" strings.
+            update: Mapping from the name of the node that finished to its state update.
+
+        Returns:
+            The events of the update.
+        """
+        path = [part.split(":")[0] for part in namespace]
+        events = []
+        for node, node_update in update.items():
+            events.append(cls(type="node", node=node, path=path))
+            for key, value in (node_update or {}).items():
+                if not value and not isinstance(value, bool):
+                    continue
+                if key.endswith("context") and _is_sequence_of(value, Context):
+                    event_type, data = "context", [context.model_dump() for context in value]
+                elif key in PATCH_KEYS:
+                    event_type, data = "patch", value
+                elif key in TEST_RESULT_KEYS:
+                    event_type = "test_result"
+                    data = (
+                        [result.model_dump() for result in value]
+                        if _is_sequence_of(value, TestedPatchResult)
+                        else value
+                    )
+                else:
+                    continue
+                events.append(cls(type=event_type, node=node, path=path, key=key, data=data))
+        return events
+
+
+def _is_sequence_of(value: Any, item_type: type) -> bool:
+    return (
+        isinstance(value, (list, tuple))
+        and bool(value)
+        and all(isinstance(item, item_type) for item in value)
+    )
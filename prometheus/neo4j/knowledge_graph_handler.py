@@ -1,11 +1,15 @@
 """The neo4j handler for writing the knowledge graph to neo4j."""
 
 import logging
-from typing import Mapping, Sequence
+import threading
+from typing import Callable, Dict, List, Mapping, Optional, Sequence
 
 from neo4j import GraphDatabase, ManagedTransaction
 
+from prometheus.graph.content_subgraph import ContentSubgraph, get_content_subgraphs
 from prometheus.graph.graph_types import (
+    KnowledgeGraphEdge,
+    KnowledgeGraphEdgeType,
     KnowledgeGraphNode,
     Neo4jASTNode,
     Neo4jFileNode,
@@ -13,6 +17,7 @@ from prometheus.graph.graph_types import (
     Neo4jHasFileEdge,
     Neo4jHasTextEdge,
     Neo4jNextChunkEdge,
+    Neo4jSymbolNode,
     Neo4jTextNode,
 )
 from prometheus.graph.knowledge_graph import KnowledgeGraph
@@ -29,6 +34,9 @@ class KnowledgeGraphHandler:
         """
         self.driver = driver
         self.batch_size = batch_size
+        # The content of the stored knowledge graphs is shared with a new one, it must not be
+        # deleted while the new one is written, see clear_knowledge_graph
+        self._writing_lock = threading.Lock()
         # initialize the database and logger
         self._init_database()
         self._logger = logging.getLogger("prometheus.neo4j.knowledge_graph_handler")
@@ -45,6 +53,15 @@ class KnowledgeGraphHandler:
             "FOR (n:ASTNode) REQUIRE n.node_id IS UNIQUE",
             "CREATE CONSTRAINT unique_text_node_id IF NOT EXISTS "
             "FOR (n:TextNode) REQUIRE n.node_id IS UNIQUE",
+            "CREATE CONSTRAINT unique_symbol_node_id IF NOT EXISTS "
+            "FOR (n:SymbolNode) REQUIRE n.node_id IS UNIQUE",
+            # The node ids are allocated from a single counter, see allocate_node_ids
+            "CREATE CONSTRAINT unique_node_id_counter_name IF NOT EXISTS "
+            "FOR (n:NodeIdCounter) REQUIRE n.name IS UNIQUE",
+            # find_definition and find_references start from the SymbolNode with a name
+            "CREATE INDEX symbol_node_name IF NOT EXISTS FOR (n:SymbolNode) ON (n.name)",
+            # The content of a file is shared by the FileNodes with the same content hash
+            "CREATE INDEX file_node_content_hash IF NOT EXISTS FOR (n:FileNode) ON (n.content_hash)",
         ]
         with self.driver.session() as session:
             for query in queries:
@@ -83,6 +100,17 @@ class KnowledgeGraphHandler:
             text_nodes_batch = text_nodes[i : i + self.batch_size]
             tx.run(query, text_nodes=text_nodes_batch)
 
+    def _write_symbol_nodes(self, tx: ManagedTransaction, symbol_nodes: Sequence[Neo4jSymbolNode]):
+        """Write Neo4jSymbolNode to neo4j."""
+        self._logger.debug(f"Writing {len(symbol_nodes)} SymbolNode to neo4j")
+        query = """
+      UNWIND $symbol_nodes AS symbol_node
+      CREATE (a:SymbolNode {node_id: symbol_node.node_id, name: symbol_node.name})
+    """
+        for i in range(0, len(symbol_nodes), self.batch_size):
+            symbol_nodes_batch = symbol_nodes[i : i + self.batch_size]
+            tx.run(query, symbol_nodes=symbol_nodes_batch)
+
     def _write_has_file_edges(
         self, tx: ManagedTransaction, has_file_edges: Sequence[Neo4jHasFileEdge]
     ):
@@ -165,23 +193,210 @@ class KnowledgeGraphHandler:
             next_chunk_edges_batch = next_chunk_edges[i : i + self.batch_size]
             tx.run(query, edges=next_chunk_edges_batch)
 
+    def _write_symbol_edges(
+        self, tx: ManagedTransaction, symbol_edges: Sequence[KnowledgeGraphEdge]
+    ):
+        """Write the DEFINES, REFERENCES and IMPORTS edges to neo4j."""
+        self._logger.debug(f"Writing {len(symbol_edges)} SymbolEdge to neo4j")
+        for edge_type in (
+            KnowledgeGraphEdgeType.defines,
+            KnowledgeGraphEdgeType.references,
+            KnowledgeGraphEdgeType.imports,
+        ):
+            # Only the node IDs are sent, as the AST node text would be repeated for every edge
+            edge_dicts = [
+                {"source_id": e.source.node_id, "target_id": e.target.node_id}
+                for e in symbol_edges
+                if e.type == edge_type
+            ]
+            query = f"""
+      UNWIND $edges AS edge
+      MATCH (source:ASTNode {{node_id: edge.source_id}})
+      MATCH (target:SymbolNode {{node_id: edge.target_id}})
+      CREATE (source) -[:{edge_type.value}]-> (target)
+    """
+            for i in range(0, len(edge_dicts), self.batch_size):
+                tx.run(query, edges=edge_dicts[i : i + self.batch_size])
+
+    def _write_content_hashes(
+        self, tx: ManagedTransaction, content_subgraphs: Sequence[ContentSubgraph]
+    ):
+        """Write the content hashes of the files to their FileNode."""
+        query = """
+      UNWIND $files AS file
+      MATCH (f:FileNode {node_id: file.node_id})
+      SET f.content_hash = file.content_hash
+    """
+        files = [
+            {"node_id": c.file_node.node_id, "content_hash": c.content_hash}
+            for c in content_subgraphs
+        ]
+        for i in range(0, len(files), self.batch_size):
+            tx.run(query, files=files[i : i + self.batch_size])
+
+    def _read_content_node_ids(
+        self, tx: ManagedTransaction, content_hashes: Sequence[str]
+    ) -> Dict[str, List[int]]:
+        """
+        Read the IDs of the ASTNodes and TextNodes of the content stored for content hashes,
+        by content hash, sorted.
+
+        Args:
+            tx (ManagedTransaction): An active Neo4j transaction.
+            content_hashes (Sequence[str]): The content hashes of files.
+
+        Returns:
+            Dict[str, List[int]]: The sorted node IDs of the content, for the content hashes
+                of the files that are already stored.
+        """
+        query = """
+        UNWIND $content_hashes AS content_hash
+        CALL {
+          WITH content_hash
+          MATCH (file:FileNode {content_hash: content_hash})
+          RETURN file
+          LIMIT 1
+        }
+        CALL {
+          WITH file
+          MATCH (file)-[:HAS_AST]->(:ASTNode)-[:PARENT_OF*0..]->(n:ASTNode)
+          RETURN n
+          UNION
+          WITH file
+          MATCH (file)-[:HAS_TEXT]->(n:TextNode)
+          RETURN n
+        }
+        RETURN content_hash, collect(n.node_id) AS node_ids
+        """
+        content_node_ids = {}
+        for i in range(0, len(content_hashes), self.batch_size):
+            result = tx.run(query, content_hashes=content_hashes[i : i + self.batch_size])
+            for record in result:
+                content_node_ids[record["content_hash"]] = sorted(record["node_ids"])
+        return content_node_ids
+
+    def _read_symbol_node_ids(self, tx: ManagedTransaction, names: Sequence[str]) -> Dict[str, int]:
+        """
+        Read the IDs of the stored SymbolNodes with names.
+
+        Args:
+            tx (ManagedTransaction): An active Neo4j transaction.
+            names (Sequence[str]): The symbol names.
+
+        Returns:
+            Dict[str, int]: The node ID of the SymbolNode of the names that are already stored.
+        """
+        query = """
+        UNWIND $names AS name
+        MATCH (symbol:SymbolNode {name: name})
+        RETURN name, min(symbol.node_id) AS node_id
+        """
+        symbol_node_ids = {}
+        for i in range(0, len(names), self.batch_size):
+            result = tx.run(query, names=names[i : i + self.batch_size])
+            for record in result:
+                symbol_node_ids[record["name"]] = record["node_id"]
+        return symbol_node_ids
+
+    def _share_stored_nodes(
+        self, kg: KnowledgeGraph, content_subgraphs: Sequence[ContentSubgraph]
+    ) -> Sequence[int]:
+        """Replaces the IDs of the nodes of kg that are already stored by the stored ones.
+
+        The content of a file that is stored for another knowledge graph, like the same file
+        at another commit, has the same content hash, and the SymbolNodes are shared by name.
+
+        Returns:
+          The new IDs of the nodes that are already stored.
+        """
+        # A stored content is shared by at most one file of a graph, so that a file of the
+        # graph that is deleted is the last reference of the graph to the content
+        first_content_subgraphs = {}
+        for content_subgraph in content_subgraphs:
+            first_content_subgraphs.setdefault(content_subgraph.content_hash, content_subgraph)
+        with self.driver.session() as session:
+            content_node_ids = session.execute_read(
+                self._read_content_node_ids, list(first_content_subgraphs)
+            )
+            symbol_node_ids = session.execute_read(
+                self._read_symbol_node_ids,
+                [kg_node.node.name for kg_node in kg.get_symbol_nodes()],
+            )
+
+        node_ids = {}
+        for content_hash, stored_node_ids in content_node_ids.items():
+            content_subgraph = first_content_subgraphs[content_hash]
+            if len(stored_node_ids) != len(content_subgraph.kg_nodes):
+                self._logger.warning(
+                    f"The stored content of {content_subgraph.file_node.node.relative_path} "
+                    "does not match its hash, it is written again"
+                )
+                continue
+            node_ids.update(
+                (kg_node.node_id, stored_node_id)
+                for kg_node, stored_node_id in zip(content_subgraph.kg_nodes, stored_node_ids)
+            )
+        for kg_node in kg.get_symbol_nodes():
+            if kg_node.node.name in symbol_node_ids:
+                node_ids[kg_node.node_id] = symbol_node_ids[kg_node.node.name]
+
+        self._logger.info(
+            f"Sharing {len(node_ids)} nodes of {len(content_node_ids)} files and "
+            f"{len(symbol_node_ids)} symbols with the stored knowledge graphs"
+        )
+        kg.replace_node_ids(node_ids)
+        return list(node_ids.values())
+
     def write_knowledge_graph(self, kg: KnowledgeGraph):
         """Write the knowledge graph to neo4j.
 
+        The content of the files that is already stored, for another knowledge graph, is not
+        written again: the FileNodes of kg are linked to the stored ASTNodes and TextNodes,
+        and the IDs of the nodes of kg are replaced by the stored ones, see content_subgraph.
+        The SymbolNodes are shared by name in the same way.
+
         Args:
           kg: The knowledge graph to write to neo4j.
         """
         self._logger.info("Writing knowledge graph to neo4j")
-        with self.driver.session() as session:
-            session.execute_write(self._write_file_nodes, kg.get_neo4j_file_nodes())
-            session.execute_write(self._write_ast_nodes, kg.get_neo4j_ast_nodes())
-            session.execute_write(self._write_text_nodes, kg.get_neo4j_text_nodes())
+        with self._writing_lock:
+            self._write_knowledge_graph(kg)
+
+    def _write_knowledge_graph(self, kg: KnowledgeGraph):
+        content_subgraphs = get_content_subgraphs(kg)
+        stored_node_ids = set(self._share_stored_nodes(kg, content_subgraphs))
 
-            session.execute_write(self._write_has_ast_edges, kg.get_neo4j_has_ast_edges())
-            session.execute_write(self._write_has_file_edges, kg.get_neo4j_has_file_edges())
-            session.execute_write(self._write_has_text_edges, kg.get_neo4j_has_text_edges())
-            session.execute_write(self._write_next_chunk_edges, kg.get_neo4j_next_chunk_edges())
-        self.write_parent_of_edges(kg.get_parent_of_edges())
+        # The stored nodes are not written again, nor the edges from them
+        def new_nodes(kg_nodes):
+            return [n.to_neo4j_node() for n in kg_nodes if n.node_id not in stored_node_ids]
+
+        def new_edges(kg_edges):
+            return [e for e in kg_edges if e.source.node_id not in stored_node_ids]
+
+        with self.driver.session() as session:
+            session.execute_write(self._write_file_nodes, new_nodes(kg.get_file_nodes()))
+            session.execute_write(self._write_ast_nodes, new_nodes(kg.get_ast_nodes()))
+            session.execute_write(self._write_text_nodes, new_nodes(kg.get_text_nodes()))
+            session.execute_write(self._write_symbol_nodes, new_nodes(kg.get_symbol_nodes()))
+            session.execute_write(self._write_content_hashes, content_subgraphs)
+
+            for write_edges, kg_edges in (
+                (self._write_has_ast_edges, kg.get_has_ast_edges()),
+                (self._write_has_file_edges, kg.get_has_file_edges()),
+                (self._write_has_text_edges, kg.get_has_text_edges()),
+                (self._write_next_chunk_edges, kg.get_next_chunk_edges()),
+            ):
+                session.execute_write(write_edges, [e.to_neo4j_edge() for e in new_edges(kg_edges)])
+        self.write_parent_of_edges(new_edges(kg.get_parent_of_edges()))
+        with self.driver.session() as session:
+            session.execute_write(self._write_symbol_edges, new_edges(kg.get_symbol_edges()))
+            # Stored next to the version, the files parsed later are parsed in the same mode
+            session.run(
+                "MATCH (root:FileNode {node_id: $root_node_id}) "
+                "SET root.selective_ast = $selective_ast",
+                root_node_id=kg.root_node_id,
+                selective_ast=kg.selective_ast,
+            )
 
     def _read_file_nodes(
         self, tx: ManagedTransaction, root_node_id: int
@@ -385,6 +600,71 @@ class KnowledgeGraphHandler:
         result = tx.run(query, root_node_id=root_node_id)
         return [record.data() for record in result]
 
+    def _read_symbol_nodes(
+        self, tx: ManagedTransaction, root_node_id: int
+    ) -> Sequence[KnowledgeGraphNode]:
+        """
+        Read all SymbolNode nodes defined in the file tree rooted at root_node_id. Every
+        SymbolNode has at least one DEFINES edge, from an ASTNode of a file in the tree.
+
+        Args:
+            tx (ManagedTransaction): An active Neo4j transaction.
+            root_node_id (int): The node id of the root FileNode.
+
+        Returns:
+            Sequence[KnowledgeGraphNode]: List of SymbolNode KnowledgeGraphNode objects.
+        """
+        query = """
+        MATCH (root:FileNode {node_id: $root_node_id})-[:HAS_FILE*0..]->(:FileNode)
+              -[:HAS_AST]->(:ASTNode)-[:PARENT_OF*0..]->(:ASTNode)-[:DEFINES]->(n:SymbolNode)
+        RETURN DISTINCT n.node_id AS node_id, n.name AS name
+        """
+        result = tx.run(query, root_node_id=root_node_id)
+        return [KnowledgeGraphNode.from_neo4j_symbol_node(record.data()) for record in result]
+
+    def _read_symbol_edges(
+        self, tx: ManagedTransaction, root_node_id: int
+    ) -> Sequence[Mapping[str, int | str]]:
+        """
+        Read all DEFINES, REFERENCES and IMPORTS edges from the ASTNodes of the file tree
+        rooted at root_node_id.
+
+        Args:
+            tx (ManagedTransaction): An active Neo4j transaction.
+            root_node_id (int): The node id of the root FileNode.
+
+        Returns:
+            Sequence[Mapping[str, int | str]]: List of dicts with source_id, target_id and type
+                for each edge.
+        """
+        query = """
+        MATCH (root:FileNode {node_id: $root_node_id})-[:HAS_FILE*0..]->(:FileNode)
+              -[:HAS_AST]->(:ASTNode)-[:PARENT_OF*0..]->(ast:ASTNode)
+        MATCH (ast)-[r:DEFINES|REFERENCES|IMPORTS]->(symbol:SymbolNode)
+        RETURN ast.node_id AS source_id, symbol.node_id AS target_id, type(r) AS type
+        """
+        result = tx.run(query, root_node_id=root_node_id)
+        return [record.data() for record in result]
+
+    def _read_selective_ast(self, tx: ManagedTransaction, root_node_id: int) -> bool:
+        """
+        Read whether the knowledge graph rooted at root_node_id was built with selective ASTs.
+
+        Args:
+            tx (ManagedTransaction): An active Neo4j transaction.
+            root_node_id (int): The node id of the root FileNode.
+
+        Returns:
+            bool: The selective_ast of the knowledge graph, False for the knowledge graphs
+                written before it was stored.
+        """
+        query = """
+        MATCH (root:FileNode {node_id: $root_node_id})
+        RETURN coalesce(root.selective_ast, false) AS selective_ast
+        """
+        record = tx.run(query, root_node_id=root_node_id).single()
+        return record["selective_ast"] if record is not None else False
+
     def read_knowledge_graph(
         self,
         root_node_id: int,
@@ -392,7 +672,7 @@ class KnowledgeGraphHandler:
         chunk_size: int,
         chunk_overlap: int,
     ) -> KnowledgeGraph:
-        """Read KnowledgeGraph from neo4j."""
+        """Read KnowledgeGraph from neo4j, with the selective_ast it was built with."""
         self._logger.info("Reading knowledge graph from neo4j")
         with self.driver.session() as session:
             return KnowledgeGraph.from_neo4j(
@@ -408,6 +688,9 @@ class KnowledgeGraphHandler:
                 session.execute_read(self._read_has_ast_edges, root_node_id=root_node_id),
                 session.execute_read(self._read_has_text_edges, root_node_id=root_node_id),
                 session.execute_read(self._read_next_chunk_edges, root_node_id=root_node_id),
+                session.execute_read(self._read_symbol_nodes, root_node_id=root_node_id),
+                session.execute_read(self._read_symbol_edges, root_node_id=root_node_id),
+                session.execute_read(self._read_selective_ast, root_node_id=root_node_id),
             )
 
     def knowledge_graph_exists(self, root_node_id: int) -> bool:
@@ -420,11 +703,41 @@ class KnowledgeGraphHandler:
         Returns:
             bool: True if the root node exists, False otherwise.
         """
-        query = "MATCH (n {node_id: $root_node_id}) RETURN count(n) > 0 AS exists"
+        query = "MATCH (n:FileNode {node_id: $root_node_id}) RETURN count(n) > 0 AS exists"
         with self.driver.session() as session:
             result = session.run(query, root_node_id=root_node_id)
             return result.single()["exists"]
 
+    def set_knowledge_graph_version(self, root_node_id: int, version: str):
+        """Stores the version of a knowledge graph on its root node.
+
+        The version identifies the content of the graph, for the snapshots of the graph that
+        are stored outside of Neo4j.
+
+        Args:
+            root_node_id (int): The node id of the root node.
+            version (str): The version of the knowledge graph.
+        """
+        query = "MATCH (root:FileNode {node_id: $root_node_id}) SET root.version = $version"
+        with self.driver.session() as session:
+            session.run(query, root_node_id=root_node_id, version=version)
+
+    def get_knowledge_graph_version(self, root_node_id: int) -> Optional[str]:
+        """
+        Get the version stored with set_knowledge_graph_version.
+
+        Args:
+            root_node_id (int): The node id of the root node.
+
+        Returns:
+            Optional[str]: The version, or None if the knowledge graph does not exist or has no
+            version, like the ones built before versions were stored.
+        """
+        query = "MATCH (root:FileNode {node_id: $root_node_id}) RETURN root.version AS version"
+        with self.driver.session() as session:
+            record = session.run(query, root_node_id=root_node_id).single()
+            return record["version"] if record is not None else None
+
     def count_nodes(self, tx: ManagedTransaction) -> int:
         """
         Return the number of nodes in the Neo4j database.
@@ -447,50 +760,174 @@ class KnowledgeGraphHandler:
         return self.count_nodes(tx) == 0
 
     def clear_all_knowledge_graph(self):
-        """Clear all knowledge graphs from neo4j."""
+        """Clear all knowledge graphs from neo4j, in batches of batch_size nodes."""
         query = """
       MATCH (n)
-      DETACH DELETE n
+      CALL { WITH n DETACH DELETE n } IN TRANSACTIONS OF $batch_size ROWS
     """
-        self._logger.info("Deleting knowledge graph from neo4j")
+        self._logger.info("Deleting all knowledge graphs from neo4j")
         with self.driver.session() as session:
-            session.run(query)
+            session.run(query, batch_size=self.batch_size).consume()
+            if not session.execute_read(self.verify_empty):
+                self._logger.warning("The database is not empty after deleting all nodes")
+
+    def _read_next_node_id(self, tx: ManagedTransaction) -> Optional[int]:
+        """Read the next node id of the NodeIdCounter, or None if there is no counter yet."""
+        query = (
+            "MATCH (counter:NodeIdCounter {name: 'node_id'}) RETURN counter.next_node_id AS next"
+        )
+        record = tx.run(query).single()
+        return record["next"] if record is not None else None
+
+    def _read_max_node_id(self, tx: ManagedTransaction) -> int:
+        """Read the largest node id in the Neo4j database, or -1 if no nodes exist."""
+        query = """
+        MATCH (n)
+        WHERE n.node_id IS NOT NULL
+        RETURN coalesce(max(n.node_id), -1) AS max_node_id"""
+        return int(tx.run(query).single()["max_node_id"])
 
-            max_retries = 3
-            for attempt in range(max_retries):
-                if session.execute_read(self.verify_empty):
-                    break
+    def allocate_node_ids(self, n_nodes: int) -> int:
+        """
+        Allocate a block of node ids, for a new knowledge graph.
 
-                self._logger.warning(f"Database not empty after attempt {attempt + 1}, retrying...")
-                session.run(query)
+        The next free node id is kept on a NodeIdCounter node, and incremented atomically, so
+        that knowledge graphs built at the same time get blocks that do not overlap. The
+        counter starts after the largest node id of the database, that is only scanned for
+        the first allocation.
 
-    def get_new_knowledge_graph_root_node_id(self) -> int:
-        """
-        Estimate the next available node id in the Neo4j database.
+        Args:
+            n_nodes (int): The number of node ids to allocate.
 
         Returns:
-            int: The next available node id (max id + 1), or 0 if no nodes exist.
+            int: The first node id of the block.
         """
         query = """
-        MATCH (n)
-        WHERE n.node_id IS NOT NULL
-        RETURN coalesce(max(n.node_id), -1) AS max_node_id"""
+        MERGE (counter:NodeIdCounter {name: 'node_id'})
+        ON CREATE SET counter.next_node_id = $first_node_id
+        SET counter.next_node_id = counter.next_node_id + $n_nodes
+        RETURN counter.next_node_id - $n_nodes AS node_id
+        """
         with self.driver.session() as session:
-            rec = session.run(query).single()
-            max_node_id = rec["max_node_id"]
-            return int(max_node_id) + 1
+            first_node_id = None
+            if session.execute_read(self._read_next_node_id) is None:
+                first_node_id = session.execute_read(self._read_max_node_id) + 1
+            record = session.execute_write(
+                lambda tx: tx.run(query, first_node_id=first_node_id, n_nodes=n_nodes).single()
+            )
+            return record["node_id"]
+
+    def _read_owned_file_node_ids(self, tx: ManagedTransaction, root_node_id: int) -> List[int]:
+        """Read the node IDs of the FileNodes of a knowledge graph, the deepest first and the
+        root last."""
+        query = """
+        MATCH path = (root:FileNode {node_id: $root_node_id})-[:HAS_FILE*0..]->(file:FileNode)
+        RETURN file.node_id AS node_id
+        ORDER BY length(path) DESC
+        """
+        return [record["node_id"] for record in tx.run(query, root_node_id=root_node_id)]
 
-    def clear_knowledge_graph(self, root_node_id: int):
+    def _read_owned_content(
+        self, tx: ManagedTransaction, file_node_ids: Sequence[int]
+    ) -> Mapping[str, Sequence]:
         """
-        Delete the subgraph rooted at root_node_id, including all descendant nodes and their relationships.
+        Read the nodes of the content of files that no other file refers to, and the
+        SymbolNodes that they refer to.
 
         Args:
-            root_node_id (int): The node id of the root node.
+            tx (ManagedTransaction): An active Neo4j transaction.
+            file_node_ids (Sequence[int]): The node IDs of FileNodes of one knowledge graph.
+
+        Returns:
+            Mapping[str, Sequence]: The element IDs of the ASTNodes and TextNodes in
+                "element_ids", and the node IDs of the SymbolNodes in "symbol_node_ids".
         """
+        # A content is referred to by at most one file of each graph, it is not referred to
+        # by another graph if this file is its only reference
         query = """
-        MATCH (root {node_id: $root_node_id})
-        OPTIONAL MATCH (root)-[*]->(descendant)
-        DETACH DELETE root, descendant
+        UNWIND $file_node_ids AS file_node_id
+        MATCH (file:FileNode {node_id: file_node_id})-[:HAS_AST|HAS_TEXT]->(content)
+        WHERE COUNT { (:FileNode)-[:HAS_AST|HAS_TEXT]->(content) } = 1
+        MATCH (content)-[:PARENT_OF*0..]->(node)
+        OPTIONAL MATCH (node)-[:DEFINES|REFERENCES|IMPORTS]->(symbol:SymbolNode)
+        RETURN collect(DISTINCT elementId(node)) AS element_ids,
+               collect(DISTINCT symbol.node_id) AS symbol_node_ids
+        """
+        return tx.run(query, file_node_ids=file_node_ids).single().data()
+
+    def _delete_files(self, tx: ManagedTransaction, file_node_ids: Sequence[int]) -> int:
+        """
+        Delete FileNodes, with the content that no other file refers to, and the SymbolNodes
+        that no other node refers to anymore.
+
+        Args:
+            tx (ManagedTransaction): An active Neo4j transaction.
+            file_node_ids (Sequence[int]): The node IDs of FileNodes of one knowledge graph.
+
+        Returns:
+            int: The number of ASTNodes and TextNodes that were deleted.
+        """
+        content = self._read_owned_content(tx, file_node_ids)
+        delete_nodes_query = """
+        UNWIND $element_ids AS element_id
+        MATCH (n) WHERE elementId(n) = element_id
+        DETACH DELETE n
+        """
+        delete_file_nodes_query = """
+        UNWIND $file_node_ids AS file_node_id
+        MATCH (file:FileNode {node_id: file_node_id})
+        DETACH DELETE file
+        """
+        delete_symbol_nodes_query = """
+        UNWIND $symbol_node_ids AS symbol_node_id
+        MATCH (symbol:SymbolNode {node_id: symbol_node_id})
+        WHERE NOT EXISTS { ()-->(symbol) }
+        DELETE symbol
+        """
+        tx.run(delete_nodes_query, element_ids=content["element_ids"]).consume()
+        tx.run(delete_file_nodes_query, file_node_ids=file_node_ids).consume()
+        tx.run(delete_symbol_nodes_query, symbol_node_ids=content["symbol_node_ids"]).consume()
+        return len(content["element_ids"])
+
+    def clear_knowledge_graph(
+        self, root_node_id: int, progress_callback: Optional[Callable[[int, int], None]] = None
+    ):
+        """
+        Delete the knowledge graph rooted at root_node_id, a few files at a time.
+
+        The nodes of the graph are found from its FileNodes, instead of expanding all the paths
+        from the root at once. The content of a file and the SymbolNodes are shared with the
+        other knowledge graphs, see write_knowledge_graph, they are only deleted when no other
+        file or ASTNode refers to them anymore.
+
+        Each batch of files is deleted in a transaction of its own, the deepest files first,
+        so that the files that are left after an interruption are still reachable from the
+        root, with their content and the SymbolNodes it refers to, and the deletion can be run
+        again. Knowledge graphs are only kept from being written during each batch.
+
+        Args:
+            root_node_id (int): The node id of the root node.
+            progress_callback: Called with the number of deleted files and the number of
+                files of the graph after each batch.
         """
         with self.driver.session() as session:
-            session.run(query, root_node_id=root_node_id)
+            file_node_ids = session.execute_read(self._read_owned_file_node_ids, root_node_id)
+            self._logger.info(
+                f"Deleting knowledge graph {root_node_id} with {len(file_node_ids)} files"
+            )
+            n_nodes = 0
+            # A file has up to a few hundred nodes, a batch has about batch_size nodes
+            n_files = max(1, self.batch_size // 100)
+            for i in range(0, len(file_node_ids), n_files):
+                with self._writing_lock:
+                    n_nodes += session.execute_write(
+                        self._delete_files, file_node_ids[i : i + n_files]
+                    )
+                n_deleted_files = min(i + n_files, len(file_node_ids))
+                self._logger.info(
+                    f"Deleted {n_deleted_files} of {len(file_node_ids)} files of knowledge graph "
+                    f"{root_node_id}, {n_nodes} nodes"
+                )
+                if progress_callback is not None:
+                    progress_callback(n_deleted_files, len(file_node_ids))
+        self._logger.info(f"Deleted knowledge graph {root_node_id}")
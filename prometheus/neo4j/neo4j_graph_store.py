@@ -0,0 +1,205 @@
+"""The queries of the graph traversal tools on the knowledge graphs in Neo4j."""
+
+from typing import Any, Dict, List, Optional, Sequence
+
+from neo4j import Driver, ManagedTransaction
+
+from prometheus.graph.graph_types import KnowledgeGraphEdgeType
+
+
+class Neo4jGraphStore:
+    """The GraphStore of the knowledge graphs written to Neo4j by KnowledgeGraphHandler."""
+
+    def __init__(self, driver: Driver):
+        """
+        Args:
+          driver: The neo4j driver.
+        """
+        self.driver = driver
+
+    def find_file_nodes(
+        self,
+        root_node_id: int,
+        basename: Optional[str] = None,
+        relative_path: Optional[str] = None,
+        limit: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        """Finds the files and directories with a basename or relative path, by node ID."""
+        query = f"""\
+        MATCH (root:FileNode {{ node_id: $root_node_id }}) -[:HAS_FILE*]-> (f:FileNode)
+        WHERE ($basename IS NULL OR f.basename = $basename)
+          AND ($relative_path IS NULL OR f.relative_path = $relative_path)
+        RETURN f AS FileNode
+        ORDER BY f.node_id
+        {_limit(limit)}
+        """
+        return self._run(
+            query, root_node_id=root_node_id, basename=basename, relative_path=relative_path
+        )
+
+    def find_ast_nodes(
+        self,
+        root_node_id: int,
+        basename: Optional[str] = None,
+        relative_path: Optional[str] = None,
+        text: Optional[str] = None,
+        type: Optional[str] = None,
+        limit: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        """Finds the ASTNodes that contain a text or have a type in the files with a basename
+        or relative path, the shortest first. The root ASTNodes of the files are excluded."""
+        query = f"""\
+        MATCH (root:FileNode {{ node_id: $root_node_id }}) -[:HAS_FILE*]-> (f:FileNode)
+              -[:HAS_AST]-> (:ASTNode) -[:PARENT_OF*]-> (a:ASTNode)
+        WHERE ($basename IS NULL OR f.basename = $basename)
+          AND ($relative_path IS NULL OR f.relative_path = $relative_path)
+          AND ($text IS NULL OR a.text CONTAINS $text)
+          AND ($type IS NULL OR a.type = $type)
+        RETURN f AS FileNode, a AS ASTNode
+        ORDER BY SIZE(a.text)
+        {_limit(limit)}
+        """
+        return self._run(
+            query,
+            root_node_id=root_node_id,
+            basename=basename,
+            relative_path=relative_path,
+            text=text,
+            type=type,
+        )
+
+    def find_symbol_occurrences(
+        self,
+        root_node_id: int,
+        name: str,
+        edge_types: Sequence[KnowledgeGraphEdgeType],
+        with_reference_type: bool = False,
+        limit: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        """Finds the ASTNodes that define, reference or import a name, by file and line.
+
+        Args:
+          root_node_id: The root node ID of the knowledge graph.
+          name: The symbol name.
+          edge_types: The types of the occurrences, DEFINES, REFERENCES or IMPORTS.
+          with_reference_type: Whether the rows have the type of the occurrence, in their
+            "reference_type" key.
+          limit: The maximum number of rows.
+        """
+        reference_type = ", type(r) AS reference_type" if with_reference_type else ""
+        query = f"""\
+        MATCH (s:SymbolNode {{ name: $name }}) <-[r:DEFINES|REFERENCES|IMPORTS]- (a:ASTNode)
+              <-[:PARENT_OF*0..]- (:ASTNode) <-[:HAS_AST]- (f:FileNode)
+              <-[:HAS_FILE*]- (root:FileNode {{ node_id: $root_node_id }})
+        WHERE type(r) IN $edge_types
+        RETURN f AS FileNode, a AS ASTNode{reference_type}
+        ORDER BY f.relative_path, a.start_line
+        {_limit(limit)}
+        """
+        return self._run(
+            query,
+            root_node_id=root_node_id,
+            name=name,
+            edge_types=[edge_type.value for edge_type in edge_types],
+        )
+
+    def find_text_nodes(
+        self,
+        root_node_id: int,
+        text: str,
+        basename: Optional[str] = None,
+        limit: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        """Finds the TextNodes that contain a text, in the files with a basename, by node ID."""
+        query = f"""\
+        MATCH (root:FileNode {{ node_id: $root_node_id }}) -[:HAS_FILE*]-> (f:FileNode)
+              -[:HAS_TEXT]-> (t:TextNode)
+        WHERE ($basename IS NULL OR f.basename = $basename) AND t.text CONTAINS $text
+        RETURN f AS FileNode, t AS TextNode
+        ORDER BY t.node_id
+        {_limit(limit)}
+        """
+        return self._run(query, root_node_id=root_node_id, text=text, basename=basename)
+
+    def get_next_text_nodes(self, root_node_id: int, node_id: int) -> List[Dict[str, Any]]:
+        """Returns the next chunk of a TextNode."""
+        query = """\
+        MATCH (root:FileNode { node_id: $root_node_id }) -[:HAS_FILE*]-> (f:FileNode)
+              -[:HAS_TEXT]-> (:TextNode { node_id: $node_id }) -[:NEXT_CHUNK]-> (t:TextNode)
+        RETURN f AS FileNode, t AS TextNode
+        """
+        return self._run(query, root_node_id=root_node_id, node_id=node_id)
+
+    def get_ast_root_nodes(
+        self,
+        root_node_id: int,
+        basename: Optional[str] = None,
+        relative_path: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        """Returns the root ASTNode, with the whole source code, of the files with a basename
+        or relative path, by node ID of the file."""
+        query = """\
+        MATCH (root:FileNode { node_id: $root_node_id }) -[:HAS_FILE*]-> (f:FileNode)
+              -[:HAS_AST]-> (a:ASTNode)
+        WHERE ($basename IS NULL OR f.basename = $basename)
+          AND ($relative_path IS NULL OR f.relative_path = $relative_path)
+        RETURN f AS FileNode, a AS ASTNode
+        ORDER BY f.node_id
+        """
+        return self._run(
+            query, root_node_id=root_node_id, basename=basename, relative_path=relative_path
+        )
+
+    def get_first_text_nodes(
+        self,
+        root_node_id: int,
+        basename: Optional[str] = None,
+        relative_path: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        """Returns the first chunks of the files with a basename or relative path, by node ID
+        of the file."""
+        query = """\
+        MATCH (root:FileNode { node_id: $root_node_id }) -[:HAS_FILE*]-> (f:FileNode)
+              -[:HAS_TEXT]-> (t:TextNode)
+        WHERE ($basename IS NULL OR f.basename = $basename)
+          AND ($relative_path IS NULL OR f.relative_path = $relative_path)
+          AND NOT EXISTS { (:TextNode) -[:NEXT_CHUNK]-> (t) }
+        RETURN f AS FileNode, t AS TextNode
+        ORDER BY f.node_id, t.node_id
+        """
+        return self._run(
+            query, root_node_id=root_node_id, basename=basename, relative_path=relative_path
+        )
+
+    def get_text_nodes(
+        self,
+        root_node_id: int,
+        basename: Optional[str] = None,
+        relative_path: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        """Returns all the chunks of the files with a basename or relative path, by node ID of
+        the file and of the chunk."""
+        query = """\
+        MATCH (root:FileNode { node_id: $root_node_id }) -[:HAS_FILE*]-> (f:FileNode)
+              -[:HAS_TEXT]-> (t:TextNode)
+        WHERE ($basename IS NULL OR f.basename = $basename)
+          AND ($relative_path IS NULL OR f.relative_path = $relative_path)
+        RETURN f AS FileNode, t AS TextNode
+        ORDER BY f.node_id, t.node_id
+        """
+        return self._run(
+            query, root_node_id=root_node_id, basename=basename, relative_path=relative_path
+        )
+
+    def _run(self, query: str, **parameters) -> List[Dict[str, Any]]:
+        """Runs a read-only query and returns its rows."""
+
+        def query_transaction(tx: ManagedTransaction) -> List[Dict[str, Any]]:
+            return tx.run(query, **parameters).data()
+
+        with self.driver.session() as session:
+            return session.execute_read(query_transaction)
+
+
+def _limit(limit: Optional[int]) -> str:
+    return "" if limit is None else f"LIMIT {int(limit)}"
@@ -0,0 +1,149 @@
+"""Decoding of source files whatever their encoding.
+
+Tree-sitter parses bytes and reports byte offsets, and the text of its nodes has to be
+decoded. A file that is not valid UTF-8, like a latin-1 comment in a Java file, used to be
+dropped from the knowledge graph. Here, a file is decoded once:
+
+* a BOM gives the encoding directly;
+* otherwise the file is decoded as UTF-8, which is the case of almost all files;
+* if that fails, a sample of the file tells whether it is UTF-8 with a few invalid bytes,
+  which are replaced, or text in a legacy 8-bit encoding, decoded as cp1252.
+
+The parsed buffer is always the UTF-8 encoding of the decoded text, the file itself when
+it is valid UTF-8, so that the offsets of the tree-sitter nodes map to the decoded text.
+For ASCII files, the offsets in bytes are also the offsets in characters, and the text of
+a node is a slice of the decoded text, without decoding anything.
+"""
+
+import codecs
+import mmap
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, Optional, Tuple, Union
+
+# The number of bytes at the start of a file used to guess its encoding
+SAMPLE_SIZE = 65536
+# The size from which a file is mapped into memory instead of being read. It is well below
+# the size of the files that are only indexed shallowly, see file_classifier.MAX_FILE_SIZE,
+# so that the largest files that are parsed are mapped. FileGraphBuilder lowers it for a
+# lower maximum file size.
+MMAP_THRESHOLD = 256 * 1024
+# The encoding of the files that are neither UTF-8 nor have a BOM
+FALLBACK_ENCODING = "cp1252"
+
+# Longest first, UTF-32 LE starts with the UTF-16 LE BOM
+_BOMS = [
+    (codecs.BOM_UTF32_LE, "utf-32-le"),
+    (codecs.BOM_UTF32_BE, "utf-32-be"),
+    (codecs.BOM_UTF8, "utf-8"),
+    (codecs.BOM_UTF16_LE, "utf-16-le"),
+    (codecs.BOM_UTF16_BE, "utf-16-be"),
+]
+
+
+class DecodedSource:
+    """The content of a file, both as the UTF-8 bytes to parse and as decoded text.
+
+    Attributes:
+      data: The UTF-8 bytes of the text, to parse with tree-sitter.
+      text: The decoded text.
+      encoding: The encoding detected for the file.
+    """
+
+    def __init__(self, data: Union[bytes, mmap.mmap], text: str, encoding: str):
+        self.data = data
+        self.text = text
+        self.encoding = encoding
+        self._is_ascii = len(text) == len(data)
+
+    def get_text(self, start_byte: int, end_byte: int) -> str:
+        """Returns the text between two byte offsets of data, like the ones of a tree-sitter node."""
+        if self._is_ascii:
+            return self.text[start_byte:end_byte]
+        return self.data[start_byte:end_byte].decode("utf-8")
+
+
+def detect_encoding(sample: bytes) -> Tuple[str, int]:
+    """Guesses the encoding of a file from its first bytes.
+
+    Args:
+      sample: The first bytes of the file.
+
+    Returns:
+      A tuple of (encoding, bom_length), where bom_length is the number of bytes of the BOM
+      at the start of the file, if any.
+    """
+    for bom, encoding in _BOMS:
+        if sample.startswith(bom):
+            return encoding, len(bom)
+    if _is_mostly_utf8(sample):
+        return "utf-8", 0
+    return FALLBACK_ENCODING, 0
+
+
+def decode_source(data: Union[bytes, mmap.mmap]) -> DecodedSource:
+    """Decodes the content of a file.
+
+    Args:
+      data: The content of the file.
+
+    Returns:
+      The decoded source, with the file content itself as data if it is valid UTF-8 without
+      a BOM.
+    """
+    if not any(data[: len(bom)] == bom for bom, _ in _BOMS):
+        try:
+            return DecodedSource(data, str(data, "utf-8"), "utf-8")
+        except UnicodeDecodeError:
+            pass
+    encoding, bom_length = detect_encoding(data[:SAMPLE_SIZE])
+    text = str(memoryview(data)[bom_length:], encoding, errors="replace")
+    return DecodedSource(text.encode("utf-8"), text, encoding)
+
+
+def read_source(file: Path) -> DecodedSource:
+    """Reads and decodes a file, see decode_source."""
+    return decode_source(file.read_bytes())
+
+
+@contextmanager
+def open_source(file: Path, mmap_threshold: Optional[int] = None) -> Iterator[DecodedSource]:
+    """Reads and decodes a file, mapping it into memory if it is large, see decode_source.
+
+    A large file is parsed without being copied, but the map, and the tree-sitter trees
+    parsed from it, can only be used until the end of the with block, where it is unmapped.
+    Small files are read into bytes, like with read_source.
+
+    Args:
+      file: The file to read.
+      mmap_threshold: The size from which the file is mapped, MMAP_THRESHOLD by default.
+    """
+    if mmap_threshold is None:
+        mmap_threshold = MMAP_THRESHOLD
+    with file.open("rb") as f:
+        # Empty files cannot be mapped
+        if f.seek(0, 2) < max(mmap_threshold, 1):
+            f.seek(0)
+            data = f.read()
+        else:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    try:
+        yield decode_source(data)
+    finally:
+        if isinstance(data, mmap.mmap):
+            data.close()
+
+
+def _is_mostly_utf8(sample: bytes) -> bool:
+    """Whether the non-ASCII bytes of a sample are mostly valid UTF-8 sequences.
+
+    In a legacy 8-bit encoding, almost every non-ASCII byte is invalid in UTF-8, while a
+    UTF-8 file with a few invalid bytes has many more non-ASCII bytes than invalid ones.
+    """
+    n_non_ascii_bytes = len(sample) - len(sample.decode("ascii", errors="ignore"))
+    if n_non_ascii_bytes == 0:
+        return True
+    # The last character of the sample may be cut in the middle, it is not decoded
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    n_invalid_bytes = decoder.decode(sample, final=False).count("\ufffd")
+    return n_invalid_bytes * 2 < n_non_ascii_bytes
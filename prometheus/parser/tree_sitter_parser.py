@@ -5,16 +5,26 @@ This module provides functionality to parse source code files using tree-sitter,
 supporting multiple programming languages. It handles file type detection and
 parsing operations, returning a syntax tree representation of the source code.
 
-The module uses tree-sitter parsers from the tree_sitter_languages package
+The module uses tree-sitter grammars from the tree_sitter_languages package
 and supports various common programming languages including Python, Java,
-JavaScript, C++, Rust, Ruby, TypeScript and others.
+JavaScript, C++, Rust, Ruby, TypeScript and others. A grammar is only loaded
+the first time a file of its language is parsed, and every thread reuses one
+parser per language.
 """
 
+import dataclasses
+import functools
+import mmap
+import threading
+import time
+from collections import defaultdict
 from pathlib import Path
+from typing import Dict, Mapping, Optional, Union
 
-from tree_sitter._binding import Tree
-from tree_sitter_languages import get_parser
+import tree_sitter_languages
+from tree_sitter import Language, Parser, Tree
 
+from prometheus.parser import decoded_source
 from prometheus.parser.file_types import FileType
 
 
@@ -62,11 +72,103 @@ def supports_file(file: Path) -> bool:
     return file_type in FILE_TYPE_TO_LANG
 
 
-def parse(file: Path) -> Tree:
+@dataclasses.dataclass
+class LanguageParseStats:
+    """The files of a language parsed by the parser and the time spent parsing them.
+
+    Attributes:
+      files: The number of parsed files.
+      bytes: The total size of the parsed files.
+      seconds: The total time spent in the tree-sitter parser, without reading the files.
+    """
+
+    files: int = 0
+    bytes: int = 0
+    seconds: float = 0.0
+
+    @property
+    def files_per_second(self) -> float:
+        return self.files / self.seconds if self.seconds else 0.0
+
+    @property
+    def megabytes_per_second(self) -> float:
+        return self.bytes / 1e6 / self.seconds if self.seconds else 0.0
+
+
+class ParseStats:
+    """Collects the parse throughput per language, to find the grammars that dominate a build.
+
+    It can be shared by threads.
+    """
+
+    def __init__(self):
+        self._stats: Dict[str, LanguageParseStats] = defaultdict(LanguageParseStats)
+        self._lock = threading.Lock()
+
+    def add(self, lang: str, n_bytes: int, seconds: float):
+        with self._lock:
+            stats = self._stats[lang]
+            stats.files += 1
+            stats.bytes += n_bytes
+            stats.seconds += seconds
+
+    def get(self) -> Mapping[str, LanguageParseStats]:
+        """Returns a copy of the stats, by language."""
+        with self._lock:
+            return {lang: dataclasses.replace(stats) for lang, stats in self._stats.items()}
+
+    def format(self) -> str:
+        """Formats the stats as one line per language, the slowest languages first."""
+        stats_by_lang = sorted(self.get().items(), key=lambda item: item[1].seconds, reverse=True)
+        return "\n".join(
+            f"{lang}: {stats.files} files, {stats.bytes / 1e6:.2f} MB in {stats.seconds:.2f}s "
+            f"({stats.files_per_second:.1f} files/s, {stats.megabytes_per_second:.2f} MB/s)"
+            for lang, stats in stats_by_lang
+        )
+
+
+@functools.cache
+def get_language(lang: str) -> Language:
+    """Loads the tree-sitter grammar of a language, once per process.
+
+    Args:
+      lang: The tree_sitter_languages name of the language, like "python".
+    """
+    return tree_sitter_languages.get_language(lang)
+
+
+# Parsers are not thread-safe, every thread gets its own parser per language
+_parsers = threading.local()
+
+
+def _get_lang(file: Path) -> str:
+    file_type = FileType.from_path(file)
+    lang = FILE_TYPE_TO_LANG.get(file_type, None)
+    if lang is None:
+        raise FileNotSupportedError(f"{file_type.value} is not supported by tree_sitter_parser")
+    return lang
+
+
+def _get_parser(lang: str) -> Parser:
+    if not hasattr(_parsers, "by_lang"):
+        _parsers.by_lang = {}
+    parser = _parsers.by_lang.get(lang)
+    if parser is None:
+        parser = Parser()
+        parser.set_language(get_language(lang))
+        _parsers.by_lang[lang] = parser
+    return parser
+
+
+def parse(file: Path, stats: Optional[ParseStats] = None) -> Tree:
     """Parses a source code file using the appropriate tree-sitter parser.
 
+    The file is decoded first, see decoded_source, and the UTF-8 encoding of its text is
+    parsed.
+
     Args:
       file: A Path object representing the file to parse.
+      stats: If given, the size of the file and the parse time are added to it.
 
     Returns:
       Tree: A tree-sitter Tree object representing the parsed syntax tree.
@@ -74,11 +176,47 @@ def parse(file: Path) -> Tree:
     Raises:
       FileNotSupportedError: If the parser does not support the file type.
     """
-    file_type = FileType.from_path(file)
-    lang = FILE_TYPE_TO_LANG.get(file_type, None)
-    if lang is None:
-        raise FileNotSupportedError(f"{file_type.value} is not supported by tree_sitter_parser")
+    lang = _get_lang(file)
+    return _parse(lang, decoded_source.read_source(file).data, None, stats)
+
+
+def parse_source(
+    file: Path,
+    source: bytes,
+    old_tree: Optional[Tree] = None,
+    stats: Optional[ParseStats] = None,
+) -> Tree:
+    """Parses the source code of a file using the appropriate tree-sitter parser.
 
-    lang_parser = get_parser(lang)
-    with file.open("rb") as f:
-        return lang_parser.parse(f.read())
+    Args:
+      file: A Path object representing the file, only used for its file type.
+      source: The content of the file, in UTF-8, like the data of a DecodedSource.
+      old_tree: A previous tree of the file, already updated with Tree.edit for the changes
+        between its source and this source. The unchanged parts of the tree are reused,
+        which makes re-parsing a file after a small edit much faster.
+      stats: If given, the size of the source and the parse time are added to it.
+
+    Returns:
+      Tree: A tree-sitter Tree object representing the parsed syntax tree.
+
+    Raises:
+      FileNotSupportedError: If the parser does not support the file type.
+    """
+    return _parse(_get_lang(file), source, old_tree, stats)
+
+
+def _parse(
+    lang: str,
+    source: Union[bytes, mmap.mmap],
+    old_tree: Optional[Tree],
+    stats: Optional[ParseStats],
+) -> Tree:
+    lang_parser = _get_parser(lang)
+    start_time = time.perf_counter()
+    if old_tree is None:
+        tree = lang_parser.parse(source)
+    else:
+        tree = lang_parser.parse(source, old_tree)
+    if stats is not None:
+        stats.add(lang, len(source), time.perf_counter() - start_time)
+    return tree
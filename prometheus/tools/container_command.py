@@ -1,17 +1,46 @@
 from pydantic import BaseModel, Field
 
 from prometheus.docker.base_container import BaseContainer
+from prometheus.utils.issue_util import format_test_commands
 
 
 class RunCommandInput(BaseModel):
     command: str = Field("The shell command to be run in the container")
 
 
+# Only the head and the tail of long outputs are returned, so that huge logs are never held
+# in memory or passed on to the LLM.
+MAX_OUTPUT_BYTES = 32 * 1024
+
 RUN_COMMAND_DESCRIPTION = """\
 Run a shell command in the container and return the result of the command. You are always at the root
-of the codebase.
+of the codebase. If the output is very long, only its beginning and end are returned.
 """
 
 
 def run_command(command: str, container: BaseContainer) -> str:
-    return container.execute_command(command)
+    return container.execute_command(command, max_output_bytes=MAX_OUTPUT_BYTES)
+
+
+def format_known_good_commands(container: BaseContainer) -> str:
+    """Describes the commands that already worked in the cached environment of the container.
+
+    Returns:
+      A message for the agent, or an empty string if the container was not started from a
+      cached environment.
+    """
+    message = ""
+    if container.cached_setup_commands:
+        message += (
+            "This environment was restored from a cache. These setup commands already succeeded "
+            "in it, so the dependencies they install are present and do not need to be "
+            f"installed again:\n{format_test_commands(container.cached_setup_commands)}"
+        )
+    if container.cached_test_commands:
+        if message:
+            message += "\n\n"
+        message += (
+            "These test commands worked in this environment before:\n"
+            f"{format_test_commands(container.cached_test_commands)}"
+        )
+    return message
@@ -1,19 +1,19 @@
-from pathlib import Path
+from collections import defaultdict
 from typing import Any, Mapping, Sequence, Union
 
-from neo4j import GraphDatabase
 from pydantic import BaseModel, Field
 
-from prometheus.parser import tree_sitter_parser
+from prometheus.graph.graph_store import GraphStore
+from prometheus.graph.graph_types import KnowledgeGraphEdgeType
 from prometheus.utils import neo4j_util
 from prometheus.utils.neo4j_util import EMPTY_DATA_MESSAGE
-from prometheus.utils.str_util import pre_append_line_numbers
+from prometheus.utils.str_util import join_chunks, pre_append_line_numbers, split_lines
 
 MAX_RESULT = 30
 
 
 """
-Tools for retrieving nodes from the Neo4j graph database.
+Tools for retrieving nodes from a GraphStore, the Neo4j graph database or an EmbeddedGraphStore.
 These tools allow you to search for FileNode, ASTNode, and TextNode based on various attributes
 like basename, relative path, text content, and node type.
 
@@ -41,16 +41,10 @@ attributes related to the file/dir."""
 
 
 def find_file_node_with_basename(
-    basename: str, driver: GraphDatabase.driver, max_token_per_result: int, root_node_id: int
+    basename: str, graph_store: GraphStore, max_token_per_result: int, root_node_id: int
 ) -> tuple[str, Sequence[Mapping[str, Any]]]:
-    query = f"""
-    MATCH (root:FileNode)-[:HAS_FILE*]->(f:FileNode {{ basename: '{basename}' }})
-    WHERE root.node_id = {root_node_id}
-    RETURN f AS FileNode
-    ORDER BY f.node_id
-    LIMIT {MAX_RESULT}
-    """
-    return neo4j_util.run_neo4j_query(query, driver, max_token_per_result)
+    data = graph_store.find_file_nodes(root_node_id, basename=basename, limit=MAX_RESULT)
+    return neo4j_util.format_neo4j_data(data, max_token_per_result), data
 
 
 class FindFileNodeWithRelativePathInput(BaseModel):
@@ -67,21 +61,10 @@ attributes related to the file/dir."""
 
 
 def find_file_node_with_relative_path(
-    relative_path: str, driver: GraphDatabase.driver, max_token_per_result: int, root_node_id: int
+    relative_path: str, graph_store: GraphStore, max_token_per_result: int, root_node_id: int
 ) -> tuple[str, Sequence[Mapping[str, Any]]]:
-    query = f"""\
-    MATCH (root:FileNode)-[:HAS_FILE*]->(f:FileNode {{ relative_path: '{relative_path}' }})
-    WHERE root.node_id = {root_node_id}
-    RETURN f AS FileNode
-    ORDER BY f.node_id
-    LIMIT {MAX_RESULT}
-  """
-    return neo4j_util.run_neo4j_query(query, driver, max_token_per_result)
-
-
-###############################################################################
-#                          ASTNode retrieval                                  #
-###############################################################################
+    data = graph_store.find_file_nodes(root_node_id, relative_path=relative_path, limit=MAX_RESULT)
+    return neo4j_util.format_neo4j_data(data, max_token_per_result), data
 
 
 class FindASTNodeWithTextInFileWithBasenameInput(BaseModel):
@@ -101,18 +84,12 @@ use unique text segments of at least several words. The basename can be either a
 def find_ast_node_with_text_in_file_with_basename(
     text: str,
     basename: str,
-    driver: GraphDatabase.driver,
+    graph_store: GraphStore,
     max_token_per_result: int,
     root_node_id: int,
 ) -> tuple[str, Sequence[Mapping[str, Any]]]:
-    query = f"""\
-    MATCH (root:FileNode)-[:HAS_FILE*]->(f:FileNode) -[:HAS_AST]-> (:ASTNode) -[:PARENT_OF*]-> (a:ASTNode)
-    WHERE root.node_id = {root_node_id} AND f.basename = '{basename}' AND a.text CONTAINS '{text}'
-    RETURN f AS FileNode, a AS ASTNode
-    ORDER BY SIZE(a.text)
-    LIMIT {MAX_RESULT}
-    """
-    return neo4j_util.run_neo4j_query(query, driver, max_token_per_result)
+    data = graph_store.find_ast_nodes(root_node_id, basename=basename, text=text, limit=MAX_RESULT)
+    return neo4j_util.format_neo4j_data(data, max_token_per_result), data
 
 
 class FindASTNodeWithTextInFileWithRelativePathInput(BaseModel):
@@ -132,18 +109,14 @@ be exact as well. The relative path should be the path from the root of codebase
 def find_ast_node_with_text_in_file_with_relative_path(
     text: str,
     relative_path: str,
-    driver: GraphDatabase.driver,
+    graph_store: GraphStore,
     max_token_per_result: int,
     root_node_id: int,
 ) -> tuple[str, Sequence[Mapping[str, Any]]]:
-    query = f"""\
-    MATCH (root:FileNode)-[:HAS_FILE*]->(f:FileNode) -[:HAS_AST]-> (:ASTNode) -[:PARENT_OF*]-> (a:ASTNode)
-    WHERE root.node_id = {root_node_id} AND f.relative_path = '{relative_path}' AND a.text CONTAINS '{text}'
-    RETURN f AS FileNode, a AS ASTNode
-    ORDER BY SIZE(a.text)
-    LIMIT {MAX_RESULT}
-    """
-    return neo4j_util.run_neo4j_query(query, driver, max_token_per_result)
+    data = graph_store.find_ast_nodes(
+        root_node_id, relative_path=relative_path, text=text, limit=MAX_RESULT
+    )
+    return neo4j_util.format_neo4j_data(data, max_token_per_result), data
 
 
 class FindASTNodeWithTypeInFileWithBasenameInput(BaseModel):
@@ -161,18 +134,12 @@ under a file/directory. The basename can be either a file (like 'bar.py',
 def find_ast_node_with_type_in_file_with_basename(
     type: str,
     basename: str,
-    driver: GraphDatabase.driver,
+    graph_store: GraphStore,
     max_token_per_result: int,
     root_node_id: int,
 ) -> tuple[str, Sequence[Mapping[str, Any]]]:
-    query = f"""\
-    MATCH (root:FileNode)-[:HAS_FILE*]->(f:FileNode) -[:HAS_AST]-> (:ASTNode) -[:PARENT_OF*]-> (a:ASTNode)
-    WHERE root.node_id = {root_node_id} AND f.basename = '{basename}' AND a.type = '{type}'
-    RETURN f AS FileNode, a AS ASTNode
-    ORDER BY SIZE(a.text)
-    LIMIT {MAX_RESULT}
-    """
-    return neo4j_util.run_neo4j_query(query, driver, max_token_per_result)
+    data = graph_store.find_ast_nodes(root_node_id, basename=basename, type=type, limit=MAX_RESULT)
+    return neo4j_util.format_neo4j_data(data, max_token_per_result), data
 
 
 class FindASTNodeWithTypeInFileWithRelativePathInput(BaseModel):
@@ -190,23 +157,59 @@ of codebase (like 'src/core/parser.py' or 'test/unit')."""
 def find_ast_node_with_type_in_file_with_relative_path(
     type: str,
     relative_path: str,
-    driver: GraphDatabase.driver,
+    graph_store: GraphStore,
     max_token_per_result: int,
     root_node_id: int,
 ) -> tuple[str, Sequence[Mapping[str, Any]]]:
-    query = f"""\
-        MATCH (root:FileNode)-[:HAS_FILE*]->(f:FileNode) -[:HAS_AST]-> (:ASTNode) -[:PARENT_OF*]-> (a:ASTNode)
-        WHERE root.node_id = {root_node_id} AND f.relative_path = '{relative_path}' AND a.type = '{type}'
-        RETURN f AS FileNode, a AS ASTNode
-        ORDER BY SIZE(a.text)
-        LIMIT {MAX_RESULT}
-        """
-    return neo4j_util.run_neo4j_query(query, driver, max_token_per_result)
+    data = graph_store.find_ast_nodes(
+        root_node_id, relative_path=relative_path, type=type, limit=MAX_RESULT
+    )
+    return neo4j_util.format_neo4j_data(data, max_token_per_result), data
 
 
-###############################################################################
-#                          TextNode retrieval                                 #
-###############################################################################
+class FindDefinitionInput(BaseModel):
+    name: str = Field("The name of the function/class/method/type to find the definition of.")
+
+
+FIND_DEFINITION_DESCRIPTION = """\
+Find the ASTNode of the definitions of a function, class, method or type with this exact
+name, like 'parse' or 'FileNode' (not 'parser.parse' or 'FileNode()'). The name is case
+sensitive. This is the fastest way to go from a name seen in code, a traceback or an issue
+to its implementation, instead of searching for text like 'def parse'."""
+
+
+def find_definition(
+    name: str, graph_store: GraphStore, max_token_per_result: int, root_node_id: int
+) -> tuple[str, Sequence[Mapping[str, Any]]]:
+    data = graph_store.find_symbol_occurrences(
+        root_node_id, name, [KnowledgeGraphEdgeType.defines], limit=MAX_RESULT
+    )
+    return neo4j_util.format_neo4j_data(data, max_token_per_result), data
+
+
+class FindReferencesInput(BaseModel):
+    name: str = Field("The name of the function/class/method/type to find the usages of.")
+
+
+FIND_REFERENCES_DESCRIPTION = """\
+Find the ASTNode that use or import a function, class, method or type with this exact
+name, like 'parse' or 'FileNode'. A usage is reported as the function/class that contains
+it, with reference_type REFERENCES, and an import as the import statement, with
+reference_type IMPORTS. The name is case sensitive. Use it to find the callers of a
+function or the code that is affected by a change."""
+
+
+def find_references(
+    name: str, graph_store: GraphStore, max_token_per_result: int, root_node_id: int
+) -> tuple[str, Sequence[Mapping[str, Any]]]:
+    data = graph_store.find_symbol_occurrences(
+        root_node_id,
+        name,
+        [KnowledgeGraphEdgeType.references, KnowledgeGraphEdgeType.imports],
+        with_reference_type=True,
+        limit=MAX_RESULT,
+    )
+    return neo4j_util.format_neo4j_data(data, max_token_per_result), data
 
 
 class FindTextNodeWithTextInput(BaseModel):
@@ -222,16 +225,10 @@ You can use this tool to find all text/documentation in codebase that contains t
 
 
 def find_text_node_with_text(
-    text: str, driver: GraphDatabase.driver, max_token_per_result: int, root_node_id: int
+    text: str, graph_store: GraphStore, max_token_per_result: int, root_node_id: int
 ) -> tuple[str, Sequence[Mapping[str, Any]]]:
-    query = f"""\
-    MATCH (root:FileNode)-[:HAS_FILE*]->(f:FileNode) -[:HAS_TEXT]-> (t:TextNode)
-    WHERE root.node_id = {root_node_id} AND t.text CONTAINS '{text}'
-    RETURN f AS FileNode, t AS TextNode
-    ORDER BY t.node_id
-    LIMIT {MAX_RESULT}
-    """
-    return neo4j_util.run_neo4j_query(query, driver, max_token_per_result)
+    data = graph_store.find_text_nodes(root_node_id, text, limit=MAX_RESULT)
+    return neo4j_util.format_neo4j_data(data, max_token_per_result), data
 
 
 class FindTextNodeWithTextInFileInput(BaseModel):
@@ -252,18 +249,12 @@ You can use this tool to find text/documentation in a specific file that contain
 def find_text_node_with_text_in_file(
     text: str,
     basename: str,
-    driver: GraphDatabase.driver,
+    graph_store: GraphStore,
     max_token_per_result: int,
     root_node_id: int,
 ) -> tuple[str, Sequence[Mapping[str, Any]]]:
-    query = f"""\
-    MATCH (root:FileNode)-[:HAS_FILE*]->(f:FileNode) -[:HAS_TEXT]-> (t:TextNode)
-    WHERE root.node_id = {root_node_id} AND f.basename = '{basename}' AND t.text CONTAINS '{text}'
-    RETURN f AS FileNode, t AS TextNode
-    ORDER BY t.node_id
-    LIMIT {MAX_RESULT}
-    """
-    return neo4j_util.run_neo4j_query(query, driver, max_token_per_result)
+    data = graph_store.find_text_nodes(root_node_id, text, basename=basename, limit=MAX_RESULT)
+    return neo4j_util.format_neo4j_data(data, max_token_per_result), data
 
 
 class GetNextTextNodeWithNodeIdInput(BaseModel):
@@ -277,19 +268,10 @@ You can use this tool to read the next section of text that you are interested i
 
 
 def get_next_text_node_with_node_id(
-    node_id: int, driver: GraphDatabase.driver, max_token_per_result: int, root_node_id: int
+    node_id: int, graph_store: GraphStore, max_token_per_result: int, root_node_id: int
 ) -> tuple[str, Sequence[Mapping[str, Any]]]:
-    query = f"""\
-    MATCH (root:FileNode)-[:HAS_FILE*]->(f:FileNode) -[:HAS_TEXT]-> (a:TextNode {{ node_id: {node_id} }}) -[:NEXT_CHUNK]-> (b:TextNode)
-    WHERE root.node_id = {root_node_id}
-    RETURN f AS FileNode, b AS TextNode
-    """
-    return neo4j_util.run_neo4j_query(query, driver, max_token_per_result)
-
-
-###############################################################################
-#                                 Other                                       #
-###############################################################################
+    data = graph_store.get_next_text_nodes(root_node_id, node_id)
+    return neo4j_util.format_neo4j_data(data, max_token_per_result), data
 
 
 class PreviewFileContentWithBasenameInput(BaseModel):
@@ -307,51 +289,10 @@ to look at the file."""
 
 
 def preview_file_content_with_basename(
-    basename: str, driver: GraphDatabase.driver, max_token_per_result: int, root_node_id: int
+    basename: str, graph_store: GraphStore, max_token_per_result: int, root_node_id: int
 ) -> tuple[str, Sequence[Mapping[str, Any]]]:
-    source_code_query = f"""\
-    MATCH (root:FileNode)-[:HAS_FILE*]->(f:FileNode) -[:HAS_AST]-> (a:ASTNode)
-    WHERE root.node_id = {root_node_id} AND f.basename = '{basename}'
-    WITH f, apoc.text.split(a.text, '\\R') AS lines
-    RETURN
-        f AS FileNode,
-        {{
-            text: apoc.text.join(lines[0..1000], '\\n'),
-            start_line: 1,
-            end_line: 1000
-        }} AS preview
-    ORDER BY f.node_id
-      """
-
-    text_query = f"""\
-    MATCH (root:FileNode)-[:HAS_FILE*]->(f:FileNode) -[:HAS_TEXT]-> (t:TextNode)
-    WHERE root.node_id = {root_node_id} AND f.basename = '{basename}' 
-      AND NOT EXISTS((:TextNode) -[:NEXT_CHUNK]-> (t))
-    RETURN
-        f AS FileNode,
-        {{
-            text: t.text,
-            start_line: 1,
-            end_line: 1000
-        }} AS preview
-    ORDER BY f.node_id
-    """
-
-    if tree_sitter_parser.supports_file(Path(basename)):
-        data = neo4j_util.run_neo4j_query_without_formatting(source_code_query, driver)
-    else:
-        data = neo4j_util.run_neo4j_query_without_formatting(text_query, driver)
-    if not data:
-        return EMPTY_DATA_MESSAGE, data
-    for result in data:
-        if isinstance(result["preview"], dict):
-            result["preview"]["text"] = pre_append_line_numbers(
-                result["preview"]["text"], result["preview"]["start_line"]
-            )
-            result["preview"]["end_line"] = (
-                result["preview"]["start_line"] + len(result["preview"]["text"].splitlines()) - 1
-            )
-    return neo4j_util.format_neo4j_data(data, max_token_per_result), data
+    data = _preview_file_content(graph_store, root_node_id, basename=basename)
+    return _format_preview(data, max_token_per_result)
 
 
 class PreviewFileContentWithRelativePathInput(BaseModel):
@@ -369,51 +310,10 @@ to look at the file."""
 
 
 def preview_file_content_with_relative_path(
-    relative_path: str, driver: GraphDatabase.driver, max_token_per_result: int, root_node_id: int
+    relative_path: str, graph_store: GraphStore, max_token_per_result: int, root_node_id: int
 ) -> tuple[str, Sequence[Mapping[str, Any]]]:
-    source_code_query = f"""\
-    MATCH (root:FileNode)-[:HAS_FILE*]->(f:FileNode) -[:HAS_AST]-> (a:ASTNode)
-    WHERE root.node_id = {root_node_id} AND f.relative_path = '{relative_path}'
-    WITH f, apoc.text.split(a.text, '\\R') AS lines
-    RETURN
-        f AS FileNode,
-        {{
-            text: apoc.text.join(lines[0..1000], '\\n'),
-            start_line: 1,
-            end_line: 1000
-        }} AS preview
-    ORDER BY f.node_id
-    """
-
-    text_query = f"""\
-    MATCH (root:FileNode)-[:HAS_FILE*]->(f:FileNode) -[:HAS_TEXT]-> (t:TextNode)
-    WHERE root.node_id = {root_node_id} AND f.relative_path = '{relative_path}' 
-      AND NOT EXISTS((:TextNode) -[:NEXT_CHUNK]-> (t))
-    RETURN
-        f AS FileNode,
-        {{
-            text: t.text,
-            start_line: 1,
-            end_line: 1000
-        }} AS preview
-    ORDER BY f.node_id
-    """
-
-    if tree_sitter_parser.supports_file(Path(relative_path)):
-        data = neo4j_util.run_neo4j_query_without_formatting(source_code_query, driver)
-    else:
-        data = neo4j_util.run_neo4j_query_without_formatting(text_query, driver)
-    if not data:
-        return EMPTY_DATA_MESSAGE, data
-    for result in data:
-        if isinstance(result["preview"], dict):
-            result["preview"]["text"] = pre_append_line_numbers(
-                result["preview"]["text"], result["preview"]["start_line"]
-            )
-            result["preview"]["end_line"] = (
-                result["preview"]["start_line"] + len(result["preview"]["text"].splitlines()) - 1
-            )
-    return neo4j_util.format_neo4j_data(data, max_token_per_result), data
+    data = _preview_file_content(graph_store, root_node_id, relative_path=relative_path)
+    return _format_preview(data, max_token_per_result)
 
 
 class ReadCodeWithBasenameInput(BaseModel):
@@ -442,34 +342,15 @@ def read_code_with_basename(
     basename: str,
     start_line: int,
     end_line: int,
-    driver: GraphDatabase.driver,
+    graph_store: GraphStore,
     max_token_per_result: int,
     root_node_id: int,
 ) -> tuple[str, Union[Sequence[Mapping[str, Any]], None]]:
     if end_line < start_line:
         return f"end_line {end_line} must be greater than start_line {start_line}", None
 
-    source_code_query = f"""\
-    MATCH (root:FileNode)-[:HAS_FILE*]->(f:FileNode) -[:HAS_AST]-> (a:ASTNode)
-    WHERE root.node_id = {root_node_id} AND f.basename = '{basename}'
-    WITH f, apoc.text.split(a.text, '\\R') AS lines
-    RETURN
-        f as FileNode,
-        {{
-            text: apoc.text.join(lines[{start_line - 1}..{end_line - 1}], '\\n'),
-            start_line: {start_line},
-            end_line: {end_line}
-        }} AS SelectedLines
-    ORDER BY f.node_id
-    """
-    data = neo4j_util.run_neo4j_query_without_formatting(source_code_query, driver)
-    if not data:
-        return EMPTY_DATA_MESSAGE, data
-    for result in data:
-        result["SelectedLines"]["text"] = pre_append_line_numbers(
-            result["SelectedLines"]["text"], result["SelectedLines"]["start_line"]
-        )
-    return neo4j_util.format_neo4j_data(data, max_token_per_result), data
+    data = _read_code(graph_store, root_node_id, start_line, end_line, basename=basename)
+    return _format_selected_lines(data, max_token_per_result)
 
 
 class ReadCodeWithRelativePathInput(BaseModel):
@@ -499,33 +380,101 @@ def read_code_with_relative_path(
     relative_path: str,
     start_line: int,
     end_line: int,
-    driver: GraphDatabase.driver,
+    graph_store: GraphStore,
     max_token_per_result: int,
     root_node_id: int,
 ) -> tuple[str, Union[Sequence[Mapping[str, Any]], None]]:
     if end_line < start_line:
         return f"end_line {end_line} must be greater than start_line {start_line}", None
 
-    source_code_query = f"""\
-    MATCH (root:FileNode)-[:HAS_FILE*]->(f:FileNode) -[:HAS_AST]-> (a:ASTNode)
-    WHERE root.node_id = {root_node_id} AND f.relative_path = '{relative_path}'
-    WITH f, apoc.text.split(a.text, '\\R') AS lines
-    RETURN
-        f as FileNode,
-        {{
-            text: apoc.text.join(lines[{start_line - 1}..{end_line - 1}], '\\n'),
-            start_line: {start_line},
-            end_line: {end_line}
-        }} AS SelectedLines
-    ORDER BY f.node_id
-    """
-
-    data = neo4j_util.run_neo4j_query_without_formatting(source_code_query, driver)
+    data = _read_code(graph_store, root_node_id, start_line, end_line, relative_path=relative_path)
+    return _format_selected_lines(data, max_token_per_result)
+
+
+def _preview_file_content(
+    graph_store: GraphStore, root_node_id: int, **kwargs
+) -> Sequence[Mapping[str, Any]]:
+    """The first 1000 lines of the files with a basename or relative path that were parsed,
+    and the first chunk of the text of the others, by node ID of the file."""
+    ast_root_rows = graph_store.get_ast_root_nodes(root_node_id, **kwargs)
+    rows = [
+        {
+            "FileNode": row["FileNode"],
+            "preview": {
+                "text": "\n".join(split_lines(row["ASTNode"]["text"])[:1000]),
+                "start_line": 1,
+                "end_line": 1000,
+            },
+        }
+        for row in ast_root_rows
+    ]
+    parsed_file_node_ids = {row["FileNode"]["node_id"] for row in ast_root_rows}
+    rows.extend(
+        {
+            "FileNode": row["FileNode"],
+            "preview": {"text": row["TextNode"]["text"], "start_line": 1, "end_line": 1000},
+        }
+        for row in graph_store.get_first_text_nodes(root_node_id, **kwargs)
+        if row["FileNode"]["node_id"] not in parsed_file_node_ids
+    )
+    rows.sort(key=lambda row: row["FileNode"]["node_id"])
+    return rows
+
+
+def _read_code(
+    graph_store: GraphStore, root_node_id: int, start_line: int, end_line: int, **kwargs
+) -> Sequence[Mapping[str, Any]]:
+    """The lines from start_line to end_line of the files with a basename or relative path,
+    from their root ASTNode, or from the chunks of their text for the files that were not
+    parsed, like vendored or generated source files, by node ID of the file."""
+    file_texts = {
+        row["FileNode"]["node_id"]: (row["FileNode"], row["ASTNode"]["text"])
+        for row in graph_store.get_ast_root_nodes(root_node_id, **kwargs)
+    }
+    chunks = defaultdict(list)
+    for row in graph_store.get_text_nodes(root_node_id, **kwargs):
+        if row["FileNode"]["node_id"] not in file_texts:
+            chunks[row["FileNode"]["node_id"]].append((row["FileNode"], row["TextNode"]["text"]))
+    for file_node_id, file_chunks in chunks.items():
+        file_texts[file_node_id] = (
+            file_chunks[0][0],
+            join_chunks([text for _, text in file_chunks]),
+        )
+    return [
+        {
+            "FileNode": file_node,
+            "SelectedLines": {
+                "text": "\n".join(split_lines(text)[start_line - 1 : end_line - 1]),
+                "start_line": start_line,
+                "end_line": end_line,
+            },
+        }
+        for _, (file_node, text) in sorted(file_texts.items())
+    ]
+
+
+def _format_preview(
+    data: Sequence[Mapping[str, Any]], max_token_per_result: int
+) -> tuple[str, Sequence[Mapping[str, Any]]]:
+    if not data:
+        return EMPTY_DATA_MESSAGE, data
+    for result in data:
+        result["preview"]["text"] = pre_append_line_numbers(
+            result["preview"]["text"], result["preview"]["start_line"]
+        )
+        result["preview"]["end_line"] = (
+            result["preview"]["start_line"] + len(result["preview"]["text"].splitlines()) - 1
+        )
+    return neo4j_util.format_neo4j_data(data, max_token_per_result), data
+
+
+def _format_selected_lines(
+    data: Sequence[Mapping[str, Any]], max_token_per_result: int
+) -> tuple[str, Sequence[Mapping[str, Any]]]:
     if not data:
         return EMPTY_DATA_MESSAGE, data
     for result in data:
         result["SelectedLines"]["text"] = pre_append_line_numbers(
             result["SelectedLines"]["text"], result["SelectedLines"]["start_line"]
         )
-
     return neo4j_util.format_neo4j_data(data, max_token_per_result), data
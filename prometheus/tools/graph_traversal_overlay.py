@@ -0,0 +1,268 @@
+import functools
+from typing import Any, Callable, Dict, List, Mapping, Optional, Sequence
+
+from prometheus.graph.graph_types import KnowledgeGraphEdgeType, KnowledgeGraphNode
+from prometheus.graph.knowledge_graph_overlay import KnowledgeGraphOverlay, OverlayFile
+from prometheus.tools import graph_traversal
+from prometheus.utils.neo4j_util import format_neo4j_data
+from prometheus.utils.str_util import join_chunks, pre_append_line_numbers, split_lines
+
+"""
+Makes the graph traversal tools answer from a KnowledgeGraphOverlay for the touched files.
+
+The rows of the Neo4j result that belong to a touched file are dropped, and the rows of the
+current content of the touched files are computed from the overlay, with the same format
+and order as the rows of the tool.
+"""
+
+
+def with_overlay(
+    tool_fn: functools.partial, kg_overlay: KnowledgeGraphOverlay
+) -> Callable[..., tuple[str, Any]]:
+    """Wraps a graph traversal tool, already bound to its graph store, with an overlay.
+
+    Args:
+      tool_fn: A graph traversal tool with its graph_store, max_token_per_result and root_node_id
+        keyword arguments.
+      kg_overlay: The overlay of the files changed since the knowledge graph was built.
+
+    Returns:
+      A function with the same tool arguments and the same content and artifact result.
+    """
+    overlay_query, sort_key = _OVERLAY_QUERIES[tool_fn.func.__name__]
+    max_token_per_result = tool_fn.keywords["max_token_per_result"]
+
+    def query(**kwargs) -> tuple[str, Any]:
+        content, data = tool_fn(**kwargs)
+        # The tools return no data for invalid arguments, like a negative line range
+        if data is None or kg_overlay.is_empty():
+            return content, data
+
+        data = [
+            row for row in data if not kg_overlay.is_touched(row["FileNode"]["relative_path"])
+        ] + overlay_query(kg_overlay.get_files(), **kwargs)
+        if sort_key is not None:
+            data.sort(key=sort_key)
+        data = data[: graph_traversal.MAX_RESULT]
+        return format_neo4j_data(data, max_token_per_result), data
+
+    return query
+
+
+def _to_row(kg_node: KnowledgeGraphNode) -> Dict[str, Any]:
+    return {"node_id": kg_node.node_id, **vars(kg_node.node)}
+
+
+def _matches_file(
+    overlay_file: OverlayFile, basename: Optional[str] = None, relative_path: Optional[str] = None
+) -> bool:
+    if basename is not None and overlay_file.file_node.node.basename != basename:
+        return False
+    if relative_path is not None and overlay_file.file_node.node.relative_path != relative_path:
+        return False
+    return True
+
+
+def _find_file_nodes(overlay_files: Sequence[OverlayFile], **kwargs) -> List[Mapping[str, Any]]:
+    return [
+        {"FileNode": _to_row(overlay_file.file_node)}
+        for overlay_file in overlay_files
+        if _matches_file(overlay_file, **kwargs)
+    ]
+
+
+def _find_ast_nodes(
+    overlay_files: Sequence[OverlayFile],
+    text: Optional[str] = None,
+    type: Optional[str] = None,
+    **kwargs,
+) -> List[Mapping[str, Any]]:
+    rows = []
+    for overlay_file in overlay_files:
+        ast_root_node = overlay_file.get_ast_root_node()
+        if ast_root_node is None or not _matches_file(overlay_file, **kwargs):
+            continue
+        for kg_node in overlay_file.kg_nodes:
+            if kg_node is ast_root_node:
+                continue
+            if text is not None and text not in kg_node.node.text:
+                continue
+            if type is not None and kg_node.node.type != type:
+                continue
+            rows.append({"FileNode": _to_row(overlay_file.file_node), "ASTNode": _to_row(kg_node)})
+    return rows
+
+
+def _find_symbol_occurrences(
+    overlay_files: Sequence[OverlayFile],
+    name: str,
+    edge_types: Sequence[KnowledgeGraphEdgeType],
+    with_reference_type: bool,
+) -> List[Mapping[str, Any]]:
+    rows = []
+    for overlay_file in overlay_files:
+        if overlay_file.symbol_table is None:
+            continue
+        for kg_node, edge_type in overlay_file.symbol_table.get_occurrences(name):
+            if edge_type not in edge_types:
+                continue
+            row = {"FileNode": _to_row(overlay_file.file_node), "ASTNode": _to_row(kg_node)}
+            if with_reference_type:
+                row["reference_type"] = edge_type.value
+            rows.append(row)
+    return rows
+
+
+def _find_text_nodes(
+    overlay_files: Sequence[OverlayFile], text: str, **kwargs
+) -> List[Mapping[str, Any]]:
+    return [
+        {"FileNode": _to_row(overlay_file.file_node), "TextNode": _to_row(kg_node)}
+        for overlay_file in overlay_files
+        if _matches_file(overlay_file, **kwargs)
+        for kg_node in overlay_file.get_text_nodes()
+        if text in kg_node.node.text
+    ]
+
+
+def _get_next_text_node(
+    overlay_files: Sequence[OverlayFile], node_id: int
+) -> List[Mapping[str, Any]]:
+    return [
+        {"FileNode": _to_row(overlay_file.file_node), "TextNode": _to_row(kg_edge.target)}
+        for overlay_file in overlay_files
+        for kg_edge in overlay_file.kg_edges
+        if kg_edge.type == KnowledgeGraphEdgeType.next_chunk and kg_edge.source.node_id == node_id
+    ]
+
+
+def _preview_file_content(
+    overlay_files: Sequence[OverlayFile], **kwargs
+) -> List[Mapping[str, Any]]:
+    rows = []
+    for overlay_file in overlay_files:
+        if not _matches_file(overlay_file, **kwargs):
+            continue
+        ast_root_node = overlay_file.get_ast_root_node()
+        if ast_root_node is not None:
+            text = "\n".join(split_lines(ast_root_node.node.text)[:1000])
+        else:
+            text_nodes = overlay_file.get_text_nodes()
+            if not text_nodes:
+                continue
+            text = text_nodes[0].node.text
+        text = pre_append_line_numbers(text, 1)
+        rows.append(
+            {
+                "FileNode": _to_row(overlay_file.file_node),
+                "preview": {
+                    "text": text,
+                    "start_line": 1,
+                    "end_line": len(text.splitlines()),
+                },
+            }
+        )
+    return rows
+
+
+def _read_code(
+    overlay_files: Sequence[OverlayFile], start_line: int, end_line: int, **kwargs
+) -> List[Mapping[str, Any]]:
+    rows = []
+    for overlay_file in overlay_files:
+        if not _matches_file(overlay_file, **kwargs):
+            continue
+        ast_root_node = overlay_file.get_ast_root_node()
+        if ast_root_node is not None:
+            text = ast_root_node.node.text
+        else:
+            text_nodes = overlay_file.get_text_nodes()
+            if not text_nodes:
+                continue
+            text = join_chunks([kg_node.node.text for kg_node in text_nodes])
+        lines = split_lines(text)[start_line - 1 : end_line - 1]
+        rows.append(
+            {
+                "FileNode": _to_row(overlay_file.file_node),
+                "SelectedLines": {
+                    "text": pre_append_line_numbers("\n".join(lines), start_line),
+                    "start_line": start_line,
+                    "end_line": end_line,
+                },
+            }
+        )
+    return rows
+
+
+def _by_file_node_id(row: Mapping[str, Any]) -> int:
+    return row["FileNode"]["node_id"]
+
+
+def _by_ast_node_size(row: Mapping[str, Any]) -> int:
+    return len(row["ASTNode"]["text"])
+
+
+def _by_location(row: Mapping[str, Any]) -> tuple[str, int]:
+    return row["FileNode"]["relative_path"], row["ASTNode"]["start_line"]
+
+
+def _by_text_node_id(row: Mapping[str, Any]) -> int:
+    return row["TextNode"]["node_id"]
+
+
+# The overlay query and the order of the rows, by graph traversal tool
+_OVERLAY_QUERIES: Mapping[str, tuple[Callable[..., List[Mapping[str, Any]]], Any]] = {
+    graph_traversal.find_file_node_with_basename.__name__: (_find_file_nodes, _by_file_node_id),
+    graph_traversal.find_file_node_with_relative_path.__name__: (
+        _find_file_nodes,
+        _by_file_node_id,
+    ),
+    graph_traversal.find_ast_node_with_text_in_file_with_basename.__name__: (
+        _find_ast_nodes,
+        _by_ast_node_size,
+    ),
+    graph_traversal.find_ast_node_with_text_in_file_with_relative_path.__name__: (
+        _find_ast_nodes,
+        _by_ast_node_size,
+    ),
+    graph_traversal.find_ast_node_with_type_in_file_with_basename.__name__: (
+        _find_ast_nodes,
+        _by_ast_node_size,
+    ),
+    graph_traversal.find_ast_node_with_type_in_file_with_relative_path.__name__: (
+        _find_ast_nodes,
+        _by_ast_node_size,
+    ),
+    graph_traversal.find_definition.__name__: (
+        functools.partial(
+            _find_symbol_occurrences,
+            edge_types=[KnowledgeGraphEdgeType.defines],
+            with_reference_type=False,
+        ),
+        _by_location,
+    ),
+    graph_traversal.find_references.__name__: (
+        functools.partial(
+            _find_symbol_occurrences,
+            edge_types=[KnowledgeGraphEdgeType.references, KnowledgeGraphEdgeType.imports],
+            with_reference_type=True,
+        ),
+        _by_location,
+    ),
+    graph_traversal.find_text_node_with_text.__name__: (_find_text_nodes, _by_text_node_id),
+    graph_traversal.find_text_node_with_text_in_file.__name__: (
+        _find_text_nodes,
+        _by_text_node_id,
+    ),
+    graph_traversal.get_next_text_node_with_node_id.__name__: (_get_next_text_node, None),
+    graph_traversal.preview_file_content_with_basename.__name__: (
+        _preview_file_content,
+        _by_file_node_id,
+    ),
+    graph_traversal.preview_file_content_with_relative_path.__name__: (
+        _preview_file_content,
+        _by_file_node_id,
+    ),
+    graph_traversal.read_code_with_basename.__name__: (_read_code, _by_file_node_id),
+    graph_traversal.read_code_with_relative_path.__name__: (_read_code, _by_file_node_id),
+}
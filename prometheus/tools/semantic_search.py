@@ -0,0 +1,51 @@
+from typing import Any, Mapping, Sequence
+
+from pydantic import BaseModel, Field
+
+from prometheus.graph.graph_types import ASTNode
+from prometheus.graph.semantic_index import SemanticIndex, SemanticSearchResult
+from prometheus.utils.neo4j_util import format_neo4j_data
+
+MAX_SEMANTIC_SEARCH_RESULT = 10
+
+
+"""
+Tool for finding the ASTNodes and TextNodes that are semantically similar to a query.
+
+Like the graph traversal tools, a content and an artifact are returned, and the artifact
+has the same format as the results of the graph traversal tools.
+"""
+
+
+class SemanticSearchInput(BaseModel):
+    query: str = Field(
+        "A description of the code or documentation to search for, in natural language or code."
+    )
+
+
+SEMANTIC_SEARCH_DESCRIPTION = """\
+Find the functions, classes and documentation chunks whose content is the most similar to
+the query, ranked by a similarity score. Unlike the other search tools, the query does not
+need to match the text exactly: describe the behavior, concept or error you are looking for,
+or quote identifiers and messages that are related to it. Use it to find starting points in
+an unfamiliar codebase, then use the other tools to read around the results."""
+
+
+def to_neo4j_data(result: SemanticSearchResult) -> Mapping[str, Any]:
+    """Formats a search result like a row of a Neo4j result of the graph traversal tools."""
+    row = {"FileNode": {"node_id": result.file_node.node_id, **vars(result.file_node.node)}}
+    if isinstance(result.kg_node.node, ASTNode):
+        row["ASTNode"] = {"node_id": result.kg_node.node_id, **vars(result.kg_node.node)}
+    else:
+        row["TextNode"] = {"node_id": result.kg_node.node_id, **vars(result.kg_node.node)}
+    row["score"] = round(result.score, 3)
+    return row
+
+
+def semantic_search(
+    query: str, semantic_index: SemanticIndex, max_token_per_result: int
+) -> tuple[str, Sequence[Mapping[str, Any]]]:
+    data = [
+        to_neo4j_data(result) for result in semantic_index.search(query, MAX_SEMANTIC_SEARCH_RESULT)
+    ]
+    return format_neo4j_data(data, max_token_per_result), data
@@ -0,0 +1,190 @@
+import hashlib
+import threading
+from typing import Dict, List, Optional, Sequence
+
+from langchain_core.embeddings import Embeddings
+from pydantic import BaseModel
+
+from prometheus.models.context import Context
+from prometheus.utils.embedding_util import cosine_similarity
+
+
+class CachedContexts(BaseModel):
+    """The context retrieved for a query, as stored in the ContextCache."""
+
+    # The retrieval stage that asked the query, queries are only matched within a scope
+    scope: str
+    query_hash: str
+    embedding: Sequence[float]
+    contexts: Sequence[Context]
+
+
+class ContextCacheHit(BaseModel):
+    contexts: Sequence[Context]
+    # Whether the cached query is the same as the looked up one, not only similar
+    exact: bool
+    similarity: float
+
+
+def normalize_query(query: str) -> str:
+    return " ".join(query.split())
+
+
+def hash_query(query: str) -> str:
+    return hashlib.sha256(normalize_query(query).encode("utf-8")).hexdigest()
+
+
+class ContextCache:
+    """
+    Caches the context retrieved for queries on knowledge graphs, across issues.
+
+    Entries are keyed by the root node ID of a knowledge graph, which identifies a
+    repository at a commit, by the scope of the query, and by the normalized query.
+    Besides exact matches, a lookup finds the entry of the same scope whose similarity
+    text is the closest to the one of the query, using an in-memory vector index of the
+    embeddings of the similarity texts. Without an embedding model, only exact matches are
+    found. Retrieval queries mostly consist of a prompt that
+    is the same for every issue, so the similarity text is usually the issue itself.
+
+    This class keeps the entries in memory only. Subclasses persist them by overriding
+    _load_entries, _save_entry and _delete_entries.
+    """
+
+    def __init__(
+        self,
+        embeddings: Optional[Embeddings],
+        similarity_threshold: float,
+        max_entries_per_graph: int = 1000,
+    ):
+        """
+        Args:
+            embeddings: The model that embeds the similarity texts, None to only find the
+                context of the same query.
+            similarity_threshold: Minimum cosine similarity of the similarity texts for an
+                entry to be returned when the query does not match exactly.
+            max_entries_per_graph: Maximum number of entries kept for a knowledge graph, the
+                oldest ones are evicted first.
+        """
+        self.embeddings = embeddings
+        self.similarity_threshold = similarity_threshold
+        self.max_entries_per_graph = max_entries_per_graph
+        self._indexes: Dict[int, List[CachedContexts]] = {}
+        self._lock = threading.Lock()
+
+    def lookup(
+        self, kg_root_node_id: int, scope: str, query: str, similarity_text: str
+    ) -> Optional[ContextCacheHit]:
+        """
+        Finds the cached context of a query.
+
+        Args:
+            kg_root_node_id: The root node ID of the knowledge graph the query is about.
+            scope: The scope of the query.
+            query: The query.
+            similarity_text: The text that is compared to find similar queries.
+
+        Returns:
+            The context of the same query if it is cached, otherwise the one of the most
+            similar query above the similarity threshold, or None.
+        """
+        query_hash = hash_query(query)
+        index = self._get_index(kg_root_node_id)
+        with self._lock:
+            entries = [entry for entry in index if entry.scope == scope]
+        for entry in entries:
+            if entry.query_hash == query_hash:
+                return ContextCacheHit(contexts=entry.contexts, exact=True, similarity=1.0)
+        if not entries or self.embeddings is None:
+            return None
+
+        embedding = self.embeddings.embed_query(similarity_text)
+        # Entries embedded by another model cannot be compared with the query
+        entries = [entry for entry in entries if len(entry.embedding) == len(embedding)]
+        if not entries:
+            return None
+        similarity, best_entry = max(
+            ((cosine_similarity(embedding, entry.embedding), entry) for entry in entries),
+            key=lambda pair: pair[0],
+        )
+        if similarity < self.similarity_threshold:
+            return None
+        return ContextCacheHit(contexts=best_entry.contexts, exact=False, similarity=similarity)
+
+    def store(
+        self,
+        kg_root_node_id: int,
+        scope: str,
+        query: str,
+        similarity_text: str,
+        contexts: Sequence[Context],
+    ):
+        """
+        Caches the context retrieved for a query, replacing the previous one of the query.
+
+        Args:
+            kg_root_node_id: The root node ID of the knowledge graph the query is about.
+            scope: The scope of the query.
+            query: The query.
+            similarity_text: The text that is compared to find similar queries.
+            contexts: The context retrieved for the query.
+        """
+        entry = CachedContexts(
+            scope=scope,
+            query_hash=hash_query(query),
+            embedding=(
+                self.embeddings.embed_query(similarity_text) if self.embeddings is not None else []
+            ),
+            contexts=contexts,
+        )
+        index = self._get_index(kg_root_node_id)
+        # The persisted entries are updated under the lock too, so that concurrent stores
+        # cannot delete the entry saved by another one or leave more entries than the limit
+        with self._lock:
+            replaced = [
+                cached
+                for cached in index
+                if cached.scope == scope and cached.query_hash == entry.query_hash
+            ]
+            index[:] = [
+                cached
+                for cached in index
+                if cached.scope != scope or cached.query_hash != entry.query_hash
+            ]
+            index.append(entry)
+            evicted = index[: -self.max_entries_per_graph]
+            del index[: -self.max_entries_per_graph]
+            for cached in replaced + evicted:
+                self._delete_entries(kg_root_node_id, cached.scope, cached.query_hash)
+            self._save_entry(kg_root_node_id, entry)
+
+    def clear(self, kg_root_node_id: int):
+        """
+        Removes all entries of a knowledge graph, for example once it is deleted.
+
+        Args:
+            kg_root_node_id: The root node ID of the knowledge graph.
+        """
+        with self._lock:
+            self._indexes.pop(kg_root_node_id, None)
+            self._delete_entries(kg_root_node_id)
+
+    def _get_index(self, kg_root_node_id: int) -> List[CachedContexts]:
+        with self._lock:
+            index = self._indexes.get(kg_root_node_id)
+        if index is not None:
+            return index
+        entries = list(self._load_entries(kg_root_node_id))[-self.max_entries_per_graph :]
+        with self._lock:
+            return self._indexes.setdefault(kg_root_node_id, entries)
+
+    def _load_entries(self, kg_root_node_id: int) -> Sequence[CachedContexts]:
+        """Loads the persisted entries of a knowledge graph, from the oldest to the newest."""
+        return []
+
+    def _save_entry(self, kg_root_node_id: int, entry: CachedContexts):
+        """Persists a new entry."""
+
+    def _delete_entries(
+        self, kg_root_node_id: int, scope: Optional[str] = None, query_hash: Optional[str] = None
+    ):
+        """Deletes the persisted entries of a knowledge graph, or only the given one."""
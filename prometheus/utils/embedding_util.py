@@ -0,0 +1,78 @@
+import hashlib
+import math
+import re
+from typing import List, Sequence
+
+from langchain_core.embeddings import Embeddings
+
+_WORD_RE = re.compile(r"[A-Za-z0-9]+")
+_CAMEL_CASE_RE = re.compile(r"[A-Z]+(?![a-z])|[A-Z]?[a-z]+|[0-9]+")
+_STOP_WORDS = frozenset(
+    {"a", "an", "and", "are", "as", "be", "by", "for", "in", "is", "it", "of", "on", "or"}
+    | {"that", "the", "this", "to", "was", "when", "with"}
+)
+
+
+def tokenize(text: str) -> List[str]:
+    """Splits text into lowercase words, also splitting identifiers on camel case and digits.
+
+    Args:
+      text: The text to tokenize.
+
+    Returns:
+      The words of the text, without stop words.
+    """
+    tokens = []
+    for word in _WORD_RE.findall(text):
+        for part in _CAMEL_CASE_RE.findall(word):
+            part = part.lower()
+            if part not in _STOP_WORDS:
+                tokens.append(part)
+    return tokens
+
+
+class HashingEmbeddings(Embeddings):
+    """Embeds text by hashing its words and pairs of consecutive words into a fixed vector.
+
+    It needs no model, so it runs locally and deterministically. Texts that share words,
+    identifiers or error messages get similar vectors, which is enough to find rephrased
+    or duplicated issues, but not texts with the same meaning in different words.
+    """
+
+    def __init__(self, dimensions: int = 1024):
+        self.dimensions = dimensions
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self.embed_query(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        tokens = tokenize(text)
+        counts = {}
+        for feature in tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]:
+            counts[feature] = counts.get(feature, 0) + 1
+
+        vector = [0.0] * self.dimensions
+        for feature, count in counts.items():
+            digest = hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest()
+            index = int.from_bytes(digest[:4], "little") % self.dimensions
+            # The sign spreads hash collisions around zero instead of accumulating them
+            sign = 1.0 if digest[4] & 1 else -1.0
+            vector[index] += sign * (1.0 + math.log(count))
+        return normalize(vector)
+
+
+def normalize(vector: Sequence[float]) -> List[float]:
+    norm = math.sqrt(sum(value * value for value in vector))
+    if norm == 0:
+        return list(vector)
+    return [value / norm for value in vector]
+
+
+def cosine_similarity(a: Sequence[float], b: Sequence[float]) -> float:
+    """Computes the cosine similarity of two vectors, 0 if one of them is zero."""
+    norm = math.sqrt(sum(value * value for value in a)) * math.sqrt(
+        sum(value * value for value in b)
+    )
+    if norm == 0:
+        return 0.0
+    return sum(x * y for x, y in zip(a, b)) / norm
@@ -0,0 +1,57 @@
+import threading
+from typing import List, Sequence
+
+from prometheus.models.context import Context
+
+
+def _covers(context: Context, other: Context) -> bool:
+    """Whether context contains all the lines of other."""
+    if context.relative_path != other.relative_path:
+        return False
+    if context.start_line_number is None or context.end_line_number is None:
+        return context == other
+    if other.start_line_number is None or other.end_line_number is None:
+        return False
+    return (
+        context.start_line_number <= other.start_line_number
+        and other.end_line_number <= context.end_line_number
+    )
+
+
+class IssueContextStore:
+    """
+    Collects the context retrieved by the stages of a single issue, like classification,
+    bug reproduction and fixing, so that a later stage starts from the context of the
+    earlier ones and only retrieves what they lack.
+
+    Context that is contained in a context already in the store is not added again.
+    """
+
+    def __init__(self):
+        self._contexts: List[Context] = []
+        self._lock = threading.Lock()
+
+    def get_contexts(self) -> Sequence[Context]:
+        """Returns the contexts in the store, in the order they were added."""
+        with self._lock:
+            return list(self._contexts)
+
+    def add_contexts(self, contexts: Sequence[Context]):
+        """
+        Adds contexts to the store.
+
+        Args:
+            contexts: The retrieved contexts.
+        """
+        with self._lock:
+            for context in contexts:
+                if any(_covers(known, context) for known in self._contexts):
+                    continue
+                self._contexts = [
+                    known for known in self._contexts if not _covers(context, known)
+                ] + [context]
+
+    def clear(self):
+        """Removes all contexts, before the store is used for another issue."""
+        with self._lock:
+            self._contexts = []
@@ -1,4 +1,4 @@
-from typing import Callable, Dict, Sequence
+from typing import Any, Callable, Dict, List, Sequence
 
 from langchain_core.messages import (
     AIMessage,
@@ -7,8 +7,18 @@ from langchain_core.messages import (
     ToolMessage,
 )
 from langchain_core.output_parsers import StrOutputParser
+from langchain_core.tools import BaseTool
 
 from prometheus.utils.neo4j_util import neo4j_data_for_context_generator
+from prometheus.utils.test_result_util import TestRunResult, compact_test_output, parse_test_output
+
+# Metadata of tools that do not change anything, so that they can be called in parallel
+READ_ONLY_TOOL_METADATA = {"read_only": True}
+
+
+def is_read_only_tool(tool: Any) -> bool:
+    """Whether a tool is a BaseTool with READ_ONLY_TOOL_METADATA."""
+    return isinstance(tool, BaseTool) and bool((tool.metadata or {}).get("read_only"))
 
 
 def check_remaining_steps(
@@ -96,3 +106,28 @@ def format_agent_tool_message_history(messages: Sequence[BaseMessage]) -> str:
         elif isinstance(message, ToolMessage):
             formatted_messages.append(f"Tool output: {message.content}")
     return "\n\n".join(formatted_messages)
+
+
+def compact_test_tool_messages(messages: Sequence[BaseMessage]) -> Sequence[BaseMessage]:
+    """Replaces the content of tool messages that contain test output with a compact summary.
+
+    Only the tool messages whose content is recognized as the output of a supported test
+    framework are changed, all other messages are returned unchanged.
+    """
+    compacted_messages = []
+    for message in messages:
+        if isinstance(message, ToolMessage) and isinstance(message.content, str):
+            message = message.model_copy(update={"content": compact_test_output(message.content)})
+        compacted_messages.append(message)
+    return compacted_messages
+
+
+def extract_test_results(messages: Sequence[BaseMessage]) -> List[TestRunResult]:
+    """Parses the test results from the outputs of all tool messages in the sequence."""
+    test_results = []
+    for message in messages:
+        if isinstance(message, ToolMessage) and isinstance(message.content, str):
+            test_result = parse_test_output(message.content)
+            if test_result is not None:
+                test_results.append(test_result)
+    return test_results
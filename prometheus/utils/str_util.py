@@ -1,4 +1,6 @@
+import re
 from functools import lru_cache
+from typing import List, Sequence
 
 import tiktoken
 
@@ -8,6 +10,33 @@ def get_tokenizer(encoding: str = "o200k_base") -> tiktoken.Encoding:
     return tiktoken.get_encoding(encoding)
 
 
+# Any line break, like apoc.text.split(text, '\\R') in Neo4j
+_LINE_BREAK_RE = re.compile(r"\r\n|[\n\v\f\r\x85\u2028\u2029]")
+
+
+def split_lines(text: str) -> List[str]:
+    """Splits a text on any line break, to number the lines of the graph traversal tools."""
+    return _LINE_BREAK_RE.split(text)
+
+
+def join_chunks(chunks: Sequence[str]) -> str:
+    """Joins the consecutive chunks of a text, without the overlap of every chunk with the
+    previous one. The overlap is the longest, up to half of the previous chunk, with which
+    the previous chunk ends."""
+    text = chunks[0] if chunks else ""
+    for previous_chunk, chunk in zip(chunks, chunks[1:]):
+        overlap = next(
+            (
+                length
+                for length in range(min(len(previous_chunk) // 2, len(chunk)), 0, -1)
+                if previous_chunk.endswith(chunk[:length])
+            ),
+            0,
+        )
+        text += chunk[overlap:]
+    return text
+
+
 def pre_append_line_numbers(text: str, start_line: int) -> str:
     return "\n".join([f"{start_line + i}. {line}" for i, line in enumerate(text.splitlines())])
 
@@ -0,0 +1,348 @@
+"""Parsers that turn raw test framework output into compact structured results.
+
+Test commands run in the container often print thousands of lines, while the steps that
+consume them only need to know which tests passed and the logs of the tests that failed.
+The parsers in this module recognize the output of common test frameworks and extract
+exactly that, so that only failures have to be passed on to the LLM.
+"""
+
+import re
+import xml.etree.ElementTree as ET
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from typing import List, Optional, Sequence
+
+
+@dataclass
+class TestFailure:
+    """A single failed test and the part of the output that belongs to it."""
+
+    name: str
+    log: str = ""
+
+
+@dataclass
+class TestRunResult:
+    """The structured result of one test run.
+
+    The counts come from the summary printed by the framework when there is one, so they
+    can be larger than the number of named tests when the output is not verbose.
+    """
+
+    framework: str
+    passed: List[str] = field(default_factory=list)
+    failed: List[TestFailure] = field(default_factory=list)
+    num_passed: int = 0
+    num_failed: int = 0
+    num_skipped: int = 0
+
+    @property
+    def total(self) -> int:
+        return self.num_passed + self.num_failed
+
+    def format(self) -> str:
+        lines = [
+            f"Test results ({self.framework}): {self.num_failed} failed, "
+            f"{self.num_passed} passed, {self.num_skipped} skipped"
+        ]
+        if self.passed:
+            lines.append("Passed tests:")
+            lines.extend(self.passed)
+        if self.failed:
+            lines.append("Failed tests:")
+            for failure in self.failed:
+                lines.append(f"--- {failure.name} ---")
+                if failure.log:
+                    lines.append(failure.log)
+        return "\n".join(lines)
+
+
+class TestResultParser(ABC):
+    """Recognizes and parses the output of one test framework."""
+
+    framework: str
+
+    @abstractmethod
+    def parse(self, output: str) -> Optional[TestRunResult]:
+        """Parse the output of a test command.
+
+        Args:
+          output: The output of the command.
+
+        Returns:
+          The parsed result, or None if the output was not produced by this framework.
+        """
+        pass
+
+
+def _count(pattern: str, text: str) -> int:
+    match = re.search(pattern, text, re.MULTILINE)
+    return int(match.group(1)) if match else 0
+
+
+class JUnitXmlParser(TestResultParser):
+    """Parses JUnit XML reports, which most frameworks can produce (e.g. pytest --junitxml)."""
+
+    framework = "junit"
+
+    _REPORT_RE = re.compile(r"<testsuites?\b.*</testsuites?>", re.DOTALL)
+
+    def parse(self, output: str) -> Optional[TestRunResult]:
+        match = self._REPORT_RE.search(output)
+        if not match:
+            return None
+        try:
+            root = ET.fromstring(match.group(0))
+        except ET.ParseError:
+            return None
+
+        result = TestRunResult(self.framework)
+        for testcase in root.iter("testcase"):
+            name = ".".join(
+                part for part in (testcase.get("classname"), testcase.get("name")) if part
+            )
+            problem = testcase.find("failure")
+            if problem is None:
+                problem = testcase.find("error")
+            if problem is not None:
+                log = "\n".join(
+                    part.strip() for part in (problem.get("message"), problem.text) if part
+                )
+                result.failed.append(TestFailure(name, log))
+            elif testcase.find("skipped") is not None:
+                result.num_skipped += 1
+            else:
+                result.passed.append(name)
+        result.num_passed = len(result.passed)
+        result.num_failed = len(result.failed)
+        return result
+
+
+class PytestParser(TestResultParser):
+    framework = "pytest"
+
+    _SUMMARY_RE = re.compile(
+        r"^(?:=+ )?(.*\b(?:passed|failed|errors?|skipped|no tests ran)\b.*) in [\d.]+s\b.*$",
+        re.MULTILINE,
+    )
+    _STATUS_RE = re.compile(r"^(\S+::\S+) (PASSED|FAILED|ERROR)\b", re.MULTILINE)
+    _SHORT_SUMMARY_RE = re.compile(r"^(PASSED|FAILED|ERROR) (\S+::\S+)", re.MULTILINE)
+    _SECTION_RE = re.compile(r"^=+ (FAILURES|ERRORS) =+$", re.MULTILINE)
+    _BLOCK_HEADER_RE = re.compile(r"^_{3,} (.+?) _{3,}$", re.MULTILINE)
+
+    def parse(self, output: str) -> Optional[TestRunResult]:
+        summaries = self._SUMMARY_RE.findall(output)
+        if not summaries:
+            return None
+        summary = summaries[-1]
+
+        result = TestRunResult(
+            self.framework,
+            num_passed=_count(r"(\d+) passed", summary),
+            num_failed=_count(r"(\d+) failed", summary) + _count(r"(\d+) errors?", summary),
+            num_skipped=_count(r"(\d+) skipped", summary),
+        )
+
+        statuses = {}
+        for nodeid, status in self._STATUS_RE.findall(output):
+            statuses[nodeid] = status
+        for status, nodeid in self._SHORT_SUMMARY_RE.findall(output):
+            statuses[nodeid] = status
+        result.passed = [nodeid for nodeid, status in statuses.items() if status == "PASSED"]
+
+        blocks = self._failure_blocks(output)
+        for nodeid, status in statuses.items():
+            if status == "PASSED":
+                continue
+            dotted_nodeid = nodeid.replace("::", ".")
+            title = next(
+                (title for title in blocks if dotted_nodeid.endswith(f".{title}")),
+                None,
+            )
+            result.failed.append(TestFailure(nodeid, blocks.pop(title, "")))
+        # Blocks that do not belong to a known test, e.g. collection errors or all failures
+        # when the output was not verbose.
+        result.failed.extend(TestFailure(title, block) for title, block in blocks.items())
+        return result
+
+    def _failure_blocks(self, output: str) -> dict:
+        blocks = {}
+        for section in self._SECTION_RE.finditer(output):
+            section_end = re.compile(r"^=+ .* =+$", re.MULTILINE).search(output, section.end())
+            section_text = output[section.end() : section_end.start() if section_end else None]
+            headers = list(self._BLOCK_HEADER_RE.finditer(section_text))
+            for index, header in enumerate(headers):
+                block_end = headers[index + 1].start() if index + 1 < len(headers) else None
+                blocks[header.group(1)] = section_text[header.end() : block_end].strip("\n")
+        return blocks
+
+
+class GoTestParser(TestResultParser):
+    """Parses the output of go test -v."""
+
+    framework = "go test"
+
+    _RESULT_RE = re.compile(r"^\s*--- (PASS|FAIL|SKIP): (\S+)", re.MULTILINE)
+
+    def parse(self, output: str) -> Optional[TestRunResult]:
+        results = self._RESULT_RE.findall(output)
+        if not results:
+            return None
+
+        result = TestRunResult(self.framework)
+        for status, name in results:
+            if status == "PASS":
+                result.passed.append(name)
+            elif status == "SKIP":
+                result.num_skipped += 1
+            else:
+                result.failed.append(TestFailure(name, self._test_log(output, name)))
+        result.num_passed = len(result.passed)
+        result.num_failed = len(result.failed)
+        return result
+
+    @staticmethod
+    def _test_log(output: str, name: str) -> str:
+        match = re.search(
+            rf"^=== RUN\s+{re.escape(name)}$(.*?)^\s*--- FAIL: {re.escape(name)}\b[^\n]*",
+            output,
+            re.MULTILINE | re.DOTALL,
+        )
+        return match.group(0).strip("\n") if match else ""
+
+
+class CargoTestParser(TestResultParser):
+    framework = "cargo test"
+
+    _RESULT_RE = re.compile(r"^test (\S+) \.\.\. (ok|FAILED|ignored)", re.MULTILINE)
+    _SUMMARY_RE = re.compile(r"^test result: \w+\. (.*)$", re.MULTILINE)
+
+    def parse(self, output: str) -> Optional[TestRunResult]:
+        summaries = self._SUMMARY_RE.findall(output)
+        if not summaries:
+            return None
+
+        result = TestRunResult(self.framework)
+        for summary in summaries:
+            result.num_passed += _count(r"(\d+) passed", summary)
+            result.num_failed += _count(r"(\d+) failed", summary)
+            result.num_skipped += _count(r"(\d+) ignored", summary)
+        for name, status in self._RESULT_RE.findall(output):
+            if status == "ok":
+                result.passed.append(name)
+            elif status == "FAILED":
+                match = re.search(
+                    rf"^---- {re.escape(name)} stdout ----$(.*?)(?=^---- |^failures:$)",
+                    output,
+                    re.MULTILINE | re.DOTALL,
+                )
+                result.failed.append(TestFailure(name, match.group(1).strip("\n") if match else ""))
+        return result
+
+
+class JestParser(TestResultParser):
+    framework = "jest"
+
+    _SUMMARY_RE = re.compile(r"^Tests:\s+(.*\d+ total)$", re.MULTILINE)
+    _PASSED_RE = re.compile(r"^\s+[✓√] (.+?)(?: \(\d+ ?ms\))?$", re.MULTILINE)
+    _FAILED_RE = re.compile(r"^\s+[✕×] (.+?)(?: \(\d+ ?ms\))?$", re.MULTILINE)
+    _BLOCK_RE = re.compile(r"^\s+● (.+?)$(.*?)(?=^\s+● |^Test Suites:)", re.MULTILINE | re.DOTALL)
+
+    def parse(self, output: str) -> Optional[TestRunResult]:
+        summaries = self._SUMMARY_RE.findall(output)
+        if not summaries:
+            return None
+        summary = summaries[-1]
+
+        result = TestRunResult(
+            self.framework,
+            passed=self._PASSED_RE.findall(output),
+            num_passed=_count(r"(\d+) passed", summary),
+            num_failed=_count(r"(\d+) failed", summary),
+            num_skipped=_count(r"(\d+) skipped", summary) + _count(r"(\d+) todo", summary),
+        )
+        blocks = {title.strip(): log.strip("\n") for title, log in self._BLOCK_RE.findall(output)}
+        result.failed = [
+            TestFailure(title, log) for title, log in blocks.items() if title != "Console"
+        ]
+        if not result.failed:
+            result.failed = [TestFailure(name) for name in self._FAILED_RE.findall(output)]
+        return result
+
+
+class MochaParser(TestResultParser):
+    framework = "mocha"
+
+    _PASSING_RE = re.compile(r"^\s*(\d+) passing \(", re.MULTILINE)
+    _PASSED_RE = re.compile(r"^\s+[✓✔] (.+?)(?: \(\d+ ?ms\))?$", re.MULTILINE)
+    _FAILING_RE = re.compile(r"^\s*(\d+) failing$", re.MULTILINE)
+    _BLOCK_RE = re.compile(r"^\s+\d+\) (.+?)$(.*?)(?=^\s+\d+\) |\Z)", re.MULTILINE | re.DOTALL)
+
+    def parse(self, output: str) -> Optional[TestRunResult]:
+        passing = self._PASSING_RE.search(output)
+        if not passing:
+            return None
+
+        result = TestRunResult(
+            self.framework,
+            passed=self._PASSED_RE.findall(output),
+            num_passed=int(passing.group(1)),
+            num_skipped=_count(r"^\s*(\d+) pending$", output),
+        )
+        failing = self._FAILING_RE.search(output)
+        if failing:
+            result.num_failed = int(failing.group(1))
+            for title, log in self._BLOCK_RE.findall(output[failing.end() :]):
+                # The title of a failure is split over lines by suite, ending with a colon
+                title_lines = [title.strip()]
+                log_lines = log.strip("\n").splitlines()
+                while log_lines and not title_lines[-1].endswith(":"):
+                    title_lines.append(log_lines.pop(0).strip())
+                name = " ".join(title_lines).rstrip(":")
+                result.failed.append(TestFailure(name, "\n".join(log_lines)))
+        return result
+
+
+# Parsers are tried in order, so formats that are easy to misdetect come last.
+TEST_RESULT_PARSERS: Sequence[TestResultParser] = (
+    JUnitXmlParser(),
+    PytestParser(),
+    CargoTestParser(),
+    GoTestParser(),
+    JestParser(),
+    MochaParser(),
+)
+
+
+def parse_test_output(output: str) -> Optional[TestRunResult]:
+    """Parse the output of a test command with the first parser that recognizes it.
+
+    Args:
+      output: The output of the test command.
+
+    Returns:
+      The parsed result, or None if the output does not come from a supported framework.
+    """
+    for parser in TEST_RESULT_PARSERS:
+        result = parser.parse(output)
+        if result is not None:
+            return result
+    return None
+
+
+def compact_test_output(output: str) -> str:
+    """Replace the output of a test command with a compact summary of its results.
+
+    Output that cannot be parsed is returned unchanged, so no information is lost for
+    unsupported frameworks or for commands that are not test runs.
+
+    Args:
+      output: The output of a command.
+
+    Returns:
+      The summary of the test results, or the original output.
+    """
+    result = parse_test_output(output)
+    if result is None:
+        return output
+    return result.format()
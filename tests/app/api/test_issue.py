@@ -1,3 +1,4 @@
+from datetime import datetime
 from unittest import mock
 
 import pytest
@@ -5,9 +6,11 @@ from fastapi import FastAPI
 from fastapi.testclient import TestClient
 
 from prometheus.app.api.routes import issue
+from prometheus.app.entity.issue_job import IssueJob, IssueJobStatus
 from prometheus.app.entity.repository import Repository
 from prometheus.app.exception_handler import register_exception_handlers
 from prometheus.lang_graph.graphs.issue_state import IssueType
+from prometheus.models.issue_event import IssueEvent
 
 app = FastAPI()
 register_exception_handlers(app)
@@ -22,8 +25,8 @@ def mock_service():
     yield service
 
 
-def test_answer_issue(mock_service):
-    mock_service["repository_service"].get_repository_by_id.return_value = Repository(
+def create_repository():
+    return Repository(
         id=1,
         url="https://github.com/fake/repo.git",
         commit_id=None,
@@ -34,14 +37,16 @@ def test_answer_issue(mock_service):
         kg_chunk_size=1000,
         kg_chunk_overlap=100,
     )
-    mock_service["issue_service"].answer_issue.return_value = (
-        "test patch",  # patch
-        True,  # passed_reproducing_test
-        True,  # passed_build
-        True,  # passed_regression_test
-        True,  # passed_existing_test
-        "Issue fixed",  # issue_response
-        IssueType.BUG,  # issue_type
+
+
+def test_answer_issue(mock_service):
+    mock_service["repository_service"].get_repository_by_id.return_value = create_repository()
+    mock_service["issue_job_service"].submit_job.return_value = IssueJob(
+        id=1,
+        repository_id=1,
+        progress="Waiting for a free worker",
+        request="{}",
+        created_at=datetime(2025, 1, 1),
     )
 
     response = client.post(
@@ -58,15 +63,19 @@ def test_answer_issue(mock_service):
         "code": 200,
         "message": "success",
         "data": {
-            "patch": "test patch",
-            "passed_reproducing_test": True,
-            "passed_build": True,
-            "passed_regression_test": True,
-            "passed_existing_test": True,
-            "issue_response": "Issue fixed",
-            "issue_type": "bug",
+            "id": 1,
+            "repository_id": 1,
+            "status": "pending",
+            "progress": "Waiting for a free worker",
+            "error": None,
+            "created_at": "2025-01-01T00:00:00",
+            "started_at": None,
+            "finished_at": None,
+            "result": None,
         },
     }
+    issue = mock_service["issue_job_service"].submit_job.call_args.args[0]
+    assert issue.issue_title == "Test Issue"
 
 
 def test_answer_issue_no_repository(mock_service):
@@ -85,17 +94,7 @@ def test_answer_issue_no_repository(mock_service):
 
 
 def test_answer_issue_invalid_container_config(mock_service):
-    mock_service["repository_service"].get_repository_by_id.return_value = Repository(
-        id=1,
-        url="https://github.com/fake/repo.git",
-        commit_id=None,
-        playground_path="/path/to/playground",
-        kg_root_node_id=0,
-        user_id=None,
-        kg_max_ast_depth=100,
-        kg_chunk_size=1000,
-        kg_chunk_overlap=100,
-    )
+    mock_service["repository_service"].get_repository_by_id.return_value = create_repository()
 
     response = client.post(
         "/issue/answer/",
@@ -111,53 +110,125 @@ def test_answer_issue_invalid_container_config(mock_service):
     assert response.status_code == 400
 
 
-def test_answer_issue_with_container(mock_service):
-    mock_service["repository_service"].get_repository_by_id.return_value = Repository(
+def test_get_job(mock_service):
+    mock_service["issue_job_service"].get_job_by_id.return_value = IssueJob(
         id=1,
-        url="https://github.com/fake/repo.git",
-        commit_id=None,
-        playground_path="/path/to/playground",
-        kg_root_node_id=0,
-        user_id=None,
-        kg_max_ast_depth=100,
-        kg_chunk_size=1000,
-        kg_chunk_overlap=100,
+        repository_id=1,
+        status=IssueJobStatus.SUCCEEDED,
+        request="{}",
+        patch="test patch",
+        passed_reproducing_test=True,
+        passed_build=True,
+        passed_regression_test=True,
+        passed_existing_test=True,
+        issue_response="Issue fixed",
+        issue_type=IssueType.BUG,
+        created_at=datetime(2025, 1, 1),
+        started_at=datetime(2025, 1, 1, 0, 1),
+        finished_at=datetime(2025, 1, 1, 0, 30),
     )
 
-    mock_service["issue_service"].answer_issue.return_value = (
-        "test patch",
-        True,
-        True,
-        True,
-        True,
-        "Issue fixed",
-        IssueType.BUG,
-    )
+    response = client.get("/issue/job/", params={"job_id": 1})
 
-    test_payload = {
-        "repository_id": 1,
-        "issue_title": "Test Issue",
-        "issue_body": "Test description",
-        "dockerfile_content": "FROM python:3.11",
-        "run_reproduce_test": True,
-        "workdir": "/app",
-        "build_commands": ["pip install -r requirements.txt"],
-        "test_commands": ["pytest ."],
+    assert response.status_code == 200
+    data = response.json()["data"]
+    assert data["status"] == "succeeded"
+    assert data["finished_at"] == "2025-01-01T00:30:00"
+    assert data["result"] == {
+        "patch": "test patch",
+        "passed_reproducing_test": True,
+        "passed_build": True,
+        "passed_regression_test": True,
+        "passed_existing_test": True,
+        "issue_response": "Issue fixed",
+        "issue_type": "bug",
     }
 
-    response = client.post("/issue/answer/", json=test_payload)
+
+def test_get_job_not_found(mock_service):
+    mock_service["issue_job_service"].get_job_by_id.return_value = None
+
+    response = client.get("/issue/job/", params={"job_id": 1})
+
+    assert response.status_code == 404
+
+
+def test_stream_job(mock_service):
+    job = IssueJob(
+        id=1,
+        repository_id=1,
+        status=IssueJobStatus.SUCCEEDED,
+        request="{}",
+        created_at=datetime(2025, 1, 1),
+    )
+    mock_service["issue_job_service"].get_job_by_id.return_value = job
+    mock_service["issue_job_service"].wait_for_events.side_effect = [
+        ([IssueEvent(type="node", node="issue_classification_subgraph_node")], False),
+        ([IssueEvent(type="patch", node="edit_node", key="edit_patch", data="test patch")], True),
+    ]
+
+    response = client.get("/issue/job/stream/", params={"job_id": 1})
 
     assert response.status_code == 200
-    assert response.json() == {
-        "code": 200,
-        "message": "success",
-        "data": {
-            "patch": "test patch",
-            "passed_reproducing_test": True,
-            "passed_build": True,
-            "passed_regression_test": True,
-            "passed_existing_test": True,
-            "issue_response": "Issue fixed",
-            "issue_type": "bug",
-        },
-    }
+    assert response.headers["content-type"].startswith("text/event-stream")
+    messages = [message for message in response.text.split("\n\n") if message]
+    assert [message.splitlines()[0] for message in messages] == [
+        "event: node",
+        "event: patch",
+        "event: job",
+    ]
+    assert '"data":"test patch"' in messages[1]
+    assert '"status":"succeeded"' in messages[2]
+
+
+def test_cancel_job(mock_service):
+    job = IssueJob(
+        id=1,
+        repository_id=1,
+        status=IssueJobStatus.CANCELLED,
+        request="{}",
+        created_at=datetime(2025, 1, 1),
+    )
+    mock_service["issue_job_service"].get_job_by_id.return_value = job
+    mock_service["issue_job_service"].cancel_job.return_value = job
+
+    response = client.post("/issue/job/cancel/", params={"job_id": 1})
+
+    assert response.status_code == 200
+    assert response.json()["data"]["status"] == "cancelled"
+    mock_service["issue_job_service"].cancel_job.assert_called_once_with(1)
+
+
+def test_resume_job(mock_service):
+    job = IssueJob(
+        id=1,
+        repository_id=1,
+        status=IssueJobStatus.FAILED,
+        request="{}",
+        created_at=datetime(2025, 1, 1),
+    )
+    mock_service["issue_job_service"].get_job_by_id.return_value = job
+    mock_service["issue_job_service"].resume_job.return_value = job.model_copy(
+        update={"status": IssueJobStatus.PENDING}
+    )
+
+    response = client.post("/issue/job/resume/", params={"job_id": 1})
+
+    assert response.status_code == 200
+    assert response.json()["data"]["status"] == "pending"
+    mock_service["issue_job_service"].resume_job.assert_called_once_with(1)
+
+
+def test_resume_job_not_resumable(mock_service):
+    mock_service["issue_job_service"].get_job_by_id.return_value = IssueJob(
+        id=1,
+        repository_id=1,
+        status=IssueJobStatus.SUCCEEDED,
+        request="{}",
+        created_at=datetime(2025, 1, 1),
+    )
+
+    response = client.post("/issue/job/resume/", params={"job_id": 1})
+
+    assert response.status_code == 400
+    mock_service["issue_job_service"].resume_job.assert_not_called()
@@ -1,3 +1,5 @@
+from contextlib import nullcontext
+from datetime import datetime, timezone
 from unittest import mock
 from unittest.mock import AsyncMock, MagicMock
 
@@ -6,6 +8,7 @@ from fastapi import FastAPI
 from fastapi.testclient import TestClient
 
 from prometheus.app.api.routes import repository
+from prometheus.app.entity.knowledge_graph_deletion import KnowledgeGraphDeletion
 from prometheus.app.entity.repository import Repository
 from prometheus.app.exception_handler import register_exception_handlers
 
@@ -18,6 +21,8 @@ client = TestClient(app)
 @pytest.fixture
 def mock_service():
     service = mock.MagicMock()
+    service["repository_service"].has_active_lease.return_value = False
+    service["issue_job_service"].has_active_job.return_value = False
     app.state.service = service
     yield service
 
@@ -54,6 +59,9 @@ def test_create_branch_and_push(mock_service):
 
     # Let repository_service.get_repository return the mocked git_repo
     mock_service["repository_service"].get_repository.return_value = git_repo_mock
+    worktree_mock = MagicMock()
+    worktree_mock.create_and_push_branch = AsyncMock(return_value=None)
+    mock_service["repository_service"].checkout_worktree.return_value = nullcontext(worktree_mock)
 
     response = client.post(
         "/repository/create-branch-and-push/",
@@ -66,6 +74,8 @@ def test_create_branch_and_push(mock_service):
     )
 
     assert response.status_code == 200
+    worktree_mock.create_and_push_branch.assert_awaited_once()
+    git_repo_mock.create_and_push_branch.assert_not_called()
 
 
 def test_delete(mock_service):
@@ -80,9 +90,11 @@ def test_delete(mock_service):
         kg_chunk_size=1000,
         kg_chunk_overlap=100,
     )
-    mock_service["knowledge_graph_service"].clear_kg.return_value = None
     mock_service["repository_service"].clean_repository.return_value = None
-    mock_service["repository_service"].delete_repository.return_value = None
+    mock_service["repository_service"].delete_repository.return_value = KnowledgeGraphDeletion(
+        id=2, repository_id=1, kg_root_node_id=0
+    )
+    mock_service["repository_service"].delete_knowledge_graph = AsyncMock()
     response = client.delete(
         "repository/delete",
         params={
@@ -90,6 +102,8 @@ def test_delete(mock_service):
         },
     )
     assert response.status_code == 200
+    mock_service["context_cache_service"].clear.assert_called_once_with(0)
+    mock_service["repository_service"].delete_knowledge_graph.assert_awaited_once_with(2)
 
 
 def test_list(mock_service):
@@ -124,3 +138,34 @@ def test_list(mock_service):
             }
         ],
     }
+
+
+def test_list_deletions(mock_service):
+    mock_service["repository_service"].get_knowledge_graph_deletions.return_value = [
+        KnowledgeGraphDeletion(
+            id=2,
+            repository_id=1,
+            kg_root_node_id=0,
+            progress="Deleted 10 of 100 files",
+            created_time=datetime(2025, 1, 1, tzinfo=timezone.utc),
+        )
+    ]
+    response = client.get("repository/delete/list/")
+    assert response.status_code == 200
+    assert response.json()["data"] == [
+        {
+            "repository_id": 1,
+            "user_id": None,
+            "progress": "Deleted 10 of 100 files",
+            "created_time": "2025-01-01T00:00:00Z",
+        }
+    ]
+
+
+def test_delete_repository_in_use(mock_service):
+    mock_service["repository_service"].has_active_lease.return_value = True
+
+    response = client.delete("repository/delete", params={"repository_id": 1})
+
+    assert response.status_code == 400
+    mock_service["repository_service"].delete_repository.assert_not_called()
@@ -0,0 +1,34 @@
+from typing import TypedDict
+
+import pytest
+from langgraph.graph import END, StateGraph
+
+from prometheus.app.services.checkpoint_service import CheckpointService
+from tests.test_utils.fixtures import postgres_container_fixture  # noqa: F401
+
+
+class CounterState(TypedDict):
+    count: int
+
+
+@pytest.mark.slow
+def test_checkpoint_service(postgres_container_fixture):  # noqa: F811
+    url = postgres_container_fixture.get_connection_url()
+    checkpoint_service = CheckpointService(url, 2)
+    checkpoint_service.start()
+
+    try:
+        workflow = StateGraph(CounterState)
+        workflow.add_node("increment", lambda state: {"count": state["count"] + 1})
+        workflow.set_entry_point("increment")
+        workflow.add_edge("increment", END)
+        graph = workflow.compile(checkpointer=checkpoint_service.checkpointer)
+        config = {"configurable": {"thread_id": "test-thread"}}
+
+        graph.invoke({"count": 1}, config)
+        assert graph.get_state(config).values == {"count": 2}
+
+        checkpoint_service.delete_checkpoints("test-thread")
+        assert graph.get_state(config).values == {}
+    finally:
+        checkpoint_service.close()
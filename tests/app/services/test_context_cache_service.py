@@ -0,0 +1,54 @@
+import pytest
+
+from prometheus.app.services.context_cache_service import ContextCacheService
+from prometheus.app.services.database_service import DatabaseService
+from prometheus.models.context import Context
+from prometheus.utils.embedding_util import HashingEmbeddings
+from tests.test_utils.fixtures import postgres_container_fixture  # noqa: F401
+
+ISSUE = "KeyError in parse_config when the config file is empty"
+CONTEXTS = [
+    Context(
+        relative_path="config.py",
+        content="1. def parse_config(path): ...",
+        start_line_number=1,
+        end_line_number=1,
+    )
+]
+
+
+@pytest.fixture
+def mock_database_service(postgres_container_fixture):  # noqa: F811
+    service = DatabaseService(postgres_container_fixture.get_connection_url())
+    service.start()
+    yield service
+    service.close()
+
+
+def create_service(database_service):
+    return ContextCacheService(database_service, HashingEmbeddings(), similarity_threshold=0.8)
+
+
+def test_entries_are_persisted(mock_database_service):
+    create_service(mock_database_service).store(1, "bug_fix_context", "query", ISSUE, CONTEXTS)
+
+    # A new instance loads the entries from the database
+    service = create_service(mock_database_service)
+    hit = service.lookup(1, "bug_fix_context", "query", ISSUE)
+    similar_hit = service.lookup(1, "bug_fix_context", "other query", f"{ISSUE} on Windows")
+
+    assert hit.exact
+    assert hit.contexts == CONTEXTS
+    assert not similar_hit.exact
+    assert similar_hit.contexts == CONTEXTS
+
+
+def test_clear_deletes_persisted_entries(mock_database_service):
+    service = create_service(mock_database_service)
+    service.store(2, "bug_fix_context", "query", ISSUE, CONTEXTS)
+
+    service.clear(2)
+
+    assert (
+        create_service(mock_database_service).lookup(2, "bug_fix_context", "query", ISSUE) is None
+    )
@@ -0,0 +1,225 @@
+from unittest.mock import create_autospec
+
+import pytest
+from sqlmodel import Session
+
+from prometheus.app.entity.issue_job import IssueJob, IssueJobStatus
+from prometheus.app.entity.repository import Repository
+from prometheus.app.models.requests.issue import IssueRequest
+from prometheus.app.services.database_service import DatabaseService
+from prometheus.app.services.issue_job_service import IssueJobService
+from prometheus.app.services.issue_service import IssueService
+from prometheus.app.services.knowledge_graph_service import KnowledgeGraphService
+from prometheus.app.services.repository_service import RepositoryService
+from prometheus.app.services.user_service import UserService
+from prometheus.exceptions.issue_cancelled_exception import IssueCancelledException
+from prometheus.lang_graph.graphs.issue_state import IssueType
+from prometheus.models.issue_event import IssueEvent
+from tests.test_utils.fixtures import postgres_container_fixture  # noqa: F401
+
+
+@pytest.fixture
+def mock_database_service(postgres_container_fixture):  # noqa: F811
+    service = DatabaseService(postgres_container_fixture.get_connection_url())
+    service.start()
+    yield service
+    service.close()
+
+
+@pytest.fixture
+def mock_repository_service():
+    service = create_autospec(RepositoryService, instance=True)
+    service.get_repository_by_id.return_value = Repository(
+        id=1,
+        url="https://github.com/fake/repo.git",
+        commit_id=None,
+        playground_path="/path/to/playground",
+        kg_root_node_id=0,
+        user_id=None,
+        kg_max_ast_depth=100,
+        kg_chunk_size=1000,
+        kg_chunk_overlap=100,
+    )
+    return service
+
+
+@pytest.fixture
+def mock_issue_service():
+    return create_autospec(IssueService, instance=True)
+
+
+@pytest.fixture
+def mock_user_service():
+    service = create_autospec(UserService, instance=True)
+    service.get_issue_credit.return_value = 3
+    return service
+
+
+@pytest.fixture
+def service(mock_database_service, mock_repository_service, mock_issue_service, mock_user_service):
+    service = IssueJobService(
+        database_service=mock_database_service,
+        repository_service=mock_repository_service,
+        knowledge_graph_service=create_autospec(KnowledgeGraphService, instance=True),
+        issue_service=mock_issue_service,
+        user_service=mock_user_service,
+        max_workers=1,
+    )
+    yield service
+    service.close()
+
+
+def _submit_and_wait(service, user_id=None) -> IssueJob:
+    job = service.submit_job(
+        IssueRequest(repository_id=1, issue_title="Test Issue", issue_body="Test description"),
+        user_id,
+    )
+    service.executor.shutdown(wait=True)
+    return service.get_job_by_id(job.id)
+
+
+def test_submit_job_succeeds(service, mock_issue_service, mock_user_service):
+    mock_issue_service.answer_issue.return_value = (
+        "test patch",
+        True,
+        True,
+        True,
+        True,
+        "Issue fixed",
+        IssueType.BUG,
+    )
+
+    job = _submit_and_wait(service, user_id=7)
+
+    assert job.status == IssueJobStatus.SUCCEEDED
+    assert job.patch == "test patch"
+    assert job.issue_response == "Issue fixed"
+    assert job.issue_type == IssueType.BUG
+    assert job.started_at is not None
+    assert job.finished_at is not None
+    assert mock_issue_service.answer_issue.call_args.kwargs["issue_title"] == "Test Issue"
+    mock_user_service.update_issue_credit.assert_called_once_with(7, 2)
+    assert not service.has_active_job(1)
+
+
+def test_submit_job_fails(service, mock_issue_service, mock_user_service):
+    mock_issue_service.answer_issue.return_value = (None, False, False, False, False, None, None)
+
+    job = _submit_and_wait(service, user_id=7)
+
+    assert job.status == IssueJobStatus.FAILED
+    assert job.error == "Failed to process the issue. Please try again later."
+    mock_user_service.update_issue_credit.assert_not_called()
+
+
+def test_start_resumes_unfinished_jobs(service, mock_issue_service):
+    mock_issue_service.answer_issue.return_value = (
+        None,
+        False,
+        False,
+        False,
+        False,
+        "Answer",
+        IssueType.QUESTION,
+    )
+    request = IssueRequest(repository_id=1, issue_title="Test Issue", issue_body="Test description")
+    with Session(service.engine) as session:
+        job = IssueJob(
+            repository_id=1, status=IssueJobStatus.RUNNING, request=request.model_dump_json()
+        )
+        session.add(job)
+        session.commit()
+        session.refresh(job)
+
+    service.start()
+    service.executor.shutdown(wait=True)
+
+    assert service.get_job_by_id(job.id).status == IssueJobStatus.SUCCEEDED
+    assert mock_issue_service.answer_issue.call_args.kwargs["thread_id"] == f"issue-job-{job.id}"
+    assert not service.has_active_job(1)
+
+
+def test_resume_failed_job(service, mock_issue_service):
+    mock_issue_service.answer_issue.side_effect = [
+        (None, False, False, False, False, None, None),
+        ("test patch", False, False, False, False, "Issue fixed", IssueType.BUG),
+    ]
+    job = service.submit_job(
+        IssueRequest(repository_id=1, issue_title="Test Issue", issue_body="Test description"),
+        None,
+    )
+    # Wait for the first run to fail
+    service.executor.submit(lambda: None).result()
+    assert service.get_job_by_id(job.id).status == IssueJobStatus.FAILED
+
+    resumed_job = service.resume_job(job.id)
+    service.executor.shutdown(wait=True)
+
+    assert resumed_job.status == IssueJobStatus.PENDING
+    job = service.get_job_by_id(job.id)
+    assert job.status == IssueJobStatus.SUCCEEDED
+    assert job.error is None
+    thread_ids = [
+        call.kwargs["thread_id"] for call in mock_issue_service.answer_issue.call_args_list
+    ]
+    assert thread_ids == [f"issue-job-{job.id}", f"issue-job-{job.id}"]
+
+
+def test_close_leaves_running_job_to_resume(service, mock_issue_service):
+    def answer_issue(**kwargs):
+        service.close()
+        raise IssueCancelledException()
+
+    mock_issue_service.answer_issue.side_effect = answer_issue
+
+    job = _submit_and_wait(service)
+
+    assert job.status == IssueJobStatus.PENDING
+    assert service.has_active_job(1)
+
+
+def test_submit_job_records_events(service, mock_issue_service):
+    def answer_issue(**kwargs):
+        kwargs["event_callback"](IssueEvent(type="node", node="edit_node"))
+        kwargs["event_callback"](
+            IssueEvent(type="patch", node="edit_node", key="edit_patch", data="test patch")
+        )
+        return "test patch", False, False, False, False, "Issue fixed", IssueType.BUG
+
+    mock_issue_service.answer_issue.side_effect = answer_issue
+
+    job = _submit_and_wait(service)
+
+    events, finished = service.wait_for_events(job.id, 0, timeout=0)
+    assert [event.type for event in events] == ["node", "patch"]
+    assert finished
+    assert service.wait_for_events(job.id, 2, timeout=0) == ([], True)
+
+
+def test_cancel_running_job_keeps_last_patch(service, mock_issue_service):
+    def answer_issue(**kwargs):
+        kwargs["event_callback"](
+            IssueEvent(type="patch", node="edit_node", key="edit_patch", data="test patch")
+        )
+        raise IssueCancelledException()
+
+    mock_issue_service.answer_issue.side_effect = answer_issue
+
+    job = _submit_and_wait(service)
+
+    assert job.status == IssueJobStatus.CANCELLED
+    assert job.patch == "test patch"
+
+
+def test_cancel_pending_job(service, mock_issue_service):
+    with Session(service.engine) as session:
+        job = IssueJob(repository_id=1, request="{}")
+        session.add(job)
+        session.commit()
+        session.refresh(job)
+
+    cancelled_job = service.cancel_job(job.id)
+    service.run_job(job.id)
+
+    assert cancelled_job.status == IssueJobStatus.CANCELLED
+    mock_issue_service.answer_issue.assert_not_called()
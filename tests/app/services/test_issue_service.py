@@ -1,11 +1,16 @@
+import threading
+from contextlib import nullcontext
 from unittest.mock import Mock, create_autospec
 
 import pytest
 
+from prometheus.app.services.checkpoint_service import CheckpointService
+from prometheus.app.services.context_cache_service import ContextCacheService
 from prometheus.app.services.issue_service import IssueService
 from prometheus.app.services.llm_service import LLMService
 from prometheus.app.services.neo4j_service import Neo4jService
 from prometheus.app.services.repository_service import RepositoryService
+from prometheus.exceptions.issue_cancelled_exception import IssueCancelledException
 from prometheus.git.git_repository import GitRepository
 from prometheus.graph.knowledge_graph import KnowledgeGraph
 from prometheus.lang_graph.graphs.issue_state import IssueType
@@ -14,7 +19,7 @@ from prometheus.lang_graph.graphs.issue_state import IssueType
 @pytest.fixture
 def mock_neo4j_service():
     service = create_autospec(Neo4jService, instance=True)
-    service.neo4j_driver = Mock(name="mock_neo4j_driver")
+    service.graph_store = Mock(name="mock_graph_store")
     return service
 
 
@@ -29,15 +34,39 @@ def mock_llm_service():
 @pytest.fixture
 def mock_repository_service():
     service = create_autospec(RepositoryService, instance=True)
+    # Run in the repository itself instead of a worktree
+    service.checkout_worktree.side_effect = lambda repository_id, git_repo, holder: nullcontext(
+        git_repo
+    )
     return service
 
 
 @pytest.fixture
-def issue_service(mock_neo4j_service, mock_llm_service, mock_repository_service):
+def mock_checkpoint_service():
+    service = create_autospec(CheckpointService, instance=True)
+    service.checkpointer = Mock(name="mock_checkpointer")
+    return service
+
+
+@pytest.fixture
+def mock_context_cache_service():
+    return create_autospec(ContextCacheService, instance=True)
+
+
+@pytest.fixture
+def issue_service(
+    mock_neo4j_service,
+    mock_llm_service,
+    mock_repository_service,
+    mock_checkpoint_service,
+    mock_context_cache_service,
+):
     return IssueService(
         neo4j_service=mock_neo4j_service,
         llm_service=mock_llm_service,
         repository_service=mock_repository_service,
+        checkpoint_service=mock_checkpoint_service,
+        context_cache_service=mock_context_cache_service,
         max_token_per_neo4j_result=1000,
         working_directory="/tmp/working_dir/",
         logging_level="DEBUG",
@@ -98,11 +127,14 @@ async def test_answer_issue_with_general_container(issue_service, monkeypatch):
         base_model=issue_service.llm_service.base_model,
         kg=knowledge_graph,
         git_repo=repository,
-        neo4j_driver=issue_service.neo4j_service.neo4j_driver,
+        graph_store=issue_service.neo4j_service.graph_store,
         max_token_per_neo4j_result=issue_service.max_token_per_neo4j_result,
         container=mock_container,
         build_commands=None,
         test_commands=None,
+        checkpointer=None,
+        context_cache=issue_service.context_cache_service,
+        semantic_index=None,
     )
     assert result == ("test_patch", True, True, True, True, "test_response", IssueType.BUG)
 
@@ -167,3 +199,95 @@ async def test_answer_issue_with_user_defined_container(issue_service, monkeypat
         "test-image",
     )
     assert result == (None, False, False, False, False, "test_response", IssueType.QUESTION)
+
+
+async def test_answer_issue_with_checkpoints(issue_service, mock_checkpoint_service, monkeypatch):
+    # Setup
+    mock_issue_graph = Mock()
+    mock_issue_graph_class = Mock(return_value=mock_issue_graph)
+    monkeypatch.setattr("prometheus.app.services.issue_service.IssueGraph", mock_issue_graph_class)
+    monkeypatch.setattr("prometheus.app.services.issue_service.GeneralContainer", Mock())
+
+    repository = Mock(spec=GitRepository)
+    repository.get_working_directory.return_value = "mock/working/directory"
+
+    mock_issue_graph.invoke.return_value = {
+        "issue_type": IssueType.QUESTION,
+        "edit_patch": None,
+        "passed_reproducing_test": False,
+        "passed_build": False,
+        "passed_regression_test": False,
+        "passed_existing_test": False,
+        "issue_response": "test_response",
+    }
+
+    # Exercise
+    issue_service.answer_issue(
+        repository_id=1,
+        repository=repository,
+        knowledge_graph=Mock(spec=KnowledgeGraph),
+        issue_title="Test Issue",
+        issue_body="Test Body",
+        issue_comments=[],
+        issue_type=IssueType.QUESTION,
+        run_build=False,
+        run_regression_test=False,
+        run_existing_test=False,
+        run_reproduce_test=False,
+        number_of_candidate_patch=1,
+        build_commands=None,
+        test_commands=None,
+        thread_id="issue-job-1",
+    )
+
+    # Verify
+    assert (
+        mock_issue_graph_class.call_args.kwargs["checkpointer"]
+        == mock_checkpoint_service.checkpointer
+    )
+    assert mock_issue_graph.invoke.call_args.kwargs["thread_id"] == "issue-job-1"
+    mock_checkpoint_service.delete_checkpoints.assert_called_once_with("issue-job-1")
+
+
+async def test_answer_issue_cancelled_while_running_command(issue_service, monkeypatch):
+    # Setup
+    cancel_event = threading.Event()
+
+    def invoke(*args, **kwargs):
+        # The node fails once the command it runs is killed
+        cancel_event.set()
+        raise RuntimeError("Command was killed")
+
+    mock_issue_graph = Mock()
+    mock_issue_graph.invoke.side_effect = invoke
+    monkeypatch.setattr(
+        "prometheus.app.services.issue_service.IssueGraph", Mock(return_value=mock_issue_graph)
+    )
+    mock_container = Mock()
+    monkeypatch.setattr(
+        "prometheus.app.services.issue_service.GeneralContainer", Mock(return_value=mock_container)
+    )
+
+    repository = Mock(spec=GitRepository)
+    repository.get_working_directory.return_value = "mock/working/directory"
+
+    # Exercise and verify
+    with pytest.raises(IssueCancelledException):
+        issue_service.answer_issue(
+            repository_id=1,
+            repository=repository,
+            knowledge_graph=Mock(spec=KnowledgeGraph),
+            issue_title="Test Issue",
+            issue_body="Test Body",
+            issue_comments=[],
+            issue_type=IssueType.BUG,
+            run_build=False,
+            run_regression_test=False,
+            run_existing_test=False,
+            run_reproduce_test=False,
+            number_of_candidate_patch=1,
+            build_commands=None,
+            test_commands=None,
+            cancel_event=cancel_event,
+        )
+    assert mock_container.cancel_event is cancel_event
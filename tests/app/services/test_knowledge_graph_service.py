@@ -7,6 +7,8 @@ from prometheus.app.services.knowledge_graph_service import KnowledgeGraphServic
 from prometheus.app.services.neo4j_service import Neo4jService
 from prometheus.graph.knowledge_graph import KnowledgeGraph
 from prometheus.neo4j.knowledge_graph_handler import KnowledgeGraphHandler
+from prometheus.utils.embedding_util import HashingEmbeddings
+from tests.test_utils.fixtures import knowledge_graph_fixture  # noqa: F401
 
 
 @pytest.fixture
@@ -27,8 +29,9 @@ def mock_kg_handler():
 def knowledge_graph_service(mock_neo4j_service, mock_kg_handler):
     """Fixture to create KnowledgeGraphService instance."""
     mock_neo4j_service.neo4j_driver = MagicMock()  # Mocking Neo4j driver
-    mock_kg_handler.get_new_knowledge_graph_root_node_id = AsyncMock(return_value=123)
-    mock_kg_handler.write_knowledge_graph = AsyncMock()
+    mock_neo4j_service.graph_store = MagicMock()
+    mock_kg_handler.allocate_node_ids.return_value = 123
+    mock_kg_handler.write_knowledge_graph = MagicMock()
 
     knowledge_graph_service = KnowledgeGraphService(
         neo4j_service=mock_neo4j_service,
@@ -49,7 +52,7 @@ async def test_build_and_save_knowledge_graph(knowledge_graph_service, mock_kg_h
     # Mock KnowledgeGraph and its methods
     mock_kg = MagicMock(KnowledgeGraph)
     mock_kg.build_graph = AsyncMock(return_value=None)  # Mock async method to build graph
-    mock_kg_handler.get_new_knowledge_graph_root_node_id.return_value = 123
+    mock_kg_handler.allocate_node_ids.return_value = 123
     mock_kg_handler.write_knowledge_graph.return_value = None
 
     # When
@@ -63,19 +66,37 @@ async def test_build_and_save_knowledge_graph(knowledge_graph_service, mock_kg_h
             source_code_path
         )  # Check if build_graph was called correctly
         mock_kg_handler.write_knowledge_graph.assert_called_once()  # Ensure graph write happened
-        mock_kg_handler.get_new_knowledge_graph_root_node_id.assert_called_once()  # Ensure the root node ID was fetched
+        mock_kg_handler.allocate_node_ids.assert_called_once()  # Ensure the node IDs were allocated
 
 
-def test_clear_kg(knowledge_graph_service, mock_kg_handler):
+async def test_build_and_save_knowledge_graph_allocates_node_ids(
+    knowledge_graph_service, mock_kg_handler, tmp_path
+):
+    (tmp_path / "project").mkdir()
+    (tmp_path / "project" / "calculator.py").write_text("def add(a, b):\n    return a + b\n")
+
+    root_node_id = await knowledge_graph_service.build_and_save_knowledge_graph(
+        tmp_path / "project"
+    )
+
+    [(n_nodes,)] = [call.args for call in mock_kg_handler.allocate_node_ids.call_args_list]
+    [(kg,)] = [call.args for call in mock_kg_handler.write_knowledge_graph.call_args_list]
+    assert root_node_id == kg.root_node_id == 123
+    node_ids = sorted(kg_node.node_id for kg_node in kg._knowledge_graph_nodes)
+    assert node_ids == list(range(123, 123 + n_nodes))
+    assert kg.get_next_node_id() == 123 + n_nodes
+
+
+async def test_clear_kg(knowledge_graph_service, mock_kg_handler):
     """Test the clear_kg method."""
     # Given
     root_node_id = 123  # Mock root node ID
 
     # When
-    knowledge_graph_service.clear_kg(root_node_id)
+    await knowledge_graph_service.clear_kg(root_node_id)
 
     # Then
-    mock_kg_handler.clear_knowledge_graph.assert_called_once_with(root_node_id)
+    mock_kg_handler.clear_knowledge_graph.assert_called_once_with(root_node_id, None)
 
 
 def test_get_knowledge_graph(knowledge_graph_service, mock_kg_handler):
@@ -100,3 +121,72 @@ def test_get_knowledge_graph(knowledge_graph_service, mock_kg_handler):
         root_node_id, max_ast_depth, chunk_size, chunk_overlap
     )  # Ensure read_knowledge_graph is called with the correct parameters
     assert result == mock_kg  # Ensure the correct KnowledgeGraph object is returned
+
+
+async def test_get_semantic_index(
+    mock_neo4j_service,
+    tmp_path,
+    knowledge_graph_fixture,  # noqa: F811
+):
+    mock_neo4j_service.neo4j_driver = MagicMock()
+    mock_neo4j_service.graph_store = MagicMock()
+    knowledge_graph_service = KnowledgeGraphService(
+        mock_neo4j_service, 1000, 5, 1000, 100, HashingEmbeddings(), tmp_path / "semantic_index"
+    )
+
+    # A missing index is built in the background, the first issue goes without it
+    assert knowledge_graph_service.get_semantic_index(knowledge_graph_fixture) is None
+    knowledge_graph_service._semantic_index_executor.shutdown(wait=True)
+    assert (tmp_path / "semantic_index" / "0.npz").exists()
+
+    semantic_index = knowledge_graph_service.get_semantic_index(knowledge_graph_fixture)
+    assert len(semantic_index) > 0
+
+    knowledge_graph_service.kg_handler = MagicMock(KnowledgeGraphHandler)
+    await knowledge_graph_service.clear_kg(0)
+    assert not (tmp_path / "semantic_index" / "0.npz").exists()
+
+
+def test_get_semantic_index_disabled(knowledge_graph_service, knowledge_graph_fixture):  # noqa: F811
+    assert knowledge_graph_service.get_semantic_index(knowledge_graph_fixture) is None
+
+
+async def test_get_knowledge_graph_from_snapshot(
+    mock_neo4j_service,
+    tmp_path,
+    knowledge_graph_fixture,  # noqa: F811
+):
+    mock_neo4j_service.neo4j_driver = MagicMock()
+    mock_neo4j_service.graph_store = MagicMock()
+    knowledge_graph_service = KnowledgeGraphService(
+        mock_neo4j_service, 1000, 5, 1000, 100, snapshot_dir=tmp_path / "snapshots"
+    )
+    kg_handler = MagicMock(KnowledgeGraphHandler)
+    knowledge_graph_service.kg_handler = kg_handler
+    kg_handler.get_knowledge_graph_version.return_value = None
+    kg_handler.read_knowledge_graph.return_value = knowledge_graph_fixture
+
+    # The first load reads Neo4j, and writes a snapshot of a new version
+    assert knowledge_graph_service.get_knowledge_graph(0, 5, 1000, 100) is knowledge_graph_fixture
+    [(_, version)] = [call.args for call in kg_handler.set_knowledge_graph_version.call_args_list]
+    assert (tmp_path / "snapshots" / "0.kg").exists()
+
+    # The next loads use the snapshot, as long as the version matches
+    kg_handler.get_knowledge_graph_version.return_value = version
+    kg_handler.read_knowledge_graph.reset_mock()
+    loaded_kg = knowledge_graph_service.get_knowledge_graph(0, 5, 1000, 100)
+    kg_handler.read_knowledge_graph.assert_not_called()
+    assert loaded_kg.get_file_tree() == knowledge_graph_fixture.get_file_tree()
+
+    # The graph was built with full ASTs, it is still loaded with full ASTs once the
+    # knowledge graphs are built with selective ASTs
+    knowledge_graph_service.selective_ast = True
+    loaded_kg = knowledge_graph_service.get_knowledge_graph(0, 5, 1000, 100)
+    assert not loaded_kg.selective_ast
+    assert not loaded_kg.get_file_graph_builder().selective_ast
+
+    kg_handler.get_knowledge_graph_version.return_value = "other"
+    assert knowledge_graph_service.get_knowledge_graph(0, 5, 1000, 100) is knowledge_graph_fixture
+
+    await knowledge_graph_service.clear_kg(0)
+    assert not (tmp_path / "snapshots" / "0.kg").exists()
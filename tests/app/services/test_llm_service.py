@@ -2,7 +2,13 @@ from unittest.mock import Mock, patch
 
 import pytest
 
-from prometheus.app.services.llm_service import CustomChatOpenAI, LLMService, get_model
+from prometheus.app.services.llm_service import (
+    CustomChatOpenAI,
+    LLMService,
+    get_embeddings,
+    get_model,
+)
+from prometheus.utils.embedding_util import HashingEmbeddings
 
 
 @pytest.fixture
@@ -129,6 +135,22 @@ def test_get_model_gemini(mock_chat_google):
     )
 
 
+def test_get_embeddings():
+    # Exercise
+    with patch("prometheus.app.services.llm_service.OpenAIEmbeddings") as mock_openai_embeddings:
+        get_embeddings("text-embedding-3-small", "openai-key", "https://api.example.com/v1")
+
+    # Verify
+    assert get_embeddings("none") is None
+    assert isinstance(get_embeddings("hashing"), HashingEmbeddings)
+    mock_openai_embeddings.assert_called_once_with(
+        model="text-embedding-3-small",
+        api_key="openai-key",
+        base_url="https://api.example.com/v1",
+        max_retries=3,
+    )
+
+
 def test_custom_chat_openai_bind_tools():
     # Setup
     model = CustomChatOpenAI(api_key="test-key", max_input_tokens=64000)
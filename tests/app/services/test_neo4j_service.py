@@ -1,6 +1,7 @@
 import pytest
 
 from prometheus.app.services.neo4j_service import Neo4jService
+from prometheus.neo4j.neo4j_graph_store import Neo4jGraphStore
 from tests.test_utils.fixtures import neo4j_container_with_kg_fixture  # noqa: F401
 
 
@@ -15,3 +16,5 @@ async def test_neo4j_service(neo4j_container_with_kg_fixture):  # noqa: F811
         neo4j_service.neo4j_driver.verify_connectivity()
     except Exception as e:
         pytest.fail(f"Connection verification failed: {e}")
+    assert isinstance(neo4j_service.graph_store, Neo4jGraphStore)
+    assert neo4j_service.graph_store.find_file_nodes(kg.root_node_id, basename="test.py")
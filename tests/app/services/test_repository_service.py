@@ -1,9 +1,12 @@
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
 from unittest.mock import create_autospec, patch
 
 import pytest
+from sqlmodel import Session
 
 from prometheus.app.entity.repository import Repository
+from prometheus.app.entity.repository_lease import RepositoryLease
 from prometheus.app.services.database_service import DatabaseService
 from prometheus.app.services.knowledge_graph_service import KnowledgeGraphService
 from prometheus.app.services.repository_service import RepositoryService
@@ -184,3 +187,69 @@ def test_get_all_repositories(service):
     repos = service.get_all_repositories()
     # Verify
     assert len(repos) == 1
+
+
+def test_acquire_and_release_lease(service):
+    lease = service.acquire_lease(repository_id=42, holder="test")
+
+    assert Path(lease.worktree_path).parent == service.worktree_directory
+    assert service.has_active_lease(42)
+    assert service.renew_lease(lease.id)
+
+    service.release_lease(lease.id)
+
+    assert not service.has_active_lease(42)
+    assert not service.renew_lease(lease.id)
+
+
+def test_clean_expired_leases(service):
+    lease = service.acquire_lease(repository_id=43, holder="crashed run")
+    with Session(service.engine) as session:
+        db_lease = session.get(RepositoryLease, lease.id)
+        db_lease.expiration_time = datetime.now(timezone.utc) - timedelta(seconds=1)
+        session.add(db_lease)
+        session.commit()
+
+    assert not service.has_active_lease(43)
+
+    service.clean_expired_leases()
+
+    with Session(service.engine) as session:
+        assert session.get(RepositoryLease, lease.id) is None
+
+
+def test_checkout_worktree(service, mock_git_repository):
+    with service.checkout_worktree(44, mock_git_repository, "test") as worktree:
+        assert worktree == mock_git_repository.create_worktree.return_value
+        assert service.has_active_lease(44)
+
+    worktree_path = mock_git_repository.create_worktree.call_args.args[0]
+    mock_git_repository.remove_worktree.assert_called_once_with(worktree_path)
+    assert not service.has_active_lease(44)
+
+
+async def test_delete_repository_and_knowledge_graph(service, mock_kg_service):
+    repository_id = service.create_new_repository(
+        url="https://github.com/test/deleted",
+        commit_id="def456",
+        playground_path="/tmp/repositories/deleted",
+        user_id=None,
+        kg_root_node_id=100,
+    )
+
+    deletion = service.delete_repository(service.get_repository_by_id(repository_id))
+
+    # The deletion of the knowledge graph is recorded with the deletion of the repository
+    assert service.get_repository_by_id(repository_id) is None
+    assert [d.kg_root_node_id for d in service.get_knowledge_graph_deletions()] == [100]
+
+    async def clear_kg(root_node_id, progress_callback):
+        progress_callback(1, 2)
+        [pending_deletion] = service.get_knowledge_graph_deletions()
+        assert pending_deletion.progress == "Deleted 1 of 2 files"
+
+    mock_kg_service.clear_kg.side_effect = clear_kg
+    await service.delete_knowledge_graph(deletion.id)
+
+    mock_kg_service.clear_kg.assert_awaited_once()
+    assert service.get_knowledge_graph_deletions() == []
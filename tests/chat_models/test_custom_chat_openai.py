@@ -0,0 +1,40 @@
+from langchain_core.tools import StructuredTool
+
+from prometheus.chat_models.custom_chat_openai import CustomChatOpenAI
+from prometheus.utils.lang_graph_util import READ_ONLY_TOOL_METADATA
+
+
+def read_file(relative_path: str) -> str:
+    """Reads a file."""
+    return ""
+
+
+def edit_file(relative_path: str, content: str) -> str:
+    """Edits a file."""
+    return ""
+
+
+READ_FILE_TOOL = StructuredTool.from_function(read_file, metadata=READ_ONLY_TOOL_METADATA)
+EDIT_FILE_TOOL = StructuredTool.from_function(edit_file)
+
+
+def create_model():
+    return CustomChatOpenAI(max_input_tokens=1000, model="gpt-4o", api_key="test")
+
+
+def test_bind_read_only_tools_in_parallel():
+    bound_model = create_model().bind_tools([READ_FILE_TOOL])
+
+    assert bound_model.kwargs["parallel_tool_calls"] is True
+
+
+def test_bind_other_tools_sequentially():
+    bound_model = create_model().bind_tools([READ_FILE_TOOL, EDIT_FILE_TOOL])
+
+    assert bound_model.kwargs["parallel_tool_calls"] is False
+
+
+def test_bind_tools_with_explicit_parallel_tool_calls():
+    bound_model = create_model().bind_tools([READ_FILE_TOOL], parallel_tool_calls=False)
+
+    assert bound_model.kwargs["parallel_tool_calls"] is False
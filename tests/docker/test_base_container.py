@@ -1,11 +1,19 @@
+import asyncio
+import io
 import shutil
+import tarfile
 import tempfile
+import threading
 from pathlib import Path
-from unittest.mock import Mock, call, patch
+from unittest.mock import MagicMock, Mock, patch
 
+import docker
 import pytest
+from git import Repo
 
-from prometheus.docker.base_container import BaseContainer
+from prometheus.docker import base_container
+from prometheus.docker.base_container import BaseContainer, HeadTailBuffer
+from prometheus.git.git_repository import GitRepository
 
 
 class TestContainer(BaseContainer):
@@ -49,6 +57,27 @@ def container(temp_project_dir, mock_docker_client):
     return container
 
 
+def test_worktree_copy_has_standalone_git_repository(mock_docker_client, tmp_path):
+    """Test that the copy of a git worktree works with git without the main repository"""
+    repo = Repo.init(tmp_path / "repository")
+    (tmp_path / "repository" / "main.py").write_text("print('hello')\n")
+    repo.index.add(["main.py"])
+    repo.index.commit("Initial commit")
+    git_repo = GitRepository()
+    git_repo.from_local_repository(tmp_path / "repository")
+    worktree = git_repo.create_worktree(tmp_path / "worktree")
+
+    container = TestContainer(worktree.get_working_directory())
+    git_repo.remove_worktree(tmp_path / "worktree")
+
+    assert (container.project_path / ".git").is_dir()
+    copied_repo = Repo(container.project_path)
+    assert not copied_repo.is_dirty(untracked_files=True)
+    (container.project_path / "test.c").write_text("int main() { return 0; }")
+    assert "test.c" in copied_repo.git.status("--porcelain")
+    shutil.rmtree(container.project_path.parent)
+
+
 def test_get_dockerfile_content(container):
     """Test that get_dockerfile_content returns expected content"""
     dockerfile_content = container.get_dockerfile_content()
@@ -60,16 +89,122 @@ def test_get_dockerfile_content(container):
 
 def test_build_docker_image(container, mock_docker_client):
     """Test building Docker image"""
+    # Setup
+    mock_docker_client.images.get.side_effect = docker.errors.ImageNotFound("not found")
+
     # Execute
     container.build_docker_image()
 
     # Verify
-    assert (container.project_path / "prometheus.Dockerfile").exists()
+    dockerfile_path = container.project_path / "prometheus.Dockerfile"
+    assert dockerfile_path.read_text() == container.get_dockerfile_content()
     mock_docker_client.images.build.assert_called_once_with(
         path=str(container.project_path), dockerfile="prometheus.Dockerfile", tag=container.tag_name
     )
 
 
+def test_build_docker_image_from_cached_environment(container, mock_docker_client):
+    """Test that a cached environment is used as the base image"""
+    # Setup
+    mock_docker_client.images.get.return_value.labels = {
+        "prometheus.setup_commands": '["pip install -r requirements.txt"]',
+        "prometheus.test_commands": '["pytest tests"]',
+    }
+
+    # Execute
+    container.build_docker_image()
+
+    # Verify
+    dockerfile_content = (container.project_path / "prometheus.Dockerfile").read_text()
+    assert dockerfile_content.startswith(
+        f"FROM prometheus_environment_cache:{container._environment_cache_key}\n"
+    )
+    assert dockerfile_content.index("git ls-files") < dockerfile_content.index("COPY . /app/")
+    assert container.cached_setup_commands == ["pip install -r requirements.txt"]
+    assert container.cached_test_commands == ["pytest tests"]
+
+
+def test_save_environment_cache(container, mock_docker_client):
+    """Test that new successful setup commands are committed with the environment"""
+    # Setup
+    mock_docker_client.images.get.side_effect = docker.errors.ImageNotFound("not found")
+    container.build_docker_image()
+    container.container = Mock()
+    container.container.exec_run.return_value = Mock(exit_code=0)
+    mock_docker_client.images.list.return_value = []
+    container._record_command("pip install -r requirements.txt", 0)
+    container._record_command("pip install missing-package", 1)
+    container._record_command("pytest tests", 1)
+
+    # Execute
+    with patch("prometheus.docker.environment_cache.time.time", return_value=1000):
+        container.save_environment_cache()
+
+    # Verify
+    [(reset_command,)] = [call.args for call in container.container.exec_run.call_args_list]
+    assert "git reset -q --hard" in reset_command[-1]
+    container.container.commit.assert_called_once_with(
+        repository="prometheus_environment_cache",
+        tag=container._environment_cache_key,
+        conf={
+            "Labels": {
+                "prometheus.setup_commands": '["pip install -r requirements.txt"]',
+                "prometheus.test_commands": '["pytest tests"]',
+                "prometheus.saved_at": "1000",
+            }
+        },
+    )
+
+
+def test_save_environment_cache_without_reset(container):
+    """Test that nothing is committed when the workdir cannot be reset"""
+    container._environment_cache_key = "key"
+    container.container = Mock()
+    container.container.exec_run.return_value = Mock(exit_code=128, output=b"not a git repo")
+    container._record_command("pip install -r requirements.txt", 0)
+
+    container.save_environment_cache()
+
+    container.container.commit.assert_not_called()
+
+
+def test_save_environment_cache_evicts_old_environments(container, mock_docker_client):
+    """Test that the environments over the age and size limits are evicted"""
+    container._environment_cache_key = "key"
+    container.container = Mock()
+    container.container.exec_run.return_value = Mock(exit_code=0)
+    container._record_command("pip install -r requirements.txt", 0)
+    now = 100 * 24 * 60 * 60
+    images = [
+        Mock(id=image_id, labels={"prometheus.saved_at": str(saved_at)}, attrs={"Size": size})
+        for image_id, saved_at, size in [
+            ("new", now, 30 * 1024**3),
+            ("large", now - 60, 30 * 1024**3),
+            ("old", now - 30 * 24 * 60 * 60, 1024),
+            ("recent", now - 120, 1024),
+        ]
+    ]
+    mock_docker_client.images.list.return_value = images
+
+    with patch("prometheus.docker.base_container.time.time", return_value=now):
+        container.save_environment_cache()
+
+    removed_images = {call.args[0] for call in mock_docker_client.images.remove.call_args_list}
+    assert removed_images == {"large", "old"}
+
+
+def test_save_environment_cache_without_new_setup_commands(container):
+    """Test that nothing is committed when no new setup command succeeded"""
+    container._environment_cache_key = "key"
+    container.container = Mock()
+    container.cached_setup_commands = ["pip install -r requirements.txt"]
+    container._record_command("pip install -r requirements.txt", 0)
+
+    container.save_environment_cache()
+
+    container.container.commit.assert_not_called()
+
+
 def test_start_container(container, mock_docker_client):
     """Test starting Docker container"""
     # Setup mock
@@ -122,32 +257,167 @@ def test_update_files(container, temp_project_dir):
     container.update_files(temp_project_dir, updated_files, removed_files)
 
     # Verify
-    mock_execute.assert_has_calls(
-        [call("rm dir3/old.txt"), call("mkdir -p dir1"), call("mkdir -p dir2")]
-    )
-    assert container.container.put_archive.called
+    mock_execute.assert_called_once_with("rm -rf -- dir3/old.txt && mkdir -p -- dir1 dir2")
+    container.container.put_archive.assert_called_once()
+    workdir, tar_bytes = container.container.put_archive.call_args.args
+    assert workdir == container.workdir
+    with tarfile.open(fileobj=io.BytesIO(tar_bytes)) as tar:
+        assert sorted(tar.getnames()) == ["dir1/test1.txt", "dir2/test2.txt"]
+        assert tar.extractfile("dir1/test1.txt").read() == b"test1"
+
+
+def test_update_files_skips_unchanged_files(container, temp_project_dir):
+    """Test that only files changed since the last sync are copied"""
+    # Setup
+    container.container = Mock()
+    container.execute_command = Mock()
+
+    test_file1 = temp_project_dir / "test1.txt"
+    test_file2 = temp_project_dir / "test2.txt"
+    test_file1.write_text("test1")
+    test_file2.write_text("test2")
+    updated_files = [Path("test1.txt"), Path("test2.txt")]
 
+    container.update_files(temp_project_dir, updated_files, [])
+    container.container.put_archive.reset_mock()
 
-def test_execute_command(container):
+    # Execute
+    test_file2.write_text("test2 changed")
+    container.update_files(temp_project_dir, updated_files, [])
+
+    # Verify
+    container.execute_command.assert_not_called()
+    _, tar_bytes = container.container.put_archive.call_args.args
+    with tarfile.open(fileobj=io.BytesIO(tar_bytes)) as tar:
+        assert tar.getnames() == ["test2.txt"]
+
+    # Nothing changed, so nothing is sent
+    container.container.put_archive.reset_mock()
+    container.update_files(temp_project_dir, updated_files, [])
+    container.container.put_archive.assert_not_called()
+
+
+def test_execute_command(container, mock_docker_client):
     """Test executing command in container"""
     # Setup
-    mock_container = Mock()
-    mock_exec_result = Mock()
-    mock_exec_result.exit_code = 0
-    mock_exec_result.output = b"command output"
-    mock_container.exec_run.return_value = mock_exec_result
-    container.container = mock_container
+    container.container = Mock()
+    mock_docker_client.api.exec_create.return_value = {"Id": "exec_id"}
+    mock_docker_client.api.exec_start.return_value = iter([b"command ", b"output"])
+    mock_docker_client.api.exec_inspect.return_value = {"ExitCode": 0}
 
     # Execute
     result = container.execute_command("test command")
 
     # Verify
-    mock_container.exec_run.assert_called_once_with(
-        "timeout -k 5 120s /bin/bash -lc test command", workdir=container.workdir
-    )
+    exec_create_args = mock_docker_client.api.exec_create.call_args
+    assert exec_create_args.args[0] == container.container.id
+    assert exec_create_args.args[1][-1] == "test command"
+    assert "timeout -k 5 120s /bin/bash -lc" in exec_create_args.args[1][2]
+    assert exec_create_args.kwargs == {"workdir": container.workdir}
+    mock_docker_client.api.exec_start.assert_called_once_with("exec_id", stream=True)
     assert result == "command output"
 
 
+def test_execute_command_timeout(container, mock_docker_client):
+    """Test that a timed out command reports the timeout"""
+    container.container = Mock()
+    mock_docker_client.api.exec_create.return_value = {"Id": "exec_id"}
+    mock_docker_client.api.exec_start.return_value = iter([b"partial output"])
+    mock_docker_client.api.exec_inspect.return_value = {"ExitCode": 124}
+
+    result = container.execute_command("sleep 1000")
+
+    assert result.startswith("partial output")
+    assert "sleep 1000 timeout after 120 seconds" in result
+
+
+def test_execute_command_keeps_head_and_tail(container, mock_docker_client):
+    """Test that long outputs are truncated in the middle"""
+    container.container = Mock()
+    mock_docker_client.api.exec_create.return_value = {"Id": "exec_id"}
+    mock_docker_client.api.exec_start.return_value = iter([b"a" * 100, b"b" * 100, b"c" * 100])
+    mock_docker_client.api.exec_inspect.return_value = {"ExitCode": 0}
+
+    result = container.execute_command("test command", max_output_bytes=100)
+
+    assert result == "a" * 50 + "\n... [200 bytes of output truncated] ...\n" + "c" * 50
+
+
+def test_stream_command_kills_command_when_closed_early(container, mock_docker_client):
+    """Test that abandoning the stream kills the command in the container"""
+    container.container = Mock()
+    mock_docker_client.api.exec_create.return_value = {"Id": "exec_id"}
+    mock_output = MagicMock()
+    mock_output.__iter__.return_value = iter([b"first", b"second"])
+    mock_docker_client.api.exec_start.return_value = mock_output
+    mock_docker_client.api.exec_inspect.return_value = {"Running": False, "ExitCode": 0}
+
+    stream = container.stream_command("pytest tests")
+    assert next(stream) == b"first"
+    stream.close()
+
+    mock_output.close.assert_called_once()
+    kill_command = container.container.exec_run.call_args.args[0]
+    assert "kill -TERM" in kill_command[-1]
+    # The killed command is not recorded as a successful one
+    assert container.successful_test_commands == []
+
+
+def test_stream_command_kills_command_cancelled_before_its_pid_file(
+    container, mock_docker_client, monkeypatch
+):
+    """Test that the kill is retried until the command has written its pid file"""
+    monkeypatch.setattr(base_container, "KILL_RETRY_INTERVAL", 0.01)
+    container.container = Mock()
+    mock_docker_client.api.exec_create.return_value = {"Id": "exec_id"}
+    killed = threading.Event()
+    kill_attempts = []
+
+    def exec_run(command):
+        kill_attempts.append(command)
+        # The pid file does not exist yet at the first attempt
+        if len(kill_attempts) > 1:
+            killed.set()
+
+    def output():
+        killed.wait(10)
+        yield b"partial output"
+
+    container.container.exec_run.side_effect = exec_run
+    mock_docker_client.api.exec_inspect.side_effect = lambda exec_id: {
+        "Running": not killed.is_set(),
+        "ExitCode": 143,
+    }
+    mock_docker_client.api.exec_start.return_value = output()
+    cancel_event = threading.Event()
+    cancel_event.set()
+
+    result = container.execute_command("sleep 1000", cancel_event=cancel_event)
+
+    assert killed.is_set()
+    assert len(kill_attempts) == 2
+    assert result == "partial output\nsleep 1000 was cancelled\n"
+
+
+def test_head_tail_buffer_without_limit():
+    """Test that the buffer keeps everything when no limit is given"""
+    buffer = HeadTailBuffer()
+    buffer.write(b"hello ")
+    buffer.write("w\u00f6rld".encode("utf-8"))
+
+    assert buffer.truncated_bytes == 0
+    assert buffer.getvalue() == "hello w\u00f6rld"
+
+
+def test_head_tail_buffer_keeps_character_split_between_head_and_tail():
+    """Test that a character split between the head and the tail is decoded whole"""
+    buffer = HeadTailBuffer(max_bytes=3)
+    buffer.write("a\u00f6".encode("utf-8"))
+
+    assert buffer.truncated_bytes == 0
+    assert buffer.getvalue() == "a\u00f6"
+
+
 def test_restart_container(container):
     """Test container restart"""
     # Setup
@@ -178,3 +448,53 @@ def test_cleanup(container, mock_docker_client):
     mock_container.remove.assert_called_once_with(force=True)
     mock_docker_client.images.remove.assert_called_once_with(container.tag_name, force=True)
     assert not container.project_path.exists()
+
+
+@pytest.mark.asyncio
+async def test_astream_command(container, mock_docker_client):
+    """Test streaming command output asynchronously"""
+    container.container = Mock()
+    mock_docker_client.api.exec_create.return_value = {"Id": "exec_id"}
+    mock_docker_client.api.exec_start.return_value = iter([b"first", b"second"])
+    mock_docker_client.api.exec_inspect.return_value = {"ExitCode": 0}
+
+    chunks = [chunk async for chunk in container.astream_command("test command")]
+
+    assert chunks == [b"first", b"second"]
+
+
+@pytest.mark.asyncio
+async def test_astream_command_kills_command_when_cancelled(container, mock_docker_client):
+    """Test that cancelling the consumer kills the command and closes its output"""
+    container.container = Mock()
+    mock_docker_client.api.exec_create.return_value = {"Id": "exec_id"}
+    killed = threading.Event()
+    container.container.exec_run.side_effect = lambda *args, **kwargs: killed.set()
+    mock_docker_client.api.exec_inspect.side_effect = lambda exec_id: {
+        "Running": not killed.is_set(),
+        "ExitCode": 143,
+    }
+
+    def output():
+        yield b"first"
+        # Blocks like a running command until it is killed
+        killed.wait(10)
+        yield b"second"
+
+    mock_output = MagicMock()
+    mock_output.__iter__.return_value = output()
+    mock_docker_client.api.exec_start.return_value = mock_output
+    first_chunk = asyncio.Event()
+
+    async def consume():
+        async for _ in container.astream_command("test command"):
+            first_chunk.set()
+
+    task = asyncio.create_task(consume())
+    await first_chunk.wait()
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+
+    assert killed.is_set()
+    mock_output.close.assert_called_once()
@@ -0,0 +1,64 @@
+from prometheus.docker.environment_cache import (
+    get_environment_cache_key,
+    is_setup_command,
+    is_test_command,
+)
+
+
+def test_get_environment_cache_key_depends_on_manifests(tmp_path):
+    (tmp_path / "main.py").write_text("print('hello')")
+    (tmp_path / "requirements.txt").write_text("requests==2.32.3")
+    key = get_environment_cache_key(tmp_path, "FROM ubuntu:24.04")
+
+    # Source changes keep the key
+    (tmp_path / "main.py").write_text("print('world')")
+    assert get_environment_cache_key(tmp_path, "FROM ubuntu:24.04") == key
+
+    # Dependency or Dockerfile changes invalidate it
+    assert get_environment_cache_key(tmp_path, "FROM ubuntu:22.04") != key
+    (tmp_path / "requirements.txt").write_text("requests==2.32.4")
+    assert get_environment_cache_key(tmp_path, "FROM ubuntu:24.04") != key
+
+
+def test_get_environment_cache_key_ignores_installed_dependencies(tmp_path):
+    key = get_environment_cache_key(tmp_path, "FROM ubuntu:24.04")
+
+    (tmp_path / "node_modules" / "left-pad").mkdir(parents=True)
+    (tmp_path / "node_modules" / "left-pad" / "package.json").write_text("{}")
+
+    assert get_environment_cache_key(tmp_path, "FROM ubuntu:24.04") == key
+
+
+def test_get_environment_cache_key_depends_on_repository(tmp_path):
+    # Two repositories without dependency manifests, built from the same Dockerfile
+    (tmp_path / "a").mkdir()
+    (tmp_path / "a" / "main.c").write_text("int main() { return 0; }")
+    (tmp_path / "b").mkdir()
+    (tmp_path / "b" / "index.html").write_text("<html></html>")
+
+    assert get_environment_cache_key(tmp_path / "a", "FROM ubuntu:24.04") != (
+        get_environment_cache_key(tmp_path / "b", "FROM ubuntu:24.04")
+    )
+    # Even with the same files
+    (tmp_path / "b" / "index.html").rename(tmp_path / "b" / "main.c")
+    assert get_environment_cache_key(tmp_path / "a", "FROM ubuntu:24.04", 1) != (
+        get_environment_cache_key(tmp_path / "b", "FROM ubuntu:24.04", 2)
+    )
+    assert get_environment_cache_key(tmp_path / "a", "FROM ubuntu:24.04", 1) == (
+        get_environment_cache_key(tmp_path / "a", "FROM ubuntu:24.04", 1)
+    )
+
+
+def test_is_setup_command():
+    assert is_setup_command("pip install -r requirements.txt")
+    assert is_setup_command("cd frontend && npm ci")
+    assert is_setup_command("python -m pip install -e .")
+    assert not is_setup_command("pytest tests")
+    assert not is_setup_command("cat setup.py")
+
+
+def test_is_test_command():
+    assert is_test_command("python -m pytest tests/test_api.py")
+    assert is_test_command("npm test")
+    assert is_test_command("go test ./...")
+    assert not is_test_command("pip install pytest-cov")
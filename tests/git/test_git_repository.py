@@ -162,3 +162,28 @@ def test_remove_repository(git_repo_fixture):  # noqa: F811
 
         mock_rmtree.assert_called_once_with(local_path)
         assert git_repo.repo is None
+
+
+@pytest.mark.skipif(
+    sys.platform.startswith("win"),
+    reason="Test fails on Windows because of cptree in git_repo_fixture",
+)
+@pytest.mark.git
+def test_create_and_remove_worktree(git_repo_fixture, tmp_path):  # noqa: F811
+    local_path = Path(git_repo_fixture.working_dir)
+    git_repo = GitRepository()
+    git_repo.from_local_repository(local_path)
+    worktree_path = tmp_path / "worktree"
+
+    worktree = git_repo.create_worktree(worktree_path)
+    (worktree_path / "test.c").write_text("int main() { return 0; }")
+
+    assert worktree.get_working_directory() == worktree_path.absolute()
+    assert worktree.repo.head.commit == git_repo.repo.head.commit
+    assert "test.c" in worktree.get_diff()
+    # The changes of the worktree are not visible in the repository
+    assert git_repo.get_diff() == ""
+
+    git_repo.remove_worktree(worktree_path)
+
+    assert not worktree_path.exists()
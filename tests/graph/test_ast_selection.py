@@ -0,0 +1,31 @@
+from prometheus.graph.ast_selection import SELECTION_QUERIES, _get_query, get_selected_nodes
+from prometheus.parser import tree_sitter_parser
+
+
+def test_selection_queries_compile():
+    for lang in SELECTION_QUERIES:
+        assert _get_query(lang) is not None
+
+
+def test_get_selected_nodes(tmp_path):
+    file = tmp_path / "a.py"
+    file.write_text(
+        '"""Module docstring."""\nimport os\n\nX = 1\n\n\n'
+        "def f(path):\n    return os.path.exists(path)\n"
+    )
+
+    selected_nodes = get_selected_nodes(file, tree_sitter_parser.parse(file))
+
+    assert sorted(node.type for node in selected_nodes) == [
+        "call",
+        "expression_statement",
+        "function_definition",
+        "import_statement",
+    ]
+
+
+def test_get_selected_nodes_of_language_without_query(tmp_path):
+    file = tmp_path / "a.yaml"
+    file.write_text("a: 1\n")
+
+    assert get_selected_nodes(file, tree_sitter_parser.parse(file)) is None
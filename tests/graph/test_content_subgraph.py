@@ -0,0 +1,57 @@
+from prometheus.graph.content_subgraph import get_content_subgraphs
+from prometheus.graph.knowledge_graph import KnowledgeGraph
+
+
+def _build(root, root_node_id):
+    kg = KnowledgeGraph(1000, 1000, 100, root_node_id)
+    kg._build_graph(root)
+    return kg
+
+
+def test_content_hash_does_not_depend_on_node_ids(tmp_path):
+    (tmp_path / "project").mkdir()
+    (tmp_path / "project" / "util.py").write_text("def helper(x):\n    return x\n")
+    (tmp_path / "project" / "main.py").write_text("from util import helper\n\nhelper(1)\n")
+    (tmp_path / "project" / "README.md").write_text("# Project\n")
+    kg = _build(tmp_path / "project", 0)
+
+    (tmp_path / "project" / "main.py").write_text("from util import helper\n\nhelper(2)\n")
+    (tmp_path / "project" / "other.py").write_text("X = 1\n")
+    other_kg = _build(tmp_path / "project", kg.get_next_node_id())
+
+    hashes = {c.file_node.node.relative_path: c.content_hash for c in get_content_subgraphs(kg)}
+    other_hashes = {
+        c.file_node.node.relative_path: c.content_hash for c in get_content_subgraphs(other_kg)
+    }
+    assert hashes.keys() == {"util.py", "main.py", "README.md"}
+    assert other_hashes["util.py"] == hashes["util.py"]
+    assert other_hashes["README.md"] == hashes["README.md"]
+    assert other_hashes["main.py"] != hashes["main.py"]
+
+
+def test_content_subgraph_nodes_and_edges(tmp_path):
+    (tmp_path / "project").mkdir()
+    (tmp_path / "project" / "util.py").write_text("def helper(x):\n    return x\n")
+    kg = _build(tmp_path / "project", 0)
+
+    (content_subgraph,) = get_content_subgraphs(kg)
+
+    assert content_subgraph.kg_nodes == sorted(kg.get_ast_nodes(), key=lambda n: n.node_id)
+    assert len(content_subgraph.kg_edges) == len(kg._knowledge_graph_edges) - len(
+        kg.get_has_file_edges()
+    )
+
+
+def test_replace_node_ids(tmp_path):
+    (tmp_path / "project").mkdir()
+    (tmp_path / "project" / "util.py").write_text("def helper(x):\n    return x\n")
+    kg = _build(tmp_path / "project", 100)
+    ast_node_ids = sorted(kg_node.node_id for kg_node in kg.get_ast_nodes())
+
+    kg.replace_node_ids({node_id: node_id - 100 for node_id in ast_node_ids})
+
+    assert sorted(kg_node.node_id for kg_node in kg.get_ast_nodes()) == [
+        node_id - 100 for node_id in ast_node_ids
+    ]
+    assert {e.target.node_id for e in kg.get_has_ast_edges()} == {ast_node_ids[0] - 100}
+    assert kg.get_file_tree() == "project\n└── util.py"
@@ -0,0 +1,114 @@
+import pytest
+
+from prometheus.graph.embedded_graph_store import EmbeddedGraphStore
+from prometheus.graph.graph_types import KnowledgeGraphEdgeType
+from prometheus.graph.knowledge_graph import KnowledgeGraph
+from tests.test_utils import test_project_paths
+from tests.test_utils.fixtures import (  # noqa: F401
+    knowledge_graph_contents,
+    knowledge_graph_fixture,
+)
+
+
+def test_write_and_read_knowledge_graph(tmp_path, knowledge_graph_fixture):  # noqa: F811
+    store = EmbeddedGraphStore(tmp_path / "store")
+    assert not store.knowledge_graph_exists(0)
+
+    store.write_knowledge_graph(knowledge_graph_fixture)
+
+    assert store.knowledge_graph_exists(0)
+    read_kg = store.read_knowledge_graph(0, 1000, 1000, 100)
+    assert knowledge_graph_contents(read_kg) == knowledge_graph_contents(knowledge_graph_fixture)
+    assert read_kg.get_file_tree() == knowledge_graph_fixture.get_file_tree()
+    with pytest.raises(ValueError):
+        store.read_knowledge_graph(1, 1000, 1000, 100)
+    assert not read_kg.selective_ast
+
+
+def test_knowledge_graph_is_reloaded_from_storage_dir(tmp_path, knowledge_graph_fixture):  # noqa: F811
+    EmbeddedGraphStore(tmp_path / "store").write_knowledge_graph(knowledge_graph_fixture)
+
+    store = EmbeddedGraphStore(tmp_path / "store")
+
+    assert store.knowledge_graph_exists(0)
+    assert store.allocate_node_ids(10) == knowledge_graph_fixture.get_next_node_id()
+    assert knowledge_graph_contents(
+        store.read_knowledge_graph(0, 1000, 1000, 100)
+    ) == knowledge_graph_contents(knowledge_graph_fixture)
+
+
+def test_allocate_node_ids(tmp_path, knowledge_graph_fixture):  # noqa: F811
+    store = EmbeddedGraphStore(tmp_path / "store")
+
+    assert store.allocate_node_ids(3) == 0
+    assert store.allocate_node_ids(2) == 3
+    store.write_knowledge_graph(knowledge_graph_fixture)
+    assert store.allocate_node_ids(1) == knowledge_graph_fixture.get_next_node_id()
+
+
+def test_clear_knowledge_graph(tmp_path, knowledge_graph_fixture):  # noqa: F811
+    store = EmbeddedGraphStore(tmp_path / "store")
+    store.write_knowledge_graph(knowledge_graph_fixture)
+    store.set_knowledge_graph_version(0, "v1")
+    assert store.get_knowledge_graph_version(0) == "v1"
+
+    store.clear_knowledge_graph(0)
+
+    assert not store.knowledge_graph_exists(0)
+    assert store.get_knowledge_graph_version(0) is None
+    assert store.find_file_nodes(0, basename="test.c") == []
+    assert not EmbeddedGraphStore(tmp_path / "store").knowledge_graph_exists(0)
+
+
+def test_find_symbol_occurrences(tmp_path, knowledge_graph_fixture):  # noqa: F811
+    store = EmbeddedGraphStore(tmp_path / "store")
+    store.write_knowledge_graph(knowledge_graph_fixture)
+
+    definitions = store.find_symbol_occurrences(0, "main", [KnowledgeGraphEdgeType.defines])
+    occurrences = store.find_symbol_occurrences(
+        0,
+        "main",
+        [KnowledgeGraphEdgeType.references, KnowledgeGraphEdgeType.imports],
+        with_reference_type=True,
+    )
+
+    assert [row["FileNode"]["relative_path"] for row in definitions] == [
+        "bar/test.java",
+        "test.c",
+    ]
+    assert definitions[1]["ASTNode"]["type"] == "function_definition"
+    assert (
+        store.find_symbol_occurrences(0, "main", [KnowledgeGraphEdgeType.defines], limit=1)
+        == definitions[:1]
+    )
+    assert occurrences == []
+
+
+def test_find_text_and_ast_nodes(tmp_path, knowledge_graph_fixture):  # noqa: F811
+    store = EmbeddedGraphStore(tmp_path / "store")
+    store.write_knowledge_graph(knowledge_graph_fixture)
+
+    text_rows = store.find_text_nodes(0, "Text under header")
+    ast_rows = store.find_ast_nodes(0, basename="test.c", text="Hello world!")
+
+    assert {row["FileNode"]["basename"] for row in text_rows} == {"test.md"}
+    assert store.get_first_text_nodes(0, basename="test.md") == text_rows[:1]
+    assert ast_rows[0]["ASTNode"]["text"] == "Hello world!"
+    assert [len(row["ASTNode"]["text"]) for row in ast_rows] == sorted(
+        len(row["ASTNode"]["text"]) for row in ast_rows
+    )
+    assert store.get_ast_root_nodes(0, relative_path="bar/test.py")[0]["ASTNode"]["type"] == (
+        "module"
+    )
+
+
+async def test_knowledge_graph_keeps_selective_ast(tmp_path):
+    kg = KnowledgeGraph(1000, 1000, 100, 0, selective_ast=True)
+    await kg.build_graph(test_project_paths.TEST_PROJECT_PATH)
+    EmbeddedGraphStore(tmp_path / "store").write_knowledge_graph(kg)
+
+    # Also once it is reloaded from the storage directory
+    read_kg = EmbeddedGraphStore(tmp_path / "store").read_knowledge_graph(0, 1000, 1000, 100)
+
+    assert read_kg.selective_ast
+    assert read_kg.get_file_graph_builder().selective_ast
@@ -0,0 +1,73 @@
+from prometheus.graph import file_classifier
+from prometheus.graph.file_classifier import FileClass, FileClassStats, classify_file
+
+
+def test_classify_regular_file(tmp_path):
+    file = tmp_path / "main.py"
+    file.write_text("def main():\n    pass\n")
+
+    assert classify_file(file, "src/main.py") == FileClass.REGULAR
+
+
+def test_classify_binary_file(tmp_path):
+    file = tmp_path / "data.py"
+    file.write_bytes(b"x = 1\n\0\0\0")
+
+    assert classify_file(file, "data.py") == FileClass.BINARY
+
+
+def test_classify_utf16_file(tmp_path):
+    file = tmp_path / "main.py"
+    file.write_text("def main():\n    pass\n", encoding="utf-16")
+    header_file = tmp_path / "api.cs"
+    header_file.write_text("// <auto-generated />\nclass Api {}\n", encoding="utf-16")
+
+    # The NUL bytes of UTF-16 text do not make it binary
+    assert classify_file(file, "main.py") == FileClass.REGULAR
+    assert classify_file(header_file, "api.cs") == FileClass.GENERATED
+
+
+def test_classify_generated_file(tmp_path):
+    header_file = tmp_path / "api.go"
+    header_file.write_text("// Code generated by protoc-gen-go. DO NOT EDIT.\npackage api\n")
+    named_file = tmp_path / "api_pb2.py"
+    named_file.write_text("X = 1\n")
+    # A comment further down a file does not make it generated
+    late_comment_file = tmp_path / "version.py"
+    late_comment_file.write_text("\n" * 10 + "# version.py is auto-generated\n")
+
+    assert classify_file(header_file, "api.go") == FileClass.GENERATED
+    assert classify_file(named_file, "api_pb2.py") == FileClass.GENERATED
+    assert classify_file(late_comment_file, "version.py") == FileClass.REGULAR
+
+
+def test_classify_minified_file(tmp_path):
+    bundle = tmp_path / "bundle.js"
+    bundle.write_text("var a=1;" * 2000)
+    named_file = tmp_path / "app.min.js"
+    named_file.write_text("var a = 1;\n")
+
+    assert classify_file(bundle, "static/bundle.js") == FileClass.MINIFIED
+    assert classify_file(named_file, "app.min.js") == FileClass.MINIFIED
+
+
+def test_classify_vendored_and_large_files(tmp_path, monkeypatch):
+    file = tmp_path / "lib.py"
+    file.write_text("x = 1\n" * 100)
+
+    assert classify_file(file, "vendor/pkg/lib.py") == FileClass.VENDORED
+    assert classify_file(file, "vendor.py") == FileClass.REGULAR
+    assert classify_file(file, "lib.py", max_file_size=100) == FileClass.LARGE
+    assert classify_file(file, "lib.py", max_file_size=1000) == FileClass.REGULAR
+    monkeypatch.setattr(file_classifier, "MAX_FILE_SIZE", 100)
+    assert classify_file(file, "lib.py") == FileClass.LARGE
+
+
+def test_file_class_stats():
+    stats = FileClassStats()
+    stats.add(FileClass.MINIFIED, 100)
+    stats.add(FileClass.MINIFIED, 200)
+    stats.add(FileClass.BINARY, 1_000_000)
+
+    assert stats.get() == {FileClass.MINIFIED: (2, 300), FileClass.BINARY: (1, 1_000_000)}
+    assert stats.format() == "binary: 1 files, 1.00 MB\nminified: 2 files, 0.00 MB"
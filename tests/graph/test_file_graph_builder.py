@@ -1,10 +1,16 @@
-from prometheus.graph.file_graph_builder import FileGraphBuilder
+import mmap
+
+from prometheus.graph import file_classifier
+from prometheus.graph.file_classifier import FileClass
+from prometheus.graph.file_graph_builder import SKIPPED_RANGE_NODE_TYPE, FileGraphBuilder
 from prometheus.graph.graph_types import (
     ASTNode,
+    FileNode,
     KnowledgeGraphEdgeType,
     KnowledgeGraphNode,
     TextNode,
 )
+from prometheus.parser import decoded_source
 from tests.test_utils import test_project_paths
 
 
@@ -61,6 +67,19 @@ def test_build_python_file_graph():
     assert found_edge
 
 
+def test_build_file_graph_collects_parse_stats():
+    file_graph_builder = FileGraphBuilder(1000, 1000, 100)
+
+    parent_kg_node = KnowledgeGraphNode(0, None)
+    file_graph_builder.build_file_graph(parent_kg_node, test_project_paths.PYTHON_FILE, 0)
+    file_graph_builder.build_file_graph(parent_kg_node, test_project_paths.MD_FILE, 0)
+
+    parse_stats = file_graph_builder.parse_stats.get()
+    assert list(parse_stats) == ["python"]
+    assert parse_stats["python"].files == 1
+    assert parse_stats["python"].bytes == test_project_paths.PYTHON_FILE.stat().st_size
+
+
 def test_build_text_file_graph():
     file_graph_builder = FileGraphBuilder(1000, 100, 10)
 
@@ -102,3 +121,158 @@ def test_build_text_file_graph():
         ):
             found_edge = True
     assert found_edge
+
+
+def test_build_selective_python_file_graph(tmp_path):
+    file = tmp_path / "a.py"
+    file.write_text(
+        "import os\n\n\n"
+        "def f(path):\n"
+        "    if not path:\n"
+        "        raise ValueError(path)\n"
+        '    path = path + "/"\n'
+        "    return os.path.exists(path)\n"
+    )
+    file_graph_builder = FileGraphBuilder(1, 1000, 100, selective_ast=True)
+
+    parent_kg_node = KnowledgeGraphNode(0, None)
+    next_node_id, kg_nodes, kg_edges = file_graph_builder.build_file_graph(parent_kg_node, file, 1)
+
+    # The nodes are not limited by max_ast_depth, and only the selected ones are kept
+    assert sorted(kg_node.node.type for kg_node in kg_nodes) == [
+        "call",
+        "call",
+        "function_definition",
+        "import_statement",
+        "module",
+        SKIPPED_RANGE_NODE_TYPE,
+        SKIPPED_RANGE_NODE_TYPE,
+    ]
+    assert next_node_id == 1 + len(kg_nodes)
+
+    # The selected nodes are the children of their closest selected ancestor, and the lines
+    # without a selected node are kept as ranges
+    function_children = sorted(
+        (kg_edge.target.node.start_line, kg_edge.target.node.type, kg_edge.target.node.text)
+        for kg_edge in kg_edges
+        if kg_edge.type == KnowledgeGraphEdgeType.parent_of
+        and kg_edge.source.node.type == "function_definition"
+    )
+    assert function_children == [
+        (5, SKIPPED_RANGE_NODE_TYPE, "if not path:"),
+        (6, "call", "ValueError(path)"),
+        (7, SKIPPED_RANGE_NODE_TYPE, 'path = path + "/"'),
+        (8, "call", "os.path.exists(path)"),
+    ]
+
+
+def test_build_minified_file_graph_shallowly(tmp_path):
+    file = tmp_path / "app.min.js"
+    file.write_text("abcdefghijklmnopqrstuvwxy")
+    file_graph_builder = FileGraphBuilder(1000, 10, 4)
+
+    parent_kg_node = KnowledgeGraphNode(
+        0, FileNode(basename="app.min.js", relative_path="app.min.js")
+    )
+    next_node_id, kg_nodes, kg_edges = file_graph_builder.build_file_graph(parent_kg_node, file, 1)
+
+    # The text is chunked instead of parsed
+    assert [kg_node.node for kg_node in kg_nodes] == [
+        TextNode(text=text, metadata="{'file_class': 'minified'}")
+        for text in ["abcdefghij", "ghijklmnop", "mnopqrstuv", "stuvwxy"]
+    ]
+    assert next_node_id == 5
+    assert len(kg_edges) == 7
+    assert file_graph_builder.file_class_stats.get() == {FileClass.MINIFIED: (1, 25)}
+    assert file_graph_builder.parse_stats.get() == {}
+
+
+def test_build_binary_file_graph(tmp_path):
+    file = tmp_path / "data.py"
+    file.write_bytes(b"\0" * 100)
+    file_graph_builder = FileGraphBuilder(1000, 1000, 100)
+
+    parent_kg_node = KnowledgeGraphNode(0, None)
+    assert file_graph_builder.build_file_graph(parent_kg_node, file, 1) == (1, [], [])
+    assert file_graph_builder.file_class_stats.get() == {FileClass.BINARY: (1, 100)}
+
+
+def test_build_latin1_python_file_graph(tmp_path):
+    file = tmp_path / "a.py"
+    file.write_bytes("# Fran\xe7ois\ndef f():\n    return 'caf\xe9'\n".encode("latin-1"))
+    file_graph_builder = FileGraphBuilder(1000, 1000, 100)
+
+    parent_kg_node = KnowledgeGraphNode(0, None)
+    _, kg_nodes, _ = file_graph_builder.build_file_graph(parent_kg_node, file, 1)
+
+    texts = [kg_node.node.text for kg_node in kg_nodes]
+    assert texts[0] == "# François\ndef f():\n    return 'café'\n"
+    assert "# François" in texts
+    assert "'café'" in texts
+
+
+def test_build_utf16_python_file_graph(tmp_path):
+    file = tmp_path / "a.py"
+    file.write_text("def f():\n    return 'café'\n", encoding="utf-16")
+    file_graph_builder = FileGraphBuilder(1000, 1000, 100)
+
+    parent_kg_node = KnowledgeGraphNode(0, None)
+    _, kg_nodes, _ = file_graph_builder.build_file_graph(parent_kg_node, file, 1)
+
+    texts = [kg_node.node.text for kg_node in kg_nodes]
+    assert texts[0] == "def f():\n    return 'café'\n"
+    assert "'café'" in texts
+    assert file_graph_builder.file_class_stats.get() == {}
+
+
+def test_build_large_python_file_graph_from_mapped_file(tmp_path, monkeypatch):
+    file = tmp_path / "a.py"
+    file.write_text("".join(f"def f{i}():\n    return 'café'\n" for i in range(12000)))
+    assert decoded_source.MMAP_THRESHOLD < file.stat().st_size <= file_classifier.MAX_FILE_SIZE
+    decoded_data = []
+    decode_source = decoded_source.decode_source
+
+    def record_decoded_data(data):
+        decoded_data.append(data)
+        return decode_source(data)
+
+    monkeypatch.setattr(decoded_source, "decode_source", record_decoded_data)
+    file_graph_builder = FileGraphBuilder(2, 1000, 100)
+
+    parent_kg_node = KnowledgeGraphNode(0, None)
+    _, kg_nodes, _ = file_graph_builder.build_file_graph(parent_kg_node, file, 1)
+
+    # The file is parsed from a map, which is unmapped once its graph is built
+    [data] = decoded_data
+    assert isinstance(data, mmap.mmap)
+    assert data.closed
+    texts = [kg_node.node.text for kg_node in kg_nodes]
+    assert texts[0] == file.read_text()
+    assert "def f11999():\n    return 'café'" in texts
+    assert file_graph_builder.file_class_stats.get() == {}
+
+
+def test_build_file_graph_with_max_file_size(tmp_path, monkeypatch):
+    file = tmp_path / "a.py"
+    file.write_text("".join(f"def f{i}():\n    return {i}\n" for i in range(100)))
+    decoded_data = []
+    decode_source = decoded_source.decode_source
+
+    def record_decoded_data(data):
+        decoded_data.append(data)
+        return decode_source(data)
+
+    monkeypatch.setattr(decoded_source, "decode_source", record_decoded_data)
+    parent_kg_node = KnowledgeGraphNode(0, None)
+
+    # Above the maximum size, the file only has its text
+    file_graph_builder = FileGraphBuilder(2, 1000, 100, max_file_size=1000)
+    _, kg_nodes, _ = file_graph_builder.build_file_graph(parent_kg_node, file, 1)
+    assert all(isinstance(kg_node.node, TextNode) for kg_node in kg_nodes)
+    assert FileClass.LARGE in file_graph_builder.file_class_stats.get()
+
+    # Below, it is parsed, from a map as it is close to the maximum size
+    file_graph_builder = FileGraphBuilder(2, 1000, 100, max_file_size=4000)
+    _, kg_nodes, _ = file_graph_builder.build_file_graph(parent_kg_node, file, 1)
+    assert isinstance(kg_nodes[0].node, ASTNode)
+    assert isinstance(decoded_data[-1], mmap.mmap)
@@ -6,7 +6,9 @@ from prometheus.graph.graph_types import (
     KnowledgeGraphNode,
     Neo4jASTNode,
     Neo4jFileNode,
+    Neo4jSymbolNode,
     Neo4jTextNode,
+    SymbolNode,
     TextNode,
 )
 
@@ -261,3 +263,17 @@ def test_from_neo4j_text_node():
     expected_text_node = TextNode(text, metadata)
     expected_knowledge_graph_node = KnowledgeGraphNode(node_id, expected_text_node)
     assert knowledge_graph_node == expected_knowledge_graph_node
+
+
+def test_to_neo4j_symbol_node():
+    knowledge_graph_node = KnowledgeGraphNode(3, SymbolNode("parse"))
+    neo4j_symbol_node = knowledge_graph_node.to_neo4j_node()
+
+    assert neo4j_symbol_node == {"node_id": 3, "name": "parse"}
+
+
+def test_from_neo4j_symbol_node():
+    neo4j_symbol_node = Neo4jSymbolNode(node_id=25, name="parse")
+    knowledge_graph_node = KnowledgeGraphNode.from_neo4j_symbol_node(neo4j_symbol_node)
+
+    assert knowledge_graph_node == KnowledgeGraphNode(25, SymbolNode("parse"))
@@ -10,12 +10,13 @@ async def test_build_graph():
     knowledge_graph = KnowledgeGraph(1000, 100, 10, 0)
     await knowledge_graph.build_graph(test_project_paths.TEST_PROJECT_PATH)
 
-    assert knowledge_graph._next_node_id == 93
+    assert knowledge_graph._next_node_id == 95
     # 7 FileNode
     # 84 ASTnode
     # 2 TextNode
-    assert len(knowledge_graph._knowledge_graph_nodes) == 93
-    assert len(knowledge_graph._knowledge_graph_edges) == 93
+    # 2 SymbolNode
+    assert len(knowledge_graph._knowledge_graph_nodes) == 95
+    assert len(knowledge_graph._knowledge_graph_edges) == 96
 
     assert len(knowledge_graph.get_file_nodes()) == 7
     assert len(knowledge_graph.get_ast_nodes()) == 84
@@ -25,6 +26,22 @@ async def test_build_graph():
     assert len(knowledge_graph.get_has_ast_edges()) == 3
     assert len(knowledge_graph.get_has_text_edges()) == 2
     assert len(knowledge_graph.get_next_chunk_edges()) == 1
+    assert len(knowledge_graph.get_symbol_nodes()) == 2
+    assert len(knowledge_graph.get_symbol_edges()) == 3
+
+
+async def test_move_node_ids():
+    knowledge_graph = KnowledgeGraph(1000, 100, 10, 0)
+    await knowledge_graph.build_graph(test_project_paths.TEST_PROJECT_PATH)
+    other_knowledge_graph = KnowledgeGraph(1000, 100, 10, 500)
+    await other_knowledge_graph.build_graph(test_project_paths.TEST_PROJECT_PATH)
+
+    knowledge_graph.move_node_ids(500)
+
+    assert knowledge_graph.root_node_id == 500
+    assert knowledge_graph.get_next_node_id() == 595
+    assert knowledge_graph == other_knowledge_graph
+    assert knowledge_graph.get_file_tree() == other_knowledge_graph.get_file_tree()
 
 
 async def test_get_file_tree():
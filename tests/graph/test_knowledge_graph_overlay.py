@@ -0,0 +1,131 @@
+import pytest
+
+from prometheus.graph.graph_types import KnowledgeGraphEdgeType
+from prometheus.graph.knowledge_graph import KnowledgeGraph
+from prometheus.graph.knowledge_graph_overlay import KnowledgeGraphOverlay, _get_edit
+from prometheus.parser import tree_sitter_parser
+
+UTIL_PY = """\
+def helper(x):
+    return x + 1
+
+
+def unused():
+    return 0
+"""
+
+
+@pytest.fixture
+def codebase(tmp_path):
+    (tmp_path / "pkg").mkdir()
+    (tmp_path / "pkg" / "util.py").write_text(UTIL_PY)
+    (tmp_path / "pkg" / "README.md").write_text("# Util\n\nHelpers.\n")
+    kg = KnowledgeGraph(1000, 1000, 100, 0)
+    kg._build_graph(tmp_path)
+    return tmp_path, kg
+
+
+def _get_definitions(overlay_file):
+    return sorted(
+        kg_node.node.text.splitlines()[0]
+        for name in ["helper", "renamed", "unused"]
+        for kg_node, edge_type in overlay_file.symbol_table.get_occurrences(name)
+        if edge_type == KnowledgeGraphEdgeType.defines
+    )
+
+
+def test_update_edited_file(codebase):
+    root, kg = codebase
+    overlay = KnowledgeGraphOverlay(kg, str(root))
+    assert overlay.is_empty()
+
+    (root / "pkg" / "util.py").write_text(UTIL_PY.replace("def helper", "def renamed"))
+    overlay.update_file("pkg/util.py")
+
+    assert not overlay.is_empty()
+    assert overlay.is_touched("pkg/util.py")
+    assert not overlay.is_touched("pkg/README.md")
+    [overlay_file] = overlay.get_files()
+    # The file keeps its FileNode, its content gets new nodes that are not in the graph
+    kg_file_node = next(
+        kg_node for kg_node in kg.get_file_nodes() if kg_node.node.relative_path == "pkg/util.py"
+    )
+    assert overlay_file.file_node is kg_file_node
+    assert min(kg_node.node_id for kg_node in overlay_file.kg_nodes) >= kg.get_next_node_id()
+    assert "def renamed(x):" in overlay_file.get_ast_root_node().node.text
+    assert _get_definitions(overlay_file) == ["def renamed(x):", "def unused():"]
+
+
+def test_incremental_reparse_matches_full_parse(codebase):
+    root, kg = codebase
+    overlay = KnowledgeGraphOverlay(kg, str(root))
+    file = root / "pkg" / "util.py"
+
+    file.write_text(UTIL_PY.replace("x + 1", "x + 2"))
+    overlay.update_file("pkg/util.py")
+    file.write_text(UTIL_PY.replace("x + 1", "x + 2") + "\n\nclass Added:\n    pass\n")
+    overlay.update_file("pkg/util.py")
+
+    [overlay_file] = overlay.get_files()
+    full_tree = tree_sitter_parser.parse(file)
+    assert overlay_file.tree.root_node.sexp() == full_tree.root_node.sexp()
+    assert overlay_file.get_ast_root_node().node.text == file.read_text()
+
+
+def test_update_created_and_deleted_files(codebase):
+    root, kg = codebase
+    overlay = KnowledgeGraphOverlay(kg, str(root))
+
+    (root / "pkg" / "new.md").write_text("# New\n")
+    overlay.update_file("pkg/new.md")
+    (root / "pkg" / "util.py").unlink()
+    overlay.update_file("pkg/util.py")
+
+    [overlay_file] = overlay.get_files()
+    assert overlay_file.file_node.node.relative_path == "pkg/new.md"
+    assert overlay_file.file_node.node_id >= kg.get_next_node_id()
+    assert [kg_node.node.text for kg_node in overlay_file.get_text_nodes()] == ["# New"]
+    assert overlay.is_touched("pkg/util.py")
+
+
+def test_update_deleted_directory(codebase):
+    root, kg = codebase
+    overlay = KnowledgeGraphOverlay(kg, str(root))
+    (root / "pkg" / "util.py").write_text("X = 1\n")
+    overlay.update_file("pkg/util.py")
+
+    for file in (root / "pkg").iterdir():
+        file.unlink()
+    (root / "pkg").rmdir()
+    overlay.update_file("pkg")
+
+    assert overlay.get_files() == []
+    assert overlay.is_touched("pkg")
+    assert overlay.is_touched("pkg/README.md")
+    assert not overlay.is_touched("pkg2/README.md")
+
+
+def test_clear(codebase):
+    root, kg = codebase
+    overlay = KnowledgeGraphOverlay(kg, str(root))
+    (root / "pkg" / "util.py").write_text("X = 1\n")
+    overlay.update_file("pkg/util.py")
+
+    overlay.clear()
+
+    assert overlay.is_empty()
+    assert not overlay.is_touched("pkg/util.py")
+
+
+def test_get_edit():
+    old_source = b"def f():\n    return 1\n"
+    new_source = b"def f():\n    return 10 + 1\n"
+
+    assert _get_edit(old_source, new_source) == {
+        "start_byte": 21,
+        "old_end_byte": 21,
+        "new_end_byte": 26,
+        "start_point": (1, 12),
+        "old_end_point": (1, 12),
+        "new_end_point": (1, 17),
+    }
@@ -0,0 +1,54 @@
+import pytest
+
+from prometheus.graph.knowledge_graph import KnowledgeGraph
+from tests.test_utils import test_project_paths
+from tests.test_utils.fixtures import (  # noqa: F401
+    knowledge_graph_contents,
+    knowledge_graph_fixture,
+)
+
+
+def test_save_and_load_snapshot(tmp_path, knowledge_graph_fixture):  # noqa: F811
+    knowledge_graph = knowledge_graph_fixture
+    path = tmp_path / "snapshots" / "0.kg"
+
+    knowledge_graph.save_snapshot(path, "v1")
+    loaded_kg = KnowledgeGraph.load_snapshot(path, "v1", 1000, 1000, 100)
+
+    assert knowledge_graph_contents(loaded_kg) == knowledge_graph_contents(knowledge_graph)
+    assert loaded_kg.root_node_id == 0
+    assert loaded_kg.get_next_node_id() == knowledge_graph.get_next_node_id()
+    assert loaded_kg.get_file_tree() == knowledge_graph.get_file_tree()
+    assert len(loaded_kg.get_symbol_nodes()) == len(knowledge_graph.get_symbol_nodes()) > 0
+    # The strings are interned
+    texts = [kg_node.node.text for kg_node in loaded_kg.get_text_nodes()]
+    assert texts == [kg_node.node.text for kg_node in knowledge_graph.get_text_nodes()]
+
+
+async def test_load_snapshot_with_selective_ast(tmp_path):
+    knowledge_graph = KnowledgeGraph(1000, 1000, 100, 0, selective_ast=True)
+    await knowledge_graph.build_graph(test_project_paths.TEST_PROJECT_PATH)
+    path = tmp_path / "0.kg"
+    knowledge_graph.save_snapshot(path, "v1")
+
+    loaded_kg = KnowledgeGraph.load_snapshot(path, "v1", 1000, 1000, 100)
+
+    # The files of an overlay are parsed like the ones of the knowledge graph
+    assert loaded_kg.selective_ast
+    assert loaded_kg.get_file_graph_builder().selective_ast
+
+
+def test_load_snapshot_of_another_version(tmp_path, knowledge_graph_fixture):  # noqa: F811
+    path = tmp_path / "0.kg"
+    knowledge_graph_fixture.save_snapshot(path, "v1")
+
+    with pytest.raises(ValueError, match="version"):
+        KnowledgeGraph.load_snapshot(path, "v2", 1000, 1000, 100)
+
+
+def test_load_invalid_snapshot(tmp_path):
+    path = tmp_path / "0.kg"
+    path.write_bytes(b"not a snapshot")
+
+    with pytest.raises(ValueError):
+        KnowledgeGraph.load_snapshot(path, "v1", 1000, 1000, 100)
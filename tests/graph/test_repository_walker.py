@@ -0,0 +1,83 @@
+import shutil
+
+import pytest
+from git import Repo
+
+from prometheus.graph.knowledge_graph import KnowledgeGraph
+from prometheus.graph.repository_walker import RepositoryWalker
+from tests.test_utils.fixtures import knowledge_graph_contents
+
+
+@pytest.fixture
+def codebase(tmp_path):
+    root = tmp_path / "git" / "project"
+    (root / "src" / "sub").mkdir(parents=True)
+    (root / "node_modules" / "lib").mkdir(parents=True)
+    (root / "logs" / "old").mkdir(parents=True)
+    (root / "build").mkdir()
+    (root / "empty" / "deeper").mkdir(parents=True)
+    (root / ".gitignore").write_text("node_modules/\nbuild/*\n!build/keep.md\ntracked.md\n")
+    (root / "logs" / ".gitignore").write_text("*.log\n")
+    (root / "src" / "main.py").write_text("def main():\n    pass\n")
+    (root / "src" / "sub" / "util.py").write_text("X = 1\n")
+    (root / "node_modules" / "lib" / "index.js").write_text("module.exports = 1;\n")
+    (root / "logs" / "a.log").write_text("log\n")
+    (root / "logs" / "old" / "b.log").write_text("log\n")
+    (root / "build" / "out.md").write_text("# Out\n")
+    (root / "build" / "keep.md").write_text("# Keep\n")
+    (root / "tracked.md").write_text("# Tracked\n")
+    (root / "linked").symlink_to("src")
+
+    repo = Repo.init(root)
+    repo.git.add("src", ".gitignore")
+    repo.git.add("-f", "tracked.md")
+    return root
+
+
+def _walk(root):
+    repository_walker = RepositoryWalker(root)
+    paths = []
+    directories = [root]
+    while directories:
+        directory = directories.pop()
+        for entry in repository_walker.scandir(directory):
+            if repository_walker.is_ignored(entry):
+                continue
+            paths.append(entry.path[len(str(root)) + 1 :])
+            if entry.is_dir():
+                directories.append(entry.path)
+    return sorted(paths)
+
+
+def test_walk_git_repository(codebase):
+    assert _walk(codebase) == [
+        ".gitignore",
+        "build",
+        "build/keep.md",
+        "empty",
+        "empty/deeper",
+        "linked",
+        "linked/main.py",
+        "linked/sub",
+        "linked/sub/util.py",
+        "logs",
+        "logs/.gitignore",
+        "logs/old",
+        "src",
+        "src/main.py",
+        "src/sub",
+        "src/sub/util.py",
+    ]
+
+
+def test_git_walk_builds_same_graph_as_ignore_rules(codebase, tmp_path):
+    # The same codebase without git is walked with the .gitignore rules only
+    copy = tmp_path / "copy" / "project"
+    shutil.copytree(codebase, copy, symlinks=True, ignore=shutil.ignore_patterns(".git"))
+
+    git_kg = KnowledgeGraph(1000, 1000, 100, 0)
+    git_kg._build_graph(codebase)
+    kg = KnowledgeGraph(1000, 1000, 100, 0)
+    kg._build_graph(copy)
+
+    assert knowledge_graph_contents(git_kg) == knowledge_graph_contents(kg)
@@ -0,0 +1,98 @@
+import pytest
+
+from prometheus.graph.knowledge_graph import KnowledgeGraph
+from prometheus.graph.semantic_index import SemanticIndex
+from prometheus.utils.embedding_util import HashingEmbeddings
+
+CALCULATOR_PY = """\
+def add(a, b):
+    return a + b
+
+
+def divide(numerator, denominator):
+    if denominator == 0:
+        raise ZeroDivisionError("cannot divide by zero")
+    return numerator / denominator
+"""
+
+README_MD = """\
+# Calculator
+
+Installation instructions for the calculator package.
+"""
+
+
+@pytest.fixture
+def knowledge_graph(tmp_path):
+    (tmp_path / "calculator.py").write_text(CALCULATOR_PY)
+    (tmp_path / "README.md").write_text(README_MD)
+    knowledge_graph = KnowledgeGraph(1000, 1000, 100, 0)
+    knowledge_graph._build_graph(tmp_path)
+    return knowledge_graph
+
+
+@pytest.fixture
+def semantic_index(knowledge_graph):
+    return SemanticIndex.build(knowledge_graph, HashingEmbeddings())
+
+
+def test_build(semantic_index):
+    # The two functions and the text chunk of the README
+    assert len(semantic_index) == 3
+
+
+def test_search(semantic_index):
+    results = semantic_index.search("error when dividing by zero", 2)
+
+    assert results[0].file_node.node.relative_path == "calculator.py"
+    assert results[0].kg_node.node.text.startswith("def divide")
+    assert results[0].score > results[1].score
+
+
+def test_search_text_node(semantic_index):
+    results = semantic_index.search("how to install the package", 1)
+
+    assert len(results) == 1
+    assert results[0].file_node.node.relative_path == "README.md"
+
+
+def test_search_without_similar_nodes(semantic_index):
+    assert semantic_index.search("kubernetes", 5) == []
+
+
+def test_save_and_load(tmp_path, knowledge_graph, semantic_index):
+    path = tmp_path / "index" / "0.npz"
+    semantic_index.save(path)
+
+    loaded_index = SemanticIndex.load(path, knowledge_graph, HashingEmbeddings())
+
+    assert len(loaded_index) == len(semantic_index)
+    assert loaded_index.search("divide", 1) == semantic_index.search("divide", 1)
+
+
+def test_load_with_other_model(tmp_path, knowledge_graph, semantic_index):
+    path = tmp_path / "0.npz"
+    semantic_index.save(path)
+
+    # The index is stale if the model embeds the queries in other dimensions
+    with pytest.raises(ValueError):
+        SemanticIndex.load(path, knowledge_graph, HashingEmbeddings(dimensions=256))
+
+
+def test_search_with_other_dimensions(knowledge_graph):
+    semantic_index = SemanticIndex.build(knowledge_graph, HashingEmbeddings())
+    semantic_index.embeddings = HashingEmbeddings(dimensions=256)
+
+    assert semantic_index.search("divide", 1) == []
+
+
+def test_load_with_other_knowledge_graph(tmp_path, semantic_index):
+    path = tmp_path / "0.npz"
+    semantic_index.save(path)
+    (tmp_path / "other").mkdir()
+    (tmp_path / "other" / "other.py").write_text("x = 1\n")
+    other_knowledge_graph = KnowledgeGraph(1000, 1000, 100, 0)
+    other_knowledge_graph._build_graph(tmp_path / "other")
+
+    with pytest.raises(ValueError):
+        SemanticIndex.load(path, other_knowledge_graph, HashingEmbeddings())
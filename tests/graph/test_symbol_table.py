@@ -0,0 +1,95 @@
+from pathlib import Path
+
+from prometheus.graph.file_graph_builder import FileGraphBuilder
+from prometheus.graph.graph_types import FileNode, KnowledgeGraphEdgeType, KnowledgeGraphNode
+from prometheus.graph.symbol_table import DEFINITION_QUERIES, SymbolTable, _get_query
+
+
+def _build_symbols(files: dict[str, str], root: Path, max_ast_depth: int = 1000):
+    file_graph_builder = FileGraphBuilder(max_ast_depth, 1000, 100)
+    symbol_table = SymbolTable()
+    next_node_id = 0
+    for relative_path, content in files.items():
+        file = root / relative_path
+        file.write_text(content)
+        file_node = KnowledgeGraphNode(next_node_id, FileNode(file.name, relative_path))
+        next_node_id, _, _ = file_graph_builder.build_file_graph(
+            file_node, file, next_node_id + 1, symbol_table
+        )
+    _, symbol_nodes, symbol_edges = symbol_table.build(next_node_id)
+    return symbol_nodes, {
+        (edge.type, edge.target.node.name, edge.source.node.text.splitlines()[0])
+        for edge in symbol_edges
+    }
+
+
+def test_symbol_queries_compile():
+    for lang in DEFINITION_QUERIES:
+        assert _get_query(lang) is not None
+
+
+def test_python_definitions_references_and_imports(tmp_path):
+    symbol_nodes, symbol_edges = _build_symbols(
+        {
+            "util.py": (
+                "import os\n\n\ndef helper(x):\n    return os.path.join(x)\n\n\n"
+                "class Parser:\n    def parse(self, text):\n        return helper(text)\n"
+            ),
+            "main.py": (
+                "from util import Parser, helper\n\n\n"
+                "def run():\n    return Parser().parse(helper('a'))\n"
+            ),
+        },
+        tmp_path,
+    )
+
+    # Names that are not defined in the codebase, like os, have no SymbolNode
+    assert [kg_node.node.name for kg_node in symbol_nodes] == ["Parser", "helper", "parse", "run"]
+    assert symbol_edges == {
+        (KnowledgeGraphEdgeType.defines, "helper", "def helper(x):"),
+        (KnowledgeGraphEdgeType.defines, "Parser", "class Parser:"),
+        (KnowledgeGraphEdgeType.defines, "parse", "def parse(self, text):"),
+        (KnowledgeGraphEdgeType.defines, "run", "def run():"),
+        (KnowledgeGraphEdgeType.references, "helper", "def parse(self, text):"),
+        (KnowledgeGraphEdgeType.references, "Parser", "def run():"),
+        (KnowledgeGraphEdgeType.references, "parse", "def run():"),
+        (KnowledgeGraphEdgeType.references, "helper", "def run():"),
+        (KnowledgeGraphEdgeType.imports, "Parser", "from util import Parser, helper"),
+        (KnowledgeGraphEdgeType.imports, "helper", "from util import Parser, helper"),
+    }
+
+
+def test_occurrences_are_attached_to_the_closest_ast_node_in_the_graph(tmp_path):
+    _, symbol_edges = _build_symbols(
+        {"a.py": "class A:\n    def f(self):\n        return g()\n\n\ndef g():\n    pass\n"},
+        tmp_path,
+        max_ast_depth=1,
+    )
+
+    # The methods are deeper than max_ast_depth, the class is the closest definition
+    assert (KnowledgeGraphEdgeType.defines, "f", "class A:") in symbol_edges
+    assert (KnowledgeGraphEdgeType.references, "g", "class A:") in symbol_edges
+
+
+def test_java_definitions_and_references(tmp_path):
+    _, symbol_edges = _build_symbols(
+        {
+            "Shape.java": "interface Shape {\n  double area();\n}\n",
+            "Circle.java": (
+                "class Circle implements Shape {\n"
+                "  public double area() {\n    return 3.14;\n  }\n}\n"
+            ),
+        },
+        tmp_path,
+    )
+
+    assert (KnowledgeGraphEdgeType.defines, "Shape", "interface Shape {") in symbol_edges
+    assert (KnowledgeGraphEdgeType.defines, "Circle", "class Circle implements Shape {") in (
+        symbol_edges
+    )
+    assert (KnowledgeGraphEdgeType.defines, "area", "public double area() {") in symbol_edges
+    assert (
+        KnowledgeGraphEdgeType.references,
+        "Shape",
+        "class Circle implements Shape {",
+    ) in symbol_edges
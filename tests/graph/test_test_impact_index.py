@@ -0,0 +1,211 @@
+import pytest
+
+from prometheus.graph.knowledge_graph import KnowledgeGraph
+from prometheus.graph.test_impact_index import TestImpactIndex
+
+CALCULATOR_PY = """\
+def add(a, b):
+    return a + b
+
+
+def divide(a, b):
+    return a / b
+"""
+
+TEST_CALCULATOR_PY = """\
+from calculator import add, divide
+
+
+def test_add():
+    assert add(1, 2) == 3
+
+
+def test_divide():
+    assert divide(4, 2) == 2
+"""
+
+DIVIDE_PATCH = """\
+diff --git a/calculator.py b/calculator.py
+--- a/calculator.py
++++ b/calculator.py
+@@ -5,2 +5,4 @@ def add(a, b):
+ def divide(a, b):
++    if b == 0:
++        raise ValueError("b must not be 0")
+     return a / b
+"""
+
+MODULE_PATCH = """\
+diff --git a/calculator.py b/calculator.py
+--- a/calculator.py
++++ b/calculator.py
+@@ -1,3 +1,5 @@
++import math
++
+ def add(a, b):
+     return a + b
+ 
+"""
+
+README_PATCH = """\
+diff --git a/setup.cfg b/setup.cfg
+--- a/setup.cfg
++++ b/setup.cfg
+@@ -1 +1 @@
+-name = old
++name = new
+"""
+
+
+@pytest.fixture
+def test_impact_index(tmp_path):
+    (tmp_path / "calculator.py").write_text(CALCULATOR_PY)
+    (tmp_path / "tests").mkdir()
+    (tmp_path / "tests" / "test_calculator.py").write_text(TEST_CALCULATOR_PY)
+    knowledge_graph = KnowledgeGraph(1000, 1000, 100, 0)
+    knowledge_graph._build_graph(tmp_path)
+    return TestImpactIndex(knowledge_graph)
+
+
+def test_index_tests(test_impact_index):
+    test_names = sorted(test.name for test in test_impact_index.tests)
+
+    assert test_names == ["test_add", "test_divide"]
+
+
+def test_get_affected_tests(test_impact_index):
+    affected_tests = test_impact_index.get_affected_tests(DIVIDE_PATCH)
+
+    assert [test.name for test in affected_tests] == ["test_divide"]
+
+
+def test_get_affected_tests_module_level_change(test_impact_index):
+    affected_tests = test_impact_index.get_affected_tests(MODULE_PATCH)
+
+    assert sorted(test.name for test in affected_tests) == ["test_add", "test_divide"]
+
+
+def test_get_affected_tests_unknown_file(test_impact_index):
+    assert test_impact_index.get_affected_tests(README_PATCH) is None
+
+
+def test_filter_regression_tests(test_impact_index):
+    regression_tests = [
+        "tests/test_calculator.py::test_add",
+        "tests/test_calculator.py::test_divide",
+        "tests/test_other.py::test_unknown",
+    ]
+
+    filtered_regression_tests = test_impact_index.filter_regression_tests(
+        regression_tests, DIVIDE_PATCH
+    )
+
+    assert filtered_regression_tests == [
+        "tests/test_calculator.py::test_divide",
+        "tests/test_other.py::test_unknown",
+    ]
+
+
+def test_filter_regression_tests_keeps_all_for_unknown_files(test_impact_index):
+    regression_tests = ["tests/test_calculator.py::test_add"]
+
+    assert (
+        test_impact_index.filter_regression_tests(regression_tests, README_PATCH)
+        == regression_tests
+    )
+
+
+PARSER_PY = """\
+def parse(text):
+    return text.split()
+
+
+def handle(text):
+    return len(parse(text))
+
+
+def unused():
+    return 0
+"""
+
+OTHER_PY = """\
+VERSION = 1
+"""
+
+TEST_HANDLER_PY = """\
+from app import parser
+
+
+def test_handle():
+    assert parser.handle("a b") == 2
+"""
+
+TEST_OTHER_PY = """\
+from app.other import VERSION
+
+
+def test_version():
+    assert VERSION == 1
+"""
+
+PARSE_PATCH = """\
+diff --git a/app/parser.py b/app/parser.py
+--- a/app/parser.py
++++ b/app/parser.py
+@@ -1,2 +1,2 @@
+ def parse(text):
+-    return text.split()
++    return text.split(" ")
+"""
+
+UNUSED_PATCH = """\
+diff --git a/app/parser.py b/app/parser.py
+--- a/app/parser.py
++++ b/app/parser.py
+@@ -9,2 +9,2 @@ def handle(text):
+ def unused():
+-    return 0
++    return 1
+"""
+
+OTHER_PATCH = """\
+diff --git a/app/other.py b/app/other.py
+--- a/app/other.py
++++ b/app/other.py
+@@ -1 +1 @@
+-VERSION = 1
++VERSION = 2
+"""
+
+
+@pytest.fixture
+def app_test_impact_index(tmp_path):
+    (tmp_path / "app").mkdir()
+    (tmp_path / "app" / "__init__.py").write_text("")
+    (tmp_path / "app" / "parser.py").write_text(PARSER_PY)
+    (tmp_path / "app" / "other.py").write_text(OTHER_PY)
+    (tmp_path / "tests").mkdir()
+    (tmp_path / "tests" / "test_handler.py").write_text(TEST_HANDLER_PY)
+    (tmp_path / "tests" / "test_other.py").write_text(TEST_OTHER_PY)
+    knowledge_graph = KnowledgeGraph(1000, 1000, 100, 0)
+    knowledge_graph._build_graph(tmp_path)
+    return TestImpactIndex(knowledge_graph)
+
+
+def test_get_affected_tests_follows_callers(app_test_impact_index):
+    affected_tests = app_test_impact_index.get_affected_tests(PARSE_PATCH)
+
+    assert [test.name for test in affected_tests] == ["test_handle"]
+    assert app_test_impact_index.filter_regression_tests(
+        ["tests/test_handler.py::test_handle", "tests/test_other.py::test_version"], PARSE_PATCH
+    ) == ["tests/test_handler.py::test_handle"]
+
+
+def test_get_affected_tests_unresolved_definition(app_test_impact_index):
+    assert app_test_impact_index.get_affected_tests(UNUSED_PATCH) is None
+
+
+def test_get_affected_tests_resolves_imports(app_test_impact_index):
+    affected_tests = app_test_impact_index.get_affected_tests(OTHER_PATCH)
+
+    assert [test.name for test in affected_tests] == ["test_version"]
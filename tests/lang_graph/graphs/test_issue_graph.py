@@ -1,13 +1,17 @@
+import threading
 from unittest.mock import Mock
 
-import neo4j
 import pytest
 from langchain_core.language_models.chat_models import BaseChatModel
+from langgraph.checkpoint.memory import MemorySaver
 
 from prometheus.docker.base_container import BaseContainer
+from prometheus.exceptions.issue_cancelled_exception import IssueCancelledException
 from prometheus.git.git_repository import GitRepository
+from prometheus.graph.graph_store import GraphStore
 from prometheus.graph.knowledge_graph import KnowledgeGraph
 from prometheus.lang_graph.graphs.issue_graph import IssueGraph
+from prometheus.lang_graph.graphs.issue_state import IssueType
 
 
 @pytest.fixture
@@ -36,8 +40,8 @@ def mock_git_repo():
 
 
 @pytest.fixture
-def mock_neo4j_driver():
-    return Mock(spec=neo4j.Driver)
+def mock_graph_store():
+    return Mock(spec=GraphStore)
 
 
 @pytest.fixture
@@ -50,7 +54,7 @@ def test_issue_graph_basic_initialization(
     mock_base_model,
     mock_kg,
     mock_git_repo,
-    mock_neo4j_driver,
+    mock_graph_store,
     mock_container,
 ):
     """Test that IssueGraph initializes correctly with basic components."""
@@ -59,10 +63,133 @@ def test_issue_graph_basic_initialization(
         base_model=mock_base_model,
         kg=mock_kg,
         git_repo=mock_git_repo,
-        neo4j_driver=mock_neo4j_driver,
+        graph_store=mock_graph_store,
         max_token_per_neo4j_result=1000,
         container=mock_container,
     )
 
     assert graph.graph is not None
     assert graph.git_repo == mock_git_repo
+
+
+def test_issue_graph_invoke_with_event_callback(
+    mock_advanced_model,
+    mock_base_model,
+    mock_kg,
+    mock_git_repo,
+    mock_graph_store,
+    mock_container,
+):
+    """Test that IssueGraph streams its node transitions to the event callback."""
+    graph = IssueGraph(
+        advanced_model=mock_advanced_model,
+        base_model=mock_base_model,
+        kg=mock_kg,
+        git_repo=mock_git_repo,
+        graph_store=mock_graph_store,
+        max_token_per_neo4j_result=1000,
+        container=mock_container,
+    )
+    events = []
+
+    output_state = graph.invoke(
+        "Title", "Body", [], IssueType.FEATURE, False, False, False, False, 1, events.append
+    )
+
+    assert [(event.type, event.node) for event in events] == [("node", "issue_type_branch_node")]
+    assert output_state["issue_title"] == "Title"
+
+
+def test_issue_graph_invoke_cancelled(
+    mock_advanced_model,
+    mock_base_model,
+    mock_kg,
+    mock_git_repo,
+    mock_graph_store,
+    mock_container,
+):
+    """Test that IssueGraph stops when the cancel event is set."""
+    graph = IssueGraph(
+        advanced_model=mock_advanced_model,
+        base_model=mock_base_model,
+        kg=mock_kg,
+        git_repo=mock_git_repo,
+        graph_store=mock_graph_store,
+        max_token_per_neo4j_result=1000,
+        container=mock_container,
+    )
+    cancel_event = threading.Event()
+    cancel_event.set()
+
+    with pytest.raises(IssueCancelledException):
+        graph.invoke(
+            "Title",
+            "Body",
+            [],
+            IssueType.FEATURE,
+            False,
+            False,
+            False,
+            False,
+            1,
+            event_callback=lambda event: None,
+            cancel_event=cancel_event,
+        )
+
+
+def test_issue_graph_invoke_resumes_from_checkpoint(
+    mock_advanced_model,
+    mock_base_model,
+    mock_kg,
+    mock_git_repo,
+    mock_graph_store,
+    mock_container,
+    monkeypatch,
+):
+    """Test that IssueGraph resumes an unfinished run of the same thread from its checkpoint."""
+    calls = []
+
+    def question_node(state):
+        calls.append(state["issue_title"])
+        if len(calls) == 1:
+            raise RuntimeError("Transient error")
+        return {"issue_response": "Answer"}
+
+    monkeypatch.setattr(
+        "prometheus.lang_graph.graphs.issue_graph.IssueQuestionSubgraphNode",
+        lambda **kwargs: question_node,
+    )
+    graph = IssueGraph(
+        advanced_model=mock_advanced_model,
+        base_model=mock_base_model,
+        kg=mock_kg,
+        git_repo=mock_git_repo,
+        graph_store=mock_graph_store,
+        max_token_per_neo4j_result=1000,
+        container=mock_container,
+        checkpointer=MemorySaver(),
+    )
+
+    with pytest.raises(RuntimeError):
+        graph.invoke(
+            "Title", "Body", [], IssueType.QUESTION, False, False, False, False, 1, thread_id="1"
+        )
+    events = []
+    output_state = graph.invoke(
+        "Other",
+        "Body",
+        [],
+        IssueType.QUESTION,
+        False,
+        False,
+        False,
+        False,
+        1,
+        event_callback=events.append,
+        thread_id="1",
+    )
+
+    assert calls == ["Title", "Title"]
+    assert [event.node for event in events] == ["issue_question_subgraph_node"]
+    assert output_state["issue_title"] == "Title"
+    assert output_state["issue_response"] == "Answer"
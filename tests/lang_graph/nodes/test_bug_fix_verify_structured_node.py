@@ -0,0 +1,47 @@
+from unittest.mock import Mock
+
+from langchain_core.messages import AIMessage, ToolMessage
+
+from prometheus.lang_graph.nodes.bug_fix_verify_structured_node import (
+    BugFixVerifyStructuredNode,
+    BugFixVerifyStructureOutput,
+)
+from tests.test_utils.util import FakeListChatWithToolsModel
+
+PYTEST_PASSED_OUTPUT = "tests/test_bug.py .\n\n============ 1 passed in 0.10s ============"
+
+
+def _state(*command_outputs):
+    return {
+        "bug_fix_verify_messages": [
+            ToolMessage(content=command_output, tool_call_id=f"call_{index}")
+            for index, command_output in enumerate(command_outputs)
+        ]
+        + [AIMessage(content="Done")]
+    }
+
+
+def test_passed_test_run_skips_the_llm():
+    node = BugFixVerifyStructuredNode(FakeListChatWithToolsModel(responses=[]))
+    node.model = Mock()
+
+    result = node(_state(PYTEST_PASSED_OUTPUT))
+
+    assert result == {"reproducing_test_fail_log": ""}
+    node.model.invoke.assert_not_called()
+
+
+def test_unparsed_command_output_is_judged_by_the_llm():
+    node = BugFixVerifyStructuredNode(FakeListChatWithToolsModel(responses=[]))
+    node.model = Mock()
+    node.model.invoke.return_value = BugFixVerifyStructureOutput(
+        reproducing_test_fail_log="AssertionError"
+    )
+
+    result = node(
+        _state(PYTEST_PASSED_OUTPUT, "Traceback (most recent call last):\nAssertionError")
+    )
+
+    assert result == {"reproducing_test_fail_log": "AssertionError"}
+    [(prompt_input,)] = [call.args for call in node.model.invoke.call_args_list]
+    assert "AssertionError" in prompt_input["bug_reproducing_logs"]
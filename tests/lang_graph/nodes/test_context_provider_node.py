@@ -2,6 +2,7 @@ import pytest
 from langchain_core.messages import AIMessage, ToolMessage
 
 from prometheus.lang_graph.nodes.context_provider_node import ContextProviderNode
+from prometheus.neo4j.neo4j_graph_store import Neo4jGraphStore
 from tests.test_utils.fixtures import neo4j_container_with_kg_fixture  # noqa: F401
 from tests.test_utils.util import FakeListChatWithToolsModel
 
@@ -15,7 +16,7 @@ async def test_context_provider_node_basic_query(neo4j_container_with_kg_fixture
     node = ContextProviderNode(
         model=fake_llm,
         kg=kg,
-        neo4j_driver=neo4j_container.get_driver(),
+        graph_store=Neo4jGraphStore(neo4j_container.get_driver()),
         max_token_per_result=1000,
     )
 
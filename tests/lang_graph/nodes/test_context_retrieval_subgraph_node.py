@@ -0,0 +1,125 @@
+from unittest.mock import Mock
+
+import pytest
+from langchain_core.language_models.chat_models import BaseChatModel
+
+from prometheus.graph.graph_store import GraphStore
+from prometheus.graph.knowledge_graph import KnowledgeGraph
+from prometheus.lang_graph.nodes.context_retrieval_subgraph_node import (
+    ContextRetrievalSubgraphNode,
+)
+from prometheus.models.context import Context
+from prometheus.utils.context_cache import ContextCache
+from prometheus.utils.embedding_util import HashingEmbeddings
+from prometheus.utils.issue_context_store import IssueContextStore
+
+CONTEXTS = [Context(relative_path="config.py", content="def parse_config(path): ...")]
+TEST_CONTEXTS = [Context(relative_path="test_config.py", content="def test_parse_config(): ...")]
+
+
+@pytest.fixture
+def mock_kg():
+    kg = Mock(spec=KnowledgeGraph)
+    kg.root_node_id = 0
+    kg.get_file_tree.return_value = "config.py"
+    kg.get_all_ast_node_types.return_value = ["FunctionDef", "ClassDef"]
+    return kg
+
+
+@pytest.fixture
+def context_cache():
+    return ContextCache(HashingEmbeddings(), similarity_threshold=0.8)
+
+
+@pytest.fixture
+def context_store():
+    return IssueContextStore()
+
+
+@pytest.fixture
+def node(mock_kg, context_cache, context_store):
+    node = ContextRetrievalSubgraphNode(
+        model=Mock(spec=BaseChatModel),
+        kg=mock_kg,
+        local_path="/path/to/repo",
+        graph_store=Mock(spec=GraphStore),
+        max_token_per_neo4j_result=1000,
+        query_key_name="bug_fix_query",
+        context_key_name="bug_fix_context",
+        context_cache=context_cache,
+        context_store=context_store,
+    )
+    node.context_retrieval_subgraph = Mock()
+    node.context_retrieval_subgraph.invoke.return_value = {"context": CONTEXTS}
+    return node
+
+
+def create_state(issue_title: str, query: str):
+    return {
+        "issue_title": issue_title,
+        "issue_body": "parse_config raises KeyError: name for an empty config.yaml",
+        "issue_comments": [],
+        "bug_fix_query": query,
+        "max_refined_query_loop": 3,
+    }
+
+
+def test_stores_retrieved_context(node, context_cache):
+    state = create_state("KeyError in parse_config", "Find the config parser")
+
+    result = node(state)
+
+    assert result == {"bug_fix_context": CONTEXTS}
+    node.context_retrieval_subgraph.invoke.assert_called_once_with(
+        "Find the config parser", 3, known_context=[]
+    )
+    assert context_cache.lookup(0, "bug_fix_context", "Find the config parser", "").exact
+
+
+def test_reuses_context_of_same_query(node, context_cache):
+    context_cache.store(0, "bug_fix_context", "Find the config parser", "", CONTEXTS)
+
+    result = node(create_state("KeyError in parse_config", "Find the config parser"))
+
+    assert result == {"bug_fix_context": CONTEXTS}
+    node.context_retrieval_subgraph.invoke.assert_not_called()
+
+
+def test_starts_from_context_of_similar_issue(node):
+    node(create_state("KeyError in parse_config", "Find the config parser"))
+
+    node(create_state("KeyError in parse_config with empty file", "Find the parser of configs"))
+
+    assert node.context_retrieval_subgraph.invoke.call_args.kwargs["known_context"] == CONTEXTS
+
+
+def test_starts_from_context_of_earlier_stages(node, context_cache, context_store):
+    context_store.add_contexts(TEST_CONTEXTS)
+
+    result = node(create_state("KeyError in parse_config", "Find the config parser"))
+
+    # The context of the earlier stages is not returned nor cached for the query
+    assert result == {"bug_fix_context": CONTEXTS}
+    node.context_retrieval_subgraph.invoke.assert_called_once_with(
+        "Find the config parser", 3, known_context=TEST_CONTEXTS
+    )
+    assert context_store.get_contexts() == TEST_CONTEXTS + CONTEXTS
+    cache_hit = context_cache.lookup(0, "bug_fix_context", "Find the config parser", "")
+    assert cache_hit.contexts == CONTEXTS
+
+
+def test_uses_context_of_earlier_stages_when_nothing_is_missing(node, context_store):
+    context_store.add_contexts(TEST_CONTEXTS)
+    node.context_retrieval_subgraph.invoke.return_value = {"context": []}
+
+    result = node(create_state("KeyError in parse_config", "Find the config parser"))
+
+    assert result == {"bug_fix_context": TEST_CONTEXTS}
+
+
+def test_adds_cached_context_to_store(node, context_cache, context_store):
+    context_cache.store(0, "bug_fix_context", "Find the config parser", "", CONTEXTS)
+
+    node(create_state("KeyError in parse_config", "Find the config parser"))
+
+    assert context_store.get_contexts() == CONTEXTS
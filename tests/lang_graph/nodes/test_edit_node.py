@@ -4,7 +4,10 @@ import pytest
 from langchain_core.messages import HumanMessage, SystemMessage
 
 from prometheus.graph.knowledge_graph import KnowledgeGraph
+from prometheus.graph.knowledge_graph_overlay import KnowledgeGraphOverlay
 from prometheus.lang_graph.nodes.edit_node import EditNode
+from prometheus.lang_graph.nodes.git_reset_node import GitResetNode
+from prometheus.utils.lang_graph_util import is_read_only_tool
 from tests.test_utils.util import FakeListChatWithToolsModel
 
 
@@ -26,6 +29,10 @@ def test_init_edit_node(mock_kg, fake_llm):
     assert isinstance(node.system_prompt, SystemMessage)
     assert len(node.tools) == 5  # Should have 5 file operation tools
     assert node.model_with_tools is not None
+    assert [tool.name for tool in node.tools if is_read_only_tool(tool)] == [
+        "read_file",
+        "read_file_with_line_numbers",
+    ]
 
 
 def test_call_method_basic(mock_kg, fake_llm):
@@ -38,3 +45,33 @@ def test_call_method_basic(mock_kg, fake_llm):
     assert "edit_messages" in result
     assert len(result["edit_messages"]) == 1
     assert result["edit_messages"][0].content == "File edit completed successfully"
+
+
+def test_edit_tools_update_kg_overlay(tmp_path, fake_llm):
+    (tmp_path / "util.py").write_text("def helper():\n    return 1\n")
+    kg = KnowledgeGraph(1000, 1000, 100, 0)
+    kg._build_graph(tmp_path)
+    kg_overlay = KnowledgeGraphOverlay(kg, str(tmp_path))
+    node = EditNode(fake_llm, str(tmp_path), kg_overlay, Mock(), 1000)
+    tools = {tool.name: tool for tool in node.tools}
+
+    tools["edit_file"].invoke(
+        {"relative_path": "util.py", "old_content": "helper", "new_content": "renamed"}
+    )
+    tools["create_file"].invoke({"relative_path": "new.py", "content": "X = 1\n"})
+
+    assert "find_references" in node.system_prompt.content
+    assert [tool.name for tool in node.tools if is_read_only_tool(tool)] == [
+        "read_file",
+        "read_file_with_line_numbers",
+        "find_definition",
+        "find_references",
+    ]
+    assert sorted(
+        overlay_file.file_node.node.relative_path for overlay_file in kg_overlay.get_files()
+    ) == ["new.py", "util.py"]
+
+    tools["delete"].invoke({"relative_path": "new.py"})
+    GitResetNode(Mock(), kg_overlay)(None)
+
+    assert kg_overlay.is_empty()
@@ -12,7 +12,10 @@ from tests.test_utils.util import FakeListChatWithToolsModel
 
 @pytest.fixture
 def mock_container():
-    return Mock(spec=BaseContainer)
+    container = Mock(spec=BaseContainer)
+    container.cached_setup_commands = []
+    container.cached_test_commands = []
+    return container
 
 
 @pytest.fixture
@@ -50,6 +53,18 @@ def test_format_human_message_with_build_summary(mock_container, mock_kg, fake_l
     assert "The previous build summary is:" in message.content
 
 
+def test_format_human_message_with_cached_environment(mock_container, mock_kg, fake_llm):
+    """Test message formatting when the container was started from a cached environment."""
+    mock_container.cached_setup_commands = ["./gradlew dependencies"]
+    node = GeneralBuildNode(fake_llm, mock_container, mock_kg)
+    state = BuildAndTestState({})
+
+    message = node.format_human_message(state)
+
+    assert "restored from a cache" in message.content
+    assert "$ ./gradlew dependencies" in message.content
+
+
 def test_call_method_with_no_build(mock_container, mock_kg, fake_llm):
     """Test __call__ method when exist_build is False."""
     node = GeneralBuildNode(fake_llm, mock_container, mock_kg)
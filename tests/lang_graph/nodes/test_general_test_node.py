@@ -12,7 +12,10 @@ from tests.test_utils.util import FakeListChatWithToolsModel
 
 @pytest.fixture
 def mock_container():
-    return Mock(spec=BaseContainer)
+    container = Mock(spec=BaseContainer)
+    container.cached_setup_commands = []
+    container.cached_test_commands = []
+    return container
 
 
 @pytest.fixture
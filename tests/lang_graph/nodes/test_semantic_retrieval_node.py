@@ -0,0 +1,42 @@
+from unittest.mock import Mock
+
+from langchain_core.messages import AIMessage, ToolMessage
+
+from prometheus.graph.graph_types import ASTNode, FileNode, KnowledgeGraphNode
+from prometheus.graph.semantic_index import SemanticIndex, SemanticSearchResult
+from prometheus.lang_graph.nodes.semantic_retrieval_node import SemanticRetrievalNode
+
+SEARCH_RESULT = SemanticSearchResult(
+    file_node=KnowledgeGraphNode(1, FileNode(basename="config.py", relative_path="config.py")),
+    kg_node=KnowledgeGraphNode(
+        5, ASTNode(type="function_definition", start_line=3, end_line=4, text="def parse(): ...")
+    ),
+    score=0.5,
+)
+
+
+def test_semantic_retrieval_node():
+    semantic_index = Mock(spec=SemanticIndex)
+    semantic_index.search.return_value = [SEARCH_RESULT]
+    node = SemanticRetrievalNode(semantic_index, 1000)
+
+    result = node({"query": "Where is the config parsed?"})
+
+    ai_message, tool_message = result["context_provider_messages"]
+    assert isinstance(ai_message, AIMessage)
+    assert ai_message.tool_calls[0]["name"] == "semantic_search"
+    assert ai_message.tool_calls[0]["args"] == {"query": "Where is the config parsed?"}
+    assert isinstance(tool_message, ToolMessage)
+    assert tool_message.tool_call_id == ai_message.tool_calls[0]["id"]
+    assert tool_message.artifact[0]["ASTNode"]["text"] == "def parse(): ..."
+    assert "def parse(): ..." in tool_message.content
+
+
+def test_semantic_retrieval_node_without_results():
+    semantic_index = Mock(spec=SemanticIndex)
+    semantic_index.search.return_value = []
+    node = SemanticRetrievalNode(semantic_index, 1000)
+
+    result = node({"query": "Where is the config parsed?"})
+
+    assert result == {"context_provider_messages": []}
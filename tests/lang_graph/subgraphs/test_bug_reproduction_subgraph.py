@@ -1,10 +1,10 @@
 from unittest.mock import Mock
 
-import neo4j
 import pytest
 
 from prometheus.docker.base_container import BaseContainer
 from prometheus.git.git_repository import GitRepository
+from prometheus.graph.graph_store import GraphStore
 from prometheus.graph.knowledge_graph import KnowledgeGraph
 from prometheus.lang_graph.subgraphs.bug_reproduction_subgraph import BugReproductionSubgraph
 from tests.test_utils.util import FakeListChatWithToolsModel
@@ -31,12 +31,12 @@ def mock_git_repo():
 
 
 @pytest.fixture
-def mock_neo4j_driver():
-    return Mock(spec=neo4j.Driver)
+def mock_graph_store():
+    return Mock(spec=GraphStore)
 
 
 def test_bug_reproduction_subgraph_basic_initialization(
-    mock_container, mock_kg, mock_git_repo, mock_neo4j_driver
+    mock_container, mock_kg, mock_git_repo, mock_graph_store
 ):
     """Test that BugReproductionSubgraph initializes correctly with basic components."""
     # Initialize fake model with empty responses
@@ -50,7 +50,7 @@ def test_bug_reproduction_subgraph_basic_initialization(
         mock_container,
         mock_kg,
         mock_git_repo,
-        mock_neo4j_driver,
+        mock_graph_store,
         0,
     )
 
@@ -1,10 +1,10 @@
 from unittest.mock import Mock
 
-import neo4j
 import pytest
 
 from prometheus.docker.base_container import BaseContainer
 from prometheus.git.git_repository import GitRepository
+from prometheus.graph.graph_store import GraphStore
 from prometheus.graph.knowledge_graph import KnowledgeGraph
 from prometheus.lang_graph.subgraphs.issue_bug_subgraph import IssueBugSubgraph
 from tests.test_utils.util import FakeListChatWithToolsModel
@@ -32,12 +32,12 @@ def mock_git_repo():
 
 
 @pytest.fixture
-def mock_neo4j_driver():
-    return Mock(spec=neo4j.Driver)
+def mock_graph_store():
+    return Mock(spec=GraphStore)
 
 
 def test_issue_bug_subgraph_basic_initialization(
-    mock_container, mock_kg, mock_git_repo, mock_neo4j_driver
+    mock_container, mock_kg, mock_git_repo, mock_graph_store
 ):
     """Test that IssueBugSubgraph initializes correctly with basic components."""
     # Initialize fake model with empty responses
@@ -51,7 +51,7 @@ def test_issue_bug_subgraph_basic_initialization(
         container=mock_container,
         kg=mock_kg,
         git_repo=mock_git_repo,
-        neo4j_driver=mock_neo4j_driver,
+        graph_store=mock_graph_store,
         max_token_per_neo4j_result=1000,
     )
 
@@ -59,9 +59,7 @@ def test_issue_bug_subgraph_basic_initialization(
     assert subgraph.subgraph is not None
 
 
-def test_issue_bug_subgraph_with_commands(
-    mock_container, mock_kg, mock_git_repo, mock_neo4j_driver
-):
+def test_issue_bug_subgraph_with_commands(mock_container, mock_kg, mock_git_repo, mock_graph_store):
     """Test that IssueBugSubgraph initializes correctly with build and test commands."""
     fake_advanced_model = FakeListChatWithToolsModel(responses=[])
     fake_base_model = FakeListChatWithToolsModel(responses=[])
@@ -74,7 +72,7 @@ def test_issue_bug_subgraph_with_commands(
         container=mock_container,
         kg=mock_kg,
         git_repo=mock_git_repo,
-        neo4j_driver=mock_neo4j_driver,
+        graph_store=mock_graph_store,
         max_token_per_neo4j_result=1000,
         build_commands=build_commands,
         test_commands=test_commands,
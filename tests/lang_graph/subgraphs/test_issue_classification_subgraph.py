@@ -1,9 +1,9 @@
 from unittest.mock import Mock
 
-import neo4j
 import pytest
 
 from prometheus.git.git_repository import GitRepository
+from prometheus.graph.graph_store import GraphStore
 from prometheus.graph.knowledge_graph import KnowledgeGraph
 from prometheus.lang_graph.subgraphs.issue_classification_subgraph import (
     IssueClassificationSubgraph,
@@ -28,12 +28,12 @@ def mock_git_repo():
 
 
 @pytest.fixture
-def mock_neo4j_driver():
-    return Mock(spec=neo4j.Driver)
+def mock_graph_store():
+    return Mock(spec=GraphStore)
 
 
 def test_issue_classification_subgraph_basic_initialization(
-    mock_kg, mock_git_repo, mock_neo4j_driver
+    mock_kg, mock_git_repo, mock_graph_store
 ):
     """Test that IssueClassificationSubgraph initializes correctly with basic components."""
     # Initialize fake model with empty responses
@@ -44,7 +44,7 @@ def test_issue_classification_subgraph_basic_initialization(
         model=fake_model,
         kg=mock_kg,
         local_path=mock_git_repo.playground_path,
-        neo4j_driver=mock_neo4j_driver,
+        graph_store=mock_graph_store,
         max_token_per_neo4j_result=1000,
     )
 
@@ -1,10 +1,10 @@
 from unittest.mock import Mock
 
-import neo4j
 import pytest
 
 from prometheus.docker.base_container import BaseContainer
 from prometheus.git.git_repository import GitRepository
+from prometheus.graph.graph_store import GraphStore
 from prometheus.graph.knowledge_graph import KnowledgeGraph
 from prometheus.lang_graph.subgraphs.issue_question_subgraph import IssueQuestionSubgraph
 from tests.test_utils.util import FakeListChatWithToolsModel
@@ -32,12 +32,12 @@ def mock_git_repo():
 
 
 @pytest.fixture
-def mock_neo4j_driver():
-    return Mock(spec=neo4j.Driver)
+def mock_graph_store():
+    return Mock(spec=GraphStore)
 
 
 def test_issue_question_subgraph_basic_initialization(
-    mock_container, mock_kg, mock_git_repo, mock_neo4j_driver
+    mock_container, mock_kg, mock_git_repo, mock_graph_store
 ):
     """Test that IssueQuestionSubgraph initializes correctly with basic components."""
     # Initialize fake model with empty responses
@@ -50,7 +50,7 @@ def test_issue_question_subgraph_basic_initialization(
         base_model=fake_base_model,
         kg=mock_kg,
         git_repo=mock_git_repo,
-        neo4j_driver=mock_neo4j_driver,
+        graph_store=mock_graph_store,
         max_token_per_neo4j_result=1000,
     )
 
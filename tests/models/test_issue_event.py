@@ -0,0 +1,37 @@
+from prometheus.models.context import Context
+from prometheus.models.issue_event import IssueEvent
+
+
+def test_from_graph_update():
+    context = Context(relative_path="foo/bar.py", content="print('hello')")
+
+    events = IssueEvent.from_graph_update(
+        ("issue_bug_subgraph_node:1234", "issue_verified_bug_subgraph_node:5678"),
+        {
+            "edit_node": {
+                "edit_patch": "diff --git a/foo/bar.py b/foo/bar.py",
+                "bug_fix_context": [context],
+                "edit_messages": ["not an event"],
+                "passed_build": False,
+            }
+        },
+    )
+
+    assert [(event.type, event.key) for event in events] == [
+        ("node", None),
+        ("patch", "edit_patch"),
+        ("context", "bug_fix_context"),
+        ("test_result", "passed_build"),
+    ]
+    assert all(event.node == "edit_node" for event in events)
+    assert events[0].path == ["issue_bug_subgraph_node", "issue_verified_bug_subgraph_node"]
+    assert events[2].data == [context.model_dump()]
+    assert events[3].data is False
+
+
+def test_from_graph_update_without_state_update():
+    events = IssueEvent.from_graph_update((), {"issue_type_branch_node": None})
+
+    assert len(events) == 1
+    assert events[0].type == "node"
+    assert events[0].path == []
@@ -1,3 +1,5 @@
+import shutil
+
 import pytest
 
 from prometheus.graph.knowledge_graph import KnowledgeGraph
@@ -101,6 +103,29 @@ async def test_num_next_chunk_edges(neo4j_container_with_kg_fixture):  # noqa: F
             assert len(read_next_chunk_edges) == 1
 
 
+@pytest.mark.slow
+async def test_num_symbol_nodes(neo4j_container_with_kg_fixture):  # noqa: F811
+    neo4j_container, kg = neo4j_container_with_kg_fixture
+    handler = KnowledgeGraphHandler(neo4j_container.get_driver(), 100)
+
+    with neo4j_container.get_driver() as driver:
+        with driver.session() as session:
+            read_symbol_nodes = session.execute_read(handler._read_symbol_nodes, root_node_id=0)
+            assert len(read_symbol_nodes) == 2
+
+
+@pytest.mark.slow
+async def test_num_symbol_edges(neo4j_container_with_kg_fixture):  # noqa: F811
+    neo4j_container, kg = neo4j_container_with_kg_fixture
+    handler = KnowledgeGraphHandler(neo4j_container.get_driver(), 100)
+
+    with neo4j_container.get_driver() as driver:
+        with driver.session() as session:
+            read_symbol_edges = session.execute_read(handler._read_symbol_edges, root_node_id=0)
+            assert len(read_symbol_edges) == 3
+            assert {edge["type"] for edge in read_symbol_edges} == {"DEFINES"}
+
+
 @pytest.mark.slow
 async def test_knowledge_graph_exists(neo4j_container_with_kg_fixture):  # noqa: F811
     neo4j_container, kg = neo4j_container_with_kg_fixture
@@ -120,6 +145,77 @@ async def test_clear_knowledge_graph(empty_neo4j_container_fixture):  # noqa: F8
 
     assert handler.knowledge_graph_exists(0)
 
+    progress = []
+    handler.clear_knowledge_graph(0, lambda *args: progress.append(args))
+
+    assert not handler.knowledge_graph_exists(0)
+    # The files are deleted in batches of one file, the root last
+    n_files = len(kg.get_file_nodes())
+    assert progress == [(i, n_files) for i in range(1, n_files + 1)]
+    with driver.session() as session:
+        assert session.execute_read(handler.verify_empty)
+
+
+@pytest.mark.slow
+async def test_knowledge_graphs_share_file_content(empty_neo4j_container_fixture, tmp_path):  # noqa: F811
+    project = tmp_path / "project"
+    shutil.copytree(test_project_paths.TEST_PROJECT_PATH, project)
+    driver = empty_neo4j_container_fixture.get_driver()
+    handler = KnowledgeGraphHandler(driver, 100)
+    kg = KnowledgeGraph(1000, 100, 10, 0)
+    await kg.build_graph(project)
+    handler.write_knowledge_graph(kg)
+    with driver.session() as session:
+        n_nodes = session.execute_read(handler.count_nodes)
+
+    # The same files at another commit, but for one of them
+    changed_file = next(project.rglob("*.py"))
+    changed_file.write_text(changed_file.read_text() + "\n\ndef added():\n    pass\n")
+    other_kg = KnowledgeGraph(1000, 100, 10, 0)
+    await other_kg.build_graph(project)
+    other_kg.move_node_ids(handler.allocate_node_ids(other_kg.get_next_node_id()))
+    handler.write_knowledge_graph(other_kg)
+
+    with driver.session() as session:
+        n_other_nodes = session.execute_read(handler.count_nodes) - n_nodes
+    assert n_other_nodes < n_nodes / 2
+    read_kg = handler.read_knowledge_graph(other_kg.root_node_id, 1000, 100, 10)
+    assert read_kg == other_kg
+
     handler.clear_knowledge_graph(0)
 
     assert not handler.knowledge_graph_exists(0)
+    assert handler.read_knowledge_graph(other_kg.root_node_id, 1000, 100, 10) == other_kg
+    # The NodeIdCounter is kept
+    with driver.session() as session:
+        assert session.execute_read(handler.count_nodes) == len(other_kg._knowledge_graph_nodes) + 1
+
+    handler.clear_knowledge_graph(other_kg.root_node_id)
+
+    with driver.session() as session:
+        assert session.execute_read(handler.count_nodes) == 1
+
+
+@pytest.mark.slow
+async def test_read_knowledge_graph_keeps_selective_ast(empty_neo4j_container_fixture):  # noqa: F811
+    handler = KnowledgeGraphHandler(empty_neo4j_container_fixture.get_driver(), 100)
+    kg = KnowledgeGraph(1000, 100, 10, 0, selective_ast=True)
+    await kg.build_graph(test_project_paths.TEST_PROJECT_PATH)
+    handler.write_knowledge_graph(kg)
+
+    read_kg = handler.read_knowledge_graph(0, 1000, 100, 10)
+
+    assert read_kg.selective_ast
+    assert read_kg.get_file_graph_builder().selective_ast
+
+
+@pytest.mark.slow
+async def test_allocate_node_ids(neo4j_container_with_kg_fixture):  # noqa: F811
+    neo4j_container, kg = neo4j_container_with_kg_fixture
+    handler = KnowledgeGraphHandler(neo4j_container.get_driver(), 100)
+
+    first_node_id = handler.allocate_node_ids(10)
+
+    assert first_node_id >= kg.get_next_node_id()
+    assert handler.allocate_node_ids(5) == first_node_id + 10
+    assert handler.allocate_node_ids(1) == first_node_id + 15
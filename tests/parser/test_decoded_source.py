@@ -0,0 +1,93 @@
+import codecs
+import mmap
+
+import pytest
+
+from prometheus.parser import decoded_source
+from prometheus.parser.decoded_source import (
+    FALLBACK_ENCODING,
+    decode_source,
+    detect_encoding,
+    open_source,
+    read_source,
+)
+
+
+def test_decode_utf8_source():
+    data = "x = 'café'\n".encode("utf-8")
+
+    source = decode_source(data)
+
+    assert source.data is data
+    assert source.text == "x = 'café'\n"
+    assert source.encoding == "utf-8"
+    # Byte offsets of the non-ASCII text are mapped to the decoded text
+    assert source.get_text(5, 11) == "café'"
+
+
+def test_decode_latin1_source():
+    source = decode_source("# Fran\xe7ois\nx = 1\n".encode("latin-1"))
+
+    assert source.text == "# François\nx = 1\n"
+    assert source.encoding == FALLBACK_ENCODING
+    assert source.data == source.text.encode("utf-8")
+
+
+def test_decode_utf8_source_with_invalid_bytes():
+    data = "# été, ça, à\n".encode("utf-8") * 3 + b"# \xff\n"
+
+    source = decode_source(data)
+
+    assert source.encoding == "utf-8"
+    assert source.text == "# été, ça, à\n" * 3 + "# �\n"
+
+
+@pytest.mark.parametrize(
+    "bom, encoding", [(codecs.BOM_UTF8, "utf-8"), (codecs.BOM_UTF16_LE, "utf-16-le")]
+)
+def test_decode_source_with_bom(bom, encoding):
+    source = decode_source(bom + "x = 'é'\n".encode(encoding))
+
+    assert source.text == "x = 'é'\n"
+    assert source.encoding == encoding
+    assert source.data == "x = 'é'\n".encode("utf-8")
+
+
+def test_detect_encoding():
+    assert detect_encoding(b"x = 1\n") == ("utf-8", 0)
+    assert detect_encoding(codecs.BOM_UTF32_LE + b"x\0\0\0") == ("utf-32-le", 4)
+    # A sample may end in the middle of a character
+    assert detect_encoding("é".encode("utf-8") * 10 + b"\xc3") == ("utf-8", 0)
+    assert detect_encoding("café\n".encode("latin-1")) == (FALLBACK_ENCODING, 0)
+
+
+def test_read_source(tmp_path):
+    file = tmp_path / "a.py"
+    file.write_bytes(b"x = 1\n")
+    empty_file = tmp_path / "empty.py"
+    empty_file.touch()
+
+    assert read_source(file).text == "x = 1\n"
+    assert read_source(empty_file).text == ""
+
+
+def test_open_small_source(tmp_path):
+    file = tmp_path / "a.py"
+    file.write_bytes(b"x = 1\n")
+
+    with open_source(file) as source:
+        assert isinstance(source.data, bytes)
+        assert source.text == "x = 1\n"
+
+
+def test_open_large_source(tmp_path, monkeypatch):
+    monkeypatch.setattr(decoded_source, "MMAP_THRESHOLD", 4)
+    file = tmp_path / "a.py"
+    file.write_bytes(b"x = 1\n")
+
+    with open_source(file) as source:
+        assert isinstance(source.data, mmap.mmap)
+        assert source.text == "x = 1\n"
+
+    # The file is unmapped at the end of the with block
+    assert source.data.closed
@@ -1,13 +1,17 @@
+import threading
 from pathlib import Path
-from unittest.mock import MagicMock, create_autospec, mock_open, patch
+from unittest.mock import MagicMock, create_autospec, patch
 
 import pytest
+from tree_sitter import Parser
 from tree_sitter._binding import Tree
 
 from prometheus.parser.file_types import FileType
 from prometheus.parser.tree_sitter_parser import (
     FILE_TYPE_TO_LANG,
     FileNotSupportedError,
+    LanguageParseStats,
+    ParseStats,
     parse,
     supports_file,
 )
@@ -45,28 +49,64 @@ def test_supports_file_with_unsupported_type(mock_unsupported_file):
         mock_from_path.assert_called_once_with(mock_unsupported_file)
 
 
-def test_parse_python_file_successfully(mock_python_file, mock_tree):
-    mock_content = b'print("hello")'
-    m = mock_open(read_data=mock_content)
+def test_parse_python_file_successfully(tmp_path):
+    file = tmp_path / "test.py"
+    file.write_bytes(b'print("hello")')
+
+    tree = parse(file)
+
+    assert tree.root_node.type == "module"
+    assert tree.root_node.text == b'print("hello")'
+
+
+def test_parse_empty_file(tmp_path):
+    file = tmp_path / "empty.py"
+    file.touch()
+
+    tree = parse(file)
+
+    assert tree.root_node.type == "module"
+    assert tree.root_node.child_count == 0
+
+
+def test_parse_reuses_parser_per_language(tmp_path):
+    (tmp_path / "a.py").write_text("a = 1\n")
+    (tmp_path / "b.py").write_text("b = 2\n")
 
     with (
-        patch("prometheus.parser.file_types.FileType.from_path") as mock_from_path,
-        patch("prometheus.parser.tree_sitter_parser.get_parser") as mock_get_parser,
-        patch.object(Path, "open", m),
+        patch("prometheus.parser.tree_sitter_parser._parsers", threading.local()),
+        patch("prometheus.parser.tree_sitter_parser.Parser", side_effect=Parser) as mock_parser,
     ):
-        # Setup mocks
-        mock_from_path.return_value = FileType.PYTHON
-        mock_parser = mock_get_parser.return_value
-        mock_parser.parse.return_value = mock_tree
+        parse(tmp_path / "a.py")
+        parse(tmp_path / "b.py")
 
-        # Test parse function
-        result = parse(mock_python_file)
+    mock_parser.assert_called_once_with()
 
-        # Verify results and interactions
-        assert result == mock_tree
-        mock_from_path.assert_called_once_with(mock_python_file)
-        mock_get_parser.assert_called_once_with("python")
-        mock_parser.parse.assert_called_once_with(mock_content)
+
+def test_parse_collects_stats(tmp_path):
+    (tmp_path / "a.py").write_text("a = 1\n")
+    (tmp_path / "b.py").write_text("b = 2\nc = 3\n")
+    (tmp_path / "c.java").write_text("class C {}\n")
+    stats = ParseStats()
+
+    for file in ["a.py", "b.py", "c.java"]:
+        parse(tmp_path / file, stats)
+
+    parse_stats = stats.get()
+    assert set(parse_stats) == {"python", "java"}
+    assert parse_stats["python"].files == 2
+    assert parse_stats["python"].bytes == 18
+    assert parse_stats["java"].files == 1
+    assert parse_stats["java"].bytes == 11
+    assert "python: 2 files" in stats.format()
+
+
+def test_language_parse_stats_throughput():
+    stats = LanguageParseStats(files=4, bytes=2_000_000, seconds=2.0)
+
+    assert stats.files_per_second == 2.0
+    assert stats.megabytes_per_second == 1.0
+    assert LanguageParseStats().files_per_second == 0.0
 
 
 def test_parse_unsupported_file_raises_error(mock_unsupported_file):
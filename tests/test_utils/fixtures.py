@@ -8,6 +8,7 @@ from git import Repo
 from testcontainers.neo4j import Neo4jContainer
 from testcontainers.postgres import PostgresContainer
 
+from prometheus.graph.embedded_graph_store import EmbeddedGraphStore
 from prometheus.graph.knowledge_graph import KnowledgeGraph
 from prometheus.neo4j.knowledge_graph_handler import KnowledgeGraphHandler
 from tests.test_utils import test_project_paths
@@ -38,6 +39,15 @@ async def neo4j_container_with_kg_fixture():
         yield neo4j_container, kg
 
 
+@pytest.fixture(scope="session")
+async def embedded_graph_store_with_kg_fixture(tmp_path_factory):
+    kg = KnowledgeGraph(1000, 100, 10, 0)
+    await kg.build_graph(test_project_paths.TEST_PROJECT_PATH)
+    store = EmbeddedGraphStore(tmp_path_factory.mktemp("embedded_graph_store"))
+    store.write_knowledge_graph(kg)
+    yield store, kg
+
+
 @pytest.fixture(scope="function")
 def empty_neo4j_container_fixture():
     container = (
@@ -49,6 +59,27 @@ def empty_neo4j_container_fixture():
         yield neo4j_container
 
 
+@pytest.fixture(scope="function")
+async def knowledge_graph_fixture():
+    kg = KnowledgeGraph(1000, 1000, 100, 0)
+    await kg.build_graph(test_project_paths.TEST_PROJECT_PATH)
+    yield kg
+
+
+def knowledge_graph_contents(kg: KnowledgeGraph):
+    """The nodes and edges of a knowledge graph by node ID, to compare two knowledge graphs."""
+    return (
+        sorted(
+            ((kg_node.node_id, kg_node.node) for kg_node in kg._knowledge_graph_nodes),
+            key=lambda node: node[0],
+        ),
+        sorted(
+            (kg_edge.source.node_id, kg_edge.target.node_id, kg_edge.type)
+            for kg_edge in kg._knowledge_graph_edges
+        ),
+    )
+
+
 @pytest.fixture(scope="session")
 def postgres_container_fixture():
     container = PostgresContainer(
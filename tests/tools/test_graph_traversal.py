@@ -1,272 +1,289 @@
 import pytest
 
+from prometheus.graph.embedded_graph_store import EmbeddedGraphStore
+from prometheus.graph.knowledge_graph import KnowledgeGraph
+from prometheus.neo4j.neo4j_graph_store import Neo4jGraphStore
 from prometheus.tools import graph_traversal
 from tests.test_utils import test_project_paths
-from tests.test_utils.fixtures import neo4j_container_with_kg_fixture  # noqa: F401
+from tests.test_utils.fixtures import (  # noqa: F401
+    embedded_graph_store_with_kg_fixture,
+    neo4j_container_with_kg_fixture,
+)
+
+
+@pytest.fixture(params=[pytest.param("neo4j", marks=pytest.mark.slow), "embedded"])
+def graph_store(request):
+    """The knowledge graph of the test project, in Neo4j or in an EmbeddedGraphStore."""
+    if request.param == "embedded":
+        store, _ = request.getfixturevalue("embedded_graph_store_with_kg_fixture")
+        yield store
+        return
+    neo4j_container, _ = request.getfixturevalue("neo4j_container_with_kg_fixture")
+    with neo4j_container.get_driver() as driver:
+        yield Neo4jGraphStore(driver)
 
 
-@pytest.mark.slow
-async def test_find_file_node_with_basename(neo4j_container_with_kg_fixture):  # noqa: F811
-    neo4j_container, kg = neo4j_container_with_kg_fixture
-    with neo4j_container.get_driver() as driver:
-        result = graph_traversal.find_file_node_with_basename(
-            test_project_paths.PYTHON_FILE.name, driver, 1000, 0
-        )
+async def test_find_file_node_with_basename(graph_store):
+    result = graph_traversal.find_file_node_with_basename(
+        test_project_paths.PYTHON_FILE.name, graph_store, 1000, 0
+    )
 
-        basename = test_project_paths.PYTHON_FILE.name
-        relative_path = str(
-            test_project_paths.PYTHON_FILE.relative_to(
-                test_project_paths.TEST_PROJECT_PATH
-            ).as_posix()
-        )
+    basename = test_project_paths.PYTHON_FILE.name
+    relative_path = str(
+        test_project_paths.PYTHON_FILE.relative_to(test_project_paths.TEST_PROJECT_PATH).as_posix()
+    )
 
-        result_data = result[1]
-        assert len(result_data) == 1
-        assert "FileNode" in result_data[0]
-        assert result_data[0]["FileNode"].get("basename", "") == basename
-        assert result_data[0]["FileNode"].get("relative_path", "") == relative_path
+    result_data = result[1]
+    assert len(result_data) == 1
+    assert "FileNode" in result_data[0]
+    assert result_data[0]["FileNode"].get("basename", "") == basename
+    assert result_data[0]["FileNode"].get("relative_path", "") == relative_path
 
 
-@pytest.mark.slow
-async def test_find_file_node_with_relative_path(neo4j_container_with_kg_fixture):  # noqa: F811
+async def test_find_file_node_with_relative_path(graph_store):
     relative_path = str(
         test_project_paths.MD_FILE.relative_to(test_project_paths.TEST_PROJECT_PATH).as_posix()
     )
-    neo4j_container, kg = neo4j_container_with_kg_fixture
-    with neo4j_container.get_driver() as driver:
-        result = graph_traversal.find_file_node_with_relative_path(relative_path, driver, 1000, 0)
+    result = graph_traversal.find_file_node_with_relative_path(relative_path, graph_store, 1000, 0)
 
-        basename = test_project_paths.MD_FILE.name
+    basename = test_project_paths.MD_FILE.name
 
-        result_data = result[1]
-        assert len(result_data) == 1
-        assert "FileNode" in result_data[0]
-        assert result_data[0]["FileNode"].get("basename", "") == basename
-        assert result_data[0]["FileNode"].get("relative_path", "") == relative_path
+    result_data = result[1]
+    assert len(result_data) == 1
+    assert "FileNode" in result_data[0]
+    assert result_data[0]["FileNode"].get("basename", "") == basename
+    assert result_data[0]["FileNode"].get("relative_path", "") == relative_path
 
 
-@pytest.mark.slow
-async def test_find_ast_node_with_text_in_file_with_basename(neo4j_container_with_kg_fixture):  # noqa: F811
+async def test_find_ast_node_with_text_in_file_with_basename(graph_store):
     basename = test_project_paths.PYTHON_FILE.name
-    neo4j_container, kg = neo4j_container_with_kg_fixture
-    with neo4j_container.get_driver() as driver:
-        result = graph_traversal.find_ast_node_with_text_in_file_with_basename(
-            "Hello world!", basename, driver, 1000, 0
-        )
+    result = graph_traversal.find_ast_node_with_text_in_file_with_basename(
+        "Hello world!", basename, graph_store, 1000, 0
+    )
 
-        result_data = result[1]
-        assert len(result_data) > 0
-        for result_row in result_data:
-            assert "ASTNode" in result_row
-            assert "Hello world!" in result_row["ASTNode"].get("text", "")
-            assert "FileNode" in result_row
-            assert result_row["FileNode"].get("basename", "") == basename
+    result_data = result[1]
+    assert len(result_data) > 0
+    for result_row in result_data:
+        assert "ASTNode" in result_row
+        assert "Hello world!" in result_row["ASTNode"].get("text", "")
+        assert "FileNode" in result_row
+        assert result_row["FileNode"].get("basename", "") == basename
 
 
-@pytest.mark.slow
-async def test_find_ast_node_with_text_in_file_with_relative_path(neo4j_container_with_kg_fixture):  # noqa: F811
+async def test_find_ast_node_with_text_in_file_with_relative_path(graph_store):
     relative_path = str(
         test_project_paths.C_FILE.relative_to(test_project_paths.TEST_PROJECT_PATH).as_posix()
     )
-    neo4j_container, kg = neo4j_container_with_kg_fixture
-    with neo4j_container.get_driver() as driver:
-        result = graph_traversal.find_ast_node_with_text_in_file_with_relative_path(
-            "Hello world!", relative_path, driver, 1000, 0
-        )
+    result = graph_traversal.find_ast_node_with_text_in_file_with_relative_path(
+        "Hello world!", relative_path, graph_store, 1000, 0
+    )
 
-        result_data = result[1]
-        assert len(result_data) > 0
-        for result_row in result_data:
-            assert "ASTNode" in result_row
-            assert "Hello world!" in result_row["ASTNode"].get("text", "")
-            assert "FileNode" in result_row
-            assert result_row["FileNode"].get("relative_path", "") == relative_path
+    result_data = result[1]
+    assert len(result_data) > 0
+    for result_row in result_data:
+        assert "ASTNode" in result_row
+        assert "Hello world!" in result_row["ASTNode"].get("text", "")
+        assert "FileNode" in result_row
+        assert result_row["FileNode"].get("relative_path", "") == relative_path
 
 
-@pytest.mark.slow
-async def test_find_ast_node_with_type_in_file_with_basename(neo4j_container_with_kg_fixture):  # noqa: F811
+async def test_find_ast_node_with_type_in_file_with_basename(graph_store):
     basename = test_project_paths.C_FILE.name
     node_type = "function_definition"
-    neo4j_container, kg = neo4j_container_with_kg_fixture
-    with neo4j_container.get_driver() as driver:
-        result = graph_traversal.find_ast_node_with_type_in_file_with_basename(
-            node_type, basename, driver, 1000, 0
-        )
+    result = graph_traversal.find_ast_node_with_type_in_file_with_basename(
+        node_type, basename, graph_store, 1000, 0
+    )
 
-        result_data = result[1]
-        assert len(result_data) > 0
-        for result_row in result_data:
-            assert "ASTNode" in result_row
-            assert result_row["ASTNode"].get("type", "") == node_type
-            assert "FileNode" in result_row
-            assert result_row["FileNode"].get("basename", "") == basename
+    result_data = result[1]
+    assert len(result_data) > 0
+    for result_row in result_data:
+        assert "ASTNode" in result_row
+        assert result_row["ASTNode"].get("type", "") == node_type
+        assert "FileNode" in result_row
+        assert result_row["FileNode"].get("basename", "") == basename
 
 
-@pytest.mark.slow
-async def test_find_ast_node_with_type_in_file_with_relative_path(neo4j_container_with_kg_fixture):  # noqa: F811
+async def test_find_ast_node_with_type_in_file_with_relative_path(graph_store):
     relative_path = str(
         test_project_paths.JAVA_FILE.relative_to(test_project_paths.TEST_PROJECT_PATH).as_posix()
     )
     node_type = "string_literal"
-    neo4j_container, kg = neo4j_container_with_kg_fixture
-    with neo4j_container.get_driver() as driver:
-        result = graph_traversal.find_ast_node_with_type_in_file_with_relative_path(
-            node_type, relative_path, driver, 1000, 0
-        )
+    result = graph_traversal.find_ast_node_with_type_in_file_with_relative_path(
+        node_type, relative_path, graph_store, 1000, 0
+    )
+
+    result_data = result[1]
+    assert len(result_data) > 0
+    for result_row in result_data:
+        assert "ASTNode" in result_row
+        assert result_row["ASTNode"].get("type", "") == node_type
+        assert "FileNode" in result_row
+        assert result_row["FileNode"].get("relative_path", "") == relative_path
 
-        result_data = result[1]
-        assert len(result_data) > 0
-        for result_row in result_data:
-            assert "ASTNode" in result_row
-            assert result_row["ASTNode"].get("type", "") == node_type
-            assert "FileNode" in result_row
-            assert result_row["FileNode"].get("relative_path", "") == relative_path
 
+async def test_find_definition(graph_store):
+    result = graph_traversal.find_definition("main", graph_store, 1000, 0)
 
-@pytest.mark.slow
-async def test_find_text_node_with_text(neo4j_container_with_kg_fixture):  # noqa: F811
+    result_data = result[1]
+    assert [result_row["FileNode"]["relative_path"] for result_row in result_data] == [
+        "bar/test.java",
+        "test.c",
+    ]
+    assert result_data[0]["ASTNode"]["type"] == "method_declaration"
+    assert result_data[1]["ASTNode"]["type"] == "function_definition"
+
+
+async def test_find_references(graph_store):
+    # main is defined, but not used by the test project
+    result = graph_traversal.find_references("main", graph_store, 1000, 0)
+
+    assert result[1] == []
+
+
+async def test_find_text_node_with_text(graph_store):
     text = "Text under header C"
-    neo4j_container, kg = neo4j_container_with_kg_fixture
-    with neo4j_container.get_driver() as driver:
-        result = graph_traversal.find_text_node_with_text(text, driver, 1000, 0)
+    result = graph_traversal.find_text_node_with_text(text, graph_store, 1000, 0)
 
-        result_data = result[1]
-        assert len(result_data) > 0
-        for result_row in result_data:
-            assert "TextNode" in result_row
-            assert text in result_row["TextNode"].get("text", "")
-            assert "FileNode" in result_row
-            assert result_row["FileNode"].get("relative_path", "") == "foo/test.md"
+    result_data = result[1]
+    assert len(result_data) > 0
+    for result_row in result_data:
+        assert "TextNode" in result_row
+        assert text in result_row["TextNode"].get("text", "")
+        assert "FileNode" in result_row
+        assert result_row["FileNode"].get("relative_path", "") == "foo/test.md"
 
 
-@pytest.mark.slow
-async def test_find_text_node_with_text_in_file(neo4j_container_with_kg_fixture):  # noqa: F811
+async def test_find_text_node_with_text_in_file(graph_store):
     basename = test_project_paths.MD_FILE.name
     text = "Text under header B"
-    neo4j_container, kg = neo4j_container_with_kg_fixture
-    with neo4j_container.get_driver() as driver:
-        result = graph_traversal.find_text_node_with_text_in_file(text, basename, driver, 1000, 0)
+    result = graph_traversal.find_text_node_with_text_in_file(text, basename, graph_store, 1000, 0)
 
-        result_data = result[1]
-        assert len(result_data) > 0
-        for result_row in result_data:
-            assert "TextNode" in result_row
-            assert text in result_row["TextNode"].get("text", "")
-            assert "FileNode" in result_row
-            assert result_row["FileNode"].get("basename", "") == basename
+    result_data = result[1]
+    assert len(result_data) > 0
+    for result_row in result_data:
+        assert "TextNode" in result_row
+        assert text in result_row["TextNode"].get("text", "")
+        assert "FileNode" in result_row
+        assert result_row["FileNode"].get("basename", "") == basename
 
 
-@pytest.mark.slow
-async def test_get_next_text_node_with_node_id(neo4j_container_with_kg_fixture):  # noqa: F811
+async def test_get_next_text_node_with_node_id(graph_store):
     node_id = 34
-    neo4j_container, kg = neo4j_container_with_kg_fixture
-    with neo4j_container.get_driver() as driver:
-        result = graph_traversal.get_next_text_node_with_node_id(node_id, driver, 1000, 0)
+    result = graph_traversal.get_next_text_node_with_node_id(node_id, graph_store, 1000, 0)
 
-        result_data = result[1]
-        assert len(result_data) > 0
-        for result_row in result_data:
-            assert "TextNode" in result_row
-            assert "Text under header D" in result_row["TextNode"].get("text", "")
-            assert "FileNode" in result_row
-            assert result_row["FileNode"].get("relative_path", "") == "foo/test.md"
+    result_data = result[1]
+    assert len(result_data) > 0
+    for result_row in result_data:
+        assert "TextNode" in result_row
+        assert "Text under header D" in result_row["TextNode"].get("text", "")
+        assert "FileNode" in result_row
+        assert result_row["FileNode"].get("relative_path", "") == "foo/test.md"
 
 
-@pytest.mark.slow
-async def test_preview_file_content_with_basename(neo4j_container_with_kg_fixture):  # noqa: F811
+async def test_preview_file_content_with_basename(graph_store):
     basename = test_project_paths.PYTHON_FILE.name
-    neo4j_container, kg = neo4j_container_with_kg_fixture
-    with neo4j_container.get_driver() as driver:
-        result = graph_traversal.preview_file_content_with_basename(basename, driver, 1000, 0)
+    result = graph_traversal.preview_file_content_with_basename(basename, graph_store, 1000, 0)
 
-        result_data = result[1]
-        assert len(result_data) > 0
-        for result_row in result_data:
-            assert "preview" in result_row
-            assert 'print("Hello world!")' in result_row["preview"].get("text", "")
-            assert "FileNode" in result_row
-            assert result_row["FileNode"].get("basename", "") == basename
+    result_data = result[1]
+    assert len(result_data) > 0
+    for result_row in result_data:
+        assert "preview" in result_row
+        assert 'print("Hello world!")' in result_row["preview"].get("text", "")
+        assert "FileNode" in result_row
+        assert result_row["FileNode"].get("basename", "") == basename
 
     basename = test_project_paths.MD_FILE.name
-    with neo4j_container.get_driver() as driver:
-        result = graph_traversal.preview_file_content_with_basename(basename, driver, 1000, 0)
+    result = graph_traversal.preview_file_content_with_basename(basename, graph_store, 1000, 0)
 
-        result_data = result[1]
-        assert len(result_data) > 0
-        for result_row in result_data:
-            assert "preview" in result_row
-            assert "Text under header A" in result_row["preview"].get("text", "")
-            assert "FileNode" in result_row
-            assert result_row["FileNode"].get("basename", "") == basename
+    result_data = result[1]
+    assert len(result_data) > 0
+    for result_row in result_data:
+        assert "preview" in result_row
+        assert "Text under header A" in result_row["preview"].get("text", "")
+        assert "FileNode" in result_row
+        assert result_row["FileNode"].get("basename", "") == basename
 
 
-@pytest.mark.slow
-async def test_preview_file_content_with_relative_path(neo4j_container_with_kg_fixture):  # noqa: F811
+async def test_preview_file_content_with_relative_path(graph_store):
     relative_path = str(
         test_project_paths.PYTHON_FILE.relative_to(test_project_paths.TEST_PROJECT_PATH).as_posix()
     )
-    neo4j_container, kg = neo4j_container_with_kg_fixture
-    with neo4j_container.get_driver() as driver:
-        result = graph_traversal.preview_file_content_with_relative_path(
-            relative_path, driver, 1000, 0
-        )
+    result = graph_traversal.preview_file_content_with_relative_path(
+        relative_path, graph_store, 1000, 0
+    )
 
-        result_data = result[1]
-        assert len(result_data) > 0
-        for result_row in result_data:
-            assert "preview" in result_row
-            assert 'print("Hello world!")' in result_row["preview"].get("text", "")
-            assert "FileNode" in result_row
-            assert result_row["FileNode"].get("relative_path", "") == relative_path
+    result_data = result[1]
+    assert len(result_data) > 0
+    for result_row in result_data:
+        assert "preview" in result_row
+        assert 'print("Hello world!")' in result_row["preview"].get("text", "")
+        assert "FileNode" in result_row
+        assert result_row["FileNode"].get("relative_path", "") == relative_path
 
     relative_path = str(
         test_project_paths.MD_FILE.relative_to(test_project_paths.TEST_PROJECT_PATH).as_posix()
     )
-    with neo4j_container.get_driver() as driver:
-        result = graph_traversal.preview_file_content_with_relative_path(
-            relative_path, driver, 1000, 0
-        )
+    result = graph_traversal.preview_file_content_with_relative_path(
+        relative_path, graph_store, 1000, 0
+    )
 
-        result_data = result[1]
-        assert len(result_data) > 0
-        for result_row in result_data:
-            assert "preview" in result_row
-            assert "Text under header A" in result_row["preview"].get("text", "")
-            assert "FileNode" in result_row
-            assert result_row["FileNode"].get("relative_path", "") == relative_path
+    result_data = result[1]
+    assert len(result_data) > 0
+    for result_row in result_data:
+        assert "preview" in result_row
+        assert "Text under header A" in result_row["preview"].get("text", "")
+        assert "FileNode" in result_row
+        assert result_row["FileNode"].get("relative_path", "") == relative_path
 
 
-@pytest.mark.slow
-async def test_read_code_with_basename(neo4j_container_with_kg_fixture):  # noqa: F811
+async def test_read_code_with_basename(graph_store):
     basename = test_project_paths.JAVA_FILE.name
-    neo4j_container, kg = neo4j_container_with_kg_fixture
-    with neo4j_container.get_driver() as driver:
-        result = graph_traversal.read_code_with_basename(basename, 2, 3, driver, 1000, 0)
-
-        result_data = result[1]
-        assert len(result_data) > 0
-        for result_row in result_data:
-            assert "SelectedLines" in result_row
-            assert "public static void main(String[] args) {" in result_row["SelectedLines"].get(
-                "text", ""
-            )
-            assert "FileNode" in result_row
-            assert result_row["FileNode"].get("basename", "") == basename
+    result = graph_traversal.read_code_with_basename(basename, 2, 3, graph_store, 1000, 0)
+
+    result_data = result[1]
+    assert len(result_data) > 0
+    for result_row in result_data:
+        assert "SelectedLines" in result_row
+        assert "public static void main(String[] args) {" in result_row["SelectedLines"].get(
+            "text", ""
+        )
+        assert "FileNode" in result_row
+        assert result_row["FileNode"].get("basename", "") == basename
 
 
-@pytest.mark.slow
-async def test_read_code_with_relative_path(neo4j_container_with_kg_fixture):  # noqa: F811
+async def test_read_code_with_relative_path(graph_store):
     relative_path = str(
         test_project_paths.C_FILE.relative_to(test_project_paths.TEST_PROJECT_PATH).as_posix()
     )
-    neo4j_container, kg = neo4j_container_with_kg_fixture
-    with neo4j_container.get_driver() as driver:
-        result = graph_traversal.read_code_with_relative_path(relative_path, 5, 6, driver, 1000, 0)
-
-        result_data = result[1]
-        assert len(result_data) > 0
-        for result_row in result_data:
-            assert "SelectedLines" in result_row
-            assert "return 0;" in result_row["SelectedLines"].get("text", "")
-            assert "FileNode" in result_row
-            assert result_row["FileNode"].get("relative_path", "") == relative_path
+    result = graph_traversal.read_code_with_relative_path(relative_path, 5, 6, graph_store, 1000, 0)
+
+    result_data = result[1]
+    assert len(result_data) > 0
+    for result_row in result_data:
+        assert "SelectedLines" in result_row
+        assert "return 0;" in result_row["SelectedLines"].get("text", "")
+        assert "FileNode" in result_row
+        assert result_row["FileNode"].get("relative_path", "") == relative_path
+
+
+async def test_preview_and_read_code_of_vendored_source_file(tmp_path):
+    # Vendored source files are not parsed, they only have the chunks of their text
+    (tmp_path / "project" / "vendor").mkdir(parents=True)
+    (tmp_path / "project" / "vendor" / "lib.py").write_text(
+        "".join(f"def function_{i}():\n    return {i}\n" for i in range(20))
+    )
+    kg = KnowledgeGraph(1000, 40, 10, 0)
+    await kg.build_graph(tmp_path / "project")
+    graph_store = EmbeddedGraphStore(tmp_path / "store")
+    graph_store.write_knowledge_graph(kg)
+
+    _, preview_data = graph_traversal.preview_file_content_with_relative_path(
+        "vendor/lib.py", graph_store, 1000, 0
+    )
+    _, read_data = graph_traversal.read_code_with_basename("lib.py", 21, 23, graph_store, 1000, 0)
+
+    assert [row["FileNode"]["relative_path"] for row in preview_data] == ["vendor/lib.py"]
+    assert preview_data[0]["preview"]["text"].startswith("1. def function_0():\n2.     return 0")
+    assert [row["SelectedLines"]["text"] for row in read_data] == [
+        "21. def function_10():\n22.     return 10"
+    ]
@@ -0,0 +1,113 @@
+import functools
+from unittest.mock import Mock
+
+import pytest
+
+from prometheus.graph.graph_store import GraphStore
+from prometheus.graph.knowledge_graph import KnowledgeGraph
+from prometheus.graph.knowledge_graph_overlay import KnowledgeGraphOverlay
+from prometheus.tools import graph_traversal
+from prometheus.tools.graph_traversal_overlay import with_overlay
+from prometheus.utils.neo4j_util import EMPTY_DATA_MESSAGE
+
+UTIL_PY = """\
+def helper(x):
+    return x + 1
+"""
+
+MAIN_PY = """\
+from util import helper
+
+
+def run():
+    return helper(1)
+"""
+
+
+@pytest.fixture
+def codebase(tmp_path):
+    (tmp_path / "util.py").write_text(UTIL_PY)
+    (tmp_path / "main.py").write_text(MAIN_PY)
+    kg = KnowledgeGraph(1000, 1000, 100, 0)
+    kg._build_graph(tmp_path)
+    return tmp_path, KnowledgeGraphOverlay(kg, str(tmp_path))
+
+
+def _bind(tool, graph_store):
+    return functools.partial(
+        tool, graph_store=graph_store, max_token_per_result=1000, root_node_id=0
+    )
+
+
+def _row(relative_path, text, start_line):
+    return {
+        "FileNode": {"node_id": 1, "basename": relative_path, "relative_path": relative_path},
+        "ASTNode": {"node_id": 2, "text": text, "start_line": start_line},
+    }
+
+
+def test_with_empty_overlay(codebase):
+    _, overlay = codebase
+    rows = [_row("util.py", UTIL_PY, 1)]
+    graph_store = Mock(spec=GraphStore)
+    graph_store.find_symbol_occurrences.return_value = rows
+    query = with_overlay(_bind(graph_traversal.find_definition, graph_store), overlay)
+
+    assert query(name="helper") == graph_traversal.find_definition("helper", graph_store, 1000, 0)
+    assert query(name="helper")[1] == rows
+
+
+def test_find_definition_of_edited_file(codebase):
+    root, overlay = codebase
+    (root / "util.py").write_text(UTIL_PY.replace("helper", "renamed"))
+    overlay.update_file("util.py")
+    graph_store = Mock(spec=GraphStore)
+    query = with_overlay(_bind(graph_traversal.find_definition, graph_store), overlay)
+
+    # The stale definition in the graph is dropped
+    graph_store.find_symbol_occurrences.return_value = [_row("util.py", UTIL_PY, 1)]
+    assert query(name="helper") == (EMPTY_DATA_MESSAGE, [])
+    graph_store.find_symbol_occurrences.return_value = []
+    content, data = query(name="renamed")
+
+    assert [row["FileNode"]["relative_path"] for row in data] == ["util.py"]
+    assert data[0]["ASTNode"]["text"] == "def renamed(x):\n    return x + 1"
+    assert "def renamed(x):" in content
+
+
+def test_find_references_merges_graph_and_overlay(codebase):
+    root, overlay = codebase
+    (root / "new.py").write_text("from util import helper\n\n\ndef other():\n    helper(2)\n")
+    overlay.update_file("new.py")
+    graph_store = Mock(spec=GraphStore)
+    graph_store.find_symbol_occurrences.return_value = [
+        _row("main.py", MAIN_PY.splitlines()[0], 1) | {"reference_type": "IMPORTS"}
+    ]
+    query = with_overlay(_bind(graph_traversal.find_references, graph_store), overlay)
+
+    _, data = query(name="helper")
+
+    assert [
+        (row["FileNode"]["relative_path"], row["ASTNode"]["start_line"], row["reference_type"])
+        for row in data
+    ] == [("main.py", 1, "IMPORTS"), ("new.py", 1, "IMPORTS"), ("new.py", 4, "REFERENCES")]
+
+
+def test_read_code_of_edited_file(codebase):
+    root, overlay = codebase
+    (root / "util.py").write_text(UTIL_PY + "\n\ndef added():\n    return 2\n")
+    overlay.update_file("util.py")
+    graph_store = Mock(spec=GraphStore)
+    graph_store.get_ast_root_nodes.return_value = []
+    graph_store.get_text_nodes.return_value = []
+    query = with_overlay(_bind(graph_traversal.read_code_with_relative_path, graph_store), overlay)
+
+    _, data = query(relative_path="util.py", start_line=5, end_line=7)
+
+    assert len(data) == 1
+    assert data[0]["FileNode"]["relative_path"] == "util.py"
+    assert data[0]["SelectedLines"] == {
+        "text": "5. def added():\n6.     return 2",
+        "start_line": 5,
+        "end_line": 7,
+    }
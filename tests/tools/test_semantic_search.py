@@ -0,0 +1,53 @@
+import pytest
+
+from prometheus.graph.knowledge_graph import KnowledgeGraph
+from prometheus.graph.semantic_index import SemanticIndex
+from prometheus.tools import semantic_search
+from prometheus.utils.embedding_util import HashingEmbeddings
+from prometheus.utils.neo4j_util import EMPTY_DATA_MESSAGE, neo4j_data_for_context_generator
+
+CALCULATOR_PY = """\
+def divide(numerator, denominator):
+    if denominator == 0:
+        raise ZeroDivisionError("cannot divide by zero")
+    return numerator / denominator
+"""
+
+
+@pytest.fixture
+def semantic_index(tmp_path):
+    (tmp_path / "calculator.py").write_text(CALCULATOR_PY)
+    knowledge_graph = KnowledgeGraph(1000, 1000, 100, 0)
+    knowledge_graph._build_graph(tmp_path)
+    return SemanticIndex.build(knowledge_graph, HashingEmbeddings())
+
+
+def test_semantic_search(semantic_index):
+    content, data = semantic_search.semantic_search("division by zero", semantic_index, 1000)
+
+    assert len(data) == 1
+    assert data[0]["FileNode"]["relative_path"] == "calculator.py"
+    assert data[0]["ASTNode"]["type"] == "function_definition"
+    assert data[0]["ASTNode"]["start_line"] == 1
+    assert data[0]["ASTNode"]["end_line"] == 4
+    assert 0 < data[0]["score"] <= 1
+    assert "def divide" in content
+
+
+def test_semantic_search_result_to_context(semantic_index):
+    _, data = semantic_search.semantic_search("division by zero", semantic_index, 1000)
+
+    contexts = list(neo4j_data_for_context_generator(data))
+
+    assert len(contexts) == 1
+    assert contexts[0].relative_path == "calculator.py"
+    assert contexts[0].content == CALCULATOR_PY.rstrip("\n")
+    assert contexts[0].start_line_number == 1
+    assert contexts[0].end_line_number == 4
+
+
+def test_semantic_search_without_results(semantic_index):
+    content, data = semantic_search.semantic_search("kubernetes", semantic_index, 1000)
+
+    assert content == EMPTY_DATA_MESSAGE
+    assert data == []
@@ -0,0 +1,118 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from prometheus.models.context import Context
+from prometheus.utils.context_cache import ContextCache
+from prometheus.utils.embedding_util import HashingEmbeddings
+
+ISSUE = "KeyError in parse_config when the config file is empty"
+CONTEXTS = [Context(relative_path="config.py", content="def parse_config(path): ...")]
+
+
+def test_lookup_exact_query():
+    cache = ContextCache(HashingEmbeddings(), similarity_threshold=0.9)
+    cache.store(1, "bug_fix_context", "Find the config parser", ISSUE, CONTEXTS)
+
+    hit = cache.lookup(1, "bug_fix_context", "Find  the config\nparser", "Another issue")
+
+    assert hit.exact
+    assert hit.contexts == CONTEXTS
+
+
+def test_lookup_similar_issue():
+    cache = ContextCache(HashingEmbeddings(), similarity_threshold=0.5)
+    cache.store(1, "bug_fix_context", f"{ISSUE}\nFind the context", ISSUE, CONTEXTS)
+
+    similar_issue = "KeyError in parse_config when the config file is empty on Windows"
+    hit = cache.lookup(1, "bug_fix_context", f"{similar_issue}\nFind the context", similar_issue)
+    unrelated_issue = "Add dark mode to the settings page"
+    miss = cache.lookup(
+        1, "bug_fix_context", f"{unrelated_issue}\nFind the context", unrelated_issue
+    )
+
+    assert not hit.exact
+    assert hit.similarity >= 0.5
+    assert hit.contexts == CONTEXTS
+    assert miss is None
+
+
+def test_lookup_other_scope_or_knowledge_graph():
+    cache = ContextCache(HashingEmbeddings(), similarity_threshold=0.5)
+    cache.store(1, "bug_fix_context", "query", ISSUE, CONTEXTS)
+
+    assert cache.lookup(1, "question_context", "query", ISSUE) is None
+    assert cache.lookup(2, "bug_fix_context", "query", ISSUE) is None
+
+
+def test_lookup_without_embeddings():
+    cache = ContextCache(None, similarity_threshold=0)
+    cache.store(1, "bug_fix_context", "query", ISSUE, CONTEXTS)
+
+    assert cache.lookup(1, "bug_fix_context", "query", "Another issue").exact
+    assert cache.lookup(1, "bug_fix_context", "other query", ISSUE) is None
+
+
+def test_lookup_skips_entries_of_another_embedding_model():
+    cache = ContextCache(HashingEmbeddings(dimensions=64), similarity_threshold=0)
+    cache.store(1, "bug_fix_context", "query 1", ISSUE, CONTEXTS)
+
+    cache.embeddings = HashingEmbeddings(dimensions=128)
+
+    assert cache.lookup(1, "bug_fix_context", "query 2", ISSUE) is None
+
+
+def test_store_replaces_and_evicts_entries():
+    cache = ContextCache(HashingEmbeddings(), similarity_threshold=2, max_entries_per_graph=2)
+    new_contexts = [Context(relative_path="loader.py", content="def load(): ...")]
+
+    cache.store(1, "bug_fix_context", "query 1", ISSUE, CONTEXTS)
+    cache.store(1, "bug_fix_context", "query 1", ISSUE, new_contexts)
+    cache.store(1, "bug_fix_context", "query 2", ISSUE, CONTEXTS)
+    assert cache.lookup(1, "bug_fix_context", "query 1", ISSUE).contexts == new_contexts
+
+    cache.store(1, "bug_fix_context", "query 3", ISSUE, CONTEXTS)
+    assert cache.lookup(1, "bug_fix_context", "query 1", ISSUE) is None
+    assert cache.lookup(1, "bug_fix_context", "query 3", ISSUE) is not None
+
+
+class PersistedContextCache(ContextCache):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.persisted = []
+        self._persisted_lock = threading.Lock()
+
+    def _save_entry(self, kg_root_node_id, entry):
+        time.sleep(0.001)
+        with self._persisted_lock:
+            self.persisted.append((entry.scope, entry.query_hash))
+
+    def _delete_entries(self, kg_root_node_id, scope=None, query_hash=None):
+        time.sleep(0.001)
+        with self._persisted_lock:
+            self.persisted = [
+                persisted for persisted in self.persisted if persisted != (scope, query_hash)
+            ]
+
+
+def test_concurrent_stores_keep_the_persisted_entries_in_sync():
+    cache = PersistedContextCache(
+        HashingEmbeddings(), similarity_threshold=2, max_entries_per_graph=3
+    )
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        for i in range(40):
+            executor.submit(cache.store, 1, "bug_fix_context", f"query {i % 5}", ISSUE, CONTEXTS)
+
+    index = cache._get_index(1)
+    assert sorted(cache.persisted) == sorted((entry.scope, entry.query_hash) for entry in index)
+    assert len(cache.persisted) == 3
+
+
+def test_clear():
+    cache = ContextCache(HashingEmbeddings(), similarity_threshold=0.9)
+    cache.store(1, "bug_fix_context", "query", ISSUE, CONTEXTS)
+
+    cache.clear(1)
+
+    assert cache.lookup(1, "bug_fix_context", "query", ISSUE) is None
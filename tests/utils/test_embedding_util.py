@@ -0,0 +1,38 @@
+import math
+
+from prometheus.utils.embedding_util import HashingEmbeddings, cosine_similarity, tokenize
+
+
+def test_tokenize_splits_identifiers():
+    assert tokenize("getUserName raises KeyError in user_name.py") == [
+        "get",
+        "user",
+        "name",
+        "raises",
+        "key",
+        "error",
+        "user",
+        "name",
+        "py",
+    ]
+
+
+def test_hashing_embeddings_are_normalized():
+    embedding = HashingEmbeddings(dimensions=64).embed_query("Login fails on mobile devices")
+
+    assert len(embedding) == 64
+    assert math.isclose(sum(value * value for value in embedding), 1.0)
+
+
+def test_hashing_embeddings_similarity():
+    embeddings = HashingEmbeddings()
+    issue = embeddings.embed_query("KeyError in parse_config when the config file is empty")
+    rephrased = embeddings.embed_query("parse_config raises a KeyError for an empty config file")
+    unrelated = embeddings.embed_query("Add dark mode to the settings page")
+
+    assert cosine_similarity(issue, rephrased) > cosine_similarity(issue, unrelated)
+    assert math.isclose(cosine_similarity(issue, issue), 1.0)
+
+
+def test_cosine_similarity_of_zero_vector():
+    assert cosine_similarity([0.0, 0.0], [1.0, 0.0]) == 0.0
@@ -0,0 +1,61 @@
+from prometheus.models.context import Context
+from prometheus.utils.issue_context_store import IssueContextStore
+
+
+def create_context(relative_path: str, start_line_number: int, end_line_number: int):
+    return Context(
+        relative_path=relative_path,
+        content="\n".join(f"{i}. line" for i in range(start_line_number, end_line_number + 1)),
+        start_line_number=start_line_number,
+        end_line_number=end_line_number,
+    )
+
+
+def test_add_contexts():
+    store = IssueContextStore()
+    first = create_context("config.py", 1, 10)
+    second = create_context("parser.py", 5, 8)
+
+    store.add_contexts([first])
+    store.add_contexts([second, first])
+
+    assert store.get_contexts() == [first, second]
+
+
+def test_add_contexts_skips_covered_context():
+    store = IssueContextStore()
+    outer = create_context("config.py", 1, 10)
+
+    store.add_contexts([outer, create_context("config.py", 3, 5)])
+
+    assert store.get_contexts() == [outer]
+
+
+def test_add_contexts_replaces_covered_context():
+    store = IssueContextStore()
+    inner = create_context("config.py", 3, 5)
+    other = create_context("parser.py", 1, 2)
+    outer = create_context("config.py", 1, 10)
+
+    store.add_contexts([inner, other])
+    store.add_contexts([outer])
+
+    assert store.get_contexts() == [other, outer]
+
+
+def test_add_contexts_without_line_numbers():
+    store = IssueContextStore()
+    whole_file = Context(relative_path="README.md", content="# Project")
+
+    store.add_contexts([whole_file, create_context("README.md", 1, 1), whole_file])
+
+    assert store.get_contexts() == [whole_file, create_context("README.md", 1, 1)]
+
+
+def test_clear():
+    store = IssueContextStore()
+    store.add_contexts([create_context("config.py", 1, 10)])
+
+    store.clear()
+
+    assert store.get_contexts() == []
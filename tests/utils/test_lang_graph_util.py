@@ -4,14 +4,19 @@ from langchain_core.messages import (
     SystemMessage,
     ToolMessage,
 )
+from langchain_core.tools import StructuredTool
 
 from prometheus.utils.lang_graph_util import (
+    READ_ONLY_TOOL_METADATA,
     check_remaining_steps,
+    compact_test_tool_messages,
     extract_ai_responses,
     extract_human_queries,
     extract_last_tool_messages,
+    extract_test_results,
     format_agent_tool_message_history,
     get_last_message_content,
+    is_read_only_tool,
 )
 from prometheus.utils.llm_util import str_token_counter, tiktoken_counter
 
@@ -129,3 +134,43 @@ def test_format_agent_tool_message_history():
     )
 
     assert result == expected
+
+
+def test_compact_test_tool_messages():
+    messages = [
+        AIMessage(content="Running the tests"),
+        ToolMessage(content="pip output", tool_call_id="call_1"),
+        ToolMessage(content="...F\n1 failed, 3 passed in 0.10s", tool_call_id="call_2"),
+    ]
+
+    compacted = compact_test_tool_messages(messages)
+
+    assert compacted[0] is messages[0]
+    assert compacted[1].content == "pip output"
+    assert compacted[2].content == "Test results (pytest): 1 failed, 3 passed, 0 skipped"
+    assert compacted[2].tool_call_id == "call_2"
+
+
+def test_extract_test_results():
+    messages = [
+        ToolMessage(content="pip output", tool_call_id="call_1"),
+        ToolMessage(content="5 passed in 0.10s", tool_call_id="call_2"),
+    ]
+
+    test_results = extract_test_results(messages)
+
+    assert len(test_results) == 1
+    assert test_results[0].num_passed == 5
+
+
+def test_is_read_only_tool():
+    def lookup(name: str) -> str:
+        """Looks up a name."""
+        return name
+
+    read_only_tool = StructuredTool.from_function(lookup, metadata=READ_ONLY_TOOL_METADATA)
+    tool = StructuredTool.from_function(lookup)
+
+    assert is_read_only_tool(read_only_tool)
+    assert not is_read_only_tool(tool)
+    assert not is_read_only_tool(lookup)
@@ -1,6 +1,7 @@
 from prometheus.utils.str_util import (
     TRUNCATED_TEXT,
     get_tokenizer,
+    join_chunks,
     pre_append_line_numbers,
     truncate_text,
 )
@@ -53,3 +54,14 @@ def test_truncation_with_unicode_handling():
     text = "Hello 👋 World 🌍"
     result = truncate_text(text, max_token=100)
     assert result == text
+
+
+def test_join_chunks_removes_overlap():
+    assert join_chunks(["line 1\nline 2\n", "line 2\nline 3\n", "line 3\nline 4"]) == (
+        "line 1\nline 2\nline 3\nline 4"
+    )
+
+
+def test_join_chunks_without_overlap():
+    assert join_chunks([]) == ""
+    assert join_chunks(["abc", "def"]) == "abcdef"
@@ -0,0 +1,191 @@
+from prometheus.utils.test_result_util import compact_test_output, parse_test_output
+
+PYTEST_OUTPUT = """\
+============================= test session starts ==============================
+platform linux -- Python 3.11.4, pytest-8.3.3, pluggy-1.5.0
+collected 3 items
+
+tests/test_auth.py::test_valid_login PASSED                              [ 33%]
+tests/test_auth.py::TestLockout::test_account_lockout FAILED             [ 66%]
+tests/test_auth.py::test_logout PASSED                                   [100%]
+
+=================================== FAILURES ===================================
+______________________ TestLockout.test_account_lockout _______________________
+
+    def test_account_lockout(self):
+>       assert auth.is_account_locked("user")
+E       AssertionError: assert False
+
+tests/test_auth.py:45: AssertionError
+=========================== short test summary info ============================
+FAILED tests/test_auth.py::TestLockout::test_account_lockout - AssertionError
+========================= 1 failed, 2 passed in 0.12s ==========================
+"""
+
+JUNIT_OUTPUT = """\
+<?xml version="1.0" encoding="utf-8"?>
+<testsuites>
+  <testsuite name="pytest" tests="3" failures="1" skipped="1">
+    <testcase classname="tests.test_math" name="test_add" time="0.001"/>
+    <testcase classname="tests.test_math" name="test_div" time="0.001">
+      <failure message="ZeroDivisionError: division by zero">Traceback here</failure>
+    </testcase>
+    <testcase classname="tests.test_math" name="test_slow" time="0.0">
+      <skipped message="slow"/>
+    </testcase>
+  </testsuite>
+</testsuites>
+"""
+
+GO_OUTPUT = """\
+=== RUN   TestAdd
+--- PASS: TestAdd (0.00s)
+=== RUN   TestDiv
+    math_test.go:12: expected 2, got 0
+--- FAIL: TestDiv (0.00s)
+FAIL
+FAIL\texample.com/math\t0.003s
+"""
+
+CARGO_OUTPUT = """\
+running 2 tests
+test tests::it_adds ... ok
+test tests::it_divides ... FAILED
+
+failures:
+
+---- tests::it_divides stdout ----
+thread 'tests::it_divides' panicked at src/lib.rs:10:9:
+attempt to divide by zero
+
+failures:
+    tests::it_divides
+
+test result: FAILED. 1 passed; 1 failed; 0 ignored; 0 measured; 0 filtered out
+"""
+
+JEST_OUTPUT = """\
+FAIL src/currency.test.js
+  Currency Formatter
+    ✓ formats USD correctly (2 ms)
+    ✕ formats EUR with proper symbol (3 ms)
+
+  ● Currency Formatter › formats EUR with proper symbol
+
+    expect(received).toBe(expected)
+
+    Expected: "€1.00"
+    Received: "1.00"
+
+Test Suites: 1 failed, 1 total
+Tests:       1 failed, 1 passed, 2 total
+Snapshots:   0 total
+Time:        0.5 s
+"""
+
+MOCHA_OUTPUT = """\
+  Array
+    ✓ returns -1 when the value is not present
+    1) finds the index of a value
+
+  1 passing (5ms)
+  1 failing
+
+  1) Array
+       finds the index of a value:
+     AssertionError: expected -1 to equal 2
+"""
+
+
+def test_parse_pytest_output():
+    result = parse_test_output(PYTEST_OUTPUT)
+
+    assert result.framework == "pytest"
+    assert result.num_passed == 2
+    assert result.num_failed == 1
+    assert result.passed == [
+        "tests/test_auth.py::test_valid_login",
+        "tests/test_auth.py::test_logout",
+    ]
+    assert len(result.failed) == 1
+    assert result.failed[0].name == "tests/test_auth.py::TestLockout::test_account_lockout"
+    assert "AssertionError: assert False" in result.failed[0].log
+
+
+def test_parse_pytest_quiet_output():
+    result = parse_test_output("...\n3 passed in 0.05s\n")
+
+    assert result.framework == "pytest"
+    assert result.num_passed == 3
+    assert result.num_failed == 0
+    assert result.failed == []
+
+
+def test_parse_junit_xml_output():
+    result = parse_test_output(JUNIT_OUTPUT)
+
+    assert result.framework == "junit"
+    assert result.passed == ["tests.test_math.test_add"]
+    assert result.num_skipped == 1
+    assert result.failed[0].name == "tests.test_math.test_div"
+    assert result.failed[0].log == "ZeroDivisionError: division by zero\nTraceback here"
+
+
+def test_parse_go_test_output():
+    result = parse_test_output(GO_OUTPUT)
+
+    assert result.framework == "go test"
+    assert result.passed == ["TestAdd"]
+    assert result.failed[0].name == "TestDiv"
+    assert "expected 2, got 0" in result.failed[0].log
+
+
+def test_parse_cargo_test_output():
+    result = parse_test_output(CARGO_OUTPUT)
+
+    assert result.framework == "cargo test"
+    assert result.num_passed == 1
+    assert result.num_failed == 1
+    assert result.passed == ["tests::it_adds"]
+    assert result.failed[0].name == "tests::it_divides"
+    assert "attempt to divide by zero" in result.failed[0].log
+
+
+def test_parse_jest_output():
+    result = parse_test_output(JEST_OUTPUT)
+
+    assert result.framework == "jest"
+    assert result.num_passed == 1
+    assert result.num_failed == 1
+    assert result.passed == ["formats USD correctly"]
+    assert result.failed[0].name == "Currency Formatter › formats EUR with proper symbol"
+    assert 'Received: "1.00"' in result.failed[0].log
+
+
+def test_parse_mocha_output():
+    result = parse_test_output(MOCHA_OUTPUT)
+
+    assert result.framework == "mocha"
+    assert result.num_passed == 1
+    assert result.num_failed == 1
+    assert result.passed == ["returns -1 when the value is not present"]
+    assert result.failed[0].name == "Array finds the index of a value"
+    assert "expected -1 to equal 2" in result.failed[0].log
+
+
+def test_parse_unknown_output():
+    assert parse_test_output("Successfully installed requests-2.32.3") is None
+
+
+def test_compact_test_output():
+    compacted = compact_test_output(PYTEST_OUTPUT)
+
+    assert compacted.startswith("Test results (pytest): 1 failed, 2 passed, 0 skipped")
+    assert "test session starts" not in compacted
+    assert "AssertionError: assert False" in compacted
+
+
+def test_compact_test_output_keeps_unknown_output():
+    output = "Successfully installed requests-2.32.3"
+
+    assert compact_test_output(output) == output